@@ -0,0 +1,145 @@
+"""
+Semantic answer cache: hit rate, wrong answers and lookup cost by threshold.
+
+A set of FAQ questions is answered once (stored in `SemanticCache`), then
+asked again in other words (`PARAPHRASES`, same intent) and mixed with
+questions that must not get a cached answer (`UNRELATED`, many of them
+close in wording to a cached one). For every threshold it reports:
+- hits: paraphrases answered from the cache with the right answer;
+- wrong: lookups answered with the answer of another question (a
+  paraphrase matched to the wrong FAQ, or an unrelated question served);
+- time saved: `--llm-s` per hit, the LLM time of the answer not requested.
+
+Then the lookup time (embedding + search) for growing numbers of cached
+entries, and the save / load time of the index. The embedder is the local
+stand-in (`hashing_embedder`), so it runs without a service; an embeddings
+deployment ranks paraphrases with other words (synonyms) much better.
+
+    python benchmarks/bench_answer_cache.py --thresholds 0.6 0.7 0.8 0.9
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from voice_pipeline.answer_cache import SemanticCache, hashing_embedder  # noqa: E402
+
+FAQ = [
+    "What are your opening hours?",
+    "How can I reset my password?",
+    "Where is the nearest office?",
+    "How much does the premium plan cost?",
+    "Can I cancel my subscription at any time?",
+    "How long does shipping take?",
+    "Do you ship to Canada?",
+    "How do I return a product?",
+    "What payment methods do you accept?",
+    "How do I contact customer support?",
+]
+
+PARAPHRASES = [                          # (question, index in FAQ)
+    ("what are the opening hours", 0),
+    ("What are your opening hours on weekends?", 0),
+    ("how can i reset the password", 1),
+    ("How do I reset my password?", 1),
+    ("where's the nearest office", 2),
+    ("Where is your nearest office?", 2),
+    ("how much does the premium plan cost per month", 3),
+    ("How much is the premium plan?", 3),
+    ("can I cancel the subscription at any time", 4),
+    ("Can I cancel my subscription anytime?", 4),
+    ("how long does the shipping take", 5),
+    ("How long does shipping usually take?", 5),
+    ("do you ship to canada", 6),
+    ("Do you also ship to Canada?", 6),
+    ("how do i return a product", 7),
+    ("How can I return a product?", 7),
+    ("which payment methods do you accept", 8),
+    ("What payment methods do you take?", 8),
+    ("how do I contact the customer support", 9),
+    ("How can I contact customer support?", 9),
+]
+
+UNRELATED = [
+    "What are your plans for the weekend?",
+    "How can I change my email address?",
+    "Where is the nearest train station?",
+    "How much does the basic plan cost?",
+    "Can I pause my subscription for a month?",
+    "How long does a refund take?",
+    "Do you ship to Mexico?",
+    "How do I exchange a product for another size?",
+    "Do you accept cryptocurrency?",
+    "What is the weather like today?",
+]
+
+
+def faq_cache(threshold: float) -> SemanticCache:
+    cache = SemanticCache(hashing_embedder(), threshold=threshold)
+    for i, question in enumerate(FAQ):
+        cache.store(question, f"answer {i}")
+    return cache
+
+
+def accuracy(threshold: float, llm_s: float) -> dict:
+    cache = faq_cache(threshold)
+    hits = wrong = 0
+    for question, i in PARAPHRASES:
+        entry = cache.lookup(question).entry
+        if entry is not None:
+            hits  += entry.answer == f"answer {i}"
+            wrong += entry.answer != f"answer {i}"
+    for question in UNRELATED:
+        wrong += cache.lookup(question).entry is not None
+    return {"hits": hits, "wrong": wrong, "saved": hits * llm_s}
+
+
+def lookup_time(entries: int, lookups: int) -> tuple[float, float, float]:
+    """Lookup, save and load seconds with `entries` cached questions."""
+    cache = faq_cache(0.9)
+    rng = np.random.default_rng(0)
+    words = "account order price plan office hours password refund ship product card support".split()
+    for n in range(entries - len(FAQ)):
+        cache.store(" ".join(rng.choice(words, 6)) + f" {n}", "answer " * 40)
+    cache.lookup(FAQ[0])                 # Builds the index (once after stores)
+    start = time.perf_counter()
+    for question, _ in PARAPHRASES[:lookups]:
+        cache.lookup(question)
+    lookup = (time.perf_counter() - start) / min(lookups, len(PARAPHRASES))
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "answers.npz")
+        start = time.perf_counter()
+        cache.save(path)
+        save = time.perf_counter() - start
+        start = time.perf_counter()
+        SemanticCache(cache.embed).load(path)
+        load = time.perf_counter() - start
+    return lookup, save, load
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--llm-s", type=float, default=1.5, help="LLM time of an answer")
+    parser.add_argument("--entries", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{len(FAQ)} cached questions, {len(PARAPHRASES)} paraphrases, {len(UNRELATED)} unrelated\n")
+    print(f"{'threshold':<11}{'hits':>8}{'wrong':>8}{'time saved':>13}")
+    for threshold in args.thresholds:
+        r = accuracy(threshold, args.llm_s)
+        print(f"{threshold:<11.2f}{r['hits']:>5}/{len(PARAPHRASES):<2}{r['wrong']:>8}{r['saved']:>11.1f} s")
+
+    print(f"\n{'entries':<10}{'lookup':>10}{'save':>10}{'load':>10}")
+    for entries in args.entries:
+        lookup, save, load = lookup_time(entries, lookups=len(PARAPHRASES))
+        print(f"{entries:<10}{lookup * 1000:>7.2f} ms{save * 1000:>7.0f} ms{load * 1000:>7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Batch mode throughput: audio hours processed per wall-clock hour.
+
+Writes `--files` WAV files of `--utterances` questions each (the synthetic
+voiced signal of bench_e2e.py, `--speech-s` long, separated by
+`--silence-s` of silence) and runs `voice_pipeline.batch.run_batch` over
+them against the stand-ins (`--ttft`, `--tts-first-byte`), once per worker
+count and sending speed. For each run: wall time, turns, audio hours per
+wall-clock hour (= x real time) and the mean time per file.
+
+    python benchmarks/bench_batch.py --files 32 --workers 1,4,16 --speed 8,0
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import wave
+
+import numpy as np
+from openai import AsyncAzureOpenAI
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bench_e2e import RATE, synthetic_speech_wav  # noqa: E402
+from fake_services import FakeServices  # noqa: E402
+from voice_pipeline.batch import BatchOptions, load_inputs, run_batch  # noqa: E402
+from voice_pipeline.engine import EngineConfig  # noqa: E402
+
+
+def write_inputs(folder: str, files: int, utterances: int, speech_s: float, silence_s: float):
+    speech_path = os.path.join(folder, "speech.tmp")
+    synthetic_speech_wav(speech_path, speech_s)
+    with wave.open(speech_path, "rb") as wav:
+        speech = wav.readframes(wav.getnframes())
+    os.remove(speech_path)
+    silence = np.zeros(int(silence_s * RATE), dtype="<i2").tobytes()
+    pcm = silence + (speech + silence) * utterances
+    inputs = os.path.join(folder, "in")
+    os.makedirs(inputs)
+    for i in range(files):
+        with wave.open(os.path.join(inputs, f"call{i:03d}.wav"), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(RATE)
+            wav.writeframes(pcm)
+    return inputs
+
+
+async def run(env: dict, inputs: str, out: str, workers: int, speed: float):
+    config = EngineConfig.from_env(system_prompt="You are a helpful assistant.", stt_prompt="")
+    aoai = AsyncAzureOpenAI(azure_endpoint=env["AZURE_OPENAI_ENDPOINT"], api_key="fake",
+                            api_version=env["AZURE_OPENAI_API_VERSION"])
+    tts = AsyncAzureOpenAI(azure_endpoint=env["AZURE_OPENAI_ENDPOINT_TTS"], api_key="fake",
+                           api_version=env["AZURE_OPENAI_API_VERSION_TTS"])
+    options = BatchOptions(out_dir=out, speed=speed, force=True)
+    async with aoai, tts:
+        return await run_batch(load_inputs(inputs), config, options, aoai, tts, workers=workers, verbose=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--utterances", type=int, default=3, help="questions per file")
+    parser.add_argument("--speech-s", type=float, default=2.0)
+    parser.add_argument("--silence-s", type=float, default=1.5)
+    parser.add_argument("--workers", default="1,4,16", help="worker counts to compare")
+    parser.add_argument("--speed", default="8,0", help="sending speeds to compare (0: unpaced)")
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tts-first-byte", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder, FakeServices(
+        chat={"ttft": args.ttft, "tokens_per_s": 100.0},
+        tts={"first_byte": args.tts_first_byte, "speed": 20.0},
+    ) as services:
+        env = services.env()
+        os.environ.update(env)
+        inputs = write_inputs(folder, args.files, args.utterances, args.speech_s, args.silence_s)
+        seconds = args.silence_s + (args.speech_s + args.silence_s) * args.utterances
+        print(f"{args.files} files of {seconds:.1f} s ({args.utterances} questions each), "
+              f"TTFT {args.ttft * 1000:.0f} ms, TTS first byte {args.tts_first_byte * 1000:.0f} ms\n")
+        print(f"{'workers':>8}{'speed':>8}{'wall':>9}{'turns':>7}{'failed':>8}{'audio-h/h':>11}{'s/file':>8}")
+        for speed in (float(s) for s in args.speed.split(",")):
+            for workers in (int(w) for w in args.workers.split(",")):
+                stats = asyncio.run(run(env, inputs, os.path.join(folder, "out"), workers, speed))
+                label = f"{speed:g}x" if speed > 0 else "max"
+                print(f"{workers:>8}{label:>8}{stats.wall_s:>7.1f} s{stats.turns:>7}{stats.failed:>8}"
+                      f"{stats.audio_hours_per_hour:>11.1f}{stats.wall_s * workers / stats.done:>7.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Microphone capture around playback: polling loop vs event-driven capture.
+
+A stand-in sound device produces a 20 ms block every 20 ms. Each trial
+mutes the microphone for `--mute-s` (an answer playing, no barge-in) and
+the user starts speaking `--early-ms` before the mute ends. Modes:
+- poll:  the old sender: `time.sleep(0.05)` while muted, then blocking
+         reads from the device buffer (`--device-blocks` deep; like
+         PortAudio, new blocks are dropped while it is full, so the first
+         reads after a mute return audio from when the mute started);
+- event: `capture.Capture` with `--pre-roll-ms`: the reader wakes when the
+         mute is cleared and starts with the last pre-roll of audio.
+
+It reports the delay from the end of the mute to the first block sent,
+the trials whose speech onset reached the sender, the audio sent from
+before the onset that is older than the pre-roll (stale playback-time
+audio), and the capture-to-send latency.
+
+    python benchmarks/bench_capture.py --trials 10 --early-ms 100
+"""
+
+import argparse
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from voice_pipeline.capture import Capture, Signal  # noqa: E402
+
+RATE, BLOCK = 24_000, 480                # 20 ms blocks
+BLOCK_S = BLOCK / RATE
+
+
+class Device:
+    """Pushes numbered blocks on a clock; `captured[i]` is when block i was produced."""
+
+    def __init__(self, push):
+        self.push     = push
+        self.captured: dict[int, float] = {}
+        self._stop    = threading.Event()
+        self._thread  = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        clock, i = time.perf_counter(), 0
+        while not self._stop.is_set():
+            self.captured[i] = time.perf_counter()
+            self.push(struct.pack("<i", i) + bytes(BLOCK * 2 - 4))
+            i += 1
+            clock += BLOCK_S
+            time.sleep(max(0.0, clock - time.perf_counter()))
+
+    def index_at(self, t: float) -> int:
+        """First block produced at or after `t`."""
+        return next(i for i, at in sorted(self.captured.items()) if at >= t)
+
+    def stop_stream(self):
+        self._stop.set()
+        self._thread.join()
+
+    def close(self):
+        pass
+
+
+def trial(sent: queue.Queue, mute: Signal, device: Device, args) -> dict:
+    """One mute; the sender thread puts (block index, time sent) in `sent`."""
+    mute.set()
+    time.sleep(args.mute_s)
+    while not sent.empty():              # Sent before the mute took effect
+        sent.get()
+    onset_at = time.perf_counter() - args.early_ms / 1000
+    ended = time.perf_counter()
+    mute.clear()
+    blocks = [sent.get() for _ in range(args.after_blocks)]
+    onset = device.index_at(onset_at)
+    steady = blocks[args.after_blocks // 2:]
+    return {
+        "lag": blocks[0][1] - ended,
+        "onset": onset in (i for i, _ in blocks),
+        "stale": sum(device.captured[i] < onset_at - args.pre_roll_ms / 1000 for i, _ in blocks) * BLOCK_S,
+        "latency": sum(at - device.captured[i] for i, at in steady) / len(steady),
+    }
+
+
+def sender(read) -> queue.Queue:
+    """Thread standing for `mic_sender`: `read()` returns the next block."""
+    sent: queue.Queue = queue.Queue()
+
+    def run():
+        while True:
+            pcm = read()
+            if pcm is None:              # Closed
+                return
+            sent.put((struct.unpack_from("<i", pcm)[0], time.perf_counter()))
+
+    threading.Thread(target=run, daemon=True).start()
+    return sent
+
+
+def run_poll(args) -> list[dict]:
+    buffer: queue.Queue[bytes] = queue.Queue(maxsize=args.device_blocks)
+    mute = Signal()
+
+    def push(pcm):
+        try:
+            buffer.put_nowait(pcm)
+        except queue.Full:               # Device overflow: the new block is lost
+            pass
+
+    def read():
+        while mute.is_set():
+            time.sleep(0.05)
+        return buffer.get()
+
+    device = Device(push)
+    sent = sender(read)
+    try:
+        return [trial(sent, mute, device, args) for _ in range(args.trials)]
+    finally:
+        device.stop_stream()
+
+
+def run_event(args) -> list[dict]:
+    mute = Signal()
+    devices = []
+
+    def open_device(push):
+        devices.append(Device(push))
+        return devices[0]
+
+    capture = Capture(open_device, RATE, BLOCK, pre_roll_ms=args.pre_roll_ms, mute=mute)
+    sent = sender(lambda: capture.read(BLOCK * 2))
+    try:
+        return [trial(sent, mute, devices[0], args) for _ in range(args.trials)]
+    finally:
+        capture.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trials", type=int, default=10)
+    parser.add_argument("--mute-s", type=float, default=1.0)
+    parser.add_argument("--early-ms", type=float, default=100, help="speech onset before the end of the mute")
+    parser.add_argument("--pre-roll-ms", type=int, default=200)
+    parser.add_argument("--device-blocks", type=int, default=8, help="device input buffer, 20 ms blocks")
+    parser.add_argument("--after-blocks", type=int, default=20, help="blocks read after each mute")
+    args = parser.parse_args()
+
+    print(f"{args.trials} mutes of {args.mute_s:.1f} s, speech {args.early_ms:.0f} ms before the end\n")
+    print(f"{'mode':<8}{'resume':>10}{'onset kept':>12}{'stale':>10}{'capture→send':>14}")
+    for name, run in (("poll", run_poll), ("event", run_event)):
+        results = run(args)
+        n = len(results)
+        lag     = sum(r["lag"] for r in results) / n * 1000
+        onset   = sum(r["onset"] for r in results)
+        stale   = sum(r["stale"] for r in results) / n * 1000
+        latency = sum(r["latency"] for r in results) / n * 1000
+        print(f"{name:<8}{lag:>7.1f} ms{onset:>7}/{n:<4}{stale:>7.0f} ms{latency:>11.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Codec layer throughput and per-call bandwidth.
+
+Every conversion of `voice_pipeline/codecs.py` is run on one thread over
+`--seconds` of synthetic speech-like audio cut into `--block-ms` blocks
+(the size of a gateway frame), and reported in samples per second per core
+(input samples) and in concurrent real-time streams per core. Then, for
+every session format, the bytes a call puts on the wire per second in each
+direction (payload plus the websocket frame header of each block), against
+24 kHz PCM.
+
+    python benchmarks/bench_codecs.py --seconds 20 --block-ms 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from voice_pipeline.codecs import (  # noqa: E402
+    AudioFormat, Decoder, Encoder, Resampler, g711_decode, g711_encode, opus_available,
+)
+
+RATE = 24_000
+
+
+def speech_like(seconds: float, rate: int, seed: int = 1) -> np.ndarray:
+    """Harmonics of a wandering pitch under a syllable envelope, plus noise."""
+    rng = np.random.default_rng(seed)
+    t   = np.arange(int(seconds * rate)) / rate
+    f0  = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    x = sum(np.sin(k * phase) / k for k in range(1, 12))
+    x *= 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+    x += 0.02 * rng.standard_normal(len(t))
+    return (x / np.abs(x).max() * 12_000).astype(np.int16)
+
+
+def blocks(samples: np.ndarray, rate: int, block_ms: int) -> list[np.ndarray]:
+    n = rate * block_ms // 1000
+    return [samples[i:i + n] for i in range(0, len(samples), n)]
+
+
+def measure(fn, items: list, samples: int, seconds: float) -> tuple[float, float]:
+    """(input samples per second, real-time streams) of `fn` over `items`, one core."""
+    t0 = time.process_time()
+    for item in items:
+        fn(item)
+    elapsed = time.process_time() - t0
+    return samples / elapsed, seconds / elapsed
+
+
+def ws_header(payload: int, masked: bool) -> int:
+    """Websocket frame header bytes (client frames are masked)."""
+    return 2 + (2 if payload > 125 else 0) + (8 if payload > 65_535 else 0) + (4 if masked else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=20.0, help="audio per conversion")
+    parser.add_argument("--block-ms", type=int, default=20, help="block (gateway frame) size")
+    args = parser.parse_args()
+
+    audio = {rate: speech_like(args.seconds, rate) for rate in (8_000, 16_000, 24_000)}
+    mulaw = [g711_encode(b, "mulaw") for b in blocks(audio[8_000], 8_000, args.block_ms)]
+    alaw  = [g711_encode(b, "alaw") for b in blocks(audio[8_000], 8_000, args.block_ms)]
+    cases = [
+        ("mulaw encode", lambda b: g711_encode(b, "mulaw"), blocks(audio[8_000], 8_000, args.block_ms), 8_000),
+        ("mulaw decode", lambda b: g711_decode(b, "mulaw"), mulaw, 8_000),
+        ("alaw encode", lambda b: g711_encode(b, "alaw"), blocks(audio[8_000], 8_000, args.block_ms), 8_000),
+        ("alaw decode", lambda b: g711_decode(b, "alaw"), alaw, 8_000),
+    ]
+    for src, dst in ((8_000, 24_000), (24_000, 8_000), (16_000, 24_000), (24_000, 16_000), (8_000, 16_000)):
+        cases.append((f"resample {src // 1000}k→{dst // 1000}k", Resampler(src, dst).process,
+                      blocks(audio[src], src, args.block_ms), src))
+    pcm24 = [b.tobytes() for b in blocks(audio[RATE], RATE, args.block_ms)]
+    formats = ["mulaw/8000", "alaw/8000", "pcm16/16000"] + (["opus/24000/24000", "opus/16000/16000"] if opus_available() else [])
+    for name in formats:
+        fmt = AudioFormat.parse(name)
+        encoder = Encoder(fmt, RATE)
+        frames  = [f for pcm in pcm24 for f in encoder.encode(pcm)]
+        cases.append((f"24k pcm → {fmt}", encoder.encode, pcm24, RATE))
+        cases.append((f"{fmt} → 24k pcm", Decoder(fmt, RATE).decode, frames, fmt.rate))
+
+    print(f"{args.seconds:.0f} s of audio in {args.block_ms} ms blocks, one core\n")
+    print(f"{'conversion':<30}{'Msamples/s':>12}{'x real time':>14}")
+    for name, fn, items, rate in cases:
+        samples = int(rate * args.seconds)   # Input samples
+        per_s, streams = measure(fn, items, samples, args.seconds)
+        print(f"{name:<30}{per_s / 1e6:>12.1f}{streams:>14.0f}")
+
+    if not opus_available():
+        print("\n(opus: pip install opuslib, needs libopus)")
+    print(f"\n{'format':<20}{'in KB/s':>10}{'out KB/s':>10}{'vs pcm16/24000':>16}")
+    frames_per_s = 1000 / args.block_ms
+    base  = None
+    for name in ["pcm16/24000", "pcm16/16000", "mulaw/8000", "alaw/8000", "opus/24000/24000", "opus/16000/16000"]:
+        fmt = AudioFormat.parse(name)
+        frame = int(fmt.bytes_per_second / frames_per_s)
+        up    = (frame + ws_header(frame, True)) * frames_per_s
+        down  = (frame + ws_header(frame, False)) * frames_per_s
+        base  = base or up + down
+        print(f"{name:<20}{up / 1000:>10.1f}{down / 1000:>10.1f}{base / (up + down):>15.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Offline end-to-end latency benchmark of the STT → LLM → TTS flows.
+
+Runs entirely on this machine: the Azure endpoints are replaced by the
+stand-ins in fake_services.py, `mic_stream` by a WAV file (`WavFileSource`)
+and `speaker_out` by a `NullSink`. For every turn it reports, from the end
+of the user's speech (end of the WAV file):
+- stt:    `...transcription.completed` received
+- ttfa:   time to first audio (first sample written to the speaker)
+- gaps:   silence between sentences (speaker ran dry after the first sample)
+- total:  end of playback
+
+Flows (modelled on the scripts):
+- nonstreaming: stt-llm-tts.py (whole answer, whole TTS, then play)
+- streaming:    stt-llm-tts_streaming.py (LLM stream, sentence TTS prefetch)
+- speech:       azure_speech_demo.py (LLM stream, callback-driven synthesis)
+
+    python benchmarks/bench_e2e.py --turns 5 --ttft 0.4 --tokens-per-s 50
+"""
+
+import argparse
+import json
+import math
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+import websocket
+from openai import AzureOpenAI
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from fake_services import FakeServices  # noqa: E402
+from voice_pipeline.audio_io import NullSink, WavFileSource  # noqa: E402
+from voice_pipeline.framing import AudioFramer  # noqa: E402
+from voice_pipeline.pcm import iter_pcm16  # noqa: E402
+from voice_pipeline.segmenter import SentenceSegmenter  # noqa: E402
+from voice_pipeline.tts_prefetch import TTSPrefetcher  # noqa: E402
+
+RATE, CHUNK = 24_000, 1024
+WRITE_SIZE  = RATE // 50 * 2
+FLOWS       = ("nonstreaming", "streaming", "speech")
+
+
+def synthetic_speech_wav(path: str, seconds: float = 1.5):
+    """Voiced-like test signal (harmonics with a syllable envelope)."""
+    t = np.arange(int(seconds * RATE)) / RATE
+    voice = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 6))
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t)
+    pcm = (voice * envelope * 6000).astype("<i2")
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(pcm.tobytes())
+
+
+class Bench:
+    def __init__(self, env: dict, wav: str, lookahead: int, eager_first: bool = True):
+        self.env         = env
+        self.lookahead   = lookahead
+        self.eager_first = eager_first
+        self.source      = WavFileSource(wav, rate=RATE)
+        self.sink        = NullSink(rate=RATE)
+        self.aoai = AzureOpenAI(
+            azure_endpoint=env["AZURE_OPENAI_ENDPOINT"], api_key="fake",
+            api_version=env["AZURE_OPENAI_API_VERSION"],
+        )
+        self.tts = AzureOpenAI(
+            azure_endpoint=env["AZURE_OPENAI_ENDPOINT_TTS"], api_key="fake",
+            api_version=env["AZURE_OPENAI_API_VERSION_TTS"],
+        )
+
+    # --- STT (same protocol as the scripts) -------------------------------
+    def transcribe(self) -> tuple[str, float]:
+        url = (
+            f'{self.env["AZURE_OPENAI_ENDPOINT_STT"]}/openai/realtime'
+            f'?api-version={self.env["AZURE_OPENAI_API_VERSION_STT"]}&intent=transcription'
+        )
+        ws = websocket.create_connection(url, header={"api-key": "fake"})
+        ws.send(json.dumps({
+            "type": "transcription_session.update",
+            "session": {
+                "input_audio_format": "pcm16",
+                "input_audio_transcription": {"model": self.env["AZURE_OPENAI_DEPLOYMENT_NAME_STT"]},
+                "turn_detection": {"type": "server_vad"},
+            },
+        }))
+        stop = threading.Event()
+
+        def mic_sender():
+            framer = AudioFramer(
+                lambda p: ws.send(p, opcode=websocket.ABNF.OPCODE_TEXT), rate=RATE
+            )
+            while not stop.is_set():
+                framer.write(self.source.read(CHUNK))
+
+        self.source.rewind()
+        sender = threading.Thread(target=mic_sender, daemon=True)
+        sender.start()
+        try:
+            while True:
+                ev = json.loads(ws.recv())
+                if ev["type"] == "conversation.item.input_audio_transcription.completed":
+                    return ev["transcript"], time.perf_counter()
+        finally:
+            stop.set()
+            sender.join()
+            ws.close()
+
+    # --- LLM / TTS helpers ------------------------------------------------
+    def llm_stream(self, question: str):
+        for chunk in self.aoai.chat.completions.create(
+            model=self.env["AZURE_OPENAI_DEPLOYMENT_NAME"],
+            messages=[{"role": "user", "content": question}],
+            stream=True,
+        ):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def sentences(self, question: str):
+        segmenter = SentenceSegmenter(eager_first=self.eager_first)
+        for piece in self.llm_stream(question):
+            yield from segmenter.feed(piece)
+        yield from segmenter.flush()
+
+    def synthesize(self, text: str):
+        with self.tts.audio.speech.with_streaming_response.create(
+            model=self.env["AZURE_OPENAI_DEPLOYMENT_NAME_TTS"], voice="ballad",
+            input=text, response_format="pcm",
+        ) as response:
+            yield from iter_pcm16(response.iter_bytes())
+
+    def synthesize_callbacks(self, text: str):
+        """Speech SDK style: audio arrives through callbacks on another thread."""
+        chunks: queue.Queue[bytes | None] = queue.Queue()
+
+        def synthesizer():
+            for chunk in self.synthesize(text):
+                chunks.put(chunk)
+            chunks.put(None)
+
+        threading.Thread(target=synthesizer, daemon=True).start()
+        while (chunk := chunks.get()) is not None:
+            yield chunk
+
+    # --- Flows ------------------------------------------------------------
+    def flow_nonstreaming(self, question: str):
+        answer = self.aoai.chat.completions.create(
+            model=self.env["AZURE_OPENAI_DEPLOYMENT_NAME"],
+            messages=[{"role": "user", "content": question}],
+        ).choices[0].message.content
+        pcm = b"".join(self.synthesize(answer))
+        for i in range(0, len(pcm), WRITE_SIZE):
+            self.sink.write(pcm[i:i + WRITE_SIZE])
+
+    def _flow_sentences(self, question: str, synthesize):
+        prefetcher = TTSPrefetcher(synthesize, self.sink.write, lookahead=self.lookahead, write_size=WRITE_SIZE)
+        for sentence in self.sentences(question):
+            prefetcher.submit(sentence)
+        prefetcher.close()
+
+    def flow_streaming(self, question: str):
+        self._flow_sentences(question, self.synthesize)
+
+    def flow_speech(self, question: str):
+        self._flow_sentences(question, self.synthesize_callbacks)
+
+    def run_turn(self, flow: str) -> dict:
+        self.sink.reset()
+        question, stt_at = self.transcribe()
+        speech_end = self.source.eof_at
+        getattr(self, f"flow_{flow}")(question)
+        return {
+            "stt":   stt_at - speech_end,
+            "ttfa":  self.sink.first_write_at - speech_end,
+            "gaps":  sum(self.sink.gaps),
+            "max_gap": max(self.sink.gaps, default=0.0),
+            "total": self.sink.play_until - speech_end,
+        }
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--flows", default=",".join(FLOWS))
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--wav", help="24 kHz mono 16-bit WAV (default: synthetic 1.5 s)")
+    parser.add_argument("--lookahead", type=int, default=2, help="TTS_LOOKAHEAD of the streaming flows")
+    parser.add_argument("--no-eager", action="store_true", help="first TTS chunk is a whole sentence")
+    parser.add_argument("--stt-latency", type=float, default=0.25)
+    parser.add_argument("--stt-silence-ms", type=int, default=500)
+    parser.add_argument("--answer", help="text returned by the fake chat model")
+    parser.add_argument("--ttft", type=float, default=0.35)
+    parser.add_argument("--tokens-per-s", type=float, default=60)
+    parser.add_argument("--tts-first-byte", type=float, default=0.25)
+    parser.add_argument("--tts-speed", type=float, default=4.0, help="x real time")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--json", help="write raw per-turn results to this file")
+    args = parser.parse_args()
+
+    wav = args.wav
+    if wav is None:
+        wav = os.path.join(tempfile.mkdtemp(), "speech.wav")
+        synthetic_speech_wav(wav)
+
+    services = FakeServices(
+        stt={"latency": args.stt_latency, "silence_ms": args.stt_silence_ms, "jitter": args.jitter},
+        chat={"ttft": args.ttft, "tokens_per_s": args.tokens_per_s, "jitter": args.jitter,
+              **({"answer": args.answer} if args.answer else {})},
+        tts={"first_byte": args.tts_first_byte, "speed": args.tts_speed, "jitter": args.jitter},
+    )
+    results: dict[str, list[dict]] = {}
+    with services:
+        bench = Bench(services.env(), wav, args.lookahead, eager_first=not args.no_eager)
+        for flow in args.flows.split(","):
+            results[flow] = [bench.run_turn(flow) for _ in range(args.turns)]
+
+    print(f"{args.turns} turn(s) per flow, times in ms from the end of speech (p50 / p95)\n")
+    print(f"{'flow':<14}{'stt':>14}{'ttfa':>14}{'gaps':>14}{'max gap':>14}{'total':>14}")
+    for flow, turns in results.items():
+        cells = []
+        for key in ("stt", "ttfa", "gaps", "max_gap", "total"):
+            values = [t[key] * 1000 for t in turns]
+            cells.append(f"{statistics.median(values):.0f} / {percentile(values, 95):.0f}")
+        print(f"{flow:<14}" + "".join(f"{c:>14}" for c in cells))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark: CPU cost of framing microphone audio for the STT websocket.
+
+Compares the scripts' original path (base64 + dict + json.dumps per 1024-sample
+chunk) with `AudioFramer` at several frame durations. Messages go through a
+real (unconnected) websocket frame builder so masking is included.
+
+    python benchmarks/bench_framing.py [--seconds 600]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+from websocket import ABNF
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from voice_pipeline.framing import AudioFramer  # noqa: E402
+
+RATE  = 24_000
+CHUNK = 1024                                   # samples per mic_stream.read
+
+
+def ws_frame(payload):
+    """What websocket-client does per send (header + masking)."""
+    return ABNF.create_frame(payload, ABNF.OPCODE_TEXT).format()
+
+
+def run_baseline(chunks):
+    wire = frames = 0
+    for data in chunks:
+        msg = json.dumps(
+            {
+                "type": "input_audio_buffer.append",
+                "audio": base64.b64encode(data).decode(),
+            }
+        )
+        wire += len(ws_frame(msg))
+        frames += 1
+    return frames, wire
+
+
+def run_framer(chunks, frame_ms):
+    wire = 0
+    def send(payload):
+        nonlocal wire
+        wire += len(ws_frame(payload))
+    framer = AudioFramer(send, rate=RATE, frame_ms=frame_ms)
+    for data in chunks:
+        framer.write(data)
+    framer.flush()
+    return framer.stats.frames, wire
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=600, help="audio seconds to frame")
+    parser.add_argument("--frames-ms", default="40,80,100,200", help="frame durations to test")
+    args = parser.parse_args()
+
+    n_chunks = int(args.seconds * RATE / CHUNK)
+    chunk = os.urandom(CHUNK * 2)
+    chunks = [chunk] * n_chunks
+    audio_s = n_chunks * CHUNK / RATE
+
+    cases = [("baseline (per chunk)", run_baseline)]
+    for ms in (int(x) for x in args.frames_ms.split(",")):
+        cases.append((f"AudioFramer {ms} ms", lambda c, ms=ms: run_framer(c, ms)))
+
+    print(f"{audio_s:.0f} s of 24 kHz mono PCM in {CHUNK}-sample chunks\n")
+    print(f"{'path':<22}{'frames':>9}{'wire KiB':>11}{'µs/audio-s':>13}{'x realtime':>13}")
+    base_cost = None
+    for name, fn in cases:
+        t0 = time.perf_counter()
+        frames, wire = fn(chunks)
+        cpu = time.perf_counter() - t0
+        cost = cpu / audio_s * 1e6
+        base_cost = base_cost or cost
+        print(
+            f"{name:<22}{frames:>9}{wire / 1024:>11.0f}{cost:>13.1f}"
+            f"{audio_s / cpu:>13.0f}   ({base_cost / cost:.2f}x vs baseline)"
+        )
+
+
+if __name__ == "__main__":
+    main()
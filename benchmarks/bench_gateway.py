@@ -0,0 +1,126 @@
+"""
+Load test of the voice gateway (stt-llm-tts_gateway.py).
+
+Starts the stand-in services and the gateway (with `--workers` processes
+and `--max-sessions`), then `--callers` simultaneous callers each stream a
+WAV question at real-time pace and wait for the whole answer. Reports the
+admitted and rejected callers, time to first audio measured by the caller
+(end of its speech → first answer byte) and the gateway's own counters.
+
+    python benchmarks/bench_gateway.py --callers 40 --workers 4 --max-sessions 32
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import InvalidStatus
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bench_e2e import percentile, synthetic_speech_wav  # noqa: E402
+from fake_services import FakeServices  # noqa: E402
+from voice_pipeline.audio_io import WavFileSource  # noqa: E402
+
+RATE, CHUNK = 24_000, 1024
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+async def caller(url: str, wav: str, timeout: float) -> dict:
+    source = WavFileSource(wav, rate=RATE, realtime=False)
+    try:
+        async with connect(url, compression=None, max_size=None) as ws:
+            async def send_mic():
+                clock = loop.time()
+                while True:
+                    clock += CHUNK / RATE
+                    await asyncio.sleep(max(0.0, clock - loop.time()))
+                    await ws.send(source.read(CHUNK))
+
+            loop = asyncio.get_running_loop()
+            sender = asyncio.create_task(send_mic())
+            first_audio = None
+            try:
+                async with asyncio.timeout(timeout):
+                    async for message in ws:
+                        if isinstance(message, bytes):
+                            first_audio = first_audio or time.perf_counter()
+                        elif json.loads(message)["type"] == "answer.done":
+                            break
+            finally:
+                sender.cancel()
+            return {"admitted": True, "ttfa": first_audio - source.eof_at if first_audio else None}
+    except InvalidStatus as exc:
+        return {"admitted": False, "status": exc.response.status_code}
+
+
+async def run_callers(url: str, wav: str, callers: int, timeout: float) -> list[dict]:
+    return await asyncio.gather(*(caller(url, wav, timeout) for _ in range(callers)))
+
+
+def wait_ready(url: str, timeout: float = 20.0):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--callers", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-sessions", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--metrics-port", type=int, default=9465)
+    parser.add_argument("--timeout", type=float, default=60.0, help="per caller, seconds")
+    parser.add_argument("--wav", help="24 kHz mono 16-bit WAV (default: synthetic 1.5 s)")
+    args = parser.parse_args()
+
+    wav = args.wav
+    if wav is None:
+        wav = os.path.join(tempfile.mkdtemp(), "speech.wav")
+        synthetic_speech_wav(wav)
+
+    answer = "Paris is the capital of France. It is also its largest city."
+    with FakeServices(chat={"answer": answer}, tts={"speed": 8.0}) as services:
+        env = dict(os.environ, **services.env())
+        gateway = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "stt-llm-tts_gateway.py"),
+             "--host", "127.0.0.1", "--port", str(args.port), "--workers", str(args.workers),
+             "--max-sessions", str(args.max_sessions), "--metrics-port", str(args.metrics_port)],
+            env=env, cwd=ROOT, stdout=subprocess.DEVNULL,
+        )
+        try:
+            wait_ready(f"http://127.0.0.1:{args.port}/healthz")
+            started = time.perf_counter()
+            results = asyncio.run(run_callers(f"ws://127.0.0.1:{args.port}/", wav, args.callers, args.timeout))
+            wall = time.perf_counter() - started
+            with urllib.request.urlopen(f"http://127.0.0.1:{args.metrics_port}/metrics") as r:
+                metrics = [line for line in r.read().decode().splitlines() if line.startswith("voice_gateway_")]
+        finally:
+            gateway.terminate()
+            gateway.wait()
+
+    admitted = [r for r in results if r["admitted"]]
+    ttfa = [r["ttfa"] * 1000 for r in admitted if r["ttfa"] is not None]
+    print(f"{args.callers} callers, {args.workers} worker(s), max {args.max_sessions} sessions, {wall:.1f} s")
+    print(f"admitted {len(admitted)}, rejected {len(results) - len(admitted)}, answered {len(ttfa)}")
+    if ttfa:
+        print(f"TTFA p50 {statistics.median(ttfa):.0f} ms, p95 {percentile(ttfa, 95):.0f} ms, max {max(ttfa):.0f} ms")
+    print("\n".join(metrics))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Prompt size, prompt-cache hits and time to first token over a long call.
+
+Runs `--turns` chat turns against the stand-in chat server (with a prefill
+cost per uncached prompt token and an Azure-like prompt cache) for each
+history strategy:
+- none:      system prompt + question (no memory, the original scripts);
+- unbounded: every turn kept (prompt grows without limit);
+- sliding:   `ConversationMemory` evicting just enough to fit the budget
+             (the prefix changes on every turn once full);
+- block:     `ConversationMemory` evicting down to half the budget
+             (the prefix changes once every several turns).
+
+    python benchmarks/bench_history.py --turns 60 --budget 3000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+from openai import AzureOpenAI
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from fake_services import FakeServices  # noqa: E402
+from voice_pipeline.history import ConversationMemory, PromptReport  # noqa: E402
+from voice_pipeline.timeline import TurnTimeline  # noqa: E402
+
+STRATEGIES = ("none", "unbounded", "sliding", "block")
+SYSTEM_PROMPT = "You are a helpful assistant. Respond in the same language than the user's question. " * 4
+ANSWER = (
+    "Sure. The short answer is that it depends on the season and on how far you travel, "
+    "but most visitors spend between three and five days there. The old town, the river "
+    "walk and the market are the places people remember most. Would you like a plan?"
+)
+
+
+def memory_for(strategy: str, budget: int) -> ConversationMemory:
+    if strategy == "none":
+        return ConversationMemory(SYSTEM_PROMPT, budget_tokens=0)
+    if strategy == "unbounded":
+        return ConversationMemory(SYSTEM_PROMPT, budget_tokens=10**9)
+    return ConversationMemory(SYSTEM_PROMPT, budget_tokens=budget,
+                              low_water=0.99 if strategy == "sliding" else 0.5)
+
+
+def run(env: dict, strategy: str, turns: int, budget: int) -> list[dict]:
+    client = AzureOpenAI(azure_endpoint=env["AZURE_OPENAI_ENDPOINT"], api_key="fake",
+                         api_version=env["AZURE_OPENAI_API_VERSION"])
+    memory = memory_for(strategy, budget)
+    report = PromptReport(memory)
+    out = []
+    for i in range(turns):
+        question = f"Question number {i + 1}: what else should I see in city {i % 7}?"
+        timeline = TurnTimeline()
+        timeline.mark("transcript")
+        parts, usage = [], None
+        for chunk in client.chat.completions.create(
+            model=env["AZURE_OPENAI_DEPLOYMENT_NAME"], messages=memory.messages(question),
+            stream=True, stream_options={"include_usage": True},
+        ):
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                timeline.mark("first_token")
+                parts.append(chunk.choices[0].delta.content)
+        out.append(report.turn(question, usage, timeline))
+        memory.add_turn(question, "".join(parts))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--budget", type=int, default=3000, help="HISTORY_TOKENS")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES))
+    parser.add_argument("--ttft", type=float, default=0.1, help="base time to first token (s)")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=40.0)
+    args = parser.parse_args()
+
+    chat = {"answer": ANSWER, "ttft": args.ttft, "tokens_per_s": 5000,
+            "prefill_ms_per_1k": args.prefill_ms_per_1k}
+    print(f"{args.turns} turns; prompt tokens, cached share and TTFT over the last half of the call\n")
+    print(f"{'strategy':<11}{'prompt p50':>12}{'prompt max':>12}{'cached':>8}"
+          f"{'TTFT first 5':>14}{'TTFT last 5':>13}{'est. last':>11}")
+    for strategy in args.strategies.split(","):
+        with FakeServices(chat=chat) as services:      # Fresh prompt cache per strategy
+            turns = run(services.env(), strategy, args.turns, args.budget)
+        late   = turns[len(turns) // 2:]
+        prompt = [t["prompt_tokens"] for t in late]
+        cached = sum(t["cached_tokens"] or 0 for t in late) / max(1, sum(prompt))
+        print(
+            f"{strategy:<11}{statistics.median(prompt):>12.0f}{max(prompt):>12}{cached:>8.0%}"
+            f"{statistics.mean(t['ttft_ms'] for t in turns[:5]):>11.0f} ms"
+            f"{statistics.mean(t['ttft_ms'] for t in turns[-5:]):>10.0f} ms"
+            f"{turns[-1]['ttft_estimate_ms']:>8} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
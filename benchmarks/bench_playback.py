@@ -0,0 +1,114 @@
+"""
+Playback under network jitter: direct device writes vs the jitter buffer.
+
+A stand-in TTS stream delivers `--seconds` of audio in 100 ms chunks,
+faster than real time on average (`--speed`) but with random stalls
+(`--stall-ms` with probability `--stall-p` per chunk, same seed for every
+mode). Modes:
+- direct:     the thread reading the stream writes to a blocking `NullSink`
+              (the old `speaker_out.write` in the reader): the reader is
+              blocked by the device for most of the turn, and a stall that
+              outlasts the device buffer is an audible gap;
+- buffer N:   the reader writes to `playback.Player` with an N ms jitter
+              target; the device pulls from its own clock thread.
+
+It reports the silences heard once audio started (gaps / underruns), the
+time to first audio from the first chunk, and the share of the turn the
+reader spent blocked in `write`.
+
+    python benchmarks/bench_playback.py --seconds 6 --stall-ms 500 --targets 0,80,160,320
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from voice_pipeline.audio_io import NullSink  # noqa: E402
+from voice_pipeline.playback import Player, clock_output  # noqa: E402
+
+RATE, CHUNK = 24_000, 1024
+PIECE = RATE // 10 * 2                   # 100 ms per network chunk
+
+
+def delays(seconds: float, speed: float, stall_ms: float, stall_p: float, seed: int) -> list[float]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(int(seconds * 10)):
+        delay = 0.1 / speed
+        if rng.random() < stall_p:
+            delay += stall_ms / 1000
+        out.append(delay)
+    return out
+
+
+def run_direct(schedule: list[float]) -> dict:
+    sink = NullSink(rate=RATE)
+    pcm = bytes(PIECE)
+    started = time.perf_counter()
+    arrival = started
+    blocked = 0.0
+    for delay in schedule:
+        arrival += delay                 # The stream delivers the next chunk
+        wait = arrival - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        t0 = time.perf_counter()
+        sink.write(pcm)
+        blocked += time.perf_counter() - t0
+    end = sink.play_until
+    return {
+        "silences": len(sink.gaps), "silence_ms": sum(sink.gaps) * 1000,
+        "ttfa_ms": (sink.first_write_at - started - schedule[0]) * 1000,
+        "blocked": blocked / (end - started),
+    }
+
+
+def run_player(schedule: list[float], target_ms: int) -> dict:
+    player = Player(clock_output(RATE, CHUNK), RATE, CHUNK, target_ms=target_ms)
+    pcm = bytes(PIECE)
+    started = time.perf_counter()
+    arrival = started
+    blocked = 0.0
+    for delay in schedule:
+        arrival += delay
+        wait = arrival - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        t0 = time.perf_counter()
+        player.write(pcm)
+        blocked += time.perf_counter() - t0
+    player.drain()
+    end = time.perf_counter()
+    player.close()
+    return {
+        "silences": player.stats.underruns, "silence_ms": player.stats.silence * 1000,
+        "ttfa_ms": (player.first_audio_at - started - schedule[0]) * 1000,
+        "blocked": blocked / (end - started),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=6.0, help="audio per turn")
+    parser.add_argument("--speed", type=float, default=3.0, help="stream speed vs real time, without stalls")
+    parser.add_argument("--stall-ms", type=float, default=500.0)
+    parser.add_argument("--stall-p", type=float, default=0.1)
+    parser.add_argument("--targets", default="0,80,160,320", help="jitter buffer targets, ms")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    schedule = delays(args.seconds, args.speed, args.stall_ms, args.stall_p, args.seed)
+    print(f"{args.seconds:.0f} s of audio at {args.speed}x, {sum(d > 0.1 / args.speed for d in schedule)} stalls "
+          f"of {args.stall_ms:.0f} ms\n")
+    print(f"{'mode':<12}{'silences':>10}{'silence':>12}{'TTFA':>10}{'reader blocked':>16}")
+    rows = [("direct", run_direct(schedule))]
+    rows += [(f"buffer {t}", run_player(schedule, int(t))) for t in args.targets.split(",")]
+    for name, r in rows:
+        print(f"{name:<12}{r['silences']:>10}{r['silence_ms']:>9.0f} ms{r['ttfa_ms']:>7.0f} ms{r['blocked']:>15.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Session recording on the audio threads: synchronous writes vs the recorder.
+
+Two producer threads stand for the mic sender and the TTS player: each
+hands a 20 ms block (24 kHz, 16-bit) to the recording every 20 ms for
+`--seconds`. The disk is the real one, with `os.fsync` made to stall for
+`--stall-ms` (a busy or network disk). Modes:
+- sync:     the producer writes and flushes the block itself, and syncs
+            every `--fsync-s` (the naive way to keep a recording);
+- recorder: `SessionRecorder.mic()` / `.tts()` (bounded queues, batched
+            writes and fsync on its own thread), with `--queue-kb` per
+            channel.
+
+It reports the time a producer spends handing over a block (average,
+p99, max), the blocks that went out more than 20 ms late (what the
+speaker or the STT socket would feel as jitter), the audio dropped and
+what reached the file.
+
+    python benchmarks/bench_recorder.py --seconds 5 --stall-ms 300
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from voice_pipeline.recorder import EVENT, SessionRecorder, read_session  # noqa: E402
+
+RATE, BLOCK_S = 24_000, 0.02
+BLOCK = bytes(int(RATE * BLOCK_S) * 2)
+FSYNC = os.fsync
+
+
+def stalled_fsync(stall_s: float):
+    def slow(fd):
+        time.sleep(stall_s)
+        FSYNC(fd)
+    return slow
+
+
+def produce(hand_over, seconds: float) -> dict:
+    """One producer on a 20 ms clock; `hand_over(block)` is timed."""
+    costs, late = [], 0
+    clock = time.perf_counter()
+    for _ in range(int(seconds / BLOCK_S)):
+        start = time.perf_counter()
+        hand_over(BLOCK)
+        end = time.perf_counter()
+        costs.append(end - start)
+        late += end - clock > BLOCK_S
+        clock += BLOCK_S
+        time.sleep(max(0.0, clock - time.perf_counter()))
+    return {"costs": costs, "late": late}
+
+
+def run(mode: str, args, path: str) -> dict:
+    results: list[dict] = []
+    if mode == "sync":
+        f = open(path, "wb")
+        lock = threading.Lock()
+        last_sync = [time.perf_counter()]
+
+        def write(block):
+            with lock:
+                f.write(block)
+                f.flush()
+                if time.perf_counter() - last_sync[0] >= args.fsync_s:
+                    os.fsync(f.fileno())
+                    last_sync[0] = time.perf_counter()
+        hand_overs = (write, write)
+    else:
+        rec = SessionRecorder(path, rate=RATE, queue_bytes=args.queue_kb << 10, fsync_s=args.fsync_s)
+        hand_overs = (rec.mic, rec.tts)
+
+    threads = [threading.Thread(target=lambda h=h: results.append(produce(h, args.seconds))) for h in hand_overs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    if mode == "sync":
+        f.close()
+        stored = os.path.getsize(path)
+        dropped = 0
+    else:
+        rec.close()
+        stored = sum(len(p) for kind, _, p in read_session(path) if kind != EVENT)
+        dropped = sum(c.dropped_bytes for c in rec.channels.values())
+    costs = sorted(c for r in results for c in r["costs"])
+    return {
+        "avg": sum(costs) / len(costs),
+        "p99": costs[int(len(costs) * 0.99)],
+        "max": costs[-1],
+        "late": sum(r["late"] for r in results),
+        "blocks": len(costs),
+        "dropped": dropped / 2 / RATE,
+        "stored": stored / 2 / RATE,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--stall-ms", type=float, nargs="+", default=[0, 300])
+    parser.add_argument("--fsync-s", type=float, default=1.0)
+    parser.add_argument("--queue-kb", type=int, default=8192)
+    args = parser.parse_args()
+
+    print(f"2 producers × {args.seconds:g} s of 20 ms blocks, fsync every {args.fsync_s:g} s\n")
+    print(f"{'stall':>7}  {'mode':<10}{'avg':>10}{'p99':>10}{'max':>10}{'late':>10}{'dropped':>10}{'stored':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        for stall in args.stall_ms:
+            os.fsync = stalled_fsync(stall / 1000)   # Also the recorder's
+            for mode in ("sync", "recorder"):
+                r = run(mode, args, os.path.join(folder, f"{mode}-{stall:g}.vprec"))
+                print(f"{stall:>4.0f} ms  {mode:<10}{r['avg'] * 1e6:>7.0f} µs{r['p99'] * 1000:>7.1f} ms"
+                      f"{r['max'] * 1000:>7.1f} ms{r['late']:>5}/{r['blocks']:<4}{r['dropped']:>8.1f} s"
+                      f"{r['stored']:>7.1f} s")
+
+
+if __name__ == "__main__":
+    main()
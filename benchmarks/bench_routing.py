@@ -0,0 +1,135 @@
+"""
+Routing across deployments: one endpoint vs failover vs hedged requests.
+
+Two stand-in deployments of the same stage (`--stage chat` or `tts`): the
+primary is the fastest (`--fast-ms` to the first byte) but throttles
+(`--throttle-p`, 429 with `Retry-After: --retry-after`) and has a slow tail
+(`--tail-p`, `--tail-ms` more); the secondary is slower and steady
+(`--slow-ms`). `--requests` requests are sent one after the other, same seed
+for every mode:
+- single:    the primary only, the OpenAI client retrying by itself
+             (`max_retries=2`, honouring Retry-After), as before;
+- failover:  `Router` over both, no hedging;
+- hedge N:   `Router` with `hedge_ms=N`.
+
+It reports the time to first byte (first token / first audio chunk) p50,
+p95 and p99, the requests that failed and the requests sent per request
+(the cost of the failovers and the hedges).
+
+    python benchmarks/bench_routing.py --stage chat --requests 100 --hedge 300,500
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+from openai import AzureOpenAI
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from fake_services import FakeChatServer, FakeTTSServer  # noqa: E402
+from voice_pipeline.routing import Endpoint, EndpointConfig, Router  # noqa: E402
+
+
+def client(endpoint: str, max_retries: int) -> AzureOpenAI:
+    return AzureOpenAI(azure_endpoint=endpoint, api_key="fake", api_version="2024-12-01-preview",
+                       max_retries=max_retries)
+
+
+def opener(stage: str):
+    """(`open(client)` → the stage's stream, `is_first(item)`)."""
+    if stage == "chat":
+        def open_chat(c):
+            return c.chat.completions.create(model="fake-chat", messages=[{"role": "user", "content": "Hi"}],
+                                             stream=True)
+        return open_chat, lambda chunk: bool(chunk.choices and chunk.choices[0].delta.content)
+
+    def open_tts(c):
+        with c.audio.speech.with_streaming_response.create(model="fake-tts", voice="coral", input="Hello there.",
+                                                           response_format="pcm") as response:
+            yield from response.iter_bytes()
+    return open_tts, lambda data: True
+
+
+def percentile(values: list[float], p: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(p * len(values)))]
+
+
+def run(servers: list, stage: str, mode: str, hedge_ms: int, requests: int, gap: float, seed: int) -> dict:
+    random.seed(seed)                    # Same faults in every mode
+    for s in servers:
+        s.requests = 0
+    open_stream, is_first = opener(stage)
+    if mode == "single":
+        primary = client(servers[0].endpoint, max_retries=2)
+        request = lambda: open_stream(primary)  # noqa: E731
+    else:
+        router = Router([Endpoint(EndpointConfig(f"ep{i}", s.endpoint, "fake", "", ""), client(s.endpoint, 0))
+                         for i, s in enumerate(servers)], hedge_ms=hedge_ms)
+        request = lambda: router.stream(lambda e: open_stream(e.client), hedge=hedge_ms > 0,  # noqa: E731
+                                        is_first=is_first)
+
+    ttfb, failed = [], 0
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        try:
+            stream = request()
+            for item in stream:
+                if is_first(item):
+                    ttfb.append(time.perf_counter() - t0)
+                    break
+            stream.close()
+        except Exception:
+            failed += 1
+        time.sleep(gap)
+    time.sleep(1.0)                      # Hedge losers finish their requests
+    return {
+        "p50": statistics.median(ttfb), "p95": percentile(ttfb, 0.95), "p99": percentile(ttfb, 0.99),
+        "failed": failed, "sent": sum(s.requests for s in servers) / requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stage", choices=("chat", "tts"), default="chat")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--gap-ms", type=int, default=100, help="pause between requests")
+    parser.add_argument("--fast-ms", type=int, default=250, help="primary first byte")
+    parser.add_argument("--slow-ms", type=int, default=450, help="secondary first byte")
+    parser.add_argument("--throttle-p", type=float, default=0.1)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--tail-p", type=float, default=0.1)
+    parser.add_argument("--tail-ms", type=int, default=1500)
+    parser.add_argument("--hedge", default="300,500", help="hedge_ms values to compare")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    faults = {"throttle_p": args.throttle_p, "retry_after": args.retry_after,
+              "tail_p": args.tail_p, "tail_s": args.tail_ms / 1000}
+    if args.stage == "chat":
+        servers = [FakeChatServer(ttft=args.fast_ms / 1000, tokens_per_s=200.0, **faults),
+                   FakeChatServer(ttft=args.slow_ms / 1000, tokens_per_s=200.0)]
+    else:
+        servers = [FakeTTSServer(first_byte=args.fast_ms / 1000, speed=20.0, **faults),
+                   FakeTTSServer(first_byte=args.slow_ms / 1000, speed=20.0)]
+    for s in servers:
+        s.start()
+
+    print(f"{args.stage}: primary {args.fast_ms} ms ({args.throttle_p:.0%} throttled, {args.tail_p:.0%} +{args.tail_ms} ms), "
+          f"secondary {args.slow_ms} ms, {args.requests} requests\n")
+    print(f"{'mode':<12}{'TTFB p50':>10}{'p95':>10}{'p99':>10}{'failed':>8}{'sent/req':>10}")
+    modes = [("single", 0), ("failover", 0)] + [(f"hedge {ms}", int(ms)) for ms in args.hedge.split(",")]
+    try:
+        for name, hedge_ms in modes:
+            r = run(servers, args.stage, name.split()[0], hedge_ms, args.requests, args.gap_ms / 1000, args.seed)
+            print(f"{name:<12}{r['p50'] * 1000:>7.0f} ms{r['p95'] * 1000:>7.0f} ms{r['p99'] * 1000:>7.0f} ms"
+                  f"{r['failed']:>8}{r['sent']:>10.2f}")
+    finally:
+        for s in servers:
+            s.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Thread count and memory vs number of concurrent sessions:
+thread-per-turn design (stt-llm-tts_streaming.py) vs the asyncio engine
+(voice_pipeline.engine, stt-llm-tts_async.py).
+
+Every session speaks one question (WAV file at real-time pace) and plays
+the whole answer into a null speaker, all sessions at the same time. The
+stand-in services (fake_services.py) run in this process; each
+(design, sessions) point runs in a fresh child process that samples its
+own OS threads and RSS (/proc/self/status) every 20 ms.
+
+    python benchmarks/bench_sessions.py --sessions 1,10,50,100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import websocket
+from openai import AsyncAzureOpenAI, AzureOpenAI
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bench_e2e import synthetic_speech_wav  # noqa: E402
+from fake_services import FakeServices  # noqa: E402
+from voice_pipeline.audio_io import NullSink, WavFileSource  # noqa: E402
+from voice_pipeline.engine import AsyncSpeaker, EngineConfig, VoiceSession, open_async_mic  # noqa: E402
+from voice_pipeline.framing import AudioFramer  # noqa: E402
+from voice_pipeline.pcm import iter_pcm16  # noqa: E402
+from voice_pipeline.segmenter import SentenceSegmenter  # noqa: E402
+from voice_pipeline.tts_prefetch import TTSPrefetcher  # noqa: E402
+
+DESIGNS = ("threads", "asyncio")
+RATE, CHUNK = 24_000, 1024
+ANSWER = (
+    "Paris is the capital of France. It is also its largest city, "
+    "known for the Eiffel Tower and the Louvre."
+)
+
+
+class ProcessSampler:
+    """Peak OS threads and RSS of this process."""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak_threads = 0
+        self.peak_rss     = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def read() -> tuple[int, int]:
+        threads = rss = 0
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    threads = int(line.split()[1])
+                elif line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+        return threads, rss
+
+    def _run(self):
+        while not self._stop.is_set():
+            threads, rss = self.read()
+            self.peak_threads = max(self.peak_threads, threads - 1)   # Minus the sampler
+            self.peak_rss     = max(self.peak_rss, rss)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+# ---------------------------------------------------------------------------
+# Thread-per-turn session (same threads as stt-llm-tts_streaming.py)
+# ---------------------------------------------------------------------------
+class ThreadedSession:
+    def __init__(self, env: dict, aoai, tts, wav: str, lookahead: int):
+        self.env, self.aoai, self.tts, self.lookahead = env, aoai, tts, lookahead
+        self.source  = WavFileSource(wav, rate=RATE)
+        self.sink    = NullSink(rate=RATE)
+        self.playing = threading.Event()
+        self.done    = threading.Event()
+        self.app = websocket.WebSocketApp(
+            f'{env["AZURE_OPENAI_ENDPOINT_STT"]}/openai/realtime'
+            f'?api-version={env["AZURE_OPENAI_API_VERSION_STT"]}&intent=transcription',
+            header={"api-key": "fake"},
+            on_open=self.on_open,
+            on_message=self.on_message,
+        )
+
+    def start(self):
+        threading.Thread(target=self.app.run_forever, daemon=True).start()
+
+    def on_open(self, ws):
+        ws.send(json.dumps({
+            "type": "transcription_session.update",
+            "session": {
+                "input_audio_format": "pcm16",
+                "input_audio_transcription": {"model": self.env["AZURE_OPENAI_DEPLOYMENT_NAME_STT"]},
+                "turn_detection": {"type": "server_vad"},
+            },
+        }))
+        framer = AudioFramer(lambda p: ws.send(p, opcode=websocket.ABNF.OPCODE_TEXT), rate=RATE)
+
+        def mic_sender():
+            try:
+                while ws.keep_running and not self.done.is_set():
+                    if self.playing.is_set():
+                        time.sleep(0.05)
+                        continue
+                    framer.write(self.source.read(CHUNK))
+            except Exception:
+                pass
+
+        threading.Thread(target=mic_sender, daemon=True).start()
+
+    def on_message(self, ws, message):
+        ev = json.loads(message)
+        if ev.get("type") == "conversation.item.input_audio_transcription.completed":
+            self.playing.set()
+            threading.Thread(target=self.assistant_stream, args=(ev["transcript"],), daemon=True).start()
+
+    def synthesize(self, text: str):
+        with self.tts.audio.speech.with_streaming_response.create(
+            model=self.env["AZURE_OPENAI_DEPLOYMENT_NAME_TTS"], voice="ballad",
+            input=text, response_format="pcm",
+        ) as response:
+            yield from iter_pcm16(response.iter_bytes())
+
+    def assistant_stream(self, question: str):
+        tts_queue: queue.Queue[str | None] = queue.Queue()
+
+        def tts_worker():
+            prefetcher = TTSPrefetcher(self.synthesize, self.sink.write, lookahead=self.lookahead,
+                                       write_size=RATE // 50 * 2)
+            while (fragment := tts_queue.get()) is not None:
+                prefetcher.submit(fragment)
+            prefetcher.close()
+            self.done.set()
+            self.app.close()
+
+        threading.Thread(target=tts_worker, daemon=True).start()
+        segmenter = SentenceSegmenter()
+        for chunk in self.aoai.chat.completions.create(
+            model=self.env["AZURE_OPENAI_DEPLOYMENT_NAME"],
+            messages=[{"role": "user", "content": question}],
+            stream=True,
+        ):
+            if chunk.choices and chunk.choices[0].delta.content:
+                for fragment in segmenter.feed(chunk.choices[0].delta.content):
+                    tts_queue.put(fragment)
+        for fragment in segmenter.flush():
+            tts_queue.put(fragment)
+        tts_queue.put(None)
+
+
+def run_threads(env: dict, sessions: int, wav: str, lookahead: int) -> list[float]:
+    aoai = AzureOpenAI(azure_endpoint=env["AZURE_OPENAI_ENDPOINT"], api_key="fake",
+                       api_version=env["AZURE_OPENAI_API_VERSION"])
+    tts = AzureOpenAI(azure_endpoint=env["AZURE_OPENAI_ENDPOINT_TTS"], api_key="fake",
+                      api_version=env["AZURE_OPENAI_API_VERSION_TTS"])
+    all_sessions = [ThreadedSession(env, aoai, tts, wav, lookahead) for _ in range(sessions)]
+    for s in all_sessions:
+        s.start()
+    for s in all_sessions:
+        s.done.wait()
+    return [s.sink.first_write_at - s.source.eof_at for s in all_sessions]
+
+
+# ---------------------------------------------------------------------------
+# Asyncio engine
+# ---------------------------------------------------------------------------
+async def _run_asyncio(env: dict, sessions: int, wav: str, lookahead: int) -> list[float]:
+    aoai = AsyncAzureOpenAI(azure_endpoint=env["AZURE_OPENAI_ENDPOINT"], api_key="fake",
+                            api_version=env["AZURE_OPENAI_API_VERSION"])
+    tts = AsyncAzureOpenAI(azure_endpoint=env["AZURE_OPENAI_ENDPOINT_TTS"], api_key="fake",
+                           api_version=env["AZURE_OPENAI_API_VERSION_TTS"])
+    config = EngineConfig(
+        stt_url=(f'{env["AZURE_OPENAI_ENDPOINT_STT"]}/openai/realtime'
+                 f'?api-version={env["AZURE_OPENAI_API_VERSION_STT"]}&intent=transcription'),
+        stt_headers={"api-key": "fake"},
+        stt_model=env["AZURE_OPENAI_DEPLOYMENT_NAME_STT"],
+        chat_model=env["AZURE_OPENAI_DEPLOYMENT_NAME"],
+        tts_model=env["AZURE_OPENAI_DEPLOYMENT_NAME_TTS"],
+        lookahead=lookahead,
+    )
+    all_sessions, sources, sinks = [], [], []
+    for _ in range(sessions):
+        source, sink = WavFileSource(wav, rate=RATE), NullSink(rate=RATE)
+        sources.append(source)
+        sinks.append(sink)
+        all_sessions.append(VoiceSession(
+            config, aoai, tts, open_async_mic(None, RATE, CHUNK, source=source),
+            AsyncSpeaker(sink), verbose=False,
+        ))
+    tasks = [asyncio.create_task(s.run()) for s in all_sessions]
+    await asyncio.gather(*(s.answered.wait() for s in all_sessions))
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return [sink.first_write_at - source.eof_at for source, sink in zip(sources, sinks)]
+
+
+def run_asyncio(env: dict, sessions: int, wav: str, lookahead: int) -> list[float]:
+    return asyncio.run(_run_asyncio(env, sessions, wav, lookahead))
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+def child(args):
+    env = json.loads(os.environ["BENCH_SERVICES"])
+    base_threads, base_rss = ProcessSampler.read()
+    sampler = ProcessSampler()
+    sampler.start()
+    started, cpu_started = time.perf_counter(), time.process_time()
+    run = run_threads if args.child == "threads" else run_asyncio
+    ttfa = run(env, args.sessions_n, args.wav, args.lookahead)
+    wall = time.perf_counter() - started
+    cpu  = time.process_time() - cpu_started
+    sampler.stop()
+    print(json.dumps({
+        "design": args.child, "sessions": args.sessions_n,
+        "threads": sampler.peak_threads, "base_threads": base_threads,
+        "rss_mb": sampler.peak_rss / 2**20, "base_rss_mb": base_rss / 2**20,
+        "ttfa_p50": statistics.median(ttfa), "ttfa_max": max(ttfa), "wall": wall, "cpu": cpu,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", default="1,10,50,100")
+    parser.add_argument("--designs", default=",".join(DESIGNS))
+    parser.add_argument("--lookahead", type=int, default=2)
+    parser.add_argument("--wav", help="24 kHz mono 16-bit WAV (default: synthetic 1.5 s)")
+    parser.add_argument("--json", help="write the raw results to this file")
+    parser.add_argument("--child", choices=DESIGNS, help=argparse.SUPPRESS)
+    parser.add_argument("--sessions-n", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args)
+        return
+
+    wav = args.wav
+    if wav is None:
+        wav = os.path.join(tempfile.mkdtemp(), "speech.wav")
+        synthetic_speech_wav(wav)
+
+    results = []
+    with FakeServices(chat={"answer": ANSWER}, tts={"speed": 8.0}) as services:
+        env = dict(os.environ, BENCH_SERVICES=json.dumps(services.env()))
+        for n in map(int, args.sessions.split(",")):
+            for design in args.designs.split(","):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", design, "--sessions-n", str(n),
+                     "--wav", wav, "--lookahead", str(args.lookahead)],
+                    env=env, capture_output=True, text=True, check=True,
+                )
+                results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+                r = results[-1]
+                print(
+                    f"{design:<8} {n:>5} sessions: {r['threads']:>5} threads (idle {r['base_threads']}), "
+                    f"RSS {r['rss_mb']:6.1f} MB (idle {r['base_rss_mb']:.1f}), "
+                    f"CPU {r['cpu']:5.1f} s, TTFA p50 {r['ttfa_p50'] * 1000:5.0f} ms, max {r['ttfa_max'] * 1000:5.0f} ms",
+                    flush=True,
+                )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
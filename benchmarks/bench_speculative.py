@@ -0,0 +1,130 @@
+"""
+Speculative chat requests on partial transcripts: latency saved vs tokens wasted.
+
+A stand-in recognizer speaks `--turns` questions word by word (a new
+hypothesis every `--word-ms`, ± 50%, with a `--pause-ms` pause in the middle
+of a question with probability `--pause-p`) and sends the final transcript
+`--final-ms` after the last word, as Azure Speech does after its
+segmentation silence. With probability `--revise-p` the final transcript
+corrects the last word of the partial. The chat server is the stand-in,
+with `--ttft`.
+
+For every mode it reports the time from the final transcript to the first
+answer token (p50 / p95), the hit rate, the speculations restarted by a
+newer partial and the completion tokens wasted per turn:
+- off:       the request is sent with the final transcript;
+- stable N:  `Speculator` with `stable_ms=N`.
+
+    python benchmarks/bench_speculative.py --turns 12 --stable 150,300,600
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+from openai import AzureOpenAI
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from fake_services import FakeServices  # noqa: E402
+from voice_pipeline.speculative import Speculator  # noqa: E402
+
+QUESTIONS = [
+    "what is the weather like in Madrid tomorrow morning",
+    "can you recommend a good book about the history of Rome",
+    "how long does it take to fly from Paris to New York",
+    "what time does the museum open on Sundays",
+    "tell me a short story about a dragon and a knight",
+    "how many people live in the city of Barcelona",
+]
+REVISED = ("today", "please", "again", "there", "now")
+
+
+def script(turns: int, args, seed: int = 1) -> list[tuple[list[tuple[float, str]], str]]:
+    """Per turn: [(delay before the hypothesis, hypothesis)], final transcript."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(turns):
+        words = QUESTIONS[i % len(QUESTIONS)].split()
+        pause_at = rng.randrange(2, len(words) - 1) if rng.random() < args.pause_p else -1
+        steps = []
+        for n in range(1, len(words) + 1):
+            delay = args.word_ms / 1000 * rng.uniform(0.5, 1.5)
+            if n - 1 == pause_at:
+                delay += args.pause_ms / 1000
+            steps.append((delay, " ".join(words[:n])))
+        final = " ".join(words)
+        if rng.random() < args.revise_p:
+            final = " ".join(words[:-1] + [rng.choice(REVISED)])
+        out.append((steps, final[0].upper() + final[1:] + "?"))
+    return out
+
+
+def first_token(stream) -> float:
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            return time.perf_counter()
+    return time.perf_counter()
+
+
+def run(env: dict, turns: list, final_ms: int, stable_ms: int | None) -> dict:
+    client = AzureOpenAI(azure_endpoint=env["AZURE_OPENAI_ENDPOINT"], api_key="fake",
+                         api_version=env["AZURE_OPENAI_API_VERSION"])
+
+    def open_stream(text: str):
+        return client.chat.completions.create(
+            model=env["AZURE_OPENAI_DEPLOYMENT_NAME"],
+            messages=[{"role": "user", "content": text}],
+            stream=True, stream_options={"include_usage": True},
+        )
+
+    speculator = Speculator(open_stream, stable_ms=stable_ms or 0)
+    latencies = []
+    for steps, final in turns:
+        for delay, hypothesis in steps:
+            time.sleep(delay)
+            if stable_ms is not None:
+                speculator.feed(hypothesis, replace=True)
+        time.sleep(final_ms / 1000)
+        final_at = time.perf_counter()
+        stream = speculator.take(final) if stable_ms is not None else None
+        stream = stream or open_stream(final)
+        latencies.append(first_token(stream) - final_at)
+        stream.close()
+    stats = speculator.stats
+    return {
+        "p50": statistics.median(latencies), "p95": sorted(latencies)[int(0.95 * (len(latencies) - 1))],
+        "hits": stats.hits / len(turns) if stable_ms is not None else 0.0,
+        "restarts": stats.restarts, "wasted": stats.wasted_tokens / len(turns),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--stable", default="150,300,600", help="stable_ms values to compare")
+    parser.add_argument("--word-ms", type=int, default=250)
+    parser.add_argument("--pause-ms", type=int, default=500)
+    parser.add_argument("--pause-p", type=float, default=0.3)
+    parser.add_argument("--final-ms", type=int, default=600)
+    parser.add_argument("--revise-p", type=float, default=0.15)
+    parser.add_argument("--ttft", type=float, default=0.35)
+    args = parser.parse_args()
+
+    turns = script(args.turns, args)
+    print(f"{args.turns} turns, TTFT {args.ttft * 1000:.0f} ms, final transcript {args.final_ms} ms "
+          f"after the last word\n")
+    print(f"{'mode':<12}{'first token p50':>17}{'p95':>9}{'hits':>7}{'restarts':>10}{'wasted tok/turn':>17}")
+    with FakeServices(chat={"ttft": args.ttft, "tokens_per_s": 60.0}) as services:
+        env = services.env()
+        modes = [("off", None)] + [(f"stable {ms}", int(ms)) for ms in args.stable.split(",")]
+        for name, stable_ms in modes:
+            r = run(env, turns, args.final_ms, stable_ms)
+            print(f"{name:<12}{r['p50'] * 1000:>14.0f} ms{r['p95'] * 1000:>6.0f} ms{r['hits']:>7.0%}"
+                  f"{r['restarts']:>10}{r['wasted']:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
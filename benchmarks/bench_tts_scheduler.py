@@ -0,0 +1,136 @@
+"""
+TTS chunking: fixed punctuation rules vs the adaptive scheduler.
+
+A stand-in LLM streams a long answer (`--tokens-per-s`, one word per
+token) and a stand-in TTS backend answers every request after a first-byte
+latency and then produces its audio at a real-time factor (60 ms of audio
+per character), for three backends: `fast`, `slow` and `overloaded`
+(slower than real time). The answer goes through the pipeline's
+segmenter, `TTSPrefetcher` and the playback jitter buffer
+(`playback.Player` on a null clock output). Modes:
+- sentences: every sentence is one request (TTS_MIN_CHARS=0);
+- fixed:     sentences merged up to TTS_MIN_CHARS=40 (the default);
+- scheduler: every sentence to `TTSScheduler`, which merges them while
+             the audio ahead covers the next request (TTS_SCHEDULER=1).
+
+The meter of the scheduler is trained on one turn before the measured ones.
+It reports the requests per answer, the time to first audio, the playback
+underruns (the buffer ran dry in the middle of the answer) and the silence
+they caused.
+
+    python benchmarks/bench_tts_scheduler.py --turns 3 --tokens-per-s 30
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from voice_pipeline.playback import Player, clock_output  # noqa: E402
+from voice_pipeline.segmenter import SentenceSegmenter  # noqa: E402
+from voice_pipeline.tts_prefetch import TTSPrefetcher  # noqa: E402
+from voice_pipeline.tts_scheduler import SynthesisMeter, TTSScheduler  # noqa: E402
+
+RATE, CHUNK = 24_000, 1024
+SECONDS_PER_CHAR = 0.06
+
+ANSWER = (
+    "Sure. The Eiffel Tower is in Paris, on the Champ de Mars, next to the Seine. "
+    "It was built for the 1889 World's Fair. It is 330 metres tall. "
+    "There are three levels for visitors. The first two can be reached by stairs or lift. "
+    "The top one only by lift. Tickets can be bought online. "
+    "The queues are shorter in the morning. Enjoy your visit!"
+)
+
+BACKENDS = {
+    "fast": {"first_byte": 0.15, "rtf": 0.2},
+    "slow": {"first_byte": 0.6, "rtf": 0.7},
+    "overloaded": {"first_byte": 0.8, "rtf": 1.3},
+}
+
+
+def stand_in_tts(first_byte: float, rtf: float):
+    def synthesize(text: str, hedge: bool = False):
+        audio = bytes(int(len(text) * SECONDS_PER_CHAR * RATE) * 2)
+        time.sleep(first_byte)
+        piece = RATE // 10 * 2                   # 100 ms of audio per chunk
+        for i in range(0, len(audio), piece):
+            yield audio[i:i + piece]
+            time.sleep(0.1 * rtf)
+    return synthesize
+
+
+def turn(mode: str, backend: dict, meter: SynthesisMeter, tokens_per_s: float, margin_ms: int) -> dict:
+    player = Player(clock_output(RATE, CHUNK), RATE, CHUNK, target_ms=80)
+    requests = []
+    synthesize = meter.wrap(stand_in_tts(**backend))
+
+    def counted(text: str):
+        requests.append(text)
+        return synthesize(text)
+
+    prefetcher = TTSPrefetcher(counted, player.write, lookahead=2, write_size=RATE // 50 * 2)
+    tts_queue: queue.Queue = queue.Queue()
+
+    def worker():
+        while (fragment := tts_queue.get()) is not None:
+            prefetcher.submit(fragment)
+        prefetcher.close()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    scheduler = None
+    if mode == "scheduler":
+        scheduler = TTSScheduler(tts_queue.put, meter, buffered=lambda: player.buffered_ms() / 1000,
+                                 margin_ms=margin_ms)
+    segmenter = SentenceSegmenter(lang="en", min_chars=40 if mode == "fixed" else 0)
+    send = scheduler.feed if scheduler else tts_queue.put
+
+    started = time.perf_counter()
+    for word in ANSWER.split(" "):
+        time.sleep(1 / tokens_per_s)
+        for fragment in segmenter.feed(word + " "):
+            send(fragment)
+    for fragment in segmenter.flush():
+        send(fragment)
+    if scheduler is not None:
+        scheduler.close()
+    tts_queue.put(None)
+    thread.join()
+    player.drain()
+    result = {
+        "requests": len(requests),
+        "ttfa": player.first_audio_at - started,
+        "underruns": player.stats.underruns,
+        "silence": player.stats.silence,
+    }
+    player.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=1)
+    parser.add_argument("--tokens-per-s", type=float, default=60.0)
+    parser.add_argument("--margin-ms", type=int, default=150)
+    args = parser.parse_args()
+
+    print(f"{len(ANSWER)}-char answer at {args.tokens_per_s:g} words/s, {args.turns} turns per mode\n")
+    print(f"{'backend':<12}{'mode':<11}{'requests':>9}{'TTFA':>9}{'underruns':>11}{'silence':>10}")
+    for name, backend in BACKENDS.items():
+        for mode in ("sentences", "fixed", "scheduler"):
+            meter = SynthesisMeter(rate=RATE)
+            turn(mode, backend, meter, args.tokens_per_s, args.margin_ms)      # Trains the meter
+            results = [turn(mode, backend, meter, args.tokens_per_s, args.margin_ms) for _ in range(args.turns)]
+            n = len(results)
+            print(f"{name:<12}{mode:<11}{sum(r['requests'] for r in results) / n:>9.1f}"
+                  f"{sum(r['ttfa'] for r in results) / n * 1000:>6.0f} ms"
+                  f"{sum(r['underruns'] for r in results) / n:>11.1f}"
+                  f"{sum(r['silence'] for r in results) / n * 1000:>7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Overlapping turns and backpressure: a thread per transcript vs the turn scheduler.
+
+Every answer goes through the pipeline's chain: a stand-in LLM streams it
+(`--tokens-per-s`, one word per token) into the segmenter, the text queue
+(`MeteredQueue`), `TTSPrefetcher` (stand-in TTS: 150 ms first byte, then
+faster than real time) and one shared speaker (`playback.Player` on a
+real-time null clock output).
+
+1) Overlapping transcripts: `--transcripts` questions arrive `--gap-ms`
+   apart (the user goes on talking while the first answer plays). Modes:
+   - threads: one answer thread per transcript (the old `on_final`);
+   - queue / merge / replace: `TurnScheduler` with that TURN_POLICY.
+   It reports the answers given and dropped (TURN_MAX_PENDING=2), the most
+   answers writing to the speaker at once, the time to the end of the
+   last answer and the wait per turn.
+
+2) Backpressure: one long answer from a fast LLM, with unbounded queues
+   (before) or `--queue-max` / `--max-pending` (TTS_QUEUE_MAX /
+   TTS_MAX_PENDING). It reports the deepest text queue, the most
+   sentences waiting for the speaker and the time the LLM stream was
+   held back.
+
+    python benchmarks/bench_turns.py --transcripts 4 --gap-ms 300
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from voice_pipeline.playback import Player, clock_output  # noqa: E402
+from voice_pipeline.segmenter import SentenceSegmenter  # noqa: E402
+from voice_pipeline.tts_prefetch import TTSPrefetcher  # noqa: E402
+from voice_pipeline.turns import POLICIES, MeteredQueue, TurnScheduler  # noqa: E402
+
+RATE, CHUNK = 24_000, 1024
+SECONDS_PER_CHAR = 0.012                 # Audio per character (faster speech keeps the bench short)
+
+ANSWER = (
+    "Sure. The Eiffel Tower is in Paris, on the Champ de Mars, next to the Seine. "
+    "It was built for the 1889 World's Fair. It is 330 metres tall. "
+    "There are three levels for visitors. The first two can be reached by stairs or lift. "
+    "The top one only by lift. Tickets can be bought online. "
+    "The queues are shorter in the morning. Enjoy your visit!"
+)
+
+
+def synthesize(text: str):
+    audio = bytes(int(len(text) * SECONDS_PER_CHAR * RATE) * 2)
+    time.sleep(0.15)
+    piece = RATE // 10 * 2                       # 100 ms of audio per chunk
+    for i in range(0, len(audio), piece):
+        yield audio[i:i + piece]
+        time.sleep(0.02)
+
+
+class Speaker:
+    """Shared player that counts the answers writing to it at the same time."""
+
+    def __init__(self):
+        self.player  = Player(clock_output(RATE, CHUNK), RATE, CHUNK, target_ms=80)
+        self.lock    = threading.Lock()
+        self.writers = 0
+        self.max_writers = 0
+
+    def begin(self):
+        with self.lock:
+            self.writers    += 1
+            self.max_writers = max(self.max_writers, self.writers)
+
+    def end(self):
+        with self.lock:
+            self.writers -= 1
+
+
+def answer(speaker: Speaker, text: str, tokens_per_s: float, queue_max: int = 0, max_pending: int = 0) -> dict:
+    """One turn through the chain; returns when its audio has been played."""
+    speaker.begin()
+    tts_queue = MeteredQueue(queue_max, name="text queue")
+    prefetcher = TTSPrefetcher(synthesize, speaker.player.write, lookahead=2, write_size=RATE // 50 * 2,
+                               max_pending=max_pending)
+    waiting = [0]                                # Most sentences submitted and not played
+
+    def worker():
+        submitted = 0
+        while (fragment := tts_queue.get()) is not None:
+            prefetcher.submit(fragment)
+            submitted += 1
+            waiting[0] = max(waiting[0], submitted - prefetcher.stats.sentences)
+        prefetcher.close()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    segmenter = SentenceSegmenter(lang="en", min_chars=0)
+    started = time.perf_counter()
+    for word in text.split(" "):
+        time.sleep(1 / tokens_per_s)
+        for fragment in segmenter.feed(word + " "):
+            tts_queue.put(fragment)
+    for fragment in segmenter.flush():
+        tts_queue.put(fragment)
+    llm_s = time.perf_counter() - started
+    tts_queue.put(None)
+    thread.join()
+    speaker.player.drain()
+    speaker.end()
+    return {"queue": tts_queue.stats, "waiting": waiting[0], "llm_s": llm_s}
+
+
+def overlapping(mode: str, args) -> dict:
+    speaker = Speaker()
+    answered = []
+
+    def run(question, timeline=None, speculative=None):
+        answer(speaker, ANSWER, args.tokens_per_s, queue_max=args.queue_max, max_pending=args.max_pending)
+        answered.append(question)
+
+    started = time.perf_counter()
+    threads, scheduler = [], None
+    if mode != "threads":
+        scheduler = TurnScheduler(run, policy=mode, max_pending=2)
+    for i in range(args.transcripts):
+        if scheduler is not None:
+            scheduler.submit(f"Question {i}")
+        else:
+            threads.append(threading.Thread(target=run, args=(f"Question {i}",)))
+            threads[-1].start()
+        time.sleep(args.gap_ms / 1000)
+    if scheduler is not None:
+        while scheduler.busy or scheduler.pending():
+            time.sleep(0.01)
+        scheduler.close()
+    for thread in threads:
+        thread.join()
+    total = time.perf_counter() - started
+    speaker.player.close()
+    stats = scheduler.stats if scheduler else None
+    return {
+        "answers": len(answered),
+        "dropped": stats.dropped + stats.replaced if stats else 0,
+        "writers": speaker.max_writers,
+        "total": total,
+        "wait": stats.total_wait / stats.started if stats and stats.started else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transcripts", type=int, default=4)
+    parser.add_argument("--gap-ms", type=int, default=300)
+    parser.add_argument("--tokens-per-s", type=float, default=60.0)
+    parser.add_argument("--fast-tokens-per-s", type=float, default=400.0)
+    parser.add_argument("--repeat", type=int, default=4, help="answer repetitions in the backpressure test")
+    parser.add_argument("--queue-max", type=int, default=16, help="text queue size (TTS_QUEUE_MAX)")
+    parser.add_argument("--max-pending", type=int, default=4, help="unplayed sentences (TTS_MAX_PENDING)")
+    args = parser.parse_args()
+
+    print(f"1) {args.transcripts} transcripts {args.gap_ms} ms apart, "
+          f"{len(ANSWER) * SECONDS_PER_CHAR:.1f} s answers at {args.tokens_per_s:g} words/s\n")
+    print(f"{'mode':<10}{'answers':>9}{'dropped':>9}{'max writers':>13}{'until quiet':>13}{'avg wait':>11}")
+    for mode in ("threads", *POLICIES):
+        r = overlapping(mode, args)
+        print(f"{mode:<10}{r['answers']:>9}{r['dropped']:>9}{r['writers']:>13}{r['total']:>11.1f} s"
+              f"{r['wait'] * 1000:>8.0f} ms")
+
+    text = " ".join([ANSWER] * args.repeat)
+    print(f"\n2) {len(text) * SECONDS_PER_CHAR:.1f} s answer at {args.fast_tokens_per_s:g} words/s\n")
+    print(f"{'queues':<18}{'text queue':>12}{'unplayed':>10}{'LLM read':>11}{'LLM held':>11}")
+    bounded = f"{args.queue_max} / {args.max_pending}"
+    for label, queue_max, max_pending in (("unbounded", 0, 0), (bounded, args.queue_max, args.max_pending)):
+        speaker = Speaker()
+        r = answer(speaker, text, args.fast_tokens_per_s, queue_max=queue_max, max_pending=max_pending)
+        speaker.player.close()
+        print(f"{label:<18}{r['queue'].max_depth:>12}{r['waiting']:>10}{r['llm_s']:>9.1f} s"
+              f"{r['queue'].blocked_s:>9.1f} s")
+
+
+if __name__ == "__main__":
+    main()
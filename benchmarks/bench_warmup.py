@@ -0,0 +1,110 @@
+"""
+First-request latency of the chat and TTS deployments: cold vs warm connections.
+
+For every run and service it measures the latency of the first request of a
+turn (chat: first token of a streamed completion; TTS: first PCM byte):
+- cold:  new client with the SDK defaults, nothing sent before (first turn
+         after startup without warm-up: DNS + TCP + TLS in the request);
+- warm:  new client from `pooled_http_client()` after `warm_http()`;
+- idle:  the same two clients after `--idle` seconds without traffic (the
+         default pool drops its sockets after 5 s, the pooled one keeps them).
+
+It uses the endpoints in .env (the real handshake costs); `--fake` runs it
+against the local stand-ins instead (no TLS, only checks the mechanics).
+
+    python benchmarks/bench_warmup.py --runs 5 --idle 10
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+from openai import AzureOpenAI
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from fake_services import FakeServices  # noqa: E402
+from voice_pipeline.warmup import pooled_http_client, warm_http  # noqa: E402
+
+
+def make_clients(env: dict, pooled: bool) -> dict[str, AzureOpenAI]:
+    def client(suffix: str) -> AzureOpenAI:
+        return AzureOpenAI(
+            azure_endpoint=env[f"AZURE_OPENAI_ENDPOINT{suffix}"],
+            api_key=env[f"AZURE_OPENAI_API_KEY{suffix}"],
+            api_version=env[f"AZURE_OPENAI_API_VERSION{suffix}"],
+            **({"http_client": pooled_http_client()} if pooled else {}),
+        )
+
+    return {"chat": client(""), "tts": client("_TTS")}
+
+
+def first_byte(env: dict, service: str, client: AzureOpenAI) -> float:
+    started = time.perf_counter()
+    if service == "chat":
+        stream = client.chat.completions.create(
+            model=env["AZURE_OPENAI_DEPLOYMENT_NAME"],
+            messages=[{"role": "user", "content": "Say OK."}],
+            max_tokens=1, stream=True,
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                break
+        elapsed = time.perf_counter() - started
+        stream.close()
+        return elapsed
+    with client.audio.speech.with_streaming_response.create(
+        model=env["AZURE_OPENAI_DEPLOYMENT_NAME_TTS"], voice="coral",
+        input="OK.", response_format="pcm",
+    ) as response:
+        next(response.iter_bytes())
+        return time.perf_counter() - started
+
+
+def run(env: dict, runs: int, idle: float) -> dict[str, dict[str, list[float]]]:
+    results = {s: {"cold": [], "warm": [], "idle default": [], "idle pooled": []} for s in ("chat", "tts")}
+    for i in range(runs):
+        cold   = make_clients(env, pooled=False)
+        warm   = make_clients(env, pooled=True)
+        for service in results:
+            results[service]["cold"].append(first_byte(env, service, cold[service]))
+            warm_http(warm[service])
+            results[service]["warm"].append(first_byte(env, service, warm[service]))
+        if idle > 0:
+            time.sleep(idle)
+            for service in results:
+                results[service]["idle default"].append(first_byte(env, service, cold[service]))
+                results[service]["idle pooled"].append(first_byte(env, service, warm[service]))
+        print(f"run {i + 1}/{runs} done", flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--idle", type=float, default=10.0, help="seconds without traffic (0: skip)")
+    parser.add_argument("--fake", action="store_true", help="use the local stand-ins instead of .env")
+    args = parser.parse_args()
+
+    if args.fake:
+        with FakeServices(chat={"ttft": 0.2}, tts={"first_byte": 0.2}) as services:
+            results = run(services.env(), args.runs, args.idle)
+    else:
+        load_dotenv(override=True)
+        results = run(dict(os.environ), args.runs, args.idle)
+
+    print(f"\nFirst byte of the first request, ms (p50 / max over {args.runs} runs)\n")
+    columns = list(next(iter(results.values())))
+    print(f"{'service':<10}" + "".join(f"{c:>18}" for c in columns))
+    for service, cells in results.items():
+        row = [
+            f"{statistics.median(v) * 1000:.0f} / {max(v) * 1000:.0f}" if v else "-"
+            for v in cells.values()
+        ]
+        print(f"{service:<10}" + "".join(f"{c:>18}" for c in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+"""
+Local stand-ins for the Azure services used by the scripts.
+
+- `FakeRealtimeSTT`: realtime transcription websocket (`intent=transcription`).
+  Emulates `server_vad` with the client-side `Endpointer` (on 24 kHz PCM or
+  8 kHz G.711 input), answers `input_audio_buffer.commit`, and sends `...transcription.delta` /
+  `...transcription.completed` events after an injected latency.
+- `FakeChatServer`: `/openai/deployments/<d>/chat/completions`, streaming
+  (SSE) or not, with time-to-first-token and tokens/s. Optionally a prefill
+  cost per uncached prompt token and a prompt cache (prefixes of 1024+
+  tokens in 128-token steps, as on Azure OpenAI), reported in the usage.
+- `FakeTTSServer`: `/openai/deployments/<d>/audio/speech` returning PCM
+  with first-byte latency and a synthesis speed (x real time).
+
+Every latency accepts a `jitter` (uniform, seconds). The HTTP stand-ins can
+also throttle (`throttle_p`: 429 with `Retry-After: retry_after`), fail
+(`error_p`: 500) and have a slow tail (`tail_p`: `tail_s` more before the
+first byte). `FakeServices(chat_pool=[...], tts_pool=[...])` adds more chat /
+TTS deployments (`AZURE_OPENAI_ENDPOINT_2`…). Run standalone to serve them
+for the real scripts:
+
+    python benchmarks/fake_services.py
+"""
+
+import asyncio
+import base64
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from websockets.asyncio.server import serve
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from voice_pipeline.codecs import g711_decode  # noqa: E402
+from voice_pipeline.vad import Endpointer  # noqa: E402
+
+RATE = 24_000
+
+DEFAULT_TRANSCRIPT = "What is the capital of France?"
+DEFAULT_ANSWER = (
+    "The capital of France is Paris. It is also its largest city, "
+    "with more than two million inhabitants. Paris is known for the Eiffel Tower, "
+    "the Louvre museum and its cafés. Would you like to know anything else?"
+)
+
+
+def _delay(base: float, jitter: float) -> float:
+    return max(0.0, base + random.uniform(-jitter, jitter))
+
+
+# ---------------------------------------------------------------------------
+# Realtime transcription websocket
+# ---------------------------------------------------------------------------
+class FakeRealtimeSTT:
+    """Realtime transcription endpoint served from a background event loop."""
+
+    def __init__(
+        self,
+        transcript: str = DEFAULT_TRANSCRIPT,
+        latency: float = 0.25,           # commit → first delta
+        jitter: float = 0.0,
+        words_per_s: float = 40.0,       # delta events rate
+        silence_ms: int = 500,           # server_vad silence_duration_ms
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.transcript  = transcript
+        self.latency     = latency
+        self.jitter      = jitter
+        self.words_per_s = words_per_s
+        self.silence_ms  = silence_ms
+        self.host, self.port = host, port
+        self.sessions    = 0
+        self.audio_bytes = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop: asyncio.Event | None = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        """Value for AZURE_OPENAI_ENDPOINT_STT (scripts only swap https→wss)."""
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        async with serve(self._session, self.host, self.port, compression=None) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._stop.wait()
+
+    async def _session(self, ws):
+        self.sessions += 1
+        vad: Endpointer | None = Endpointer(rate=RATE, hangover_ms=self.silence_ms)
+        g711 = None                          # "mulaw" / "alaw" with input_audio_format g711_*
+        item = 0
+
+        async def send(ev):
+            await ws.send(json.dumps(ev))
+
+        async def commit():
+            nonlocal item
+            item += 1
+            item_id = f"item_{item}"
+            await send({"type": "input_audio_buffer.committed", "item_id": item_id})
+            asyncio.create_task(transcribe(item_id))
+
+        async def transcribe(item_id):
+            await asyncio.sleep(_delay(self.latency, self.jitter))
+            for i, word in enumerate(self.transcript.split()):
+                await send({                 # Tokens carry their leading space, as in the service
+                    "type": "conversation.item.input_audio_transcription.delta",
+                    "item_id": item_id, "delta": word if i == 0 else " " + word,
+                })
+                await asyncio.sleep(1 / self.words_per_s)
+            await send({
+                "type": "conversation.item.input_audio_transcription.completed",
+                "item_id": item_id, "transcript": self.transcript,
+            })
+
+        try:
+            async for raw in ws:
+                ev = json.loads(raw)
+                etype = ev.get("type", "")
+                if etype == "transcription_session.update":
+                    audio_format = ev.get("session", {}).get("input_audio_format", "pcm16")
+                    if audio_format.startswith("g711"):
+                        g711 = "mulaw" if audio_format == "g711_ulaw" else "alaw"
+                        vad  = Endpointer(rate=8_000, hangover_ms=self.silence_ms)
+                    if ev.get("session", {}).get("turn_detection") is None:
+                        vad = None           # Client commits the turns
+                    await send({"type": "transcription_session.updated", "session": ev.get("session", {})})
+                elif etype == "input_audio_buffer.append":
+                    pcm = base64.b64decode(ev["audio"])
+                    self.audio_bytes += len(pcm)
+                    if vad is None:
+                        continue
+                    if g711:
+                        pcm = g711_decode(pcm, g711).tobytes()
+                    result = vad.feed(pcm)
+                    if result.speech_started:
+                        await send({"type": "input_audio_buffer.speech_started"})
+                    if result.speech_ended:
+                        await send({"type": "input_audio_buffer.speech_stopped"})
+                        await commit()
+                elif etype == "input_audio_buffer.commit":
+                    await commit()
+        except Exception:
+            pass                             # Client went away
+
+
+# ---------------------------------------------------------------------------
+# HTTP (chat completions + TTS)
+# ---------------------------------------------------------------------------
+class _FakeHTTPServer:
+    """Threaded HTTP/1.1 server (keep-alive, chunked responses)."""
+
+    def __init__(
+        self,
+        throttle_p: float = 0.0,         # Probability of a 429
+        retry_after: float = 1.0,        # …and its Retry-After (s)
+        error_p: float = 0.0,            # Probability of a 500
+        tail_p: float = 0.0,             # Probability of a slow first byte
+        tail_s: float = 1.0,             # …and how much slower
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):            # Warm-up / keep-alive pings (GET /openai/models)
+                owner.send_json(self, {"object": "list", "data": []})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                owner.requests += 1
+                if not owner.fault(self):
+                    owner.handle(self, json.loads(body or b"{}"))
+
+        class Server(ThreadingHTTPServer):
+            request_queue_size = 1024        # Many sessions connect at once
+
+            def handle_error(self, request, client_address):
+                pass                         # Clients that exit drop keep-alive sockets
+
+        self.throttle_p  = throttle_p
+        self.retry_after = retry_after
+        self.error_p     = error_p
+        self.tail_p      = tail_p
+        self.tail_s      = tail_s
+        self.requests  = 0
+        self.throttled = 0
+        self.failed    = 0
+        self.httpd = Server((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.host, self.port = self.httpd.server_address[:2]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def handle(self, req: BaseHTTPRequestHandler, body: dict):
+        raise NotImplementedError
+
+    def fault(self, req) -> bool:
+        """Injected 429 / 500 (True: answered) or slow tail."""
+        roll = random.random()
+        if roll < self.throttle_p:
+            self.throttled += 1
+            self.send_json(req, {"error": {"code": "429", "message": "Rate limit exceeded"}}, status=429,
+                           headers={"Retry-After": f"{self.retry_after:g}",
+                                    "retry-after-ms": str(int(self.retry_after * 1000))})
+            return True
+        if roll < self.throttle_p + self.error_p:
+            self.failed += 1
+            self.send_json(req, {"error": {"code": "500", "message": "Internal server error"}}, status=500)
+            return True
+        if random.random() < self.tail_p:
+            time.sleep(self.tail_s)
+        return False
+
+    # --- Response helpers --------------------------------------------------
+    @staticmethod
+    def send_json(req, obj, status=200, headers=None):
+        data = json.dumps(obj).encode()
+        req.send_response(status)
+        req.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            req.send_header(name, value)
+        req.send_header("Content-Length", str(len(data)))
+        req.end_headers()
+        req.wfile.write(data)
+
+    @staticmethod
+    def start_chunked(req, content_type):
+        req.send_response(200)
+        req.send_header("Content-Type", content_type)
+        req.send_header("Transfer-Encoding", "chunked")
+        req.end_headers()
+
+    @staticmethod
+    def send_chunk(req, data: bytes):
+        req.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        req.wfile.flush()
+
+
+class FakeChatServer(_FakeHTTPServer):
+    """Chat completions with time-to-first-token and a token rate."""
+
+    def __init__(
+        self,
+        answer: str = DEFAULT_ANSWER,
+        ttft: float = 0.35,
+        jitter: float = 0.0,
+        tokens_per_s: float = 60.0,
+        prefill_ms_per_1k: float = 0.0,  # TTFT added per 1000 uncached prompt tokens
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.answer       = answer
+        self.ttft         = ttft
+        self.jitter       = jitter
+        self.tokens_per_s = tokens_per_s
+        self.prefill_ms_per_1k = prefill_ms_per_1k
+        self._prompts: list[str] = []    # Recent prompts (prompt cache)
+
+    def tokens(self) -> list[str]:
+        return re.findall(r"\S+\s*", self.answer)
+
+    def prompt_usage(self, messages: list[dict]) -> tuple[int, int]:
+        """(prompt tokens, cached tokens); ~4 characters per token."""
+        prompt = "".join(f"<{m['role']}>{m.get('content') or ''}" for m in messages)
+        total  = len(prompt) // 4 + 3 * len(messages)
+        common = max((len(os.path.commonprefix([prompt, p])) for p in self._prompts), default=0)
+        cached = common // 4 // 128 * 128 if common // 4 >= 1024 else 0
+        self._prompts = (self._prompts + [prompt])[-64:]
+        return total, min(cached, total)
+
+    def handle(self, req, body):
+        model  = req.path.split("/deployments/")[-1].split("/")[0]
+        tokens = self.tokens()
+        prompt_tokens, cached_tokens = self.prompt_usage(body.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+        prefill = self.prefill_ms_per_1k * (prompt_tokens - cached_tokens) / 1e6
+        time.sleep(_delay(self.ttft, self.jitter) + prefill)
+        if not body.get("stream"):
+            time.sleep(len(tokens) / self.tokens_per_s)
+            self.send_json(req, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0, "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": self.answer},
+                }],
+                "usage": usage,
+            })
+            return
+
+        self.start_chunked(req, "text/event-stream")
+        for i, tok in enumerate(tokens):
+            if i:
+                time.sleep(1 / self.tokens_per_s)
+            chunk = {
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {"content": tok}, "finish_reason": None}],
+            }
+            try:
+                self.send_chunk(req, f"data: {json.dumps(chunk)}\n\n".encode())
+            except OSError:
+                return                       # Client closed the stream
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk = {
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": model, "choices": [], "usage": usage,
+            }
+            self.send_chunk(req, f"data: {json.dumps(chunk)}\n\n".encode())
+        self.send_chunk(req, b"data: [DONE]\n\n")
+        self.send_chunk(req, b"")
+
+
+class FakeTTSServer(_FakeHTTPServer):
+    """PCM TTS with first-byte latency and a synthesis speed."""
+
+    def __init__(
+        self,
+        first_byte: float = 0.25,
+        jitter: float = 0.0,
+        speed: float = 4.0,              # Seconds of audio produced per second
+        chars_per_s: float = 15.0,       # Speaking rate of the voice
+        chunk_ms: int = 100,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.first_byte  = first_byte
+        self.jitter      = jitter
+        self.speed       = speed
+        self.chars_per_s = chars_per_s
+        self.chunk_ms    = chunk_ms
+
+    def audio_seconds(self, text: str) -> float:
+        return max(0.2, len(text) / self.chars_per_s)
+
+    def handle(self, req, body):
+        total = int(self.audio_seconds(body.get("input", "")) * RATE) * 2
+        step  = RATE * self.chunk_ms // 1000 * 2
+        chunk = bytes(step)
+        time.sleep(_delay(self.first_byte, self.jitter))
+        self.start_chunked(req, "audio/pcm")
+        sent = 0
+        try:
+            while sent < total:
+                n = min(step, total - sent)
+                self.send_chunk(req, chunk[:n])
+                sent += n
+                time.sleep(n / 2 / RATE / self.speed)
+            self.send_chunk(req, b"")
+        except OSError:
+            pass                             # Client aborted (barge-in)
+
+
+class FakeServices:
+    """Starts the stand-ins; `env()` points the scripts at them."""
+
+    def __init__(
+        self,
+        stt: dict | None = None,
+        chat: dict | None = None,
+        tts: dict | None = None,
+        chat_pool: list[dict] = (),      # More chat deployments (…_2, …_3)
+        tts_pool: list[dict] = (),
+    ):
+        self.stt  = FakeRealtimeSTT(**(stt or {}))
+        self.chat = FakeChatServer(**(chat or {}))
+        self.tts  = FakeTTSServer(**(tts or {}))
+        self.chat_pool = [FakeChatServer(**kw) for kw in chat_pool]
+        self.tts_pool  = [FakeTTSServer(**kw) for kw in tts_pool]
+
+    def _servers(self) -> list:
+        return [self.stt, self.chat, self.tts, *self.chat_pool, *self.tts_pool]
+
+    def __enter__(self):
+        for server in self._servers():
+            server.start()
+        return self
+
+    def __exit__(self, *exc):
+        for server in self._servers():
+            server.stop()
+
+    def env(self) -> dict[str, str]:
+        extra = {}
+        for stage, pool in (("", self.chat_pool), ("_TTS", self.tts_pool)):
+            for n, server in enumerate(pool, start=2):
+                extra[f"AZURE_OPENAI_ENDPOINT{stage}_{n}"] = server.endpoint
+                extra[f"AZURE_OPENAI_API_KEY{stage}_{n}"] = "fake"
+        values = {
+            "AZURE_OPENAI_ENDPOINT_STT": self.stt.endpoint,
+            "AZURE_OPENAI_API_KEY_STT": "fake",
+            "AZURE_OPENAI_DEPLOYMENT_NAME_STT": "fake-transcribe",
+            "AZURE_OPENAI_API_VERSION_STT": "2025-04-01-preview",
+            "AZURE_OPENAI_ENDPOINT_TTS": self.tts.endpoint,
+            "AZURE_OPENAI_API_KEY_TTS": "fake",
+            "AZURE_OPENAI_DEPLOYMENT_NAME_TTS": "fake-tts",
+            "AZURE_OPENAI_API_VERSION_TTS": "2025-03-01-preview",
+            "AZURE_OPENAI_ENDPOINT": self.chat.endpoint,
+            "AZURE_OPENAI_API_KEY": "fake",
+            "AZURE_OPENAI_DEPLOYMENT_NAME": "fake-chat",
+            "AZURE_OPENAI_API_VERSION": "2024-12-01-preview",
+        }
+        return values | extra
+
+
+if __name__ == "__main__":
+    with FakeServices() as services:
+        print("Fake services running. Environment for the scripts:\n")
+        for key, value in services.env().items():
+            print(f'{key}="{value}"')
+        print('MIC_WAV_FILE="<24 kHz mono WAV>"\nSPEAKER_SINK="null"\n\nCtrl+C to stop.')
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
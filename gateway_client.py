@@ -0,0 +1,14 @@
+"""
+Client for stt-llm-tts_gateway.py
+Sends the microphone to the gateway and plays the answer it streams back.
+Same as `python -m voice_pipeline client`.
+
+    python gateway_client.py ws://localhost:8765/?voice=ballad
+"""
+
+import sys
+
+from voice_pipeline.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(["client", *sys.argv[1:]]))
@@ -0,0 +1,15 @@
+"""
+Speech-to-AOAI-to-TTS with streaming, on one asyncio event loop
+Same pipeline as stt-llm-tts_streaming.py (realtime transcription,
+streaming AOAI response, sentence TTS prefetch, barge-in) driven by
+voice_pipeline.engine: async clients and websocket, a few coroutines
+per session instead of a thread per stage and per turn.
+Same as `python -m voice_pipeline async`.
+"""
+
+import sys
+
+from voice_pipeline.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(["async", *sys.argv[1:]]))
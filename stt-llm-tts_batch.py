@@ -0,0 +1,13 @@
+"""
+Batch mode: a directory or manifest of recordings through STT → LLM → TTS
+Transcripts, answers and answer audio for every file, many files at a time,
+faster than real time (see voice_pipeline/batch.py).
+Same as `python -m voice_pipeline batch`.
+"""
+
+import sys
+
+from voice_pipeline.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(["batch", *sys.argv[1:]]))
@@ -0,0 +1,14 @@
+"""
+Voice gateway: many remote callers, one STT → LLM → TTS session each
+Callers stream their microphone over a websocket and receive the answer
+audio on the same socket (see voice_pipeline/gateway.py for the protocol
+and gateway_client.py for a client).
+Same as `python -m voice_pipeline gateway`.
+"""
+
+import sys
+
+from voice_pipeline.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(["gateway", *sys.argv[1:]]))
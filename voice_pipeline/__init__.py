@@ -0,0 +1,7 @@
+"""
+Shared building blocks for the STT → LLM → TTS demo scripts.
+
+`python -m voice_pipeline <variant>` runs one of the pipelines in
+`voice_pipeline.apps`; the scripts in the repository root (stt-llm-tts.py,
+stt-llm-tts_streaming.py, azure_speech_demo.py…) are shortcuts to it.
+"""
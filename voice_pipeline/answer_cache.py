@@ -0,0 +1,265 @@
+"""
+Semantic answer cache: questions asked in other words get the answer given
+before, without an LLM call (and, with its audio, without TTS).
+
+    transcript ─► embed ─► nearest question (cosine) ─► ≥ threshold, not expired?
+                                 │ yes                          │ no
+                                 ▼                              ▼
+                        cached answer (+ audio)      LLM → answer → store()
+
+- Index: the normalized embeddings of the cached questions in one NumPy
+  matrix, so a lookup is one matrix-vector product.
+- Entries expire after `ttl_s` and are evicted least-recently-used over
+  `memory_bytes` (question, answer, embedding and audio).
+- `save(path)` / `load(path)` keep the index in one `.npz` file (written
+  atomically), so the cache survives restarts.
+
+Only answers that do not depend on the conversation should be cached: the
+lookup sees the transcript alone. `embed(text)` returns a vector; the
+`aoai_embedder` calls an embeddings deployment, `hashing_embedder` is a
+local stand-in (words and character trigrams hashed into a fixed-size
+vector) that needs no service: it catches rewordings that share most of
+their words, not synonyms.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+
+# ---------------------------------------------------------------------------
+# Embedders
+# ---------------------------------------------------------------------------
+def _plain(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.findall(r"\w+", text))
+
+
+def hashing_embedder(dim: int = 512) -> Callable[[str], np.ndarray]:
+    """Local stand-in: bag of word and character-trigram hashes (no service, no model)."""
+    def embed(text: str) -> np.ndarray:
+        vector = np.zeros(dim, dtype=np.float32)
+        plain  = _plain(text)
+        grams  = plain.split() + [f" {plain} "[i:i + 3] for i in range(len(plain))]
+        for gram in grams:
+            h = int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "little")
+            vector[h % dim] += 1.0 if h >> 63 else -1.0
+        return vector
+    return embed
+
+
+def aoai_embedder(client, model: str) -> Callable[[str], np.ndarray]:
+    """Embeddings deployment of an (Azure) OpenAI client."""
+    def embed(text: str) -> np.ndarray:
+        data = client.embeddings.create(model=model, input=text).data[0].embedding
+        return np.asarray(data, dtype=np.float32)
+    return embed
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+class Entry:
+    def __init__(self, question: str, answer: str, vector: np.ndarray, created: float,
+                 answer_s: float = 0.0, audio: bytes | None = None):
+        self.question = question
+        self.answer   = answer
+        self.vector   = vector
+        self.created  = created              # time.time()
+        self.answer_s = answer_s             # What the LLM took to answer it
+        self.audio    = audio                # PCM of the whole answer, if kept
+
+    @property
+    def size(self) -> int:
+        return (len(self.question.encode()) + len(self.answer.encode()) + self.vector.nbytes
+                + len(self.audio or b""))
+
+
+class Lookup:
+    """Result of `SemanticCache.lookup`: `entry` is None on a miss."""
+
+    def __init__(self, vector: np.ndarray, entry: Entry | None, similarity: float, seconds: float):
+        self.vector     = vector             # Reused by `store()` after a miss
+        self.entry      = entry
+        self.similarity = similarity
+        self.seconds    = seconds            # Embedding + search
+
+
+class AnswerCacheStats:
+    def __init__(self):
+        self.lookups    = 0
+        self.hits       = 0
+        self.audio_hits = 0                  # Hits served with their audio (no TTS)
+        self.expired    = 0
+        self.evictions  = 0
+        self.lookup_s   = 0.0
+        self.saved_s    = 0.0                # LLM time not spent, minus the lookups of the hits
+
+    def summary(self) -> str:
+        rate = self.hits / self.lookups if self.lookups else 0.0
+        avg  = self.lookup_s / self.lookups if self.lookups else 0.0
+        return (
+            f"{self.hits}/{self.lookups} hits ({rate:.0%}, {self.audio_hits} with audio), "
+            f"{self.saved_s:.1f} s of LLM time saved, lookup avg {avg * 1000:.0f} ms, "
+            f"{self.expired} expired, {self.evictions} evicted"
+        )
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        embed: Callable[[str], np.ndarray],
+        threshold: float = 0.9,
+        ttl_s: float = 86_400,
+        memory_bytes: int = 64 << 20,
+        path: str | None = None,
+    ):
+        self.embed        = embed
+        self.threshold    = threshold
+        self.ttl_s        = ttl_s
+        self.memory_bytes = memory_bytes
+        self.path         = path             # Where the pipeline loads / saves it
+        self.stats        = AnswerCacheStats()
+        self._lock    = threading.Lock()
+        self._entries: OrderedDict[int, Entry] = OrderedDict()   # LRU order
+        self._used    = 0
+        self._next_id = 0
+        self._ids: list[int] = []
+        self._matrix: np.ndarray | None = None                   # Rebuilt after changes
+
+    @classmethod
+    def from_env(cls, client, env=os.environ) -> "SemanticCache":
+        """SEMANTIC_CACHE_* settings (`client`: for the embeddings deployment)."""
+        if env.get("SEMANTIC_CACHE_EMBEDDER", "aoai") == "local":
+            embed = hashing_embedder()
+        else:
+            embed = aoai_embedder(client, env.get("AZURE_OPENAI_DEPLOYMENT_NAME_EMBEDDINGS", "text-embedding-3-small"))
+        return cls(
+            embed,
+            threshold=float(env.get("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+            ttl_s=float(env.get("SEMANTIC_CACHE_TTL_S", "86400")),
+            memory_bytes=int(env.get("SEMANTIC_CACHE_MB", "64")) << 20,
+            path=env.get("SEMANTIC_CACHE_FILE") or None,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- Lookup / store ----------------------------------------------------
+    def lookup(self, question: str) -> Lookup:
+        start  = time.perf_counter()
+        vector = _unit(self.embed(question))
+        entry, best = None, 0.0
+        with self._lock:
+            self._expire()
+            if self._entries:
+                matrix = self._index()
+                sims   = matrix @ vector
+                i      = int(np.argmax(sims))
+                best   = float(sims[i])
+                if best >= self.threshold:
+                    key = self._ids[i]
+                    entry = self._entries[key]
+                    self._entries.move_to_end(key)
+            seconds = time.perf_counter() - start
+            self.stats.lookups  += 1
+            self.stats.lookup_s += seconds
+            if entry is not None:
+                self.stats.hits    += 1
+                self.stats.saved_s += max(0.0, entry.answer_s - seconds)
+                self.stats.audio_hits += entry.audio is not None
+        return Lookup(vector, entry, best, seconds)
+
+    def store(self, question: str, answer: str, vector: np.ndarray | None = None,
+              answer_s: float = 0.0, audio: bytes | None = None) -> Entry | None:
+        """Caches an answer (`vector`: the one of the missed lookup, not embedded again)."""
+        if not answer:
+            return None
+        vector = _unit(self.embed(question)) if vector is None else vector
+        entry  = Entry(question, answer, vector, time.time(), answer_s, audio or None)
+        if entry.size > self.memory_bytes and entry.audio is not None:
+            entry.audio = None               # The text alone may still fit
+        if entry.size > self.memory_bytes:
+            return None
+        with self._lock:
+            self._add(entry)
+        return entry
+
+    # --- Persistence -------------------------------------------------------
+    def save(self, path: str):
+        """Writes every live entry to `path` (.npz), atomically."""
+        with self._lock:
+            self._expire()
+            entries = list(self._entries.values())      # LRU order is kept
+        meta  = [{"question": e.question, "answer": e.answer, "created": e.created, "answer_s": e.answer_s,
+                  "audio": len(e.audio) if e.audio is not None else -1} for e in entries]
+        dim   = entries[0].vector.size if entries else 0
+        vectors = np.stack([e.vector for e in entries]) if entries else np.zeros((0, dim), np.float32)
+        audio = np.frombuffer(b"".join(e.audio or b"" for e in entries), dtype=np.uint8)
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, vectors=vectors, audio=audio, meta=np.array(json.dumps(meta)))
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> int:
+        """Adds the entries saved in `path` that have not expired; returns how many."""
+        with np.load(path) as data:
+            vectors, audio = data["vectors"], data["audio"].tobytes()
+            meta = json.loads(str(data["meta"]))
+        loaded, offset = 0, 0
+        with self._lock:
+            for item, vector in zip(meta, vectors):
+                pcm = None
+                if item["audio"] >= 0:
+                    pcm = audio[offset:offset + item["audio"]]
+                    offset += item["audio"]
+                if time.time() - item["created"] > self.ttl_s:
+                    continue
+                self._add(Entry(item["question"], item["answer"], vector.astype(np.float32),
+                                item["created"], item["answer_s"], pcm))
+                loaded += 1
+        return loaded
+
+    # --- Internals (under the lock) ----------------------------------------
+    def _add(self, entry: Entry):
+        key, self._next_id = self._next_id, self._next_id + 1
+        self._entries[key] = entry
+        self._used  += entry.size
+        self._matrix = None
+        while self._used > self.memory_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._used -= evicted.size
+            self.stats.evictions += 1
+
+    def _expire(self):
+        cutoff  = time.time() - self.ttl_s
+        expired = [key for key, e in self._entries.items() if e.created < cutoff]
+        for key in expired:
+            self._used -= self._entries.pop(key).size
+        if expired:
+            self.stats.expired += len(expired)
+            self._matrix = None
+
+    def _index(self) -> np.ndarray:
+        if self._matrix is None:
+            self._ids    = list(self._entries)
+            self._matrix = np.stack([self._entries[key].vector for key in self._ids])
+        return self._matrix
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
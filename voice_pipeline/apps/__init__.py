@@ -0,0 +1,10 @@
+"""
+The pipeline variants behind `python -m voice_pipeline <variant>`.
+
+Each module defines `App(args, profile)`: nothing is opened when it is
+created; `start()` creates only the clients, SDK objects and audio devices
+that variant uses (each step timed in `profile`), `run()` blocks in the
+conversation loop and `close()` releases the devices. Heavy dependencies
+(openai, websocket-client, the Speech SDK, PyAudio, NumPy) are imported
+inside those methods, so a variant never pays for another one's imports.
+"""
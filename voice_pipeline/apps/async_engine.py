@@ -0,0 +1,124 @@
+"""
+Speech-to-AOAI-to-TTS with streaming, on one asyncio event loop
+Same pipeline as the streaming variant (realtime transcription, streaming
+AOAI response, sentence TTS prefetch, barge-in) driven by
+voice_pipeline.engine: async clients and websocket, a few coroutines per
+session instead of a thread per stage and per turn.
+
+    python -m voice_pipeline async
+"""
+
+import asyncio
+import os
+
+from ..audio_io import AudioDevices
+from ..startup import StartupProfile
+from ..timeline import TimelineRecorder
+from ..tts_cache import TTSCache
+
+# Audio constants
+RATE            = 24_000                 # 24 kHz → matches Azure voices
+CHANNELS        = 1
+CHUNK           = 1024
+
+
+class AsyncPipeline:
+    """
+    `start()` builds the config, the async clients and the audio bridges;
+    the warm-up needs the event loop, so it runs at the start of `run()`.
+    """
+
+    def __init__(self, args=None, profile: StartupProfile | None = None):
+        self.profile     = profile or StartupProfile()
+        self.warmup      = os.environ.get("WARMUP", "1") == "1"        # Open the connections at startup
+        self.keepalive_s = float(os.environ.get("KEEPALIVE_S", "60"))  # Idle pings (0: none)
+        self.devices = self.speaker = None
+
+    def start(self):
+        env = os.environ
+        with self.profile.phase("engine"):
+            from ..engine import EngineConfig, open_async_mic, open_async_speaker
+
+            self.config = EngineConfig.from_env(rate=RATE, chunk=CHUNK)
+
+        with self.profile.phase("clients"):
+            from openai import AsyncAzureOpenAI
+
+            from ..warmup import pooled_async_http_client
+
+            # Azure OpenAI async clients (keep-alive pools: connections reused across turns)
+            self.aoai_client = AsyncAzureOpenAI(
+                azure_endpoint=env["AZURE_OPENAI_ENDPOINT"],
+                api_key=env["AZURE_OPENAI_API_KEY"],
+                api_version=env["AZURE_OPENAI_API_VERSION"],
+                http_client=pooled_async_http_client(),
+            )
+            self.tts_client = AsyncAzureOpenAI(
+                azure_endpoint=env["AZURE_OPENAI_ENDPOINT_TTS"],
+                api_key=env["AZURE_OPENAI_API_KEY_TTS"],
+                api_version=env["AZURE_OPENAI_API_VERSION_TTS"],
+                http_client=pooled_async_http_client(),
+            )
+
+        with self.profile.phase("audio"):
+            # PyAudio – Microphone and speaker
+            # (MIC_WAV_FILE / SPEAKER_SINK=null replace them with a WAV file / null sink)
+            self.devices = AudioDevices(RATE, CHUNK, CHANNELS)
+            if env.get("MIC_WAV_FILE"):
+                self.mic = open_async_mic(None, RATE, CHUNK)
+            else:
+                self.mic = open_async_mic(self.devices.audio, RATE, CHUNK, **self.devices.stream_kwargs())
+            if env.get("SPEAKER_SINK"):
+                self.speaker = open_async_speaker(None, RATE, CHUNK)
+            else:
+                self.speaker = open_async_speaker(self.devices.audio, RATE, CHUNK, **self.devices.stream_kwargs())
+
+        with self.profile.phase("metrics + cache"):
+            self.timelines = TimelineRecorder(
+                jsonl_path=env.get("METRICS_JSONL"),
+                port=int(env.get("METRICS_PORT", "0")),
+            )
+            self.tts_cache = TTSCache(
+                memory_bytes=int(env.get("TTS_CACHE_MB", "64")) << 20,
+                directory=env.get("TTS_CACHE_DIR") or None,
+                disk_bytes=int(env.get("TTS_CACHE_DISK_MB", "512")) << 20,
+            )
+
+    def run(self):
+        try:
+            asyncio.run(self.main())
+        except KeyboardInterrupt:
+            pass
+
+    def close(self):
+        if self.speaker is not None:
+            self.speaker.close()
+        if self.devices is not None:
+            self.devices.close()
+
+    async def main(self):
+        from ..engine import VoiceSession
+        from ..warmup import WarmupReport, keep_alive_async, warm_http_async
+
+        pings = {"chat": lambda: warm_http_async(self.aoai_client), "tts": lambda: warm_http_async(self.tts_client)}
+        if self.warmup:                  # DNS + TLS + HTTP handshakes now, not in the first turn
+            print("[Warm-up]", (await WarmupReport().run_async(pings)).summary())
+
+        session = VoiceSession(
+            self.config, self.aoai_client, self.tts_client, self.mic, self.speaker,
+            timelines=self.timelines, tts_cache=self.tts_cache,
+        )
+        print("Connected to:", self.config.stt_url)
+        print("Say something!")
+        keepalive = asyncio.create_task(
+            keep_alive_async(pings, self.keepalive_s if self.warmup else 0, busy=lambda: session.playing)
+        )
+        try:
+            await session.run()
+        finally:
+            keepalive.cancel()
+            if session.framing is not None:
+                print("[STT]", session.framing.summary())
+
+
+App = AsyncPipeline
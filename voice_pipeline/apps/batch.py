@@ -0,0 +1,94 @@
+"""
+Batch mode: a directory or manifest of recordings through STT → LLM → TTS
+Every file is streamed to its own transcription session faster than real
+time, `--workers` files at a time; the transcripts, answers and answer
+audio go to `--out` (see voice_pipeline/batch.py).
+
+    python -m voice_pipeline batch recordings/ --out batch_out --workers 8 --speed 10
+"""
+
+import asyncio
+import os
+
+from ..startup import StartupProfile
+
+
+class BatchRunner:
+    """`start()` lists the inputs and builds the clients; `run()` processes them."""
+
+    def __init__(self, args, profile: StartupProfile | None = None):
+        self.args    = args
+        self.profile = profile or StartupProfile()
+        self.warmup  = os.environ.get("WARMUP", "1") == "1"
+
+    def start(self):
+        args, env = self.args, os.environ
+        with self.profile.phase("batch"):
+            from ..batch import BatchOptions, load_inputs
+            from ..codecs import AudioFormat
+            from ..engine import EngineConfig
+
+            self.items  = load_inputs(args.input)
+            self.config = EngineConfig.from_env()
+            self.options = BatchOptions(
+                out_dir=args.out,
+                speed=args.speed,
+                raw_format=AudioFormat.parse(args.raw_format),
+                vad_threshold_db=float(env.get("VAD_THRESHOLD_DB", "-45")),
+                vad_hangover_ms=int(env.get("VAD_HANGOVER_MS", "500")),
+                force=args.force,
+            )
+
+        with self.profile.phase("clients"):
+            from openai import AsyncAzureOpenAI
+
+            from ..tts_cache import TTSCache
+            from ..warmup import pooled_async_http_client
+
+            self.aoai_client = AsyncAzureOpenAI(
+                azure_endpoint=env["AZURE_OPENAI_ENDPOINT"],
+                api_key=env["AZURE_OPENAI_API_KEY"],
+                api_version=env["AZURE_OPENAI_API_VERSION"],
+                http_client=pooled_async_http_client(),
+            )
+            self.tts_client = AsyncAzureOpenAI(
+                azure_endpoint=env["AZURE_OPENAI_ENDPOINT_TTS"],
+                api_key=env["AZURE_OPENAI_API_KEY_TTS"],
+                api_version=env["AZURE_OPENAI_API_VERSION_TTS"],
+                http_client=pooled_async_http_client(),
+            )
+            self.tts_cache = TTSCache(
+                memory_bytes=int(env.get("TTS_CACHE_MB", "64")) << 20,
+                directory=env.get("TTS_CACHE_DIR") or None,
+                disk_bytes=int(env.get("TTS_CACHE_DISK_MB", "512")) << 20,
+            )
+
+    def run(self):
+        try:
+            asyncio.run(self.main())
+        except KeyboardInterrupt:
+            print("Interrupted: run again to resume (finished files are skipped)")
+
+    def close(self):
+        pass
+
+    async def main(self):
+        from ..batch import run_batch
+        from ..warmup import WarmupReport, warm_http_async
+
+        args = self.args
+        if self.warmup:
+            pings = {"chat": lambda: warm_http_async(self.aoai_client), "tts": lambda: warm_http_async(self.tts_client)}
+            print("[Warm-up]", (await WarmupReport().run_async(pings)).summary())
+        speed = f"{args.speed:g}x real time" if args.speed > 0 else "unpaced"
+        print(f"{len(self.items)} file(s) from {args.input} → {args.out} ({args.workers} worker(s), {speed})")
+        async with self.aoai_client, self.tts_client:
+            stats = await run_batch(
+                self.items, self.config, self.options, self.aoai_client, self.tts_client,
+                workers=args.workers, tts_cache=self.tts_cache,
+            )
+        print("[Batch]", stats.summary())
+        print("[TTS cache]", self.tts_cache.stats.summary())
+
+
+App = BatchRunner
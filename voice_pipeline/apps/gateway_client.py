@@ -0,0 +1,87 @@
+"""
+Client for the voice gateway
+Sends the microphone to the gateway and plays the answer it streams back.
+
+    python -m voice_pipeline client ws://localhost:8765/?voice=ballad
+    python -m voice_pipeline client "ws://localhost:8765/?format=mulaw/8000"
+
+With `input=` / `output=` / `format=` in the URL the microphone is encoded
+and the answer decoded here (see voice_pipeline/codecs.py).
+"""
+
+import json
+import threading
+from urllib.parse import parse_qs, urlparse
+
+from ..audio_io import AudioDevices
+from ..startup import StartupProfile
+
+# Audio constants
+RATE            = 24_000                 # 24 kHz → same format as the gateway
+CHANNELS        = 1
+CHUNK           = 1024
+
+
+class GatewayClient:
+    def __init__(self, args, profile: StartupProfile | None = None):
+        self.url     = args.url
+        self.profile = profile or StartupProfile()
+        self.devices = None
+
+    def start(self):
+        with self.profile.phase("audio"):
+            # PyAudio – Microphone and speaker
+            # (MIC_WAV_FILE / SPEAKER_SINK=null replace them with a WAV file / null sink)
+            self.devices = AudioDevices(RATE, CHUNK, CHANNELS)
+            self.mic_stream  = self.devices.mic
+            self.speaker_out = self.devices.speaker
+
+    def codecs(self):
+        """(encode, decode) for the formats asked for in the URL; identity for 24 kHz PCM."""
+        query = parse_qs(urlparse(self.url).query)
+        if not {"input", "output", "format"} & query.keys():
+            return (lambda pcm: [pcm]), (lambda frame: frame)
+        from ..codecs import Decoder, Encoder, negotiate   # NumPy only when needed
+        input_format, output_format = negotiate(query)
+        return Encoder(input_format, RATE).encode, Decoder(output_format, RATE).decode
+
+    def run(self):
+        from websockets.sync.client import connect
+
+        encode, decode = self.codecs()
+        with connect(self.url, compression=None, max_size=None) as ws:
+            def mic_sender():
+                try:
+                    while True:
+                        for frame in encode(self.mic_stream.read(CHUNK, exception_on_overflow=False)):
+                            ws.send(frame)
+                except Exception:
+                    pass
+
+            threading.Thread(target=mic_sender, daemon=True).start()
+            print("Connected to:", self.url)
+            try:
+                for message in ws:
+                    if isinstance(message, bytes):
+                        self.speaker_out.write(decode(message))
+                        continue
+                    ev = json.loads(message)
+                    if ev["type"] == "session.created":
+                        print("Session", ev["session_id"], f"({ev['input']} in, {ev['output']} out)", "- say something!")
+                    elif ev["type"] == "transcript":
+                        print(f"\n>> {ev['text']}\n\nAssistant:\n", end=" ", flush=True)
+                    elif ev["type"] == "answer.delta":
+                        print(ev["text"], end="", flush=True)
+                    elif ev["type"] == "answer.done":
+                        print("\n[Timeline]", ev["stages_ms"])
+                    elif ev["type"] == "playback.cancel":
+                        print("\n[barge-in] Listening...")
+            except KeyboardInterrupt:
+                pass
+
+    def close(self):
+        if self.devices is not None:
+            self.devices.close()
+
+
+App = GatewayClient
@@ -0,0 +1,47 @@
+"""
+Voice gateway: many remote callers, one STT → LLM → TTS session each
+Callers stream their microphone over a websocket and receive the answer
+audio on the same socket (see voice_pipeline/gateway.py for the protocol
+and the `client` variant for a client).
+
+    python -m voice_pipeline gateway --port 8765 --workers 4
+"""
+
+import os
+
+from ..startup import StartupProfile
+
+
+class GatewayServer:
+    """`start()` builds the gateway (workers start in `run()`)."""
+
+    def __init__(self, args, profile: StartupProfile | None = None):
+        self.args    = args
+        self.profile = profile or StartupProfile()
+
+    def start(self):
+        args = self.args
+        with self.profile.phase("gateway"):
+            from ..engine import EngineConfig
+            from ..gateway import Gateway
+
+            config = EngineConfig.from_env()
+            self.gateway = Gateway(
+                config, host=args.host, port=args.port, workers=args.workers,
+                max_sessions=args.max_sessions, ahead_ms=args.ahead_ms,
+                metrics_port=args.metrics_port, jsonl_path=os.environ.get("METRICS_JSONL"),
+            )
+
+    def run(self):
+        args = self.args
+        print(f"Voice gateway on ws://{args.host}:{args.port} "
+              f"({args.workers} worker(s), max {args.max_sessions} sessions)")
+        if args.metrics_port:
+            print(f"Metrics on http://{args.host}:{args.metrics_port}/metrics and /sessions")
+        self.gateway.serve_forever()
+
+    def close(self):
+        pass
+
+
+App = GatewayServer
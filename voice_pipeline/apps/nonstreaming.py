@@ -0,0 +1,438 @@
+"""
+Speech-to-AOAI-to-TTS without streaming: the whole answer is generated,
+then synthesized, then played.
+
+    python -m voice_pipeline nonstreaming
+"""
+
+import json
+import os
+import threading
+import time
+
+from ..audio_io import AudioDevices
+from ..barge_in import BargeIn
+from ..capture import Signal
+from ..framing import AudioFramer
+from ..history import ConversationMemory, PromptReport, summarize_with
+from ..pcm import iter_pcm16
+from ..startup import StartupProfile
+from ..timeline import TimelineRecorder, mark_first
+from ..tts_cache import TTSCache, cache_key
+from ..turns import TurnScheduler
+
+# Audio stream parameters (16-bit PCM, 24kHz mono)
+RATE = 24000
+CHANNELS = 1
+CHUNK = 1024
+WRITE_SIZE = RATE // 50 * 2  # 20 ms per speaker write (cached answers)
+SYSTEM_PROMPT = "You are a helpful assistant."
+
+TTS_VOICE = "coral"
+TTS_INSTRUCTIONS = "Affect/personality: A cheerful guide\\n\\nTone: Friendly, clear, and reassuring, creating a calm atmosphere and making the listener feel confident and comfortable.\\n\\nPronunciation: Clear, articulate, and steady, ensuring each instruction is easily understood while maintaining a natural, conversational flow.\\n\\nPause: Brief, purposeful pauses after key instructions (e.g., \"cross the street\" and \"turn right\") to allow time for the listener to process the information and follow along.\\n\\nEmotion: Warm and supportive, conveying empathy and care, ensuring the listener feels guided and safe throughout the journey."
+
+
+# Function to call to AOAI
+# Send a call to the model deployed on Azure OpenAI (the fastest deployment of `router`,
+# failing over to the next ones on 429 / 5xx)
+def call_aoai(router, messages, temperature, max_tokens):
+    """Returns (answer, token usage); (None, None) when no deployment could answer."""
+    try:
+        response = router.call(lambda endpoint: endpoint.client.chat.completions.create(
+            model=endpoint.config.deployment,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        ))
+        usage = response.usage
+        json_response = json.loads(response.model_dump_json())
+        response = json_response['choices'][0]['message']['content']
+    except Exception as ex:
+        print(f'ERROR call_aoai: {ex}')
+        response = usage = None
+
+    return response, usage
+
+
+class NonStreamingPipeline:
+    """Same lifecycle as `StreamingPipeline`: `start()`, `run()`, `close()`."""
+
+    def __init__(self, args=None, profile: StartupProfile | None = None):
+        self.profile = profile or StartupProfile()
+        env = os.environ
+        # WebSocket endpoint for OpenAI Realtime API (transcription model)
+        self.url = (
+            f'{env["AZURE_OPENAI_ENDPOINT_STT"].replace("https", "wss")}'
+            f'/openai/realtime?api-version={env["AZURE_OPENAI_API_VERSION_STT"]}&intent=transcription'
+        )
+        self.headers = {"api-key": env["AZURE_OPENAI_API_KEY_STT"]}
+        self.stt_frame_ms = int(env.get("STT_FRAME_MS", "80"))  # Audio per websocket message
+        # Client-side VAD: "off", "gate" (drop silence) or "endpoint" (drop silence and commit the turn)
+        self.client_vad = env.get("CLIENT_VAD", "off")
+        self.vad_threshold_db = float(env.get("VAD_THRESHOLD_DB", "-45"))
+        self.vad_pre_roll_ms = int(env.get("VAD_PRE_ROLL_MS", "300"))
+        self.vad_hangover_ms = int(env.get("VAD_HANGOVER_MS", "300" if self.client_vad == "endpoint" else "700"))
+        self.warmup = env.get("WARMUP", "1") == "1"  # Open the connections at startup
+        self.keepalive_s = float(env.get("KEEPALIVE_S", "60"))  # Idle pings (0: none)
+        self.hedge_ms = int(env.get("HEDGE_MS", "0"))  # Duplicate TTS request after this (0: off)
+        self.turn_policy = env.get("TURN_POLICY", "queue")  # Transcripts during an answer: queue/merge/replace
+        self.turn_pending = int(env.get("TURN_MAX_PENDING", "2"))  # Questions waiting for the current answer
+
+        self.is_playing_audio = Signal()  # Wakes the microphone sender when it clears
+        self.barge_in = BargeIn(enabled=env.get("BARGE_IN", "0") == "1", playing=self.is_playing_audio)
+
+        # Load Azure OpenAI configuration from environment variables
+        self.deployment = env.get("AZURE_OPENAI_DEPLOYMENT_NAME")
+        self.deployment_stt = env["AZURE_OPENAI_DEPLOYMENT_NAME_STT"]
+        self.deployment_tts = env["AZURE_OPENAI_DEPLOYMENT_NAME_TTS"]
+        self.stt_connected = False
+        self.answer_cache = None
+        self.recorder = None
+        self.turns = None
+        self.keepalive = None
+        self.devices = None
+        self.closed = False
+
+    def start(self):
+        env = os.environ
+        with self.profile.phase("metrics"):
+            # Per-turn latency timelines (METRICS_JSONL file, METRICS_PORT /metrics endpoint)
+            self.timelines = TimelineRecorder(jsonl_path=env.get("METRICS_JSONL"),
+                                              port=int(env.get("METRICS_PORT", "0")))
+
+        if env.get("RECORD_DIR"):
+            with self.profile.phase("recording"):
+                from ..recorder import SessionRecorder
+
+                # Audio, transcripts, answers and timelines of the session, written in the background
+                self.recorder = SessionRecorder.in_dir(env["RECORD_DIR"], rate=RATE,
+                                                       queue_bytes=int(env.get("RECORD_QUEUE_MB", "8")) << 20,
+                                                       fsync_s=float(env.get("RECORD_FSYNC_S", "1")))
+                print("Recording:", self.recorder.path)
+
+        with self.profile.phase("clients"):
+            from openai import AzureOpenAI
+
+            from ..routing import Router
+            from ..warmup import pooled_http_client
+
+            # One client per deployment (AZURE_OPENAI_ENDPOINT[_TTS]_2…), connections reused across turns
+            def client(cfg):
+                return AzureOpenAI(azure_endpoint=cfg.endpoint, api_key=cfg.api_key, api_version=cfg.api_version,
+                                   http_client=pooled_http_client(), max_retries=0)
+
+            self.chat_router = Router.from_env("", client, name="chat")
+            # Load TTS configuration from environment variables
+            self.tts_router = Router.from_env("_TTS", client, hedge_ms=self.hedge_ms, name="tts")
+            self.aoai_client = self.chat_router.primary.client      # Summaries
+
+        with self.profile.phase("memory"):
+            # Conversation memory: system prompt + history as a stable prefix (prompt cache hits)
+            self.memory = ConversationMemory(SYSTEM_PROMPT, budget_tokens=int(env.get("HISTORY_TOKENS", "3000")),
+                                             summarize=env.get("HISTORY_SUMMARY", "0") == "1")
+            self.prompts = PromptReport(self.memory)
+
+        with self.profile.phase("turns"):
+            # One answer at a time: transcripts arriving meanwhile wait under TURN_POLICY
+            self.turns = TurnScheduler(lambda transcript, timeline, _: self.answer_question(transcript, timeline),
+                                       policy=self.turn_policy, max_pending=self.turn_pending)
+
+        with self.profile.phase("tts cache"):
+            # Repeated answers are played from the cache (TTS_CACHE_MB memory budget, TTS_CACHE_DIR persistent tier)
+            self.tts_cache = TTSCache(memory_bytes=int(env.get("TTS_CACHE_MB", "64")) << 20,
+                                      directory=env.get("TTS_CACHE_DIR") or None,
+                                      disk_bytes=int(env.get("TTS_CACHE_DISK_MB", "512")) << 20)
+
+        if env.get("SEMANTIC_CACHE", "0") == "1":
+            with self.profile.phase("answer cache"):
+                from ..answer_cache import SemanticCache
+
+                # Questions close enough to one answered before get its answer without calling
+                # the model; its audio then comes from the TTS cache
+                self.answer_cache = SemanticCache.from_env(self.aoai_client)
+                if self.answer_cache.path and os.path.exists(self.answer_cache.path):
+                    n = self.answer_cache.load(self.answer_cache.path)
+                    print(f"Answer cache: {n} answer(s) loaded from {self.answer_cache.path}")
+
+        with self.profile.phase("audio"):
+            # PyAudio for audio input (MIC_WAV_FILE replaces it with a WAV file), in callback mode
+            # behind a ring buffer, muted while the answer plays unless the user can interrupt
+            self.devices = AudioDevices(RATE, CHUNK, CHANNELS)
+            self.capture = self.devices.capture(mute=None if self.barge_in.enabled else self.is_playing_audio)
+            # Speaker behind a jitter buffer, opened once (SPEAKER_SINK=null / .wav: no sound card)
+            self.speaker_out = self.devices.player
+
+        if self.warmup:
+            with self.profile.phase("warm-up"):
+                from ..warmup import KeepAlive, WarmupReport, warm_http
+
+                # DNS + TLS + HTTP handshakes happen now instead of in the first turn (every deployment)
+                pings = {f"{router.name} {e.name}" if len(router.endpoints) > 1 else router.name:
+                         lambda client=e.client: warm_http(client)
+                         for router in (self.chat_router, self.tts_router) for e in router.endpoints}
+                print("Warm-up:", WarmupReport().run(pings).summary())
+                self.keepalive = KeepAlive(pings, interval=self.keepalive_s, busy=self.is_playing_audio.is_set)
+
+    def run(self):
+        import websocket
+
+        from ..routing import endpoints_from_env
+
+        if self.warmup:
+            self.keepalive.start()
+        # Next STT deployment (AZURE_OPENAI_ENDPOINT_STT_2…) if the handshake fails
+        for cfg in endpoints_from_env("_STT"):
+            self.url = (f'{cfg.endpoint.replace("https", "wss")}'
+                        f'/openai/realtime?api-version={cfg.api_version}&intent=transcription')
+            self.headers = {"api-key": cfg.api_key}
+            self.deployment_stt = cfg.deployment
+            print("Connecting to:", self.url)
+            ws_app = websocket.WebSocketApp(
+                self.url,
+                header=self.headers,
+                on_open=self.on_open,
+                on_message=self.on_message,
+                on_error=self.on_error,
+                on_close=self.on_close
+            )
+            ws_app.run_forever()
+            if self.stt_connected:
+                break
+
+    def close(self):
+        """Runs on disconnect and at exit, and after a failed `start()`: only the first call counts."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.keepalive is not None:
+            self.keepalive.stop()
+        if self.turns is not None:
+            self.turns.close()
+        if self.answer_cache is not None and self.answer_cache.path:
+            self.answer_cache.save(self.answer_cache.path)
+            print(f"Answer cache: {len(self.answer_cache)} answer(s) saved to {self.answer_cache.path}")
+        if self.recorder is not None:
+            self.recorder.close()
+            print("Recording:", self.recorder.stats.summary())
+        if self.devices is not None:
+            self.devices.close()
+
+    def on_open(self, ws):
+        import websocket
+
+        print("Connected! Start speaking...")
+        self.stt_connected = True
+        session_config = {
+            "type": "transcription_session.update",
+            "session": {
+                "input_audio_format": "pcm16",
+                "input_audio_transcription": {
+                    "model": self.deployment_stt,
+                    "prompt": "Respond in the same language than the text."
+                },
+                "input_audio_noise_reduction": {"type": "near_field"},
+                "turn_detection": None if self.client_vad == "endpoint" else {"type": "server_vad"}
+            }
+        }
+        ws.send(json.dumps(session_config))
+
+        vad = None
+        if self.client_vad != "off":
+            from ..vad import Endpointer  # NumPy only when the VAD is on
+            vad = Endpointer(rate=RATE, threshold_db=self.vad_threshold_db,
+                             hangover_ms=self.vad_hangover_ms, pre_roll_ms=self.vad_pre_roll_ms)
+
+        # Coalesces the mic chunks into STT_FRAME_MS append messages
+        framer = AudioFramer(lambda payload: ws.send(payload, opcode=websocket.ABNF.OPCODE_TEXT),
+                             rate=RATE, frame_ms=self.stt_frame_ms)
+
+        def stream_microphone():
+            try:
+                while ws.keep_running:
+                    # Blocks while the answer plays (unless the user can interrupt)
+                    audio_data = self.capture.read(CHUNK * 2, timeout=0.5)
+                    if audio_data is None:
+                        continue
+                    if self.recorder is not None:  # Copied into its queue, written later
+                        self.recorder.mic(audio_data)
+                    if vad is not None:  # Only speech goes on the wire
+                        result = vad.feed(audio_data)
+                        if result.speech_started and self.is_playing_audio.is_set() and self.barge_in.interrupt():
+                            print("\n[barge-in] Listening...")
+                        audio_data = result.audio
+                    if audio_data:
+                        framer.write(audio_data)
+                    if vad is not None and result.speech_ended:
+                        self.timelines.open_turn().mark("end_of_speech")
+                        framer.flush()  # The end of speech goes out now
+                        if self.client_vad == "endpoint":
+                            ws.send(json.dumps({"type": "input_audio_buffer.commit"}))
+
+            except Exception as e:
+                print("Audio streaming error:", e)
+                ws.close()
+            print("[STT]", framer.stats.summary())
+            print("[Capture]", self.capture.stats.summary())
+
+        threading.Thread(target=stream_microphone, daemon=True).start()
+
+    def play_audio(self, chunks, turn, keep=None):
+        # Each chunk is played as soon as it arrives, not after the whole answer;
+        # barge-in clears the playback buffer (turn.on_cancel)
+        for chunk in chunks:
+            if turn.cancelled.is_set():
+                break
+            if keep is not None:
+                keep.append(chunk)
+            if self.recorder is not None:
+                self.recorder.tts(chunk)
+            self.speaker_out.write(chunk)
+        if not turn.cancelled.is_set():
+            self.speaker_out.drain()
+
+    def answer_question(self, transcript, timeline):
+        turn = self.barge_in.start_turn(transcript)  # Pausar micrófono
+        try:
+            self.answer_turn(turn, transcript, timeline)
+        finally:
+            self.barge_in.end_turn(turn)  # Reanudar micrófono, also after an error
+
+    def answer_turn(self, turn, transcript, timeline):
+        lookup = None
+        if self.answer_cache is not None:
+            lookup = self.answer_cache.lookup(transcript)
+            timeline.meta.update(answer_cache="hit" if lookup.entry else "miss",
+                                 answer_similarity=round(lookup.similarity, 3))
+        if lookup is not None and lookup.entry is not None:
+            print(f"Answer from cache (similarity {lookup.similarity:.2f})")
+            answer, usage = lookup.entry.answer, None
+        else:
+            print("Calling AOAI...")
+            started = time.perf_counter()
+            answer, usage = call_aoai(self.chat_router, self.memory.messages(transcript), 0.7, 1000)
+            if lookup is not None and answer:
+                self.answer_cache.store(transcript, answer, lookup.vector, answer_s=time.perf_counter() - started)
+        # Not streamed: the first token and the first sentence arrive with the whole answer
+        timeline.mark("first_token")
+        timeline.mark("first_sentence")
+        print("Response from AOAI:", answer)
+        if turn.cancelled.is_set() or not answer:
+            print("[barge-in] Answer discarded" if answer else "No answer")
+            self.timelines.finish(timeline, truncated=turn.cancelled.is_set(), warm=self.warmup)
+            return
+
+        self.speaker_out.reset()
+        turn.on_cancel(self.speaker_out.clear)  # Silence within one device block
+        # Repeated answers are played from the cache without calling TTS
+        key = cache_key(answer, TTS_VOICE, self.deployment_tts, TTS_INSTRUCTIONS, "pcm")
+        pcm_bytes = self.tts_cache.get(key)
+        if pcm_bytes is not None:
+            timeline.mark("first_tts_byte")
+            print("TTS from cache")
+            # In 20 ms blocks, so barge-in stops it between two of them
+            view = memoryview(pcm_bytes)
+            self.play_audio((view[i:i + WRITE_SIZE] for i in range(0, len(view), WRITE_SIZE)), turn)
+        else:
+            # Call TTS API to convert text to speech, playing it while it downloads
+            print("Calling TTS API...")
+            chunks = []
+
+            def request(endpoint):
+                with endpoint.client.audio.speech.with_streaming_response.create(
+                    model=endpoint.config.deployment,
+                    voice=TTS_VOICE,
+                    input=(answer),
+                    instructions=TTS_INSTRUCTIONS,
+                    response_format="pcm",
+                ) as response:
+                    turn.on_cancel(response.close)  # Aborts the TTS request
+                    yield from iter_pcm16(response.iter_bytes())
+
+            try:
+                # The whole answer is one TTS request: hedged (HEDGE_MS)
+                pcm = self.tts_router.stream(request, hedge=True)
+                turn.on_cancel(pcm.close)
+                self.play_audio(mark_first(pcm, timeline, "first_tts_byte"), turn, keep=chunks)
+                pcm.close()
+                if not turn.cancelled.is_set():
+                    self.tts_cache.put(key, b"".join(chunks))
+            except Exception as exc:
+                if not turn.cancelled.is_set():  # Closed by barge-in: expected
+                    print("TTS error:", exc)
+        if self.speaker_out.first_audio_at is not None:
+            timeline.mark("first_audio", at=self.speaker_out.first_audio_at)
+        timeline.mark("playback_end")
+        # Not spoken at all if interrupted: only complete answers go to the memory
+        prompt_info = self.prompts.turn(transcript, usage, timeline)
+        if not turn.cancelled.is_set():
+            self.memory.add_turn(transcript, answer)
+        if self.memory.pending:
+            threading.Thread(target=summarize_with, args=(self.aoai_client, self.deployment, self.memory),
+                             daemon=True).start()
+        self.timelines.finish(timeline, truncated=turn.cancelled.is_set(), warm=self.warmup, **prompt_info)
+        if self.recorder is not None:
+            self.recorder.event("answer", text=answer, truncated=turn.cancelled.is_set())
+            self.recorder.turn(timeline)
+
+        if turn.cancelled.is_set():
+            turn.record.spoken = []
+            print("[barge-in] Answer truncated")
+            return
+        turn.record.spoken = [answer]
+        print("Timeline:", timeline.summary())
+        print("Playback:", self.speaker_out.stats.summary())
+        print("Turns:", self.turns.stats.summary())
+        print("TTS cache:", self.tts_cache.stats.summary())
+        if self.answer_cache is not None:
+            print("Answer cache:", self.answer_cache.stats.summary())
+        for router in (self.chat_router, self.tts_router):
+            if len(router.endpoints) > 1:
+                print("Routing:", router.summary())
+        print("History:", self.memory.stats(), "|", PromptReport.summary(prompt_info))
+        print("You can continue Start speaking...")
+
+    def on_message(self, ws, message):
+        try:
+            data = json.loads(message)
+            event_type = data.get("type", "")
+            print("\tEvent type:", event_type)
+            if event_type == "input_audio_buffer.speech_started":
+                # Barge-in: the user talks over the answer → stop it right away
+                if self.is_playing_audio.is_set() and self.barge_in.interrupt():
+                    print("\n[barge-in] Listening...")
+            if event_type == "input_audio_buffer.speech_stopped":
+                self.timelines.open_turn().mark("end_of_speech")
+            # Stream live incremental transcripts
+            if event_type == "conversation.item.input_audio_transcription.delta":
+                transcript_piece = data.get("delta", "")
+                if transcript_piece:
+                    print(transcript_piece, end=' ', flush=True)
+            if event_type == "conversation.item.input_audio_transcription.completed":
+                transcript = data["transcript"]
+                print(f"\n>> {transcript}\n")
+                timeline = self.timelines.take_turn()
+                timeline.mark("transcript")
+                if self.recorder is not None:
+                    self.recorder.event("transcript", text=transcript)
+                # Answered on the turn scheduler's thread, after the answer in progress,
+                # so barge-in events keep arriving
+                self.turns.submit(transcript, timeline)
+            if event_type == "item":
+                transcript = data.get("item", "")
+                if transcript:
+                    print("\nFinal transcript:", transcript)
+
+        except Exception as e:
+            print("Error:", e)
+            pass  # Ignore unrelated events
+
+    def on_error(self, ws, error):
+        print("WebSocket error:", error)
+
+    def on_close(self, ws, close_status_code, close_msg):
+        print("Disconnected from server.")
+        if self.stt_connected:  # Otherwise run() tries the next deployment
+            self.close()
+
+
+App = NonStreamingPipeline
@@ -0,0 +1,106 @@
+"""
+Session recordings (RECORD_DIR): what a conversation said and played
+Reads the files written by `voice_pipeline.recorder`:
+- info:   duration, the conversation with its times, the turn timelines
+          and the gaps (drops) of the recording;
+- export: `session.wav` (stereo: user left, assistant right) and
+          `events.jsonl` into `--out`;
+- replay: both sides mixed through the speaker (SPEAKER_SINK applies),
+          the transcripts and answers printed when they happened.
+
+    python -m voice_pipeline recording info recordings/session-20250101-120000-4242.vprec
+    python -m voice_pipeline recording export recordings/session-….vprec --out session_out
+"""
+
+import time
+
+from ..startup import StartupProfile
+
+CHUNK = 1024
+
+
+def describe(event: dict) -> str | None:
+    """One line of the conversation, or None for the events not shown."""
+    kind = event["type"]
+    if kind == "transcript":
+        return f">> {event['text']}"
+    if kind == "answer":
+        return f"Assistant{' (truncated)' if event.get('truncated') else ''}: {event['text']}"
+    if kind == "turn":
+        stages = event.get("stages_ms", {})
+        keys = ("stt", "llm_first_token", "tts_first_byte", "time_to_first_audio", "turn_total")
+        return "[Timeline] " + " | ".join(f"{k} {stages[k]:.0f} ms" for k in keys if k in stages)
+    if kind == "drop":
+        return f"[Recording] {event['items']} {event['channel']} item(s) dropped ({event['bytes'] / 1024:.0f} KiB)"
+    return None
+
+
+class RecordingTool:
+    """`start()` reads the file; `run()` prints, exports or replays it."""
+
+    def __init__(self, args, profile: StartupProfile | None = None):
+        self.args    = args
+        self.profile = profile or StartupProfile()
+        self.devices = None
+
+    def start(self):
+        with self.profile.phase("recording"):
+            from ..recorder import session_events
+
+            self.events = session_events(self.args.path)
+
+    def run(self):
+        action = self.args.action
+        if action == "export":
+            from ..recorder import export_session
+
+            result = export_session(self.args.path, self.args.out)
+            print(f"{result['seconds']:.1f} s of audio → {result['wav']}, "
+                  f"{result['events_count']} events → {result['events']}")
+        elif action == "replay":
+            self.replay()
+        else:
+            self.info()
+
+    def close(self):
+        if self.devices is not None:
+            self.devices.close()
+
+    def info(self):
+        session = next((e for e in self.events if e["type"] == "session"), {})
+        if session:
+            print("Started:", time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(session["started"])))
+        for event in self.events:
+            line = describe(event)
+            if line is not None:
+                print(f"{event['t']:8.1f} s  {line}")
+        turns = sum(e["type"] == "turn" for e in self.events)
+        drops = [e for e in self.events if e["type"] == "drop"]
+        last = self.events[-1]["t"] if self.events else 0.0
+        print(f"\n{turns} turn(s), {last:.1f} s, {len(drops)} gap(s) in the recording")
+
+    def replay(self):
+        import numpy as np
+
+        from ..audio_io import AudioDevices
+        from ..recorder import session_audio
+
+        user, assistant, rate = session_audio(self.args.path)
+        mixed = np.clip(np.frombuffer(user, "<i2").astype(np.int32) + np.frombuffer(assistant, "<i2"),
+                        -32768, 32767).astype("<i2").tobytes()
+        self.devices = AudioDevices(rate, CHUNK)
+        player = self.devices.player
+        lines = [(e["t"], describe(e)) for e in self.events]
+        lines = [(t, line) for t, line in lines if line is not None]
+        step = rate // 10 * 2                    # 100 ms per write: the player paces the loop
+        for i in range(0, len(mixed), step):
+            player.write(mixed[i:i + step])
+            heard = (i + step) / 2 / rate - player.buffered_ms() / 1000
+            while lines and lines[0][0] <= heard:
+                print(lines.pop(0)[1])
+        player.drain()
+        for _, line in lines:
+            print(line)
+
+
+App = RecordingTool
@@ -0,0 +1,38 @@
+"""  
+STT y TTS con Azure Speech  –  LLM con Azure OpenAI (GPT-4o-mini)  
+-----------------------------------------------------------------  
+Micrófono ─► STT (Azure Speech) ─► GPT-4o-mini ─► TTS (Azure Speech) ─► Altavoz  
+  
+Mismo núcleo que la variante `streaming` (apps/streaming.py) con otros  
+proveedores por defecto: STT_PROVIDER=speech y TTS_PROVIDER=speech (ver  
+voice_pipeline/providers.py). Se pueden combinar, p. ej. TTS_PROVIDER=aoai  
+reconoce con Azure Speech y locuta con Azure OpenAI TTS.  
+  
+    python -m voice_pipeline speech  
+"""  
+from .streaming import StreamingPipeline  
+  
+PROMPT_STT         = "Your response MUST be in the same language as the user."  
+SYSTEM_PROMPT_CHAT = "You are a helpful assistant. Respond in the same language."  
+  
+  
+class SpeechPipeline(StreamingPipeline):  
+    """  
+    Mismo ciclo de vida que las otras variantes: `start()` crea los proveedores  
+    (SDK de Speech, clientes) y el audio; `run()` reconoce hasta Ctrl+C.  
+    """  
+  
+    providers     = {"stt": "speech", "llm": "aoai", "tts": "speech"}  
+    stt_prompt    = PROMPT_STT  
+    system_prompt = SYSTEM_PROMPT_CHAT  
+    text = {                                      # mensajes para el usuario  
+        "ready":     "🟢 STT iniciado – habla cuando quieras",  
+        "again":     "¡Dime algo más!",  
+        "listening": "[barge-in] Escuchando...",  
+        "truncated": "[barge-in] Respuesta cortada tras {} frase(s)",  
+        "assistant": "Assistant:",  
+        "closing":   "Cerrando…",  
+    }  
+  
+  
+App = SpeechPipeline  
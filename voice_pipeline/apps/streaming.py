@@ -0,0 +1,588 @@
+"""
+Speech-to-AOAI-to-TTS with streaming
+Real-time transcription
+Streaming response from Azure OpenAI model
+Streaming TTS and instant playback
+
+The pipeline core behind the `streaming` and `speech` variants: STT, LLM
+and TTS are providers (voice_pipeline/providers.py) picked with
+STT_PROVIDER / LLM_PROVIDER / TTS_PROVIDER, so any combination runs the
+same turn logic (e.g. `STT_PROVIDER=speech` for Azure Speech recognition
+with AOAI TTS).
+
+    python -m voice_pipeline streaming
+"""
+
+import os
+import threading
+import time
+
+from ..audio_io import AudioDevices
+from ..barge_in import BargeIn
+from ..capture import Signal
+from ..history import ConversationMemory, PromptReport, summarize_with
+from ..segmenter import SentenceSegmenter
+from ..startup import StartupProfile
+from ..timeline import TimelineRecorder, mark_first
+from ..tts_cache import TTSCache, load_phrases
+from ..tts_prefetch import TTSPrefetcher
+from ..tts_scheduler import SynthesisMeter, TTSScheduler
+from ..tts_stream import TextStreamSpeaker
+from ..turns import MeteredQueue, TurnScheduler
+
+# Audio constants
+RATE            = 24_000                 # 24 kHz → matches Azure voices
+CHANNELS        = 1
+CHUNK           = 1024
+WRITE_SIZE      = RATE // 50 * 2         # 20 ms per speaker write
+
+PROMPT_STT = "Your response **MUST** be in the same language than the user's question."
+SYSTEM_PROMPT_CHAT = "You are a helpful assistant. Respond in the same language than the user's question." # Respond in Spanish.
+
+
+class StreamingPipeline:
+    """
+    Nothing is opened when the object is created: `start()` creates the
+    providers, devices and caches this variant uses (timed in `profile`),
+    `run()` connects the transcription and blocks.
+    """
+
+    providers     = {"stt": "aoai", "llm": "aoai", "tts": "aoai"}   # Defaults of <STAGE>_PROVIDER
+    stt_prompt    = PROMPT_STT
+    system_prompt = SYSTEM_PROMPT_CHAT
+    text = {                                                        # What the user reads
+        "ready":     "Connected. Say something!",
+        "again":     "Say something else!",
+        "listening": "[barge-in] Listening...",
+        "truncated": "[barge-in] Answer truncated after {} sentence(s)",
+        "assistant": "Assistant:",
+        "closing":   "Closing…",
+    }
+
+    def __init__(self, args=None, profile: StartupProfile | None = None):
+        self.profile = profile or StartupProfile()
+        env = os.environ
+        self.tts_lookahead   = int(env.get("TTS_LOOKAHEAD", "2"))   # Sentences synthesized ahead
+        self.tts_eager_first = env.get("TTS_EAGER_FIRST", "1") == "1"  # First chunk at the first clause
+        self.tts_min_chars   = int(env.get("TTS_MIN_CHARS", "40"))  # Next chunks: sentences merged up to this
+        self.tts_max_chars   = int(env.get("TTS_MAX_CHARS", "300"))
+        self.tts_text_stream = env.get("TTS_TEXT_STREAM", "0") == "1"  # One text-stream synthesis per answer
+        self.tts_scheduler   = env.get("TTS_SCHEDULER", "0") == "1"    # Chunks sized from the measured TTS speed
+        self.tts_margin_ms   = int(env.get("TTS_SCHEDULER_MARGIN_MS", "150"))
+        self.stt_frame_ms    = int(env.get("STT_FRAME_MS", "80"))   # Audio per websocket message
+        self.warmup          = env.get("WARMUP", "1") == "1"        # Open the connections at startup
+        self.keepalive_s     = float(env.get("KEEPALIVE_S", "60"))  # Idle pings (0: none)
+        self.speculative     = env.get("SPECULATIVE", "0") == "1"   # Chat started on the partial transcript
+        self.hedge_ms        = int(env.get("HEDGE_MS", "0"))        # Duplicate of the first token / sentence (0: off)
+        self.answer_audio    = env.get("SEMANTIC_CACHE_AUDIO", "0") == "1"  # Cached answers keep their audio
+        self.turn_policy     = env.get("TURN_POLICY", "queue")      # Transcripts during an answer: queue/merge/replace
+        self.turn_pending    = int(env.get("TURN_MAX_PENDING", "2"))  # Questions waiting for the current answer
+        self.tts_queue_max   = max(1, int(env.get("TTS_QUEUE_MAX", "32")))  # Text fragments between LLM and TTS
+        self.tts_max_pending = int(env.get("TTS_MAX_PENDING", "8"))  # Sentences waiting for the speaker (0: no limit)
+        self.provider_specs  = {stage: env.get(f"{stage.upper()}_PROVIDER") or default   # Empty: the variant's
+                                for stage, default in self.providers.items()}
+
+        # Client-side VAD: "off" (send everything), "gate" (drop silence, server VAD
+        # ends the turn) or "endpoint" (drop silence and commit the turn ourselves)
+        self.client_vad       = env.get("CLIENT_VAD", "off")
+        self.vad_threshold_db = float(env.get("VAD_THRESHOLD_DB", "-45"))
+        self.vad_pre_roll_ms  = int(env.get("VAD_PRE_ROLL_MS", "300"))
+        # In "gate" mode the server still needs to hear its silence window (500 ms)
+        self.vad_hangover_ms  = int(env.get("VAD_HANGOVER_MS", "300" if self.client_vad == "endpoint" else "700"))
+
+        self.is_playing_audio = Signal()              # Activates while TTS is playing (wakes the mic sender)
+        self.barge_in = BargeIn(enabled=env.get("BARGE_IN", "0") == "1", playing=self.is_playing_audio)
+        self.keepalive = None
+        self.stt = self.llm = self.tts = None
+        self.answer_cache = None
+        self.recorder = None
+        self.turns = None
+        self.devices = None
+        self.closed = False
+        self.tts_requests = 0                         # TTS calls (cache misses), for the per-turn count
+        self.tts_lock     = threading.Lock()          # Prefetch threads count them concurrently
+        self.tts_meter    = SynthesisMeter(rate=RATE) # First byte / RTF of the TTS provider, across turns
+        self.dry_turns    = [0, 0]                    # Turns where playback ran dry, turns
+
+    # -----------------------------------------------------------------------
+    # Startup
+    # -----------------------------------------------------------------------
+    def start(self):
+        env = os.environ
+        with self.profile.phase("metrics"):
+            # Per-turn latency timelines (METRICS_JSONL file, METRICS_PORT /metrics endpoint)
+            self.timelines = TimelineRecorder(
+                jsonl_path=env.get("METRICS_JSONL"),
+                port=int(env.get("METRICS_PORT", "0")),
+            )
+
+        if env.get("RECORD_DIR"):
+            with self.profile.phase("recording"):
+                from ..recorder import SessionRecorder
+
+                # Audio, transcripts, answers and timelines of the session, written from a
+                # background thread (dropped and counted if the disk falls behind)
+                self.recorder = SessionRecorder.in_dir(
+                    env["RECORD_DIR"], rate=RATE,
+                    queue_bytes=int(env.get("RECORD_QUEUE_MB", "8")) << 20,
+                    fsync_s=float(env.get("RECORD_FSYNC_S", "1")),
+                )
+                print("[Recording]", self.recorder.path)
+
+        with self.profile.phase("providers"):
+            from ..providers import choose
+
+            # One backend per stage (or the fastest of several, probed now); the AOAI
+            # ones keep a pooled client per deployment (AZURE_OPENAI_ENDPOINT[_TTS]_2…)
+            options = {
+                "stt": dict(prompt=self.stt_prompt, client_commit=self.client_vad == "endpoint",
+                            frame_ms=self.stt_frame_ms),
+                "llm": dict(hedge_ms=self.hedge_ms),
+                "tts": dict(hedge_ms=self.hedge_ms, lookahead=self.tts_lookahead,
+                            text_stream=self.tts_text_stream),
+            }
+            for stage, spec in self.provider_specs.items():
+                provider, report = choose(stage, spec, **options[stage])
+                setattr(self, stage, provider)
+                if report is not None:
+                    print("[Probe]", report.summary())
+            print(f"[Providers] STT {self.stt.name}, LLM {self.llm.name}, TTS {self.tts.name}")
+            if self.tts_text_stream and not self.tts.text_stream:
+                print(f"[TTS] {self.tts.name} has no text-stream input: one request per sentence")
+
+        with self.profile.phase("memory"):
+            # Conversation memory: system prompt + history as a stable prefix (prompt cache hits)
+            self.memory = ConversationMemory(
+                self.system_prompt,
+                budget_tokens=int(env.get("HISTORY_TOKENS", "3000")),
+                summarize=env.get("HISTORY_SUMMARY", "0") == "1",
+            )
+            self.prompts = PromptReport(self.memory)
+            self.speculator = None
+            if self.speculative:
+                from ..speculative import Speculator
+
+                # Chat request on the stable partial transcript, held back from TTS
+                # until the final transcript confirms it
+                self.speculator = Speculator(
+                    self.open_chat_stream,
+                    stable_ms=int(env.get("SPECULATIVE_STABLE_MS", "300")),
+                    min_words=int(env.get("SPECULATIVE_MIN_WORDS", "3")),
+                    count_tokens=self.memory.count,
+                    version=lambda: self.memory.turns,
+                )
+
+        with self.profile.phase("turns"):
+            # One answer at a time: transcripts arriving meanwhile wait under TURN_POLICY
+            self.turns = TurnScheduler(self.assistant_stream, policy=self.turn_policy,
+                                       max_pending=self.turn_pending, discard=self.discard_turn)
+
+        with self.profile.phase("tts cache"):
+            # Repeated phrases are played from the cache without calling TTS
+            # (TTS_CACHE_MB memory budget, TTS_CACHE_DIR persistent tier)
+            self.tts_cache = TTSCache(
+                memory_bytes=int(env.get("TTS_CACHE_MB", "64")) << 20,
+                directory=env.get("TTS_CACHE_DIR") or None,
+                disk_bytes=int(env.get("TTS_CACHE_DISK_MB", "512")) << 20,
+            )
+            self.synthesize_cached = self.tts_cache.cached(self.synthesize, self.tts.cache_key)
+            # First sentence of a turn: hedged (HEDGE_MS)
+            self.synthesize_hedged = self.tts_cache.cached(lambda text: self.synthesize(text, hedge=True),
+                                                           self.tts.cache_key)
+
+        if env.get("SEMANTIC_CACHE", "0") == "1":
+            with self.profile.phase("answer cache"):
+                from ..answer_cache import SemanticCache
+
+                # Questions close enough to one answered before get its answer (and
+                # its audio with SEMANTIC_CACHE_AUDIO) without calling the LLM
+                self.answer_cache = SemanticCache.from_env(self.llm.client)
+                if self.answer_cache.path and os.path.exists(self.answer_cache.path):
+                    n = self.answer_cache.load(self.answer_cache.path)
+                    print(f"[Answer cache] {n} answer(s) loaded from {self.answer_cache.path}")
+
+        with self.profile.phase("audio"):
+            # PyAudio – Microphone and speaker, opened here (not at import)
+            # (MIC_WAV_FILE / SPEAKER_SINK=null replace them with a WAV file / null sink)
+            self.devices = AudioDevices(RATE, CHUNK, CHANNELS)
+            # Microphone behind a ring buffer filled from its callback, muted while
+            # TTS plays unless the user can interrupt (MIC_PRE_ROLL_MS kept meanwhile)
+            self.capture = self.devices.capture(mute=None if self.barge_in.enabled else self.is_playing_audio)
+            # Speaker behind a jitter buffer: TTS writes never wait for the device
+            # (PLAYBACK_BUFFER_MS target, underruns/overruns counted)
+            self.speaker_out = self.devices.player
+
+        if self.warmup:
+            with self.profile.phase("warm-up"):
+                from ..warmup import KeepAlive, WarmupReport
+
+                # DNS + TLS + handshakes happen now instead of in the first turn (every deployment)
+                providers = (self.stt, self.llm, self.tts)
+                warmups = {name: step for p in providers for name, step in p.warmups().items()}
+                print("[Warm-up]", WarmupReport().run(warmups).summary())
+                pings = {name: ping for p in providers for name, ping in p.pings().items()}
+                self.keepalive = KeepAlive(pings, interval=self.keepalive_s, busy=self.is_playing_audio.is_set)
+
+        if env.get("TTS_CACHE_WARM_FILE"):
+            def prewarm():
+                n = self.tts_cache.prewarm(load_phrases(env["TTS_CACHE_WARM_FILE"]), self.tts.synthesize,
+                                           self.tts.cache_key)
+                print(f"[TTS cache] {n} phrase(s) pre-warmed")
+            threading.Thread(target=prewarm, daemon=True).start()
+
+    def run(self):
+        if self.keepalive is not None:
+            self.keepalive.start()
+        try:
+            self.stt.run(self)           # Until the transcription session ends
+        except KeyboardInterrupt:
+            print("\n" + self.text["closing"])
+        if self.speculator is not None:
+            self.speculator.reset()
+
+    def close(self):
+        """Releases what `start()` opened, even if it stopped halfway; runs once."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.keepalive is not None:
+            self.keepalive.stop()
+        if self.turns is not None:
+            self.turns.close()
+        for provider in (self.stt, self.llm, self.tts):
+            if provider is not None:
+                provider.close()
+        if self.answer_cache is not None and self.answer_cache.path:
+            self.answer_cache.save(self.answer_cache.path)
+            print(f"[Answer cache] {len(self.answer_cache)} answer(s) saved to {self.answer_cache.path}")
+        if self.recorder is not None:
+            self.recorder.close()
+            print("[Recording]", self.recorder.stats.summary())
+        if self.devices is not None:
+            self.devices.close()
+
+    # -----------------------------------------------------------------------
+    # Utils Functions
+    # -----------------------------------------------------------------------
+    def open_chat_stream(self, question: str, hedge: bool = False):
+        """Chat stream of the LLM provider (`hedge`: and a second deployment after HEDGE_MS)."""
+        return self.llm.open_stream(self.memory.messages(question), hedge=hedge)
+
+    def synthesize(self, text: str, hedge: bool = False):
+        """One TTS request (what the cache misses), counted in `tts_requests` and measured."""
+        with self.tts_lock:
+            self.tts_requests += 1
+        return self.tts_meter.wrap(self.tts.synthesize)(text, hedge=hedge)
+
+    @staticmethod
+    def discard_turn(question: str, speculative):
+        """A question merged, replaced or dropped by the turn scheduler."""
+        if speculative is not None:
+            speculative.close()
+
+    # -----------------------------------------------------------------------
+    # LLM + TTS – everything in streaming
+    # -----------------------------------------------------------------------
+    def assistant_stream(self, question: str, timeline, speculative=None):
+        """
+        Receives the response from the LLM in streaming
+        and sends it to TTS sentence by sentence, or token by token into one
+        synthesis with TTS_TEXT_STREAM
+        (`speculative`: the stream already started on the partial transcript).
+        With SEMANTIC_CACHE, an answer cached for a similar question is
+        played instead (from its audio when it has it).
+        Runs on the turn scheduler and returns when the answer has been
+        played; every queue on the way is bounded, so a slow TTS or speaker
+        slows down the reading of the LLM stream.
+        """
+        lookup = hit = None
+        if self.answer_cache is not None:
+            lookup = self.answer_cache.lookup(question)
+            hit    = lookup.entry
+            timeline.meta.update(answer_cache="hit" if hit else "miss", answer_similarity=round(lookup.similarity, 3))
+        cached_audio = hit.audio if hit is not None else None
+        text_stream = self.tts_text_stream and self.tts.text_stream and cached_audio is None
+        underruns   = self.speaker_out.stats.underruns
+        # The turn can be cancelled by barge-in (user speaking over the answer)
+        turn = self.barge_in.start_turn(question)
+        self.speaker_out.reset()
+        turn.on_cancel(self.speaker_out.clear)          # Silence within one device block
+
+        answer_parts: list[str] = []
+        usage = []                                      # Last stream chunk carries the token usage
+        llm_s = []                                      # LLM time of the answer (cached with it)
+        recorded: list[bytes] = []                      # Its audio (SEMANTIC_CACHE_AUDIO)
+        record = lookup is not None and hit is None and self.answer_audio
+
+        def write(pcm):
+            if record:
+                recorded.append(bytes(pcm))
+            if self.recorder is not None:
+                self.recorder.tts(pcm)
+            self.speaker_out.write(pcm)
+
+        # Text Queue → TTS (bounded: the LLM stream waits when TTS is behind)
+        tts_queue = MeteredQueue(self.tts_queue_max, name="text queue")
+        turn.on_cancel(tts_queue.close)
+
+        # Sentences go to TTS as they complete, or to the scheduler (TTS_SCHEDULER),
+        # which merges them as long as the audio ahead covers the next request
+        def to_tts(fragment: str):
+            timeline.mark("first_sentence")
+            tts_queue.put(fragment)
+
+        scheduler = None
+        if self.tts_scheduler and not text_stream:
+            scheduler = TTSScheduler(to_tts, self.tts_meter, buffered=lambda: self.speaker_out.buffered_ms() / 1000,
+                                     margin_ms=self.tts_margin_ms, max_chars=self.tts_max_chars)
+            turn.on_cancel(scheduler.cancel)
+
+        # --- Worker that consumes the queue and plays each chunk ----------
+        def tts_worker():
+            try:
+                speak()
+            except Exception as exc:
+                print("\nTTS error:", exc)
+                tts_queue.close()                       # The LLM loop no longer waits for room
+            finally:
+                self.barge_in.end_turn(turn)            # Resume the microphone, also after an error
+
+        def speak():
+            requests_before = self.tts_requests
+            hedged = None                               # Synthesis of the first sentence only
+            if text_stream:
+                # Tokens go into one synthesis that plays while it is written
+                player = TextStreamSpeaker(
+                    self.tts.open_text_stream, write, write_size=WRITE_SIZE, rate=RATE,
+                    on_first_audio=lambda: timeline.mark("first_tts_byte"),
+                )
+            elif cached_audio is not None:
+                # The whole answer as one fragment, played from the answer cache
+                player = TTSPrefetcher(lambda text: mark_first([cached_audio], timeline, "first_tts_byte"),
+                                       write, lookahead=0, write_size=WRITE_SIZE)
+            else:
+                # Next sentences are synthesized while the current one plays;
+                # the first one decides the time to first audio (hedged)
+                def timed(synthesize):
+                    return lambda text: mark_first(synthesize(text), timeline, "first_tts_byte")
+
+                player = TTSPrefetcher(timed(self.synthesize_cached), write, lookahead=self.tts_lookahead,
+                                       write_size=WRITE_SIZE, max_pending=self.tts_max_pending)
+                hedged = timed(self.synthesize_hedged)
+            turn.on_cancel(player.cancel)
+            while True:
+                fragment = tts_queue.get()
+                if fragment is None or fragment == "":
+                    break
+                if hedged is not None:
+                    player.submit(fragment, hedged)
+                    hedged = None
+                else:
+                    player.submit(fragment)
+            player.close()                              # Everything is in the playback buffer
+            tts_requests = player.stats.requests if text_stream else self.tts_requests - requests_before
+            dry = self.speaker_out.stats.underruns - underruns      # Playback ran dry mid-answer
+            if not turn.cancelled.is_set():
+                self.speaker_out.drain()                # Waits until all is played
+            if self.speaker_out.first_audio_at is not None:
+                timeline.mark("first_audio", at=self.speaker_out.first_audio_at)
+            timeline.mark("playback_end")
+            turn.record.spoken = player.played
+            # The memory keeps what the user actually heard
+            prompt_info = self.prompts.turn(question, usage[0] if usage else None, timeline)
+            spoken = " ".join(player.played) if turn.cancelled.is_set() else "".join(answer_parts)
+            self.memory.add_turn(question, spoken)
+            if self.memory.pending:
+                threading.Thread(target=summarize_with, args=(self.llm.client, self.llm.model, self.memory),
+                                 daemon=True).start()
+            # Complete answers from the LLM are cached for the next similar question
+            if lookup is not None and hit is None and llm_s and not turn.cancelled.is_set():
+                self.answer_cache.store(question, "".join(answer_parts), lookup.vector,
+                                        answer_s=llm_s[0], audio=b"".join(recorded) or None)
+            self.timelines.finish(timeline, truncated=turn.cancelled.is_set(), sentences=len(player.played),
+                                  warm=self.warmup, tts_mode="stream" if text_stream else "sentences",
+                                  tts_requests=tts_requests, tts_dry=dry,
+                                  text_queue_max=tts_queue.stats.max_depth,
+                                  text_queue_blocked_ms=round(tts_queue.stats.blocked_s * 1000, 1), **prompt_info)
+            if self.recorder is not None:
+                self.recorder.event("answer", text=spoken, truncated=turn.cancelled.is_set())
+                self.recorder.turn(timeline)
+
+            if turn.cancelled.is_set():
+                print("\n" + self.text["truncated"].format(len(player.played)))
+                return
+            print("\n[TTS]", player.stats.summary() if text_stream
+                  else f"{player.stats.summary()}, {tts_requests} request(s)")
+            print("[Playback]", self.speaker_out.stats.summary())
+            print("[Turns]", self.turns.stats.summary(), "|", tts_queue.stats.summary())
+            self.dry_turns[0] += dry > 0
+            self.dry_turns[1] += 1
+            if scheduler is not None:
+                print("[TTS scheduler]", scheduler.stats.summary(), "|", self.tts_meter.summary(),
+                      f"| ran dry in {self.dry_turns[0]}/{self.dry_turns[1]} turns")
+            print("[TTS cache]", self.tts_cache.stats.summary())
+            if lookup is not None:
+                print("[Answer cache]", f"{'hit' if hit else 'miss'} (similarity {lookup.similarity:.2f}) |",
+                      self.answer_cache.stats.summary())
+            if self.speculator is not None:
+                print("[Speculation]", self.speculator.stats.summary())
+            for provider in (self.llm, self.tts):
+                for label, summary in provider.summaries().items():
+                    print(f"[{label}]", summary)
+            print("[Timeline]", timeline.summary())
+            print("[History]", self.memory.stats(), "|", PromptReport.summary(prompt_info))
+            print('\n____________________________________________________')
+            print(self.text["again"])
+
+        worker = threading.Thread(target=tts_worker, daemon=True)
+        worker.start()
+
+        # ---  Request chat in streaming ---------------------------------
+        # The answer language is the user's: abbreviations of every known language
+        segmenter = SentenceSegmenter(lang=self.stt.language, eager_first=self.tts_eager_first,
+                                      min_chars=0 if scheduler else self.tts_min_chars, max_chars=self.tts_max_chars)
+        send = scheduler.feed if scheduler else to_tts
+        print("\n" + self.text["assistant"] + "\n", end=" ", flush=True)
+
+        stream = None
+        started = time.perf_counter()
+        try:
+            if hit is not None:
+                if speculative is not None:             # Not needed: the answer is cached
+                    speculative.close()
+                stream = [hit.answer]
+            else:
+                stream = speculative or self.open_chat_stream(question, hedge=True)
+                turn.on_cancel(stream.close)            # Stops consuming LLM tokens
+
+            for content_piece in (stream if hit is not None else content_pieces(stream, usage)):
+                if turn.cancelled.is_set():
+                    break
+
+                # 1) Display on screen
+                timeline.mark("first_token")
+                print(content_piece, end="", flush=True)
+                answer_parts.append(content_piece)
+
+                # 2) Tokens straight into the text stream, cached audio as one
+                #    fragment, or split into TTS chunks (first one as early as possible)
+                if text_stream:
+                    timeline.mark("first_sentence")
+                    tts_queue.put(content_piece)
+                    continue
+                if cached_audio is not None:
+                    to_tts(content_piece)
+                    continue
+                for fragment in segmenter.feed(content_piece):
+                    send(fragment)
+            llm_s.append(time.perf_counter() - started)
+
+            if not turn.cancelled.is_set():
+                # Any remaining text
+                for fragment in segmenter.flush():
+                    send(fragment)
+        except Exception as exc:
+            if not turn.cancelled.is_set():             # Closed by barge-in: expected
+                print("\nLLM stream error:", exc)       # The answer ends with what arrived
+        finally:
+            if hit is None and stream is not None:
+                stream.close()
+            if scheduler is not None:
+                scheduler.close()
+            # End signal to the TTS worker (a no-op once barge-in closed the queue)
+            tts_queue.put(None)
+            worker.join()                               # The next turn starts after this one
+
+    # -----------------------------------------------------------------------
+    # STT events (called by the STT provider)
+    # -----------------------------------------------------------------------
+    def on_connected(self):
+        print(self.text["ready"])
+
+        vad = None
+        if self.client_vad != "off":
+            from ..vad import Endpointer              # NumPy only when the VAD is on
+            vad = Endpointer(
+                rate=RATE, threshold_db=self.vad_threshold_db,
+                hangover_ms=self.vad_hangover_ms, pre_roll_ms=self.vad_pre_roll_ms,
+            )
+        # Without commits (Azure Speech) "endpoint" is "gate": the service ends the turn
+        commit = self.client_vad == "endpoint" and self.stt.commits
+
+        # Thread that sends microphone audio
+        def mic_sender():
+            try:
+                while self.stt.active:
+                    # Blocks while TTS is playing (unless the user can interrupt)
+                    data = self.capture.read(CHUNK * 2, timeout=0.5)
+                    if data is None:
+                        continue
+                    if self.recorder is not None:       # Copied into its queue, written later
+                        self.recorder.mic(data)
+                    if vad is not None:                 # Only speech goes on the wire
+                        result = vad.feed(data)
+                        if result.speech_started:
+                            self.on_speech_started()
+                        data = result.audio
+                    if data:
+                        self.stt.write(data)
+                    if vad is not None and result.speech_ended:
+                        self.timelines.open_turn().mark("end_of_speech")
+                        if commit:
+                            self.stt.commit()
+                        else:
+                            self.stt.flush()
+            except Exception as exc:
+                print("Error sending audio:", exc)
+                self.stt.close()
+            for label, summary in self.stt.summaries().items():
+                print(f"[{label}]", summary)
+            print("[Capture]", self.capture.stats.summary())
+            if vad is not None:
+                print("[VAD]", vad.stats.summary())
+
+        threading.Thread(target=mic_sender, daemon=True).start()
+
+    def on_speech_started(self):
+        # Barge-in: the user talks over the answer → stop it right away
+        if self.is_playing_audio.is_set() and self.barge_in.interrupt():
+            print("\n" + self.text["listening"])
+
+    def on_speech_ended(self):
+        self.timelines.open_turn().mark("end_of_speech")
+
+    def on_partial(self, text: str, replace: bool, utterance):
+        """`replace`: `text` is the whole hypothesis (Azure Speech), else an increment."""
+        print("." if replace else text, end=" ", flush=True)
+        if self.speculator is not None:
+            self.speculator.feed(text, replace=replace, utterance=utterance)
+
+    def on_final(self, transcript: str):
+        timeline = self.timelines.take_turn()
+        timeline.mark("transcript")
+        print(f"\n>> {transcript}\n")
+        if self.recorder is not None:
+            self.recorder.event("transcript", text=transcript)
+        speculative = None
+        if self.speculator is not None:     # Answer already started if the partial was right
+            # Not while another answer is in progress: the prompt lacks it (a miss)
+            speculative = self.speculator.take(transcript, usable=not self.turns.busy)
+            timeline.meta.update(self.speculator.stats.last, speculative=speculative is not None)
+
+        # LLM + TTS on the turn scheduler's thread (the STT callbacks never wait), after
+        # the answer in progress
+        self.turns.submit(transcript, timeline, speculative)
+
+
+def content_pieces(stream, usage: list):
+    """Text of a chat stream, piece by piece (its token usage appended to `usage`)."""
+    for chunk in stream:
+        if chunk.usage is not None:
+            usage.append(chunk.usage)
+        for choice in chunk.choices or ():
+            content_piece = getattr(getattr(choice, "delta", None), "content", None)
+            if content_piece:
+                yield content_piece
+
+
+App = StreamingPipeline
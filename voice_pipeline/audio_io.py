@@ -0,0 +1,222 @@
+"""
+Stand-ins for the PyAudio streams, so the pipeline runs without a sound card.
+
+- `WavFileSource` replaces `mic_stream`: `read(n)` returns the WAV samples at
+  real-time pace and silence once the file is over.
+- `NullSink` replaces `speaker_out`: `write(pcm)` blocks like a sound device
+  would and records when audio started and where playback ran dry.
+
+`open_mic` / `open_speaker` return these when `MIC_WAV_FILE` / `SPEAKER_SINK`
+are set and a real PyAudio stream otherwise. `AudioDevices` opens them on
+first use and only imports PyAudio when a real device is needed; its
+`player` is the speaker behind the playback ring buffer (playback.py) and
+its `capture(mute)` the microphone behind the capture ring buffer
+(capture.py).
+"""
+
+import os
+import threading
+import time
+import wave
+
+
+class WavFileSource:
+    """`mic_stream`-compatible reader over a 16-bit mono WAV file."""
+
+    def __init__(self, path: str, rate: int = 24_000, realtime: bool = True):
+        with wave.open(path, "rb") as wav:
+            if (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) != (1, 2, rate):
+                raise ValueError(
+                    f"{path}: expected 16-bit mono {rate} Hz, got "
+                    f"{wav.getsampwidth() * 8}-bit {wav.getnchannels()}ch {wav.getframerate()} Hz"
+                )
+            self.pcm = wav.readframes(wav.getnframes())
+        self.rate     = rate
+        self.realtime = realtime
+        self.eof_at: float | None = None     # When the last file sample was read
+        self._pos     = 0
+        self._clock: float | None = None
+
+    def rewind(self):
+        self._pos, self._clock, self.eof_at = 0, None, None
+
+    def read(self, num_frames: int, exception_on_overflow: bool = True) -> bytes:
+        n = num_frames * 2
+        if self.realtime:                    # Pace like a real microphone
+            now = time.perf_counter()
+            if self._clock is None:
+                self._clock = now
+            self._clock += num_frames / self.rate
+            if self._clock > now:
+                time.sleep(self._clock - now)
+        data = self.pcm[self._pos:self._pos + n]
+        self._pos += len(data)
+        if self._pos >= len(self.pcm) and self.eof_at is None:
+            self.eof_at = time.perf_counter()
+        return data + bytes(n - len(data))   # Silence after the end of file
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class NullSink:
+    """
+    `speaker_out`-compatible sink that discards audio. `write` returns once
+    the data fits in a device buffer of `buffer_ms`, like a blocking PyAudio
+    write, and the playback clock is used to measure silences (underruns).
+    """
+
+    def __init__(self, rate: int = 24_000, buffer_ms: int = 40, realtime: bool = True):
+        self.rate     = rate
+        self.buffer_s = buffer_ms / 1000
+        self.realtime = realtime
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Starts a new measurement (one turn)."""
+        with self._lock:
+            self.first_write_at: float | None = None
+            self.play_until = 0.0            # When the queued audio ends
+            self.gaps: list[float] = []      # Silences between writes, seconds
+
+    def write(self, pcm: bytes, num_frames: int | None = None, exception_on_underflow: bool = False):
+        duration = len(pcm) / 2 / self.rate
+        with self._lock:
+            now = time.perf_counter()
+            if self.first_write_at is None:
+                self.first_write_at = now
+                self.play_until = now
+            elif now > self.play_until:      # The device ran dry
+                self.gaps.append(now - self.play_until)
+                self.play_until = now
+            self.play_until += duration
+            self.bytes_written += len(pcm)
+            wait = self.play_until - self.buffer_s - now
+        if self.realtime and wait > 0:
+            time.sleep(wait)
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def open_mic(audio, rate: int, chunk: int, **kwargs):
+    """PyAudio input stream, or a `WavFileSource` if MIC_WAV_FILE is set."""
+    path = os.environ.get("MIC_WAV_FILE")
+    if path:
+        return WavFileSource(path, rate=rate)
+    return audio.open(rate=rate, input=True, frames_per_buffer=chunk, **kwargs)
+
+
+def open_speaker(audio, rate: int, chunk: int, **kwargs):
+    """PyAudio output stream, or a `NullSink` if SPEAKER_SINK is set."""
+    if os.environ.get("SPEAKER_SINK"):
+        return NullSink(rate=rate)
+    return audio.open(rate=rate, output=True, frames_per_buffer=chunk, **kwargs)
+
+
+class AudioDevices:
+    """Microphone and speaker of a script, opened on first use (16-bit mono)."""
+
+    def __init__(self, rate: int, chunk: int, channels: int = 1):
+        self.rate     = rate
+        self.chunk    = chunk
+        self.channels = channels
+        self._audio   = None
+        self._mic     = None
+        self._speaker = None
+        self._player  = None
+        self._capture = None
+
+    @property
+    def audio(self):
+        """The PyAudio instance (created, and `pyaudio` imported, on first use)."""
+        if self._audio is None:
+            import pyaudio
+            self._audio = pyaudio.PyAudio()
+        return self._audio
+
+    def stream_kwargs(self) -> dict:
+        """`format` / `channels` for `audio.open` (imports PyAudio)."""
+        import pyaudio
+        return {"format": pyaudio.paInt16, "channels": self.channels}
+
+    @property
+    def mic(self):
+        if self._mic is None:
+            if os.environ.get("MIC_WAV_FILE"):
+                self._mic = open_mic(None, self.rate, self.chunk)
+            else:
+                self._mic = open_mic(self.audio, self.rate, self.chunk, **self.stream_kwargs())
+        return self._mic
+
+    @property
+    def speaker(self):
+        """Reusable speaker output (prevents clicks when opening/closing)."""
+        if self._speaker is None:
+            self._speaker = self.open_speaker()
+        return self._speaker
+
+    def open_speaker(self):
+        """A new speaker stream, closed by the caller."""
+        if os.environ.get("SPEAKER_SINK"):
+            return open_speaker(None, self.rate, self.chunk)
+        return open_speaker(self.audio, self.rate, self.chunk, **self.stream_kwargs())
+
+    @property
+    def player(self):
+        """
+        Speaker behind a jitter buffer (`playback.Player`), fed from its own
+        callback; SPEAKER_SINK=null / a .wav path replace the sound card.
+        """
+        if self._player is None:
+            from .playback import Player, clock_output, pyaudio_output
+
+            sink = os.environ.get("SPEAKER_SINK")
+            if sink:
+                output = clock_output(self.rate, self.chunk, path=None if sink == "null" else sink)
+            else:
+                output = pyaudio_output(self.audio, self.rate, self.chunk, **self.stream_kwargs())
+            self._player = Player(
+                output, self.rate, self.chunk,
+                target_ms=int(os.environ.get("PLAYBACK_BUFFER_MS", "80")),
+                capacity_ms=int(os.environ.get("PLAYBACK_CAPACITY_MS", "2000")),
+            )
+        return self._player
+
+    def capture(self, mute=None):
+        """
+        Microphone in callback mode behind a ring buffer (`capture.Capture`),
+        muted while `mute` is set; MIC_WAV_FILE replaces the sound card.
+        """
+        if self._capture is None:
+            from .capture import Capture, pyaudio_input, source_input
+
+            if os.environ.get("MIC_WAV_FILE"):
+                input = source_input(open_mic(None, self.rate, self.chunk), self.chunk)
+            else:
+                input = pyaudio_input(self.audio, self.rate, self.chunk, **self.stream_kwargs())
+            self._capture = Capture(
+                input, self.rate, self.chunk,
+                capacity_ms=int(os.environ.get("MIC_BUFFER_MS", "2000")),
+                pre_roll_ms=int(os.environ.get("MIC_PRE_ROLL_MS", "200")),
+                mute=mute,
+            )
+        return self._capture
+
+    def close(self):
+        for stream in (self._mic, self._speaker, self._player, self._capture):
+            if stream is not None:
+                stream.stop_stream()
+                stream.close()
+        self._mic = self._speaker = self._player = self._capture = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
@@ -0,0 +1,114 @@
+"""
+Barge-in (full duplex): the user can interrupt the assistant by talking.
+
+Each answer is a `Turn`. Everything that keeps the answer alive registers a
+cancel callback on it (LLM stream `close`, `TTSPrefetcher.cancel`, closing
+the text queue, ...). When speech is detected while the answer is playing,
+`BargeIn.interrupt()` runs all those callbacks at once and the turn is
+recorded as truncated.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+
+@dataclass
+class TurnRecord:
+    """What was asked and what the user actually heard."""
+
+    question:  str
+    spoken:    list[str] = field(default_factory=list)
+    truncated: bool = False
+    started:   float = field(default_factory=time.time)
+
+    @property
+    def spoken_text(self) -> str:
+        return " ".join(self.spoken)
+
+
+class Turn:
+    """One assistant answer that can be cancelled from any thread."""
+
+    def __init__(self, question: str):
+        self.record    = TurnRecord(question)
+        self.cancelled = threading.Event()
+        self._lock     = threading.Lock()
+        self._on_cancel: list[Callable[[], object]] = []
+
+    def on_cancel(self, fn: Callable[[], object]):
+        """Registers `fn`; it runs right away if the turn is already cancelled."""
+        with self._lock:
+            if not self.cancelled.is_set():
+                self._on_cancel.append(fn)
+                return
+        self._run(fn)
+
+    def cancel(self):
+        with self._lock:
+            if self.cancelled.is_set():
+                return
+            self.cancelled.set()
+            callbacks, self._on_cancel = self._on_cancel, []
+        for fn in callbacks:
+            self._run(fn)
+
+    @staticmethod
+    def _run(fn: Callable[[], object]):
+        try:
+            fn()
+        except Exception as exc:             # Closing a dead stream, etc.
+            print("Barge-in cancel error:", exc)
+
+
+class BargeIn:
+    """
+    Tracks the current turn and owns the `playing` event (the scripts'
+    `is_playing_audio`): set while a turn is current, cleared as soon as it
+    ends or is interrupted. With `enabled=False` the scripts keep the old
+    behaviour (microphone muted while TTS plays) and `interrupt` is a no-op.
+    """
+
+    def __init__(self, enabled: bool, playing: threading.Event):
+        self.enabled  = enabled
+        self.playing  = playing
+        self._lock    = threading.Lock()
+        self._current: Turn | None = None
+
+    def start_turn(self, question: str) -> Turn:
+        """Starts a new answer; a previous one still running is superseded."""
+        turn = Turn(question)
+        with self._lock:
+            previous, self._current = self._current, turn
+            self.playing.set()
+        if previous is not None:
+            self._truncate(previous)
+        return turn
+
+    def end_turn(self, turn: Turn) -> bool:
+        """Marks `turn` as finished; returns False if a newer turn replaced it."""
+        with self._lock:
+            if self._current is not turn:
+                return False
+            self._current = None
+            self.playing.clear()
+            return True
+
+    def interrupt(self) -> bool:
+        """Called when the user starts talking; cancels the answer in flight."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            turn, self._current = self._current, None
+            self.playing.clear()
+        if turn is None:
+            return False
+        self._truncate(turn)
+        return True
+
+    @staticmethod
+    def _truncate(turn: Turn):
+        if not turn.cancelled.is_set():
+            turn.record.truncated = True
+            turn.cancel()
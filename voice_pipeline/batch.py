@@ -0,0 +1,430 @@
+"""
+Batch mode: recorded audio through the same STT → LLM → TTS logic.
+
+    inputs ─► workers ─► decode ─► VAD ─► realtime STT ─► transcript ─► chat ─► TTS ─► out/<id>.*
+              (× N)     (24 kHz)   commit per utterance        (in order, with the file's memory)
+
+Inputs: a directory (every .wav / .pcm / .raw under it) or a manifest file,
+one path per line or JSON lines `{"path": ..., "id": ..., "format": ...}`
+(relative paths are relative to the manifest). WAV files are 16-bit PCM,
+mono or stereo (mixed down), at 8, 12, 16, 24 or 48 kHz; raw files are in
+`raw_format` (`codec/rate`, see voice_pipeline.codecs: `pcm16/16000`,
+`mulaw/8000`…) unless their manifest line says otherwise. Everything is
+resampled to 24 kHz.
+
+Each file gets its own realtime transcription session. The audio is sent
+`speed` times faster than real time (0: as fast as the socket takes it),
+so the turns are cut on the client: the `Endpointer` commits the input
+buffer at the end of every utterance, and the server VAD is off. Every
+transcript is answered in order with the conversation memory of its file,
+and the answer is synthesized sentence by sentence (`lookahead` + 1
+requests in flight).
+
+Output per file: `<id>.json` (transcripts, answers, token usage, timings)
+and `<id>.<turn>.wav` (the answer audio, 24 kHz 16-bit PCM). A file with an
+`<id>.json` and no error in it (nor in any of its turns) is skipped unless
+`force`, so an interrupted or throttled run resumes where it stopped. `summary.json` has the totals, among them the
+audio hours processed per wall-clock hour.
+"""
+
+import asyncio
+import json
+import os
+import time
+import wave
+from dataclasses import dataclass, field
+
+from websockets.asyncio.client import connect
+
+from .codecs import PIPELINE_RATE, RATES, AudioFormat, Decoder
+from .engine import EngineConfig
+from .framing import AudioFramer
+from .history import ConversationMemory
+from .segmenter import SentenceSegmenter
+from .tts_cache import TTSCache, cache_key
+from .vad import Endpointer
+
+AUDIO_EXTENSIONS = (".wav", ".pcm", ".raw")
+BLOCK_S = 0.5                            # Audio decoded per read
+
+
+@dataclass
+class BatchItem:
+    path: str
+    id: str
+    format: AudioFormat | None = None    # Raw files; None: WAV header (or the default)
+
+
+def _item_id(path: str, root: str) -> str:
+    rel = os.path.splitext(os.path.relpath(path, root))[0]
+    return rel.replace(os.sep, "__").replace("/", "__")
+
+
+def load_inputs(source: str) -> list[BatchItem]:
+    """The audio files of a directory (recursively) or a manifest."""
+    if os.path.isdir(source):
+        items = []
+        for folder, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(AUDIO_EXTENSIONS):
+                    path = os.path.join(folder, name)
+                    items.append(BatchItem(path, _item_id(path, source)))
+        return sorted(items, key=lambda item: item.path)
+
+    root  = os.path.dirname(os.path.abspath(source))
+    items = []
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line) if line.startswith("{") else {"path": line}
+            path  = os.path.join(root, entry["path"])
+            items.append(BatchItem(
+                path, entry.get("id") or _item_id(path, root),
+                AudioFormat.parse(entry["format"]) if entry.get("format") else None,
+            ))
+    return items
+
+
+# ---------------------------------------------------------------------------
+# Audio
+# ---------------------------------------------------------------------------
+class AudioFile:
+    """A WAV or raw file read in blocks as 24 kHz 16-bit mono PCM."""
+
+    def __init__(self, item: BatchItem, raw_format: AudioFormat):
+        self.path = item.path
+        self._wav = None
+        if item.path.lower().endswith(".wav") and item.format is None:
+            self._wav = wave.open(item.path, "rb")
+            if self._wav.getsampwidth() != 2:
+                raise ValueError(f"{item.path}: {self._wav.getsampwidth() * 8}-bit WAV (16-bit PCM only)")
+            self.channels = self._wav.getnchannels()
+            self.format   = AudioFormat("pcm16", self._wav.getframerate())
+            self.seconds  = self._wav.getnframes() / self.format.rate
+        else:
+            self.channels = 1
+            self.format   = item.format or raw_format
+            self._raw     = open(item.path, "rb")
+            self.seconds  = os.path.getsize(item.path) / self.format.bytes_per_second
+        if self.format.rate not in RATES or self.format.codec == "opus":
+            raise ValueError(f"{item.path}: unsupported format {self.format}")
+        self.decoder = Decoder(self.format, PIPELINE_RATE)
+
+    def blocks(self):
+        frames = int(self.format.rate * BLOCK_S)
+        while True:
+            if self._wav is not None:
+                data = self._wav.readframes(frames)
+                if self.channels > 1:
+                    data = _mix_down(data, self.channels)
+            else:
+                data = self._raw.read(int(self.format.bytes_per_second * BLOCK_S))
+            if not data:
+                return
+            yield self.decoder.decode(data)
+
+    def close(self):
+        (self._wav or self._raw).close()
+
+
+def _mix_down(pcm: bytes, channels: int) -> bytes:
+    import numpy as np
+
+    samples = np.frombuffer(pcm, dtype="<i2").reshape(-1, channels)
+    return samples.mean(axis=1).astype(np.int16).tobytes()
+
+
+def write_wav(path: str, pcm: bytes, rate: int = PIPELINE_RATE):
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm)
+
+
+# ---------------------------------------------------------------------------
+# One file
+# ---------------------------------------------------------------------------
+@dataclass
+class BatchOptions:
+    out_dir: str
+    speed: float       = 8.0             # x real time (0: unpaced)
+    raw_format: AudioFormat = field(default_factory=lambda: AudioFormat("pcm16", PIPELINE_RATE))
+    vad_threshold_db: float = -45.0
+    vad_hangover_ms: int    = 500        # Silence that ends an utterance
+    timeout_s: float   = 60.0            # Transcripts still missing this long after the audio
+    force: bool        = False
+
+
+class BatchJob:
+    """Transcribes, answers and synthesizes one file."""
+
+    def __init__(self, item: BatchItem, config: EngineConfig, options: BatchOptions,
+                 aoai, tts, tts_cache: TTSCache | None = None):
+        self.item    = item
+        self.config  = config
+        self.options = options
+        self.aoai    = aoai
+        self.tts     = tts
+        self.tts_cache = tts_cache
+        self.memory  = ConversationMemory(config.system_prompt, budget_tokens=config.history_tokens)
+        self.result: dict = {"id": item.id, "file": item.path, "audio_s": 0.0, "turns": [], "error": None}
+        self._order: asyncio.Queue = asyncio.Queue()     # Futures of the transcripts, in commit order
+        self._items: dict[str, asyncio.Future] = {}
+        self._commits   = 0              # Commits sent
+        self._committed = 0              # ... and acknowledged
+        self.audio: AudioFile | None = None
+
+    async def run(self) -> dict:
+        started = time.perf_counter()
+        try:
+            self.audio = AudioFile(self.item, self.options.raw_format)
+            self.result["audio_s"] = round(self.audio.seconds, 3)
+            self.result["format"]  = str(self.audio.format)
+            try:
+                await self._transcribe()
+            finally:
+                self.audio.close()
+        except Exception as exc:
+            self.result["error"] = f"{type(exc).__name__}: {exc}"
+        self.result["elapsed_s"] = round(time.perf_counter() - started, 3)
+        path = os.path.join(self.options.out_dir, f"{self.item.id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.result, f, ensure_ascii=False, indent=2)
+        return self.result
+
+    async def _transcribe(self):
+        async with connect(
+            self.config.stt_url, additional_headers=self.config.stt_headers,
+            compression=None, max_size=None,
+        ) as ws:
+            await ws.send(json.dumps({
+                "type": "transcription_session.update",
+                "session": {
+                    "input_audio_format": "pcm16",
+                    "input_audio_transcription": {
+                        "model": self.config.stt_model,
+                        "prompt": self.config.stt_prompt,
+                    },
+                    "turn_detection": None,          # Committed per utterance by the endpointer
+                },
+            }))
+            receiver = asyncio.create_task(self._receive(ws))
+            answerer = asyncio.create_task(self._answer_all())
+            try:
+                await self._send_audio(ws)
+                await self._wait_transcripts(receiver)
+            finally:
+                receiver.cancel()
+                for future in self._items.values():
+                    future.cancel()          # Missing transcripts: the turn is recorded without one
+                self._order.put_nowait(None)
+                await answerer
+
+    async def _send_audio(self, ws):
+        pending: list[str] = []
+        framer = AudioFramer(lambda payload: pending.append(payload.decode("ascii")),
+                             rate=PIPELINE_RATE, frame_ms=self.config.frame_ms)
+        vad = Endpointer(rate=PIPELINE_RATE, threshold_db=self.options.vad_threshold_db,
+                         hangover_ms=self.options.vad_hangover_ms)
+        commit = json.dumps({"type": "input_audio_buffer.commit"})
+        loop  = asyncio.get_running_loop()
+        clock = loop.time()
+        for pcm in self.audio.blocks():
+            result = vad.feed(pcm)
+            if result.audio:
+                framer.write(result.audio)
+            if result.speech_ended:
+                framer.flush()
+                pending.append(commit)
+                self._commits += 1
+            for payload in pending:
+                await ws.send(payload)
+            pending.clear()
+            if self.options.speed > 0:           # Paced to `speed` x real time
+                clock += len(pcm) / 2 / PIPELINE_RATE / self.options.speed
+                delay = clock - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        if vad.in_speech:                        # The file ends while speaking
+            framer.flush()
+            for payload in pending + [commit]:
+                await ws.send(payload)
+            self._commits += 1
+
+    async def _wait_transcripts(self, receiver: asyncio.Task):
+        """Until every commit has its transcript (TimeoutError after `timeout_s`)."""
+        deadline = asyncio.get_running_loop().time() + self.options.timeout_s
+        while self._committed < self._commits or not all(f.done() for f in self._items.values()):
+            if receiver.done():              # Socket closed (or failed) before the end
+                receiver.result()
+                raise ConnectionError("transcription session closed before the last transcript")
+            if asyncio.get_running_loop().time() > deadline:
+                raise TimeoutError(f"no transcript after {self.options.timeout_s:.0f} s")
+            await asyncio.sleep(0.02)
+
+    async def _receive(self, ws):
+        loop = asyncio.get_running_loop()
+        async for message in ws:
+            ev = json.loads(message)
+            etype = ev.get("type", "")
+            if etype == "input_audio_buffer.committed":
+                future = self._items.setdefault(ev["item_id"], loop.create_future())
+                self._order.put_nowait(future)
+                self._committed += 1
+            elif etype == "conversation.item.input_audio_transcription.completed":
+                future = self._items.setdefault(ev["item_id"], loop.create_future())
+                if not future.done():
+                    future.set_result(ev.get("transcript", ""))
+            elif etype == "conversation.item.input_audio_transcription.failed":
+                future = self._items.setdefault(ev["item_id"], loop.create_future())
+                if not future.done():
+                    future.set_result(None)
+            elif etype == "error":
+                self.result.setdefault("stt_errors", []).append(ev.get("error"))
+
+    # --- Answers -------------------------------------------------------------
+    async def _answer_all(self):
+        while (future := await self._order.get()) is not None:
+            try:
+                transcript = await future
+            except asyncio.CancelledError:
+                transcript = None
+            turn = {"transcript": transcript}
+            self.result["turns"].append(turn)
+            if transcript and transcript.strip():
+                await self._answer(transcript, turn, len(self.result["turns"]))
+
+    async def _answer(self, question: str, turn: dict, number: int):
+        try:
+            response = await self.aoai.chat.completions.create(
+                model=self.config.chat_model,
+                messages=self.memory.messages(question),
+                temperature=self.config.temperature,
+                max_tokens=self.config.max_tokens,
+            )
+            answer = response.choices[0].message.content or ""
+            turn["answer"] = answer
+            if response.usage is not None:
+                turn["prompt_tokens"]     = response.usage.prompt_tokens
+                turn["completion_tokens"] = response.usage.completion_tokens
+            self.memory.add_turn(question, answer)
+
+            segmenter = SentenceSegmenter(**{**self.config.segmenter, "eager_first": False})
+            fragments = segmenter.feed(answer) + segmenter.flush()
+            permits = asyncio.Semaphore(self.config.lookahead + 1)
+            pcm = b"".join(await asyncio.gather(*(self._synthesize(text, permits) for text in fragments)))
+            name = f"{self.item.id}.{number}.wav"
+            await asyncio.to_thread(write_wav, os.path.join(self.options.out_dir, name), pcm)
+            turn["audio"]   = name
+            turn["audio_s"] = round(len(pcm) / 2 / PIPELINE_RATE, 3)
+        except Exception as exc:
+            turn["error"] = f"{type(exc).__name__}: {exc}"
+
+    async def _synthesize(self, text: str, permits: asyncio.Semaphore) -> bytes:
+        key = cache_key(text, self.config.voice, self.config.tts_model, self.config.tts_instructions, "pcm")
+        if self.tts_cache is not None and (pcm := self.tts_cache.get(key)) is not None:
+            return pcm
+        async with permits:
+            response = await self.tts.audio.speech.create(
+                model=self.config.tts_model,
+                voice=self.config.voice,
+                input=text,
+                instructions=self.config.tts_instructions,
+                response_format="pcm",
+            )
+            pcm = response.content
+        pcm = pcm[:len(pcm) // 2 * 2]
+        if self.tts_cache is not None:
+            self.tts_cache.put(key, pcm)
+        return pcm
+
+
+# ---------------------------------------------------------------------------
+# Many files
+# ---------------------------------------------------------------------------
+def failed(result: dict) -> bool:
+    """The file, or one of its answers (LLM or TTS), ended with an error."""
+    return result.get("error") is not None or any(t.get("error") for t in result.get("turns", ()))
+
+
+class BatchStats:
+    def __init__(self, files: int = 0):
+        self.files   = files
+        self.done    = 0
+        self.failed  = 0                 # Files with an error, in any turn (see their .json)
+        self.skipped = 0                 # Already in the output directory
+        self.audio_s = 0.0               # Audio processed
+        self.turns   = 0
+        self.started = time.perf_counter()
+        self.wall_s  = 0.0
+
+    def add(self, result: dict):
+        self.done    += 1
+        self.failed  += failed(result)
+        self.audio_s += result["audio_s"]
+        self.turns   += len(result["turns"])
+        self.wall_s   = time.perf_counter() - self.started
+
+    @property
+    def audio_hours_per_hour(self) -> float:
+        """Audio hours processed per wall-clock hour (= x real time)."""
+        return self.audio_s / self.wall_s if self.wall_s else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "files": self.files, "done": self.done, "failed": self.failed, "skipped": self.skipped,
+            "turns": self.turns, "audio_hours": round(self.audio_s / 3600, 4),
+            "wall_hours": round(self.wall_s / 3600, 4),
+            "audio_hours_per_wall_hour": round(self.audio_hours_per_hour, 2),
+        }
+
+    def summary(self) -> str:
+        return (
+            f"{self.done}/{self.files} files ({self.failed} failed, {self.skipped} skipped), {self.turns} turns, "
+            f"{self.audio_s / 3600:.2f} h of audio in {self.wall_s / 60:.1f} min "
+            f"→ {self.audio_hours_per_hour:.1f} audio-hours per wall-clock hour"
+        )
+
+
+def _finished(path: str) -> bool:
+    """Processed by an earlier run without an error."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return not failed(json.load(f))
+    except (OSError, ValueError):
+        return False
+
+
+async def run_batch(items: list[BatchItem], config: EngineConfig, options: BatchOptions,
+                    aoai, tts, workers: int = 4, tts_cache: TTSCache | None = None,
+                    verbose: bool = True) -> BatchStats:
+    """Processes `items` with `workers` files in flight and writes `summary.json`."""
+    os.makedirs(options.out_dir, exist_ok=True)
+    todo: asyncio.Queue[BatchItem] = asyncio.Queue()
+    stats = BatchStats(len(items))
+    for item in items:
+        if not options.force and _finished(os.path.join(options.out_dir, f"{item.id}.json")):
+            stats.skipped += 1
+        else:
+            todo.put_nowait(item)
+
+    async def worker():
+        while not todo.empty():
+            item = todo.get_nowait()
+            result = await BatchJob(item, config, options, aoai, tts, tts_cache).run()
+            stats.add(result)
+            if verbose:
+                errors = [result["error"]] if result["error"] else [t["error"] for t in result["turns"] if t.get("error")]
+                state = f"ERROR {errors[0]}" if errors else f"{len(result['turns'])} turns"
+                speed = result["audio_s"] / result["elapsed_s"] if result["elapsed_s"] else 0.0
+                print(f"[{stats.done + stats.skipped}/{stats.files}] {item.id}: {state}, "
+                      f"{result['audio_s']:.0f} s of audio in {result['elapsed_s']:.1f} s ({speed:.1f}x)")
+
+    await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+    stats.wall_s = time.perf_counter() - stats.started
+    with open(os.path.join(options.out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(stats.to_dict(), f, indent=2)
+    return stats
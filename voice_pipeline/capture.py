@@ -0,0 +1,219 @@
+"""
+Event-driven microphone capture: the sound device writes into a
+preallocated ring buffer from its callback, the sender reads from it.
+
+    sound device ──callback──► [ ring buffer ] ──read()──► mic sender
+                    (memcpy)    pre-roll while muted   (memoryview, no copy)
+
+`Capture.read(n)` blocks on a condition until `n` bytes are buffered and
+the microphone is not muted, and returns a `memoryview` of a reused
+buffer (valid until the next read), so there is no polling and no new
+`bytes` per chunk. The mute flag is a `Signal` (a `threading.Event` that
+wakes the reader on `clear()`): the pipeline's `is_playing_audio`, when
+the user cannot interrupt the answer.
+
+While muted (and before the first read), the ring keeps only the last
+`pre_roll_ms` of audio: when playback ends, the reader starts with what
+was said just before, instead of losing the first syllables. Counters:
+- overflows: the reader fell `capacity_ms` behind and the oldest audio was
+  dropped (plus the overflows the device itself reports);
+- latency: from the callback that captured a block to the read that hands
+  it to the sender (average and maximum).
+"""
+
+import collections
+import threading
+import time
+
+from .playback import PA_CONTINUE, RingBuffer
+
+PA_INPUT_OVERFLOW = 2                    # pyaudio.paInputOverflow
+
+
+class Signal(threading.Event):
+    """`threading.Event` that also calls its watchers on `set()` and `clear()`."""
+
+    def __init__(self):
+        super().__init__()
+        self._watchers: list = []
+
+    def watch(self, callback):
+        self._watchers.append(callback)
+
+    def set(self):
+        super().set()
+        for callback in self._watchers:
+            callback()
+
+    def clear(self):
+        super().clear()
+        for callback in self._watchers:
+            callback()
+
+
+class CaptureStats:
+    def __init__(self, rate: int = 24_000):
+        self.rate             = rate
+        self.captured         = 0        # Bytes from the device
+        self.overflows        = 0        # Reader too slow: oldest audio dropped
+        self.dropped          = 0        # Bytes dropped by overflows
+        self.device_overflows = 0        # Reported by the device (callback too late)
+        self.pre_rolls        = 0        # Reads resumed after a mute (from the pre-roll)
+        self.reads            = 0
+        self.total_latency    = 0.0      # Seconds, capture → read
+        self.max_latency      = 0.0
+
+    def summary(self) -> str:
+        avg = self.total_latency / self.reads if self.reads else 0.0
+        return (
+            f"{self.captured / 2 / self.rate:.1f} s captured, {self.overflows} overflows "
+            f"({self.dropped / 2 / self.rate * 1000:.0f} ms dropped), {self.device_overflows} device overflows, "
+            f"capture→send avg {avg * 1000:.1f} ms, max {self.max_latency * 1000:.1f} ms, "
+            f"{self.pre_rolls} pre-rolls"
+        )
+
+
+class Capture:
+    """
+    `input(push)` opens the device that calls `push(pcm, status)` for every
+    block: see `pyaudio_input`, `source_input`.
+    """
+
+    def __init__(self, input, rate: int = 24_000, chunk: int = 1024, capacity_ms: int = 2000,
+                 pre_roll_ms: int = 200, mute: Signal | None = None):
+        self.rate     = rate
+        self.chunk    = chunk
+        self.ring     = RingBuffer(max(rate * 2 * capacity_ms // 1000, chunk * 4))
+        self.pre_roll = min(rate * 2 * pre_roll_ms // 1000, self.ring.capacity)
+        self.stats    = CaptureStats(rate)
+        self.mute     = mute
+        self._cond    = threading.Condition()
+        self._blocks: collections.deque[tuple[int, float]] = collections.deque()  # (end position, captured at)
+        self._pushed  = 0                # Bytes ever written to the ring
+        self._out     = bytearray(chunk * 2)
+        self._was_muted = False
+        self._reading = False            # No reader yet: only the pre-roll is kept
+        self._behind  = False            # Overflow episode in progress (until the next read)
+        self._closed  = False
+        if mute is not None:
+            mute.watch(self._wake)
+        self._stream  = input(self._push)
+
+    # --- Device side -------------------------------------------------------
+    def _push(self, pcm: bytes, status: int = 0):
+        now = time.perf_counter()
+        with self._cond:
+            self.stats.captured += len(pcm)
+            if status & PA_INPUT_OVERFLOW:
+                self.stats.device_overflows += 1
+            muted = self._muted() or not self._reading
+            limit = self.pre_roll if muted else self.ring.capacity
+            if len(pcm) > limit:
+                pcm = memoryview(pcm)[len(pcm) - limit:]
+            excess = len(self.ring) + len(pcm) - limit
+            if excess > 0:               # Oldest audio out (while muted: beyond the pre-roll)
+                self.ring.discard(excess)
+                if not muted:
+                    if not self._behind:     # One per episode, not per block
+                        self.stats.overflows += 1
+                    self._behind = True
+                    self.stats.dropped += excess
+            if pcm:
+                self.ring.write(pcm)
+                self._pushed += len(pcm)
+                self._blocks.append((self._pushed, now))
+            self._cond.notify_all()
+
+    # --- Reader side -------------------------------------------------------
+    def read(self, n: int, timeout: float | None = None) -> memoryview | None:
+        """
+        The next `n` bytes once they are buffered and the microphone is not
+        muted; None on timeout or after `close()`.
+        """
+        if n > len(self._out):
+            self._out = bytearray(n)
+        with self._cond:
+            self._reading = True
+            if not self._cond.wait_for(lambda: self._closed or (not self._muted() and len(self.ring) >= n), timeout):
+                return None
+            if self._closed:
+                return None
+            if self._was_muted:
+                self._was_muted = False
+                self.stats.pre_rolls += 1
+            head = self._pushed - len(self.ring)
+            while self._blocks and self._blocks[0][0] <= head:
+                self._blocks.popleft()
+            captured_at = self._blocks[0][1] if self._blocks else time.perf_counter()
+            out = memoryview(self._out)[:n]
+            self.ring.read_into(out)
+            self._behind = False
+        latency = time.perf_counter() - captured_at
+        self.stats.reads         += 1
+        self.stats.total_latency += latency
+        self.stats.max_latency    = max(self.stats.max_latency, latency)
+        return out
+
+    def _muted(self) -> bool:
+        muted = self.mute is not None and self.mute.is_set()
+        if muted:
+            self._was_muted = True
+        return muted
+
+    def _wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+def pyaudio_input(audio, rate: int, chunk: int, **kwargs):
+    """PyAudio stream in callback mode pushing into the capture."""
+    def input(push):
+        def callback(in_data, frame_count, time_info, status):
+            push(in_data, status)
+            return None, PA_CONTINUE
+        return audio.open(rate=rate, input=True, frames_per_buffer=chunk, stream_callback=callback, **kwargs)
+    return input
+
+
+class SourceInput:
+    """Device stand-in: a thread pushes `source.read(chunk)` (e.g. a `WavFileSource`, paced by itself)."""
+
+    def __init__(self, push, source, chunk: int):
+        self.push   = push
+        self.source = source
+        self.chunk  = chunk
+        self._stop   = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.push(self.source.read(self.chunk))
+
+    def stop_stream(self):
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def close(self):
+        self.stop_stream()
+        self.source.close()
+
+
+def source_input(source, chunk: int):
+    return lambda push: SourceInput(push, source, chunk)
@@ -0,0 +1,120 @@
+"""
+One entry point for every pipeline variant.
+
+    python -m voice_pipeline streaming           # realtime STT, streamed answer
+    python -m voice_pipeline nonstreaming        # whole answer, then TTS
+    python -m voice_pipeline speech              # Azure Speech STT/TTS
+    python -m voice_pipeline async               # asyncio engine, one session
+    python -m voice_pipeline gateway --workers 4 # multi-session websocket server
+    python -m voice_pipeline client ws://localhost:8765/
+    python -m voice_pipeline batch recordings/   # files → transcripts, answers, audio
+    python -m voice_pipeline recording info session.vprec   # RECORD_DIR sessions
+
+Only the selected variant's module is imported, and it imports its own
+dependencies when it starts (see voice_pipeline.apps). `--profile` starts
+the variant without entering its loop and prints how long each startup
+phase took, which heavy modules it loaded and the import time per package
+(the command re-runs itself under `python -X importtime`).
+"""
+
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+
+from .startup import StartupProfile, import_table
+
+VARIANTS = {
+    "nonstreaming": ("nonstreaming",   "Realtime STT, whole AOAI answer, then TTS"),
+    "streaming":    ("streaming",      "Realtime STT, streamed AOAI answer, sentence TTS"),
+    "speech":       ("speech",         "Azure Speech STT and TTS, streamed AOAI answer"),
+    "async":        ("async_engine",   "Streaming pipeline on one asyncio event loop"),
+    "gateway":      ("gateway_server", "Multi-session voice gateway"),
+    "client":       ("gateway_client", "Microphone client for the gateway"),
+    "batch":        ("batch",          "Recorded audio files, many at a time, faster than real time"),
+    "recording":    ("recording",      "Show, export or replay a recorded session (RECORD_DIR)"),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--profile", action="store_true",
+                        help="start without entering the loop and print the startup profile")
+
+    parser = argparse.ArgumentParser(prog="python -m voice_pipeline", description="STT → LLM → TTS voice pipeline")
+    variants = parser.add_subparsers(dest="variant", required=True, metavar="variant")
+    for name, (_, description) in VARIANTS.items():
+        variants.add_parser(name, parents=[common], help=description, description=description)
+
+    gateway = variants.choices["gateway"]
+    env = os.environ
+    gateway.add_argument("--host", default=env.get("GATEWAY_HOST", "0.0.0.0"))
+    gateway.add_argument("--port", type=int, default=int(env.get("GATEWAY_PORT", "8765")))
+    gateway.add_argument("--workers", type=int, default=int(env.get("GATEWAY_WORKERS", "1")),
+                         help="worker processes sharing the port (Linux/macOS)")
+    gateway.add_argument("--max-sessions", type=int, default=int(env.get("GATEWAY_MAX_SESSIONS", "100")),
+                         help="concurrent sessions over all the workers")
+    gateway.add_argument("--ahead-ms", type=int, default=int(env.get("GATEWAY_AHEAD_MS", "200")),
+                         help="answer audio sent ahead of real time")
+    gateway.add_argument("--metrics-port", type=int, default=int(env.get("METRICS_PORT", "0")),
+                         help="/metrics and /sessions endpoint")
+
+    variants.choices["client"].add_argument("url", nargs="?", default="ws://localhost:8765/")
+
+    batch = variants.choices["batch"]
+    batch.add_argument("input", help="directory of .wav / .pcm / .raw files, or a manifest")
+    batch.add_argument("--out", default=env.get("BATCH_OUT", "batch_out"), help="output directory")
+    batch.add_argument("--workers", type=int, default=int(env.get("BATCH_WORKERS", "4")),
+                       help="files processed at the same time")
+    batch.add_argument("--speed", type=float, default=float(env.get("BATCH_SPEED", "8")),
+                       help="audio sent this many times faster than real time (0: unpaced)")
+    batch.add_argument("--raw-format", default=env.get("BATCH_RAW_FORMAT", "pcm16/24000"),
+                       help="format of raw files: codec/rate (pcm16/16000, mulaw/8000...)")
+    batch.add_argument("--force", action="store_true", help="process files already in the output directory")
+
+    recording = variants.choices["recording"]
+    recording.add_argument("action", choices=("info", "export", "replay"))
+    recording.add_argument("path", help=".vprec file written with RECORD_DIR")
+    recording.add_argument("--out", default="session_out", help="export directory")
+    return parser
+
+
+def profile_imports(argv: list[str]) -> int:
+    """Re-runs the command under `-X importtime` and prints the import table."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "voice_pipeline", *argv],
+        env=env, stderr=subprocess.PIPE, text=True,
+    )
+    errors = [line for line in child.stderr.splitlines() if not line.startswith("import time:")]
+    if errors:
+        print("\n".join(errors), file=sys.stderr)
+    print(import_table(child.stderr))
+    return child.returncode
+
+
+def main(argv: list[str] | None = None) -> int:
+    profile = StartupProfile()
+    argv = sys.argv[1:] if argv is None else argv
+    with profile.phase("environment"):
+        from dotenv import load_dotenv
+        load_dotenv(override=True)       # Before the option defaults read the environment
+    args = build_parser().parse_args(argv)
+
+    if args.profile and "importtime" not in sys._xoptions:
+        return profile_imports(argv)
+
+    with profile.phase("variant"):
+        module = importlib.import_module(f".apps.{VARIANTS[args.variant][0]}", __package__)
+    app = module.App(args, profile)
+    try:
+        app.start()                      # A failure halfway still closes what was opened
+        if args.profile:
+            print(profile.report())
+            return 0
+        app.run()
+    finally:
+        app.close()
+    return 0
@@ -0,0 +1,301 @@
+"""
+Telephony and compressed audio formats, converted to and from the pipeline's
+16-bit mono PCM.
+
+- G.711 μ-law / A-law (one byte per sample): NumPy lookup tables both ways
+  (256 entries to decode, 65 536 to encode), no Python loop per sample;
+- Opus: `opuslib` (optional, needs the libopus shared library), one 20 ms
+  packet per frame;
+- `Resampler`: polyphase windowed-sinc FIR between 8, 16 and 24 kHz (any
+  integer ratio). Every block is filtered with one matrix product per
+  phase, and the filter history is kept between blocks, so a stream cut
+  into arbitrary chunks gives the same samples as the whole signal.
+
+Formats are written `codec/rate[/bitrate]`: `mulaw/8000`, `alaw/8000`,
+`pcm16/16000`, `opus/24000/24000` (see `AudioFormat.parse`). `Decoder(fmt)`
+turns the frames of a format into pipeline PCM, `Encoder(fmt)` the reverse.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+PIPELINE_RATE = 24_000
+RATES  = (8_000, 12_000, 16_000, 24_000, 48_000)
+CODECS = ("pcm16", "mulaw", "alaw", "opus")
+_ALIASES = {
+    "pcm": "pcm16", "l16": "pcm16", "s16le": "pcm16",
+    "ulaw": "mulaw", "pcmu": "mulaw", "g711_ulaw": "mulaw",
+    "pcma": "alaw", "g711_alaw": "alaw",
+}
+OPUS_FRAME_MS = 20
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    codec: str   = "pcm16"
+    rate: int    = PIPELINE_RATE
+    bitrate: int = 24_000                # Opus only, bits/s
+
+    @classmethod
+    def parse(cls, text: str) -> "AudioFormat":
+        """`mulaw`, `mulaw/8000`, `opus/16000/16000`... Raises ValueError."""
+        parts = text.strip().lower().split("/")
+        codec = _ALIASES.get(parts[0], parts[0])
+        if codec not in CODECS:
+            raise ValueError(f"unknown codec {parts[0]!r} (one of {', '.join(CODECS)})")
+        rate = int(parts[1]) if len(parts) > 1 else (8_000 if codec in ("mulaw", "alaw") else PIPELINE_RATE)
+        if rate not in RATES:
+            raise ValueError(f"unsupported rate {rate} (one of {', '.join(map(str, RATES))})")
+        return cls(codec, rate, int(parts[2]) if len(parts) > 2 else cls.bitrate)
+
+    def __str__(self) -> str:
+        return f"{self.codec}/{self.rate}" + (f"/{self.bitrate}" if self.codec == "opus" else "")
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Audio payload on the wire (without framing overhead)."""
+        if self.codec == "opus":
+            return self.bitrate / 8
+        return self.rate * (2 if self.codec == "pcm16" else 1)
+
+    @property
+    def stt_format(self) -> str | None:
+        """`input_audio_format` of the realtime STT that takes this format as is."""
+        if self.rate == 8_000 and self.codec in ("mulaw", "alaw"):
+            return "g711_ulaw" if self.codec == "mulaw" else "g711_alaw"
+        if self.rate == PIPELINE_RATE and self.codec == "pcm16":
+            return "pcm16"
+        return None
+
+
+PCM16 = AudioFormat()
+
+
+# ---------------------------------------------------------------------------
+# G.711
+# ---------------------------------------------------------------------------
+def _mulaw_encode(x: np.ndarray) -> np.ndarray:
+    """ITU-T G.711 μ-law of int32 samples (vectorized reference implementation)."""
+    x    = x >> 2                        # 14-bit
+    mask = np.where(x >= 0, 0xFF, 0x7F)
+    mag  = np.minimum(np.abs(x), 8159) + 0x21
+    seg  = np.searchsorted(np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), mag)
+    code = np.where(seg >= 8, 0x7F, (np.minimum(seg, 7) << 4) | ((mag >> (np.minimum(seg, 7) + 1)) & 0x0F))
+    return ((code ^ mask) & 0xFF).astype(np.uint8)
+
+
+def _mulaw_decode(u: np.ndarray) -> np.ndarray:
+    u    = ~u & 0xFF
+    exp  = (u >> 4) & 0x07
+    mag  = ((((u & 0x0F) << 3) + 0x84) << exp) - 0x84
+    return np.where(u & 0x80, -mag, mag).astype(np.int16)
+
+
+def _alaw_encode(x: np.ndarray) -> np.ndarray:
+    """ITU-T G.711 A-law of int32 samples."""
+    x    = x >> 3                        # 13-bit
+    mask = np.where(x >= 0, 0xD5, 0x55)
+    mag  = np.where(x >= 0, x, -x - 1)
+    seg  = np.searchsorted(np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF]), mag)
+    low  = np.where(seg < 2, mag >> 1, mag >> np.maximum(seg, 1)) & 0x0F
+    code = np.where(seg >= 8, 0x7F, (np.minimum(seg, 7) << 4) | low)
+    return ((code ^ mask) & 0xFF).astype(np.uint8)
+
+
+def _alaw_decode(a: np.ndarray) -> np.ndarray:
+    a   = a ^ 0x55
+    seg = (a & 0x70) >> 4
+    t   = (a & 0x0F) << 4
+    t   = np.where(seg == 0, t + 8, (t + 0x108) << np.maximum(seg - 1, 0))
+    return np.where(a & 0x80, t, -t).astype(np.int16)
+
+
+@lru_cache(maxsize=None)
+def _tables(codec: str) -> tuple[np.ndarray, np.ndarray]:
+    """(encode table indexed by the uint16 view of a sample, decode table)."""
+    samples = np.arange(65_536, dtype=np.uint16).view(np.int16).astype(np.int32)
+    codes   = np.arange(256, dtype=np.int32)
+    if codec == "mulaw":
+        return _mulaw_encode(samples), _mulaw_decode(codes)
+    return _alaw_encode(samples), _alaw_decode(codes)
+
+
+def g711_encode(pcm: np.ndarray, codec: str = "mulaw") -> bytes:
+    """int16 samples → one byte per sample."""
+    return _tables(codec)[0][pcm.astype(np.int16, copy=False).view(np.uint16)].tobytes()
+
+
+def g711_decode(data: bytes, codec: str = "mulaw") -> np.ndarray:
+    """G.711 bytes → int16 samples."""
+    return _tables(codec)[1][np.frombuffer(data, dtype=np.uint8)]
+
+
+# ---------------------------------------------------------------------------
+# Resampling
+# ---------------------------------------------------------------------------
+class Resampler:
+    """
+    Streaming rational resampler: upsample by `up`, low-pass, keep one
+    sample out of `down`, computed as a polyphase filter (only the products
+    that reach an output sample). `zeros` zero crossings of the sinc on each
+    side of the lower rate; ~`zeros / min(rates)` seconds of delay.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int, zeros: int = 8, rolloff: float = 0.92, beta: float = 8.0):
+        g = gcd(src_rate, dst_rate)
+        self.src_rate, self.dst_rate = src_rate, dst_rate
+        self.up, self.down = dst_rate // g, src_rate // g
+        self.taps = 2 * zeros * max(self.up, self.down) // self.up   # Per phase
+        n  = self.taps * self.up
+        fc = rolloff * 0.5 / max(self.up, self.down)                  # Cycles per upsampled sample
+        t  = np.arange(n) - (n - 1) / 2
+        h  = 2 * fc * np.sinc(2 * fc * t) * np.kaiser(n, beta) * self.up
+        # Phase p, tap j = h[p + j*up]; reversed to dot with x[k - taps + 1 .. k]
+        self._phases = np.ascontiguousarray(h.reshape(self.taps, self.up).T[:, ::-1], dtype=np.float32)
+        self.reset()
+
+    @property
+    def passthrough(self) -> bool:
+        return self.up == self.down
+
+    def reset(self):
+        self._hist  = np.zeros(self.taps - 1, dtype=np.float32)
+        self._start = -(self.taps - 1)   # Input index of _hist[0]
+        self._next  = 0                  # Index of the next output sample
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Any number of int16 (or float) samples in; the float32 samples ready out."""
+        if self.passthrough:
+            return samples.astype(np.float32)
+        x   = np.concatenate((self._hist, samples.astype(np.float32, copy=False)))
+        end = self._start + len(x)       # Input index after the last sample
+        # Output n needs input k = n*down // up, so the ready ones are n*down < end*up
+        stop = -(-end * self.up // self.down)
+        out  = np.empty(max(stop - self._next, 0), dtype=np.float32)
+        windows = sliding_window_view(x, self.taps)
+        for r in range(min(self.up, len(out))):
+            n    = self._next + r        # Every `up`-th output has the same phase
+            k, p = divmod(n * self.down, self.up)
+            rows = windows[k - self.taps + 1 - self._start::self.down][:len(range(r, len(out), self.up))]
+            out[r::self.up] = rows @ self._phases[p]
+        self._next  = max(stop, self._next)
+        self._hist  = x[len(x) - self.taps + 1:].copy()
+        self._start = end - self.taps + 1
+        return out
+
+    def process_pcm(self, pcm: bytes) -> bytes:
+        """int16 PCM bytes → int16 PCM bytes."""
+        if self.passthrough:
+            return bytes(pcm)
+        return to_pcm16(self.process(np.frombuffer(pcm, dtype=np.int16))).tobytes()
+
+
+def to_pcm16(samples: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+
+
+# ---------------------------------------------------------------------------
+# Opus (optional)
+# ---------------------------------------------------------------------------
+def _opuslib():
+    try:
+        import opuslib
+        return opuslib
+    except Exception as e:           # Not installed, or libopus not found
+        raise RuntimeError(f"Opus needs `pip install opuslib` and the libopus library ({e})") from e
+
+
+@lru_cache(maxsize=None)
+def opus_available() -> bool:
+    try:
+        _opuslib()
+        return True
+    except RuntimeError:
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Encoder / decoder
+# ---------------------------------------------------------------------------
+class Encoder:
+    """Pipeline PCM (`rate`) → frames of `fmt`. Opus frames are 20 ms packets."""
+
+    def __init__(self, fmt: AudioFormat, rate: int = PIPELINE_RATE):
+        self.fmt       = fmt
+        self.resampler = Resampler(rate, fmt.rate)
+        self.frame     = fmt.rate * OPUS_FRAME_MS // 1000   # Samples per Opus packet
+        self._pending  = np.zeros(0, dtype=np.int16)
+        self._opus     = None
+        if fmt.codec == "opus":
+            opuslib = _opuslib()
+            self._opus = opuslib.Encoder(fmt.rate, 1, "voip")
+            self._opus.bitrate = fmt.bitrate
+
+    def encode(self, pcm: bytes) -> list[bytes]:
+        if self.fmt.codec == "pcm16":
+            data = self.resampler.process_pcm(pcm)
+            return [data] if data else []
+        samples = to_pcm16(self.resampler.process(np.frombuffer(pcm, dtype=np.int16)))
+        if self._opus is None:
+            return [g711_encode(samples, self.fmt.codec)] if len(samples) else []
+        self._pending = np.concatenate((self._pending, samples))
+        frames = []
+        while len(self._pending) >= self.frame:
+            frames.append(self._opus.encode(self._pending[:self.frame].tobytes(), self.frame))
+            self._pending = self._pending[self.frame:]
+        return frames
+
+    def flush(self) -> list[bytes]:
+        """End of the audio: the partial Opus packet, padded with silence."""
+        if self._opus is None or not len(self._pending):
+            return []
+        last = np.zeros(self.frame, dtype=np.int16)
+        last[:len(self._pending)] = self._pending
+        self._pending = self._pending[:0]
+        return [self._opus.encode(last.tobytes(), self.frame)]
+
+    def reset(self):
+        """Drops the audio not encoded yet (barge-in)."""
+        self._pending = self._pending[:0]
+
+
+class Decoder:
+    """Frames of `fmt` → pipeline PCM (`rate`)."""
+
+    def __init__(self, fmt: AudioFormat, rate: int = PIPELINE_RATE):
+        self.fmt       = fmt
+        self.resampler = Resampler(fmt.rate, rate)
+        self._opus     = None
+        self._odd      = b""             # Last byte of a pcm16 frame cut mid-sample
+        if fmt.codec == "opus":
+            self._opus = _opuslib().Decoder(fmt.rate, 1)
+            self._max_frame = fmt.rate * 120 // 1000          # Longest Opus packet
+
+    def decode(self, frame: bytes) -> bytes:
+        if self.fmt.codec == "pcm16":
+            if self._odd or len(frame) % 2:  # A sample split across two frames
+                frame = self._odd + bytes(frame)
+                cut   = len(frame) // 2 * 2
+                frame, self._odd = frame[:cut], frame[cut:]
+            return self.resampler.process_pcm(frame) if frame else b""
+        if self._opus is not None:
+            samples = np.frombuffer(self._opus.decode(frame, self._max_frame), dtype=np.int16)
+        else:
+            samples = g711_decode(frame, self.fmt.codec)
+        if self.resampler.passthrough:
+            return samples.tobytes()
+        return to_pcm16(self.resampler.process(samples)).tobytes()
+
+
+def negotiate(query: dict) -> tuple[AudioFormat, AudioFormat]:
+    """(input, output) formats of a session from its query string; ValueError if unsupported."""
+    both = query.get("format", [str(PCM16)])[0]
+    input_format  = AudioFormat.parse(query.get("input", [both])[0])
+    output_format = AudioFormat.parse(query.get("output", [both])[0])
+    if "opus" in (input_format.codec, output_format.codec) and not opus_available():
+        raise ValueError("opus is not available here (needs opuslib and libopus)")
+    return input_format, output_format
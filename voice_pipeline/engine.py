@@ -0,0 +1,452 @@
+"""
+Asyncio pipeline engine: STT → LLM → TTS on one event loop.
+
+The thread-per-turn scripts use, per session, a websocket thread, a mic
+thread, a thread per answer, a TTS worker thread and the prefetcher's
+dispatcher, player and synthesis threads. Here a session is a handful of
+coroutines on a shared loop:
+
+    mic ──► _send_audio ──► realtime STT websocket ──► _receive
+                                                         │ transcript
+                                                         ▼
+    speaker ◄── _play ◄── _synthesize (× lookahead) ◄── answer (LLM stream)
+
+- async clients: `AsyncAzureOpenAI` (chat + TTS) and `websockets`;
+- audio devices are bridged in: the PyAudio microphone runs in callback
+  mode and hands its chunks to the loop with `call_soon_threadsafe`;
+  speaker writes run in the loop's default executor (shared by all
+  sessions). With MIC_WAV_FILE / SPEAKER_SINK=null the WAV source and the
+  null sink are paced with `asyncio.sleep` instead;
+- cancellation (barge-in, new transcript, shutdown) is `task.cancel()` on
+  the answer: the LLM stream, the TTS requests in flight and the playback
+  are cancelled together by the task group.
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable
+
+from websockets.asyncio.client import connect
+
+from .audio_io import NullSink, WavFileSource
+from .framing import AudioFramer
+from .history import ConversationMemory, PromptReport, summarize_with_async
+from .pcm import aiter_pcm16
+from .segmenter import SentenceSegmenter
+from .timeline import TimelineRecorder, TurnTimeline
+from .tts_cache import HIT_CHUNK, TTSCache, cache_key
+from .tts_prefetch import GapStats
+
+PA_CONTINUE = 0                          # pyaudio.paContinue
+
+
+@dataclass
+class EngineConfig:
+    stt_url: str
+    stt_headers: dict
+    stt_model: str
+    chat_model: str
+    tts_model: str
+    stt_prompt: str    = ""
+    system_prompt: str = "You are a helpful assistant."
+    voice: str         = "ballad"
+    tts_instructions: str = ""
+    temperature: float = 0.7
+    max_tokens: int    = 1000
+    rate: int          = 24_000
+    chunk: int         = 1024
+    frame_ms: int      = 80
+    stt_format: str    = "pcm16"         # Mic audio as sent: pcm16 (rate) or g711_ulaw / g711_alaw (8 kHz)
+    lookahead: int     = 2
+    barge_in: bool     = False
+    history_tokens: int   = 3000         # Prompt budget of the conversation memory
+    history_summary: bool = False        # Summarize the evicted turns
+    segmenter: dict    = field(default_factory=dict)   # SentenceSegmenter options
+
+    @property
+    def write_size(self) -> int:
+        return self.rate // 50 * 2       # 20 ms per speaker write
+
+    @classmethod
+    def from_env(cls, **overrides) -> "EngineConfig":
+        """Same environment variables, voice and prompts as the streaming script."""
+        env = os.environ
+        config = dict(
+            voice="ballad",
+            tts_instructions=(
+                "Affect/personality: A cheerful guide\n\n"
+                "Tone: Friendly, clear, and reassuring.\n"
+                "Pause: Brief pauses after key instructions.\n"
+                "Emotion: Warm and supportive."
+            ),
+            stt_prompt="Your response **MUST** be in the same language than the user's question.",
+            system_prompt="You are a helpful assistant. Respond in the same language than the user's question.",
+            stt_url=(
+                f'{env["AZURE_OPENAI_ENDPOINT_STT"].replace("https", "wss")}'
+                f'/openai/realtime?api-version={env["AZURE_OPENAI_API_VERSION_STT"]}&intent=transcription'
+            ),
+            stt_headers={"api-key": env["AZURE_OPENAI_API_KEY_STT"]},
+            stt_model=env["AZURE_OPENAI_DEPLOYMENT_NAME_STT"],
+            chat_model=env["AZURE_OPENAI_DEPLOYMENT_NAME"],
+            tts_model=env["AZURE_OPENAI_DEPLOYMENT_NAME_TTS"],
+            frame_ms=int(env.get("STT_FRAME_MS", "80")),
+            lookahead=int(env.get("TTS_LOOKAHEAD", "2")),
+            barge_in=env.get("BARGE_IN", "0") == "1",
+            history_tokens=int(env.get("HISTORY_TOKENS", "3000")),
+            history_summary=env.get("HISTORY_SUMMARY", "0") == "1",
+            segmenter=dict(
+                eager_first=env.get("TTS_EAGER_FIRST", "1") == "1",
+                min_chars=int(env.get("TTS_MIN_CHARS", "40")),
+                max_chars=int(env.get("TTS_MAX_CHARS", "300")),
+            ),
+        )
+        config.update(overrides)
+        return cls(**config)
+
+
+# ---------------------------------------------------------------------------
+# Audio bridges
+# ---------------------------------------------------------------------------
+async def _paced_source(source: WavFileSource, rate: int, chunk: int) -> AsyncIterator[bytes]:
+    source.realtime = False              # Paced here, without blocking the loop
+    loop  = asyncio.get_running_loop()
+    clock = loop.time()
+    while True:
+        clock += chunk / rate
+        delay = clock - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        yield source.read(chunk)
+
+
+async def _callback_source(audio, rate: int, chunk: int, **kwargs) -> AsyncIterator[bytes]:
+    loop   = asyncio.get_running_loop()
+    chunks: asyncio.Queue[bytes] = asyncio.Queue(maxsize=100)
+
+    def put(data: bytes):
+        if chunks.full():                # Loop stalled: drop the oldest
+            chunks.get_nowait()
+        chunks.put_nowait(data)
+
+    def callback(data, frame_count, time_info, status):
+        loop.call_soon_threadsafe(put, data)
+        return None, PA_CONTINUE
+
+    stream = audio.open(rate=rate, input=True, frames_per_buffer=chunk, stream_callback=callback, **kwargs)
+    try:
+        while True:
+            yield await chunks.get()
+    finally:
+        stream.stop_stream()
+        stream.close()
+
+
+def open_async_mic(audio, rate: int, chunk: int, source: WavFileSource | None = None, **kwargs) -> AsyncIterator[bytes]:
+    """Async microphone: `source`, MIC_WAV_FILE or a PyAudio callback stream."""
+    path = os.environ.get("MIC_WAV_FILE")
+    if source is None and path:
+        source = WavFileSource(path, rate=rate)
+    if source is not None:
+        return _paced_source(source, rate, chunk)
+    return _callback_source(audio, rate, chunk, **kwargs)
+
+
+class AsyncSpeaker:
+    """
+    Async speaker. A PyAudio stream is written from the default executor;
+    a `NullSink` is written in place and paced with `asyncio.sleep`.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.paced  = isinstance(stream, NullSink)
+        if self.paced:
+            stream.realtime = False
+
+    async def write(self, pcm: bytes):
+        if not self.paced:
+            await asyncio.get_running_loop().run_in_executor(None, self.stream.write, pcm)
+            return
+        self.stream.write(pcm)
+        wait = self.stream.play_until - self.stream.buffer_s - time.perf_counter()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def close(self):
+        self.stream.stop_stream()
+        self.stream.close()
+
+
+def open_async_speaker(audio, rate: int, chunk: int, **kwargs) -> AsyncSpeaker:
+    """Async speaker: PyAudio output, or a `NullSink` if SPEAKER_SINK is set."""
+    if os.environ.get("SPEAKER_SINK"):
+        return AsyncSpeaker(NullSink(rate=rate))
+    return AsyncSpeaker(audio.open(rate=rate, output=True, frames_per_buffer=chunk, **kwargs))
+
+
+# ---------------------------------------------------------------------------
+# Session
+# ---------------------------------------------------------------------------
+class VoiceSession:
+    """One user: a realtime STT socket, the answer in flight and the speaker."""
+
+    def __init__(
+        self,
+        config: EngineConfig,
+        aoai,                                # AsyncAzureOpenAI (chat)
+        tts,                                 # AsyncAzureOpenAI (TTS)
+        mic: AsyncIterator[bytes],
+        speaker: AsyncSpeaker,
+        timelines: TimelineRecorder | None = None,
+        tts_cache: TTSCache | None = None,
+        verbose: bool = True,
+        on_event: Callable[[dict], None] | None = None,
+    ):
+        self.config    = config
+        self.aoai      = aoai
+        self.tts       = tts
+        self.mic       = mic
+        self.speaker   = speaker
+        self.timelines = timelines or TimelineRecorder()
+        self.tts_cache = tts_cache
+        self.verbose   = verbose
+        self.on_event  = on_event            # transcript / answer.* / playback.cancel
+        self.playing   = False               # Mic muted while answering (no barge-in)
+        self.turns     = 0                   # Answers finished (played or cancelled)
+        self.answered  = asyncio.Event()     # Set after every finished answer
+        self.framing   = None
+        self.memory    = ConversationMemory(config.system_prompt, budget_tokens=config.history_tokens,
+                                            summarize=config.history_summary)
+        self.prompts   = PromptReport(self.memory)
+        self._summary: asyncio.Task | None = None
+        self._answer: asyncio.Task | None = None
+        self._pending: TurnTimeline | None = None
+
+    def log(self, *args, **kwargs):
+        if self.verbose:
+            print(*args, **kwargs)
+
+    def emit(self, event: dict):
+        if self.on_event is not None:
+            self.on_event(event)
+
+    async def run(self):
+        """Runs until the websocket closes or the task is cancelled."""
+        async with connect(
+            self.config.stt_url, additional_headers=self.config.stt_headers,
+            compression=None, max_size=None,
+        ) as ws:
+            await ws.send(json.dumps({
+                "type": "transcription_session.update",
+                "session": {
+                    "input_audio_format": self.config.stt_format,
+                    "input_audio_transcription": {
+                        "model": self.config.stt_model,
+                        "prompt": self.config.stt_prompt,
+                    },
+                    "input_audio_noise_reduction": {"type": "near_field"},
+                    "turn_detection": {"type": "server_vad"},
+                },
+            }))
+            sender = asyncio.create_task(self._send_audio(ws))
+            try:
+                await self._receive(ws)
+            finally:
+                sender.cancel()
+                await self.interrupt()
+
+    async def interrupt(self):
+        """Cancels the answer in flight (barge-in) and waits until it stopped."""
+        task, self._answer = self._answer, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            self.emit({"type": "playback.cancel"})
+
+    # --- STT ---------------------------------------------------------------
+    async def _send_audio(self, ws):
+        pending: list[str] = []
+        g711   = self.config.stt_format.startswith("g711")
+        framer = AudioFramer(
+            lambda payload: pending.append(payload.decode("ascii")),
+            rate=8_000 if g711 else self.config.rate, frame_ms=self.config.frame_ms,
+            sample_width=1 if g711 else 2,
+        )
+        self.framing = framer.stats
+        async for data in self.mic:
+            # If TTS is playing: pause mic (unless the user can interrupt)
+            if self.playing and not self.config.barge_in:
+                continue
+            framer.write(data)
+            for payload in pending:
+                await ws.send(payload)
+            pending.clear()
+
+    def _open_turn(self) -> TurnTimeline:
+        if self._pending is None:
+            self._pending = TurnTimeline()
+        return self._pending
+
+    async def _receive(self, ws):
+        async for message in ws:
+            ev = json.loads(message)
+            etype = ev.get("type", "")
+
+            if etype == "input_audio_buffer.speech_started":
+                # Barge-in: the user talks over the answer → stop it right away
+                if self.config.barge_in and self._answer is not None and not self._answer.done():
+                    self.log("\n[barge-in] Listening...")
+                    await self.interrupt()
+
+            elif etype == "input_audio_buffer.speech_stopped":
+                self._open_turn().mark("end_of_speech")
+
+            elif etype == "conversation.item.input_audio_transcription.completed":
+                timeline, self._pending = self._open_turn(), None
+                timeline.mark("transcript")
+                self.log(f"\n>> {ev['transcript']}\n")
+                self.emit({"type": "transcript", "text": ev["transcript"]})
+                await self.interrupt()       # A newer question replaces the answer
+                self._answer = asyncio.create_task(self.answer(ev["transcript"], timeline))
+
+            elif etype == "error":
+                self.log("STT error:", ev.get("error"))
+
+    # --- LLM → TTS → speaker -----------------------------------------------
+    async def answer(self, question: str, timeline: TurnTimeline | None = None):
+        """Streams the answer to `question` to the speaker."""
+        timeline  = timeline or TurnTimeline()
+        segmenter = SentenceSegmenter(**self.config.segmenter)
+        stats     = GapStats()
+        played: list[str] = []
+        parts: list[str]  = []
+        usage = None
+        # (text, chunks) per sentence, in order; at most lookahead+1 in flight
+        slots: asyncio.Queue = asyncio.Queue()
+        permits = asyncio.Semaphore(self.config.lookahead + 1)
+        self.playing = True
+        try:
+            async with asyncio.TaskGroup() as group:
+                player = group.create_task(self._play(slots, permits, timeline, stats, played))
+
+                async def dispatch(texts: asyncio.Queue):
+                    while (text := await texts.get()) is not None:
+                        await permits.acquire()
+                        chunks: asyncio.Queue = asyncio.Queue()
+                        group.create_task(self._synthesize(text, chunks, timeline))
+                        await slots.put((text, chunks))
+                    await slots.put(None)
+
+                texts: asyncio.Queue = asyncio.Queue()
+                group.create_task(dispatch(texts))
+                self.log("\nAssistant:\n", end=" ", flush=True)
+                stream = await self.aoai.chat.completions.create(
+                    model=self.config.chat_model,
+                    messages=self.memory.messages(question),
+                    temperature=self.config.temperature,
+                    max_tokens=self.config.max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                try:
+                    async for chunk in stream:
+                        if chunk.usage is not None:
+                            usage = chunk.usage
+                        for choice in chunk.choices:
+                            piece = getattr(choice.delta, "content", None)
+                            if not piece:
+                                continue
+                            timeline.mark("first_token")
+                            self.log(piece, end="", flush=True)
+                            parts.append(piece)
+                            self.emit({"type": "answer.delta", "text": piece})
+                            for fragment in segmenter.feed(piece):
+                                timeline.mark("first_sentence")
+                                texts.put_nowait(fragment)
+                finally:
+                    await stream.close()     # Stops consuming LLM tokens
+                for fragment in segmenter.flush():
+                    timeline.mark("first_sentence")
+                    texts.put_nowait(fragment)
+                texts.put_nowait(None)
+                await player
+        except asyncio.CancelledError:
+            self._finish(timeline, played, True, question, " ".join(played), usage)
+            self.log(f"\n[barge-in] Answer truncated after {len(played)} sentence(s)")
+            raise
+        except Exception as exc:
+            self._finish(timeline, played, True, question, " ".join(played), usage)
+            self.log("\nAnswer error:", exc)
+            return
+        prompt_info = self._finish(timeline, played, False, question, "".join(parts), usage)
+        self.log("\n[TTS]", stats.summary())
+        self.log("[Timeline]", timeline.summary())
+        self.log("[History]", self.memory.stats(), "|", PromptReport.summary(prompt_info))
+
+    def _finish(self, timeline: TurnTimeline, played: list[str], cancelled: bool,
+                question: str, spoken: str, usage) -> dict:
+        timeline.mark("playback_end")
+        # The memory keeps what the user actually heard
+        prompt_info = self.prompts.turn(question, usage, timeline)
+        self.memory.add_turn(question, spoken)
+        if self.memory.pending and (self._summary is None or self._summary.done()):
+            self._summary = asyncio.create_task(
+                summarize_with_async(self.aoai, self.config.chat_model, self.memory))
+        self.timelines.finish(timeline, truncated=cancelled, sentences=len(played), **prompt_info)
+        self.emit({"type": "answer.done", **timeline.to_dict()})
+        self.playing = False
+        self.turns  += 1
+        self.answered.set()
+        return prompt_info
+
+    async def _synthesize(self, text: str, chunks: asyncio.Queue, timeline: TurnTimeline):
+        key = cache_key(text, self.config.voice, self.config.tts_model, self.config.tts_instructions, "pcm")
+        try:
+            pcm = self.tts_cache.get(key) if self.tts_cache else None
+            if pcm is not None:
+                timeline.mark("first_tts_byte")
+                for i in range(0, len(pcm), HIT_CHUNK):
+                    chunks.put_nowait(pcm[i:i + HIT_CHUNK])
+                return
+            parts: list[bytes] = []
+            async with self.tts.audio.speech.with_streaming_response.create(
+                model=self.config.tts_model,
+                voice=self.config.voice,
+                input=text,
+                instructions=self.config.tts_instructions,
+                response_format="pcm",
+            ) as response:
+                async for chunk in aiter_pcm16(response.iter_bytes()):
+                    timeline.mark("first_tts_byte")
+                    parts.append(chunk)
+                    chunks.put_nowait(chunk)
+            if self.tts_cache is not None:
+                self.tts_cache.put(key, b"".join(parts))
+        except Exception as exc:
+            self.log("TTS synthesis error:", exc)
+        finally:
+            chunks.put_nowait(None)
+
+    async def _play(self, slots: asyncio.Queue, permits: asyncio.Semaphore,
+                    timeline: TurnTimeline, stats: GapStats, played: list[str]):
+        step     = self.config.write_size
+        last_end = None                      # When the previous sentence ended
+        while (slot := await slots.get()) is not None:
+            text, chunks = slot
+            first = True
+            while (chunk := await chunks.get()) is not None:
+                if first:
+                    first = False
+                    played.append(text)
+                    if last_end is not None:
+                        stats.add_gap(time.perf_counter() - last_end)
+                for i in range(0, len(chunk), step):
+                    timeline.mark("first_audio")
+                    await self.speaker.write(chunk[i:i + step])
+            permits.release()
+            if not first:
+                stats.sentences += 1
+                last_end = time.perf_counter()
@@ -0,0 +1,116 @@
+"""
+Low-overhead framing of microphone audio for the realtime STT websocket.
+
+Instead of `json.dumps({"type": ..., "audio": b64encode(chunk).decode()})`
+for every 1024-sample chunk, `AudioFramer`:
+- coalesces the PCM into frames of `frame_ms` (fewer websocket frames);
+- accumulates it in a preallocated buffer;
+- base64-encodes each full frame into a preallocated JSON envelope (no
+  dict, no `json.dumps`, no str round trip) and sends it as bytes.
+
+The encoder still returns a new `bytes` per frame (`binascii` and `base64`
+cannot write into an existing buffer); it is copied into the envelope at
+once, so that is one short-lived object per `frame_ms`, not per chunk.
+
+`send(payload)` must consume the payload before returning (as
+`websocket.WebSocket.send` does): the envelope buffer is reused.
+"""
+
+import binascii
+import time
+from typing import Callable
+
+_PREFIX = b'{"type":"input_audio_buffer.append","audio":"'
+_SUFFIX = b'"}'
+
+
+def b64_len(n: int) -> int:
+    return 4 * ((n + 2) // 3)
+
+
+def append_message(pcm) -> bytes:
+    """One-off `input_audio_buffer.append` message (used for partial frames)."""
+    return _PREFIX + binascii.b2a_base64(pcm, newline=False) + _SUFFIX
+
+
+class FramingStats:
+    """Bytes and frames sent on the wire."""
+
+    def __init__(self):
+        self.frames      = 0
+        self.wire_bytes  = 0         # JSON payload bytes
+        self.audio_bytes = 0         # PCM bytes
+        self.started: float | None = None
+
+    def add(self, wire: int, audio: int):
+        if self.started is None:
+            self.started = time.perf_counter()
+        self.frames      += 1
+        self.wire_bytes  += wire
+        self.audio_bytes += audio
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started if self.started else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.wire_bytes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.frames} frames, {self.wire_bytes / 1024:.0f} KiB sent, "
+            f"{self.bytes_per_second / 1024:.1f} KiB/s, "
+            f"{self.frames_per_second:.1f} frames/s"
+        )
+
+
+class AudioFramer:
+    """Coalesces PCM into `frame_ms` frames and sends them as append messages."""
+
+    def __init__(
+        self,
+        send: Callable[[bytes | bytearray], object],
+        rate: int = 24_000,
+        frame_ms: int = 80,
+        sample_width: int = 2,
+    ):
+        self.send        = send
+        self.frame_bytes = rate * frame_ms // 1000 * sample_width
+        self.stats       = FramingStats()
+
+        self._pcm      = bytearray(self.frame_bytes)
+        self._pcm_view = memoryview(self._pcm)
+        self._fill     = 0
+
+        start = len(_PREFIX)
+        self._b64 = slice(start, start + b64_len(self.frame_bytes))
+        self._msg = bytearray(_PREFIX + bytes(b64_len(self.frame_bytes)) + _SUFFIX)
+
+    def write(self, pcm: bytes):
+        """Adds PCM; sends a message every time a frame is complete."""
+        view = memoryview(pcm)
+        while view:
+            n = min(len(view), self.frame_bytes - self._fill)
+            self._pcm_view[self._fill:self._fill + n] = view[:n]
+            self._fill += n
+            view = view[n:]
+            if self._fill == self.frame_bytes:
+                # Slice assignment of the same length: the envelope is not reallocated
+                self._msg[self._b64] = binascii.b2a_base64(self._pcm_view, newline=False)
+                self.send(self._msg)
+                self.stats.add(len(self._msg), self.frame_bytes)
+                self._fill = 0
+
+    def flush(self):
+        """Sends the partial frame (e.g. before `input_audio_buffer.commit`)."""
+        if not self._fill:
+            return
+        msg = append_message(self._pcm_view[:self._fill])
+        self.send(msg)
+        self.stats.add(len(msg), self._fill)
+        self._fill = 0
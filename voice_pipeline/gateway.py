@@ -0,0 +1,428 @@
+"""
+Multi-session voice gateway.
+
+Remote callers connect over a websocket and get their own STT → LLM → TTS
+session (`engine.VoiceSession`); nothing is shared between sessions except
+the pooled `AsyncAzureOpenAI` clients and the content-addressed TTS cache
+of their worker process.
+
+Protocol (ws://host:port/?voice=<voice>&barge_in=1&input=<fmt>&output=<fmt>):
+- client → gateway: binary frames with the mic in the `input` format;
+- gateway → client: binary frames with the answer in the `output` format,
+  paced to `ahead_ms` ahead of real time, and JSON text events:
+  `session.created` (with the negotiated formats), `transcript`,
+  `answer.delta`, `answer.done` (timeline) and `playback.cancel`
+  (barge-in: drop the buffered audio).
+
+Formats (`codecs.AudioFormat`, `format=` sets both): `pcm16/24000` by
+default, `mulaw/8000` / `alaw/8000` (telephony), `pcm16/8000|16000`,
+`opus/<rate>/<bitrate>` (one packet per frame). G.711 at 8 kHz goes to the
+realtime STT as is (`g711_ulaw` / `g711_alaw`); anything else is decoded
+and resampled to 24 kHz PCM first. The answer is resampled and encoded per
+session on its way out.
+
+Admission control: at most `max_sessions` sessions over all the workers;
+beyond that the handshake is answered with HTTP 503 (or, if two callers
+race for the last slot, the loser is closed with code 1013).
+
+Workers: `workers` processes accept on the same port (SO_REUSEPORT, so
+Linux/macOS) and the kernel spreads the connections among them. Sessions,
+turn timelines and admission counters are reported to the parent process,
+which serves `/metrics` (Prometheus) and `/sessions` (JSON) on
+`metrics_port`.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from openai import AsyncAzureOpenAI
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from .codecs import PCM16, AudioFormat, Decoder, Encoder, negotiate
+from .engine import EngineConfig, VoiceSession
+from .timeline import TimelineRecorder, TurnTimeline
+from .tts_cache import TTSCache
+from .warmup import WarmupReport, keep_alive_async, pooled_async_http_client, warm_http_async
+
+
+class ClientSpeaker:
+    """Speaker that streams the answer back to the caller (encoded by `encoder`, if any)."""
+
+    def __init__(self, send, rate: int = 24_000, ahead_ms: int = 200, encoder: Encoder | None = None):
+        self.send     = send             # Non-blocking: queues a frame
+        self.rate     = rate
+        self.ahead_s  = ahead_ms / 1000
+        self.encoder  = encoder
+        self.bytes_sent = 0
+        self._play_until = 0.0
+
+    async def write(self, pcm: bytes):
+        now = time.perf_counter()
+        self._play_until = max(self._play_until, now) + len(pcm) / 2 / self.rate
+        for frame in (self.encoder.encode(pcm) if self.encoder else (pcm,)):
+            self.send(frame)
+            self.bytes_sent += len(frame)
+        # Never more than `ahead_ms` buffered on the client: barge-in stays fast
+        wait = self._play_until - self.ahead_s - now
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def flush(self):
+        """End of the answer: sends the audio the encoder still holds."""
+        for frame in (self.encoder.flush() if self.encoder else ()):
+            self.send(frame)
+            self.bytes_sent += len(frame)
+
+    def reset(self):
+        """The client dropped its buffer (playback.cancel)."""
+        self._play_until = 0.0
+        if self.encoder:
+            self.encoder.reset()
+
+
+class SessionMetrics:
+    """Per-session counters, reported to the parent after every turn and at the end."""
+
+    def __init__(self, session_id: str, remote: str, input_format: AudioFormat = PCM16,
+                 output_format: AudioFormat = PCM16):
+        self.session_id = session_id
+        self.remote     = remote
+        self.input_format  = input_format
+        self.output_format = output_format
+        self.worker     = os.getpid()
+        self.started    = time.time()
+        self.audio_in   = 0                  # Bytes from the caller
+        self.audio_out  = 0                  # Bytes to the caller
+        self.turns      = 0
+        self.truncated  = 0
+        self.dropped    = 0                  # Mic frames dropped (slow STT)
+        self.ttfa_ms: list[float] = []
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id, "remote": self.remote, "worker": self.worker,
+            "started": self.started, "duration_s": round(time.time() - self.started, 1),
+            "input_format": str(self.input_format), "output_format": str(self.output_format),
+            "audio_in_bytes": self.audio_in, "audio_out_bytes": self.audio_out,
+            "turns": self.turns, "truncated": self.truncated, "dropped_frames": self.dropped,
+            "ttfa_ms": self.ttfa_ms,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------------
+class _Worker:
+    def __init__(self, config: EngineConfig, reports, active, max_sessions: int, ahead_ms: int):
+        self.config       = config
+        self.reports      = reports          # Queue to the parent
+        self.active       = active           # Shared session counter
+        self.max_sessions = max_sessions
+        self.ahead_ms     = ahead_ms
+        self.aoai = AsyncAzureOpenAI(
+            azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
+            api_key=os.environ["AZURE_OPENAI_API_KEY"],
+            api_version=os.environ["AZURE_OPENAI_API_VERSION"],
+            http_client=pooled_async_http_client(),
+        )
+        self.tts = AsyncAzureOpenAI(
+            azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT_TTS"],
+            api_key=os.environ["AZURE_OPENAI_API_KEY_TTS"],
+            api_version=os.environ["AZURE_OPENAI_API_VERSION_TTS"],
+            http_client=pooled_async_http_client(),
+        )
+        self.tts_cache = TTSCache(
+            memory_bytes=int(os.environ.get("TTS_CACHE_MB", "64")) << 20,
+            directory=os.environ.get("TTS_CACHE_DIR") or None,
+            disk_bytes=int(os.environ.get("TTS_CACHE_DISK_MB", "512")) << 20,
+        )
+        self.timelines = _ReportingRecorder(reports)
+
+    # --- Admission control -------------------------------------------------
+    def admit(self) -> bool:
+        with self.active.get_lock():
+            if self.active.value >= self.max_sessions:
+                return False
+            self.active.value += 1
+            return True
+
+    def release(self):
+        with self.active.get_lock():
+            self.active.value -= 1
+
+    def process_request(self, connection, request):
+        if urlparse(request.path).path == "/healthz":
+            return connection.respond(200, "ok\n")
+        try:
+            negotiate(parse_qs(urlparse(request.path).query))
+        except ValueError as e:
+            return connection.respond(400, f"{e}\n")
+        if self.active.value >= self.max_sessions:
+            self.reports.put(("rejected", None))
+            return connection.respond(503, "Too many sessions, try again later.\n")
+        return None
+
+    # --- One caller ----------------------------------------------------------
+    async def handle(self, ws):
+        if not self.admit():                 # Lost a race for the last slot
+            self.reports.put(("rejected", None))
+            await ws.close(1013, "Too many sessions")
+            return
+        session_id = uuid.uuid4().hex[:12]
+        query   = parse_qs(urlparse(ws.request.path).query)
+        config  = self.config
+        if "voice" in query:
+            config = replace(config, voice=query["voice"][0])
+        if "barge_in" in query:
+            config = replace(config, barge_in=query["barge_in"][0] == "1")
+        input_format, output_format = negotiate(query)
+        metrics = SessionMetrics(session_id, "%s:%s" % ws.remote_address[:2], input_format, output_format)
+        # G.711 goes to the STT as is; other formats are converted to the engine's PCM
+        decoder = None
+        if input_format.stt_format:
+            config = replace(config, stt_format=input_format.stt_format)
+        else:
+            decoder = Decoder(input_format, config.rate)
+        encoder = Encoder(output_format, config.rate) if output_format != PCM16 else None
+
+        outgoing: asyncio.Queue = asyncio.Queue()
+        mic: asyncio.Queue      = asyncio.Queue(maxsize=100)
+        speaker = ClientSpeaker(outgoing.put_nowait, rate=config.rate, ahead_ms=self.ahead_ms, encoder=encoder)
+
+        def on_event(event: dict):
+            if event["type"] == "playback.cancel":
+                speaker.reset()
+                pending = [outgoing.get_nowait() for _ in range(outgoing.qsize())]
+                for frame in pending:        # Audio not sent yet is dropped here
+                    if isinstance(frame, str):
+                        outgoing.put_nowait(frame)
+            elif event["type"] == "answer.done":
+                speaker.flush()
+                metrics.turns += 1
+                metrics.truncated += bool(event.get("truncated"))
+                if "time_to_first_audio" in event["stages_ms"]:
+                    metrics.ttfa_ms.append(event["stages_ms"]["time_to_first_audio"])
+                self.reports.put(("update", metrics.to_dict()))
+            outgoing.put_nowait(json.dumps(event))
+
+        async def mic_frames():
+            while True:
+                yield await mic.get()
+
+        async def reader():
+            async for message in ws:
+                if isinstance(message, str):
+                    continue                 # No control messages yet
+                metrics.audio_in += len(message)
+                if decoder is not None:
+                    message = decoder.decode(message)
+                if mic.full():               # STT socket is behind: drop the oldest
+                    mic.get_nowait()
+                    metrics.dropped += 1
+                mic.put_nowait(message)
+
+        async def writer():
+            while True:
+                frame = await outgoing.get()
+                if isinstance(frame, bytes):
+                    metrics.audio_out += len(frame)
+                await ws.send(frame)
+
+        session = VoiceSession(
+            config, self.aoai, self.tts, mic_frames(), speaker,
+            timelines=self.timelines, tts_cache=self.tts_cache, verbose=False, on_event=on_event,
+        )
+        self.reports.put(("open", metrics.to_dict()))
+        outgoing.put_nowait(json.dumps({
+            "type": "session.created", "session_id": session_id,
+            "input": str(input_format), "output": str(output_format), "stt_input": config.stt_format,
+        }))
+        tasks = [asyncio.create_task(t) for t in (reader(), writer(), session.run())]
+        try:  # Whichever ends first (caller hung up, STT socket closed) ends the session
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            self.release()
+            report = metrics.to_dict()
+            errors = [r for r in results if isinstance(r, Exception) and not isinstance(r, ConnectionClosed)]
+            if errors:
+                report["error"] = repr(errors[0])
+            self.reports.put(("close", report))
+
+    async def serve(self, host: str, port: int, reuse_port: bool):
+        # Connections opened before the first caller, kept warm while idle
+        pings = {"chat": lambda: warm_http_async(self.aoai), "tts": lambda: warm_http_async(self.tts)}
+        if os.environ.get("WARMUP", "1") == "1":
+            report = await WarmupReport().run_async(pings)
+            print(f"[worker {os.getpid()}] Warm-up: {report.summary()}")
+            self._keepalive = asyncio.create_task(keep_alive_async(
+                pings, float(os.environ.get("KEEPALIVE_S", "60")), busy=lambda: self.active.value > 0,
+            ))
+        async with serve(
+            self.handle, host, port, process_request=self.process_request,
+            compression=None, max_size=None, reuse_port=reuse_port,
+        ):
+            await asyncio.Future()
+
+
+class _ReportingRecorder(TimelineRecorder):
+    """Sends the finished timelines to the parent process."""
+
+    def __init__(self, reports):
+        super().__init__()
+        self.reports = reports
+
+    def finish(self, timeline: TurnTimeline, **meta):
+        timeline.meta.update(meta)
+        self.reports.put(("turn", (timeline.points, timeline.started, timeline.meta)))
+
+
+def _run_worker(config, reports, active, max_sessions, ahead_ms, host, port, reuse_port):
+    worker = _Worker(config, reports, active, max_sessions, ahead_ms)
+    try:
+        asyncio.run(worker.serve(host, port, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Parent: worker pool and metrics
+# ---------------------------------------------------------------------------
+class Gateway:
+    def __init__(
+        self,
+        config: EngineConfig,
+        host: str = "0.0.0.0",
+        port: int = 8765,
+        workers: int = 1,
+        max_sessions: int = 100,
+        ahead_ms: int = 200,
+        metrics_port: int | None = None,
+        jsonl_path: str | None = None,
+    ):
+        self.config       = config
+        self.host, self.port = host, port
+        self.workers      = max(1, workers)
+        self.max_sessions = max_sessions
+        self.ahead_ms     = ahead_ms
+        self.metrics_port = metrics_port
+        self.timelines    = TimelineRecorder(jsonl_path=jsonl_path)
+        self.sessions: dict[str, dict] = {}  # Active, by session id
+        self.closed: deque[dict] = deque(maxlen=100)
+        self.sessions_total = 0
+        self.rejected_total = 0
+        self._lock = threading.Lock()
+        ctx = multiprocessing.get_context("spawn")
+        self._ctx     = ctx
+        self._active  = ctx.Value("i", 0)
+        self._reports = ctx.Queue() if self.workers > 1 else queue.Queue()
+
+    def serve_forever(self):
+        threading.Thread(target=self._collect, daemon=True).start()
+        if self.metrics_port:
+            _serve_gateway_metrics(self, self.metrics_port)
+        # SIGTERM as well as Ctrl+C must not leave workers holding the port
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        args = (self.config, self._reports, self._active, self.max_sessions, self.ahead_ms, self.host, self.port)
+        if self.workers == 1:
+            _run_worker(*args, False)
+            return
+        processes = [
+            self._ctx.Process(target=_run_worker, args=args + (True,), daemon=True)
+            for _ in range(self.workers)
+        ]
+        for p in processes:
+            p.start()
+        try:
+            for p in processes:
+                p.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for p in processes:
+                p.terminate()
+
+    def _collect(self):
+        while True:
+            kind, data = self._reports.get()
+            with self._lock:
+                if kind == "open":
+                    self.sessions[data["session_id"]] = data
+                    self.sessions_total += 1
+                elif kind == "update" and data["session_id"] in self.sessions:
+                    self.sessions[data["session_id"]] = data
+                elif kind == "close":
+                    self.sessions.pop(data["session_id"], None)
+                    self.closed.append(data)
+                elif kind == "rejected":
+                    self.rejected_total += 1
+            if kind == "turn":
+                points, started, meta = data
+                timeline = TurnTimeline()
+                timeline.points, timeline.started = points, started
+                self.timelines.finish(timeline, **meta)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "active": list(self.sessions.values()),
+                "closed": list(self.closed),
+                "max_sessions": self.max_sessions,
+                "workers": self.workers,
+            }
+
+    def prometheus(self) -> str:
+        with self._lock:
+            active = len(self.sessions)
+            lines = [
+                "# TYPE voice_gateway_sessions_active gauge",
+                f"voice_gateway_sessions_active {active}",
+                "# TYPE voice_gateway_sessions_max gauge",
+                f"voice_gateway_sessions_max {self.max_sessions}",
+                "# TYPE voice_gateway_sessions_total counter",
+                f"voice_gateway_sessions_total {self.sessions_total}",
+                "# TYPE voice_gateway_rejected_total counter",
+                f"voice_gateway_rejected_total {self.rejected_total}",
+            ]
+        return "\n".join(lines) + "\n" + self.timelines.prometheus()
+
+
+def _serve_gateway_metrics(gateway: Gateway, port: int) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/metrics":
+                body, ctype = gateway.prometheus().encode(), "text/plain; version=0.0.4"
+            elif path == "/sessions":
+                body, ctype = json.dumps(gateway.snapshot(), indent=2).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
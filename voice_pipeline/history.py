@@ -0,0 +1,263 @@
+"""
+Token-budgeted conversation memory with a cache-friendly prompt prefix.
+
+    [system] [summary?] [user 1] [assistant 1] ... [user n] [assistant n] [new user]
+    └──────────── stable prefix: byte-identical from turn to turn ───────────┘
+
+Every stored message is rendered once and never changed, so the prompt of
+a turn starts with the exact prompt of the previous turn and the provider's
+prompt cache (prefixes of 1024+ tokens, in 128-token steps on Azure OpenAI)
+keeps hitting. Tokens are counted once per message when it is appended.
+
+When the prefix goes over `budget_tokens`, the oldest turns are evicted in
+one block down to `low_water` × budget, not one turn per request: sliding
+the window by one turn would change the prefix (and miss the cache) on every
+turn, a block eviction changes it once every several turns. With
+`summarize=True` the evicted turns are kept in `pending` until the caller
+folds them into the summary message (`summarize_with(client, model)` /
+`summarize_with_async`); otherwise they are dropped.
+
+`TTFTEstimator` fits time to first token against the uncached prompt
+tokens, so the report shows whether latency stays flat over a long call.
+"""
+
+import threading
+from typing import Callable
+
+MESSAGE_OVERHEAD = 3                     # Tokens per message (role, separators)
+REPLY_OVERHEAD   = 3                     # Tokens that prime the reply
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below for the assistant's memory in at most "
+    "{words} words. Keep names, numbers, decisions and open questions. "
+    "Answer with the summary only, in the language of the conversation."
+)
+
+
+def token_counter(model: str | None = None) -> Callable[[str], int]:
+    """Token count of a text: tiktoken when installed, else ~4 chars/token."""
+    try:
+        import tiktoken                  # Exact counts (optional, imported on use)
+    except ImportError:
+        tiktoken = None
+    if tiktoken is not None:
+        try:
+            enc = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("o200k_base")
+        except KeyError:                 # Deployment names are not model names
+            enc = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(enc.encode(text, disallowed_special=()))
+    return lambda text: (len(text.encode("utf-8")) + 3) // 4
+
+
+class ConversationMemory:
+    def __init__(
+        self,
+        system_prompt: str,
+        budget_tokens: int = 3000,
+        low_water: float = 0.5,
+        summarize: bool = False,
+        summary_words: int = 120,
+        model: str | None = None,
+    ):
+        self.budget_tokens = budget_tokens
+        self.low_water     = low_water
+        self.summarize     = summarize
+        self.summary_words = summary_words
+        self.count         = token_counter(model)
+        self.turns         = 0               # Turns appended
+        self.evictions     = 0               # Block evictions (prefix changes)
+        self.evicted_turns = 0
+        self.pending: list[dict] = []        # Evicted messages waiting for the summary
+        self._lock    = threading.Lock()
+        self._summarizing = False            # A summary request is in flight
+        self._system  = self._render("system", system_prompt)
+        self._summary: tuple[dict, int] | None = None
+        self._history: list[tuple[dict, int]] = []   # (message, tokens)
+        self._history_tokens = 0
+
+    def _render(self, role: str, content: str) -> tuple[dict, int]:
+        return {"role": role, "content": content}, self.count(content) + MESSAGE_OVERHEAD
+
+    # --- Prompt ------------------------------------------------------------
+    def messages(self, user_text: str) -> list[dict]:
+        """Stable prefix + the new user message."""
+        with self._lock:
+            prefix = [self._system[0]]
+            if self._summary is not None:
+                prefix.append(self._summary[0])
+            prefix += [m for m, _ in self._history]
+        return prefix + [{"role": "user", "content": user_text}]
+
+    def prefix_tokens(self) -> int:
+        with self._lock:
+            return self._prefix_tokens()
+
+    def _prefix_tokens(self) -> int:
+        return self._system[1] + (self._summary[1] if self._summary else 0) + self._history_tokens
+
+    def prompt_tokens(self, user_text: str) -> int:
+        """Local estimate of the prompt tokens of `messages(user_text)`."""
+        return self.prefix_tokens() + self.count(user_text) + MESSAGE_OVERHEAD + REPLY_OVERHEAD
+
+    # --- History -----------------------------------------------------------
+    def add_turn(self, user_text: str, assistant_text: str):
+        """Appends a finished turn (for a truncated answer, what was spoken)."""
+        if not assistant_text:
+            return
+        with self._lock:
+            for role, content in (("user", user_text), ("assistant", assistant_text)):
+                message = self._render(role, content)
+                self._history.append(message)
+                self._history_tokens += message[1]
+            self.turns += 1
+            if self._prefix_tokens() > self.budget_tokens:
+                self._evict()
+
+    def _evict(self):
+        target = self.budget_tokens * self.low_water
+        dropped = 0
+        while self._history and self._prefix_tokens() > target:
+            for _ in range(2):           # user + assistant
+                message, tokens = self._history.pop(0)
+                self._history_tokens -= tokens
+                if self.summarize:
+                    self.pending.append(message)
+            dropped += 1
+        self.evictions     += 1
+        self.evicted_turns += dropped
+
+    # --- Summary -----------------------------------------------------------
+    def summary_request(self) -> tuple[list[dict], int] | None:
+        """
+        (messages asking the model to fold `pending` into the summary, number
+        of pending messages in them), or None when there is nothing to fold
+        or another summary is in flight; `set_summary` must follow.
+        """
+        with self._lock:
+            if not self.pending or self._summarizing:
+                return None
+            self._summarizing = True
+            lines = []
+            if self._summary is not None:
+                lines.append(f"Earlier summary: {self._summary[0]['content']}")
+            lines += [f"{m['role']}: {m['content']}" for m in self.pending]
+            folded = len(self.pending)
+        return [
+            {"role": "system", "content": SUMMARY_PROMPT.format(words=self.summary_words)},
+            {"role": "user", "content": "\n".join(lines)},
+        ], folded
+
+    def set_summary(self, text: str | None, folded: int = 0):
+        """Replaces the summary; `folded` pending messages went into it (None: the request failed)."""
+        with self._lock:
+            self._summarizing = False
+            if text is None:             # Kept pending for the next attempt
+                return
+            del self.pending[:folded]
+            self._summary = self._render("system", f"Summary of the earlier conversation: {text.strip()}")
+
+    def stats(self) -> str:
+        return (
+            f"{self.turns} turns, prefix {self.prefix_tokens()} / {self.budget_tokens} tokens, "
+            f"{self.evictions} evictions ({self.evicted_turns} turns"
+            f"{', summarized' if self.summarize else ''})"
+        )
+
+
+def summarize_with(client, model: str, memory: ConversationMemory):
+    """Folds the evicted turns into the summary (blocking: call between turns)."""
+    request = memory.summary_request()
+    if request is None:
+        return
+    request, folded = request
+    try:
+        response = client.chat.completions.create(model=model, messages=request, temperature=0, max_tokens=400)
+    except Exception as exc:
+        print("History summary error:", exc)
+        memory.set_summary(None)
+        return
+    memory.set_summary(response.choices[0].message.content or "", folded)
+
+
+async def summarize_with_async(client, model: str, memory: ConversationMemory):
+    request = memory.summary_request()
+    if request is None:
+        return
+    request, folded = request
+    try:
+        response = await client.chat.completions.create(model=model, messages=request, temperature=0, max_tokens=400)
+    except Exception as exc:
+        print("History summary error:", exc)
+        memory.set_summary(None)
+        return
+    memory.set_summary(response.choices[0].message.content or "", folded)
+
+
+class TTFTEstimator:
+    """
+    Time to first token ≈ base + per_token × uncached prompt tokens, fitted
+    by least squares over the observed turns (default slope until the
+    prompt sizes differ).
+    """
+
+    def __init__(self, base: float = 0.3, per_1k_tokens: float = 0.1):
+        self.base    = base
+        self.per_tok = per_1k_tokens / 1000
+        self._n = self._sx = self._sy = self._sxx = self._sxy = 0.0
+
+    def estimate(self, uncached_tokens: int) -> float:
+        return self.base + self.per_tok * uncached_tokens
+
+    def observe(self, uncached_tokens: int, ttft: float):
+        x = float(uncached_tokens)
+        self._n   += 1
+        self._sx  += x
+        self._sy  += ttft
+        self._sxx += x * x
+        self._sxy += x * ttft
+        var = self._n * self._sxx - self._sx ** 2
+        if self._n >= 2 and var > 0:
+            self.per_tok = max(0.0, (self._n * self._sxy - self._sx * self._sy) / var)
+        self.base = (self._sy - self.per_tok * self._sx) / self._n   # Default slope until x varies
+
+
+class PromptReport:
+    """Per-turn prompt tokens (from the API usage when available) and TTFT."""
+
+    def __init__(self, memory: ConversationMemory):
+        self.memory    = memory
+        self.estimator = TTFTEstimator()
+
+    def turn(self, user_text: str, usage=None, timeline=None) -> dict:
+        """Call before `memory.add_turn`; `usage` is the stream's last chunk usage."""
+        ttft = None
+        # A speculative answer had its first token before the transcript, a cached
+        # one had no request: not TTFT samples. Measured from `turn_start` when the
+        # turn waited for the previous answer (the queueing is not model latency)
+        if timeline is not None and not timeline.meta.get("speculative") \
+                and timeline.meta.get("answer_cache") != "hit":
+            ttft = timeline.stages().get("llm_first_token")
+        prompt = cached = None
+        if usage is not None:
+            prompt  = usage.prompt_tokens
+            details = getattr(usage, "prompt_tokens_details", None)
+            cached  = getattr(details, "cached_tokens", None) or 0
+        if prompt is None:                # No usage in the stream: local count
+            prompt = self.memory.prompt_tokens(user_text)
+        uncached = prompt - (cached or 0)
+        estimate = self.estimator.estimate(uncached)
+        if ttft is not None:
+            self.estimator.observe(uncached, ttft)
+        return {
+            "prompt_tokens": prompt, "cached_tokens": cached,
+            "ttft_estimate_ms": round(estimate * 1000),
+            **({"ttft_ms": round(ttft * 1000)} if ttft is not None else {}),
+        }
+
+    @staticmethod
+    def summary(info: dict) -> str:
+        cached = f" ({info['cached_tokens']} cached)" if info["cached_tokens"] is not None else ""
+        text = f"prompt {info['prompt_tokens']} tokens{cached}, est. TTFT {info['ttft_estimate_ms']} ms"
+        if "ttft_ms" in info:
+            text += f" (measured {info['ttft_ms']} ms)"
+        return text
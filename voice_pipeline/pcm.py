@@ -0,0 +1,58 @@
+"""
+PCM helpers shared by the TTS playback paths.
+"""
+
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+WAV_HEADER_LEN = 44                      # RIFF/WAV header bytes
+
+
+class _Aligner:
+    """
+    Normalizes the audio received via streaming:
+    1. Discards the WAV header sent by TTS.
+    2. Ensures that byte pairs (16-bit) are always returned.
+    """
+
+    def __init__(self):
+        self.first_chunk = True
+        self.leftover    = b""          # Unpaired byte remaining between chunks
+
+    def feed(self, chunk: bytes) -> bytes:
+        if not chunk:
+            return b""
+
+        # --- 1) Remove WAV header the first time -------------------
+        if self.first_chunk:
+            self.first_chunk = False
+            if chunk.startswith(b"RIFF"):
+                chunk = chunk[WAV_HEADER_LEN:]   # skip header
+                if not chunk:
+                    return b""
+
+        # --- 2) Align to 16-bit (multiple of 2 bytes) ---------------
+        chunk = self.leftover + chunk
+        if len(chunk) & 1:                       # Odd-sized buffer
+            self.leftover, chunk = chunk[-1:], chunk[:-1]
+        else:
+            self.leftover = b""
+        return chunk
+
+
+def iter_pcm16(pcm_iter: Iterable[bytes]) -> Iterator[bytes]:
+    """16-bit aligned PCM without the WAV header."""
+    aligner = _Aligner()
+    for chunk in pcm_iter:
+        chunk = aligner.feed(chunk)
+        if chunk:
+            yield chunk
+    # If a byte is left over, discard it; half a sample can’t be played
+
+
+async def aiter_pcm16(pcm_iter: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """`iter_pcm16` for async streams (`AsyncAzureOpenAI`)."""
+    aligner = _Aligner()
+    async for chunk in pcm_iter:
+        chunk = aligner.feed(chunk)
+        if chunk:
+            yield chunk
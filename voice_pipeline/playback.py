@@ -0,0 +1,287 @@
+"""
+Decoupled playback: a preallocated ring buffer drained by the sound device.
+
+    TTS threads ──write()──► [ ring buffer ] ──callback──► sound device
+                   (memcpy)    jitter target    (every `chunk` frames)
+
+`Player.write(pcm)` only copies into the ring, so a slow network chunk no
+longer blocks on the device and a slow device no longer blocks the socket
+read. The device pulls audio from its own callback (PyAudio callback mode,
+or a clock thread for the file / null outputs used without a sound card).
+
+Jitter buffer: after the first write of a turn, and again after the ring
+ran dry in the middle of one, playback waits until `target_ms` of audio is
+buffered (or `end()` says no more is coming) before it starts. Counters:
+- underruns: the ring ran dry while more audio was expected (silence was
+  played and the buffer re-primed);
+- overruns:  the ring filled up and writes had to wait for the device (the
+  producer got more than `capacity_ms` ahead; nothing is dropped).
+"""
+
+import threading
+import time
+import wave
+
+PA_CONTINUE = 0                          # pyaudio.paContinue
+
+
+class RingBuffer:
+    """Fixed-size byte ring, one producer and one consumer thread."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf   = bytearray(capacity)
+        self._view  = memoryview(self._buf)
+        self._start = 0                  # Read position
+        self._size  = 0                  # Bytes buffered
+        self.generation = 0              # Bumped by clear(): writes in flight give up
+        self._lock  = threading.Lock()
+        self._space = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, data: bytes, stop: threading.Event | None = None) -> tuple[int, bool]:
+        """
+        Copies all of `data`, waiting for space when full (until `stop` is
+        set or `clear()` is called). Returns (bytes written, whether it had
+        to wait).
+        """
+        src, done, waited = memoryview(data), 0, False
+        with self._space:
+            generation = self.generation
+            while done < len(src):
+                if self.generation != generation:
+                    break                # Cleared while waiting: the rest is dropped
+                free = self.capacity - self._size
+                if free == 0:
+                    if stop is not None and stop.is_set():
+                        break
+                    waited = True
+                    self._space.wait(0.05)
+                    continue
+                n   = min(free, len(src) - done)
+                end = (self._start + self._size) % self.capacity
+                first = min(n, self.capacity - end)
+                self._view[end:end + first] = src[done:done + first]
+                if n > first:            # Wraps around
+                    self._view[:n - first] = src[done + first:done + n]
+                self._size += n
+                done += n
+        return done, waited
+
+    def read_into(self, out: memoryview) -> int:
+        """Moves up to len(out) bytes into `out`; returns how many."""
+        with self._lock:
+            n = min(len(out), self._size)
+            first = min(n, self.capacity - self._start)
+            out[:first] = self._view[self._start:self._start + first]
+            if n > first:
+                out[first:n] = self._view[:n - first]
+            self._start = (self._start + n) % self.capacity
+            self._size -= n
+            self._space.notify_all()
+        return n
+
+    def discard(self, n: int) -> int:
+        """Drops up to `n` of the oldest bytes; returns how many."""
+        with self._lock:
+            n = min(n, self._size)
+            self._start = (self._start + n) % self.capacity
+            self._size -= n
+            self._space.notify_all()
+        return n
+
+    def clear(self):
+        """Drops everything buffered and aborts the writes in progress."""
+        with self._lock:
+            self._start = self._size = 0
+            self.generation += 1
+            self._space.notify_all()
+
+
+class PlaybackStats:
+    def __init__(self, rate: int = 24_000):
+        self.rate      = rate
+        self.underruns = 0
+        self.overruns  = 0
+        self.silence   = 0.0             # Seconds of silence played by underruns
+        self.max_fill  = 0.0             # Seconds buffered, maximum
+        self.played    = 0               # Bytes played
+
+    def summary(self) -> str:
+        return (
+            f"{self.played / 2 / self.rate:.1f} s played, {self.underruns} underruns "
+            f"({self.silence * 1000:.0f} ms silence), {self.overruns} overruns, "
+            f"max buffered {self.max_fill * 1000:.0f} ms"
+        )
+
+
+class Player:
+    """
+    `speaker_out`-compatible sink (`write`) on top of a `RingBuffer`.
+    `output(pull)` opens the device that calls `pull(n)` for every block:
+    see `pyaudio_output`, `clock_output`.
+    """
+
+    def __init__(self, output, rate: int = 24_000, chunk: int = 1024,
+                 target_ms: int = 80, capacity_ms: int = 2000):
+        self.rate      = rate
+        self.chunk     = chunk
+        self.target    = rate * 2 * target_ms // 1000
+        self.ring      = RingBuffer(max(rate * 2 * capacity_ms // 1000, chunk * 2, self.target))
+        self.stats     = PlaybackStats(rate)
+        self.first_audio_at: float | None = None   # perf_counter of the turn's first sample
+        self.idle      = threading.Event()         # Nothing buffered or playing
+        self.idle.set()
+        self._out      = bytearray(chunk * 2)
+        self._playing  = False
+        self._ended    = False                     # No more audio coming (play below target)
+        self._full     = False                     # Overrun episode in progress
+        self._stop     = threading.Event()
+        self._stream   = output(self._pull)
+
+    # --- Producer side -----------------------------------------------------
+    def write(self, pcm: bytes, num_frames: int | None = None, exception_on_underflow: bool = False):
+        if not pcm:
+            return
+        self._ended = False
+        self.idle.clear()
+        _, waited = self.ring.write(pcm, self._stop)
+        if waited:
+            if not self._full:           # One per episode, not per blocked write
+                self.stats.overruns += 1
+            self._full = True
+        elif len(self.ring) < self.ring.capacity // 2:
+            self._full = False
+        self.stats.max_fill = max(self.stats.max_fill, len(self.ring) / 2 / self.rate)
+
+    def end(self):
+        """No more audio for now: what is buffered plays even below the target."""
+        self._ended = True
+        if not len(self.ring) and not self._playing:
+            self.idle.set()
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """`end()` and wait until everything buffered has been played."""
+        self.end()
+        return self.idle.wait(timeout)
+
+    def clear(self):
+        """Barge-in: drops the buffered audio (and the rest of a blocked write), silence from the next block."""
+        self.ring.clear()
+        self._playing = False
+        self._ended   = True
+        self.idle.set()
+
+    def reset(self):
+        """Starts a new turn (`first_audio_at`)."""
+        self.first_audio_at = None
+
+    def buffered_ms(self) -> float:
+        return len(self.ring) / 2 / self.rate * 1000
+
+    # --- Device side -------------------------------------------------------
+    def _pull(self, n: int) -> bytes | None:
+        """Next `n` bytes for the device; None while idle (nothing to play)."""
+        out = memoryview(self._out)[:n] if n <= len(self._out) else memoryview(bytearray(n))
+        if not self._playing:
+            buffered = len(self.ring)
+            if buffered == 0 and self._ended:
+                return None
+            if buffered < self.target and not self._ended:
+                if self.first_audio_at is None:
+                    return None          # Priming the turn: the device stays idle
+                self.stats.silence += n / 2 / self.rate   # Re-priming after an underrun
+                return bytes(n)
+            self._playing = True
+        got = self.ring.read_into(out)
+        if got and self.first_audio_at is None:
+            self.first_audio_at = time.perf_counter()
+        self.stats.played += got
+        if got < n:
+            out[got:] = bytes(n - got)
+            if self._ended:              # End of the audio: back to idle
+                self._playing = False
+                self.idle.set()
+            else:                        # Ran dry: silence, then re-prime
+                self._playing = False
+                self.stats.underruns += 1
+                self.stats.silence   += (n - got) / 2 / self.rate
+        return bytes(out)
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        self._stop.set()
+        self.idle.set()
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+
+
+# ---------------------------------------------------------------------------
+# Outputs
+# ---------------------------------------------------------------------------
+def pyaudio_output(audio, rate: int, chunk: int, **kwargs):
+    """PyAudio stream in callback mode pulling from the player."""
+    def output(pull):
+        def callback(in_data, frame_count, time_info, status):
+            data = pull(frame_count * 2)
+            return (data if data is not None else bytes(frame_count * 2)), PA_CONTINUE
+        return audio.open(rate=rate, output=True, frames_per_buffer=chunk, stream_callback=callback, **kwargs)
+    return output
+
+
+class ClockOutput:
+    """
+    Device stand-in: a thread pulls one block every `chunk / rate` seconds
+    and writes the audio to a WAV file (`path`) or discards it.
+    """
+
+    def __init__(self, pull, rate: int, chunk: int, path: str | None = None, realtime: bool = True):
+        self.pull     = pull
+        self.rate     = rate
+        self.chunk    = chunk
+        self.realtime = realtime
+        self._wav     = None
+        if path:
+            self._wav = wave.open(path, "wb")
+            self._wav.setnchannels(1)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(rate)
+        self._stop   = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        period = self.chunk / self.rate
+        clock  = time.perf_counter()
+        while not self._stop.is_set():
+            data = self.pull(self.chunk * 2)
+            if data is not None and self._wav is not None:
+                self._wav.writeframes(data)   # Idle time is not recorded
+            if self.realtime:
+                clock += period
+                delay = clock - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    clock = time.perf_counter()   # Late (e.g. suspended): do not catch up
+
+    def stop_stream(self):
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def close(self):
+        self.stop_stream()
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+def clock_output(rate: int, chunk: int, path: str | None = None, realtime: bool = True):
+    return lambda pull: ClockOutput(pull, rate, chunk, path=path, realtime=realtime)
@@ -0,0 +1,594 @@
+"""
+Pluggable STT, LLM and TTS backends for the streaming pipeline.
+
+    mic ─► STT ─► transcript ─► LLM ─► text ─► TTS ─► PCM ─► speaker
+           aoai | speech               aoai | openai       aoai | speech
+
+The pipeline core (apps/streaming.py) only talks to these interfaces, so
+the backends can be mixed per deployment: `STT_PROVIDER=speech
+TTS_PROVIDER=aoai` recognizes with Azure Speech and speaks with Azure
+OpenAI TTS.
+
+- STT: `run(events)` connects and blocks until the session ends, calling
+  `events.on_connected()`, `on_speech_started()`, `on_speech_ended()`,
+  `on_partial(text, replace, utterance)` and `on_final(text)`; `write(pcm)`
+  takes 24 kHz 16-bit microphone audio, `flush()` sends what is buffered and
+  `commit()` ends the turn (client endpointing; only if `commits`).
+- LLM: `open_stream(messages, hedge)` returns a chat completion stream
+  (OpenAI chunks, usage in the last one) with `close()`; `client` and
+  `model` serve the history summaries.
+- TTS: `synthesize(text, hedge)` yields 24 kHz 16-bit PCM as it arrives;
+  `cache_key(text)` identifies the audio in the TTS cache. Backends with a
+  text-stream input (`text_stream`) also have `open_text_stream()`: one
+  synthesis the whole answer is written into as it is generated (see
+  tts_stream.py); the others keep one request per sentence.
+
+Every provider has `warmups()` (connections opened at startup), `pings()`
+(idle keep-alive), `probe()` (one minimal request), `summaries()` (report
+lines after a turn) and `close()`. The AOAI providers route over every
+deployment of their stage (`AZURE_OPENAI_ENDPOINT[_TTS|_STT]_2`…).
+
+`<STAGE>_PROVIDER` names one backend or several separated by commas, or
+`auto` for every backend whose settings are in the environment. With more
+than one, `choose()` probes them in parallel at startup (best of
+`PROBE_SAMPLES`, `PROBE_TIMEOUT_S` at most) and keeps the fastest:
+time to first token for the LLM, to first audio byte for TTS, and to an
+open session for STT (there is no speech to transcribe at startup, so the
+handshake stands for the network distance to the service).
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Iterator
+
+from .pcm import iter_pcm16
+from .tts_cache import cache_key
+
+RATE        = 24_000
+PROBE_TEXT  = "Hi."
+
+
+class Provider:
+    stage    = ""
+    name     = ""
+    requires: tuple[str, ...] = ()       # Environment variables it cannot start without
+
+    @classmethod
+    def available(cls) -> bool:
+        return all(os.environ.get(var) for var in cls.requires)
+
+    def warmups(self) -> dict[str, Callable[[], object]]:
+        return self.pings()
+
+    def pings(self) -> dict[str, Callable[[], object]]:
+        return {}
+
+    def probe(self):
+        raise NotImplementedError
+
+    def summaries(self) -> dict[str, str]:
+        return {}
+
+    def close(self):
+        pass
+
+
+def _aoai_client(cfg):
+    from openai import AzureOpenAI
+
+    from .warmup import pooled_http_client
+
+    # Keep-alive pool (connections reused across turns); the router retries
+    return AzureOpenAI(azure_endpoint=cfg.endpoint, api_key=cfg.api_key,
+                       api_version=cfg.api_version or "2024-02-01-preview",
+                       http_client=pooled_http_client(), max_retries=0)
+
+
+def _router_pings(router) -> dict[str, Callable[[], object]]:
+    from .warmup import warm_http
+
+    return {
+        f"{router.name} {e.name}" if len(router.endpoints) > 1 else router.name:
+            lambda client=e.client: warm_http(client)
+        for e in router.endpoints
+    }
+
+
+def _router_summaries(router) -> dict[str, str]:
+    return {"Routing": router.summary()} if len(router.endpoints) > 1 else {}
+
+
+def _first_token(stream):
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                return
+    finally:
+        stream.close()
+
+
+# ---------------------------------------------------------------------------
+# STT
+# ---------------------------------------------------------------------------
+class RealtimeSTT(Provider):
+    """Azure OpenAI realtime transcription websocket."""
+
+    stage, name = "stt", "aoai"
+    requires = ("AZURE_OPENAI_ENDPOINT_STT", "AZURE_OPENAI_API_KEY_STT")
+    commits  = True
+
+    def __init__(self, prompt: str = "", client_commit: bool = False, frame_ms: int = 80):
+        from .routing import endpoints_from_env
+
+        self.prompt        = prompt
+        self.client_commit = client_commit        # Turns committed by `commit()`, no server VAD
+        self.frame_ms      = frame_ms
+        self.language      = None
+        self.endpoints     = endpoints_from_env("_STT")
+        self.connected     = False
+        self.ws_app = None
+        self.framer = None
+
+    @staticmethod
+    def url(cfg) -> str:
+        return (f'{cfg.endpoint.replace("https", "wss")}'
+                f'/openai/realtime?api-version={cfg.api_version}&intent=transcription')
+
+    @property
+    def active(self) -> bool:
+        return self.ws_app is not None and self.ws_app.keep_running
+
+    def run(self, events):
+        import websocket
+
+        # Next STT deployment (AZURE_OPENAI_ENDPOINT_STT_2…) if the handshake fails
+        for cfg in self.endpoints:
+            print("Connected to:", self.url(cfg))
+            self.ws_app = websocket.WebSocketApp(
+                self.url(cfg),
+                header={"api-key": cfg.api_key},
+                on_open=lambda ws, cfg=cfg: self._on_open(ws, cfg, events),
+                on_message=lambda ws, message: self._on_message(message, events),
+                on_error=lambda ws, error: print("Websocket error:", error),
+                on_close=lambda ws, code, reason: print("Websocket closed:", code, reason),
+            )
+            self.ws_app.run_forever()
+            if self.connected:
+                break
+
+    def _on_open(self, ws, cfg, events):
+        import websocket
+
+        from .framing import AudioFramer
+
+        self.connected = True
+        ws.send(json.dumps({
+            "type": "transcription_session.update",
+            "session": {
+                "input_audio_format": "pcm16",
+                "input_audio_transcription": {
+                    "model": cfg.deployment,
+                    "prompt": self.prompt,
+                },
+                "input_audio_noise_reduction": {"type": "near_field"},
+                # With client endpointing the turn is committed by `commit()`
+                "turn_detection": None if self.client_commit else {"type": "server_vad"},
+            },
+        }))
+        # Coalesces the mic chunks into STT_FRAME_MS append messages
+        self.framer = AudioFramer(
+            lambda payload: ws.send(payload, opcode=websocket.ABNF.OPCODE_TEXT),
+            rate=RATE, frame_ms=self.frame_ms,
+        )
+        events.on_connected()
+
+    def _on_message(self, message, events):
+        try:
+            ev = json.loads(message)
+            etype = ev.get("type", "")
+            if etype == "input_audio_buffer.speech_started":
+                events.on_speech_started()
+            elif etype == "input_audio_buffer.speech_stopped":
+                events.on_speech_ended()
+            elif etype == "conversation.item.input_audio_transcription.delta":
+                events.on_partial(ev.get("delta", ""), False, ev.get("item_id"))
+            elif etype == "conversation.item.input_audio_transcription.completed":
+                events.on_final(ev["transcript"])
+        except Exception as exc:
+            print("on_message error:", exc)
+
+    def write(self, pcm: bytes):
+        self.framer.write(pcm)
+
+    def flush(self):
+        self.framer.flush()                       # The end of speech goes out now
+
+    def commit(self):
+        self.flush()
+        self.ws_app.send(json.dumps({"type": "input_audio_buffer.commit"}))
+
+    def probe(self):
+        import websocket
+
+        cfg = self.endpoints[0]
+        ws = websocket.create_connection(self.url(cfg), header={"api-key": cfg.api_key},
+                                         timeout=float(os.environ.get("PROBE_TIMEOUT_S", "5")))
+        ws.close()
+
+    def summaries(self) -> dict[str, str]:
+        return {"STT": self.framer.stats.summary()} if self.framer is not None else {}
+
+    def close(self):
+        if self.ws_app is not None:
+            self.ws_app.close()
+
+
+class SpeechSTT(Provider):
+    """Azure Speech continuous recognition over a push stream."""
+
+    stage, name = "stt", "speech"
+    requires = ("AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION")
+    commits  = False                              # The service segments the utterances
+
+    def __init__(self, **_):
+        import azure.cognitiveservices.speech as speechsdk
+
+        self.speechsdk = speechsdk
+        self.language  = os.environ.get("AZURE_SPEECH_LANGUAGE", "es-ES")
+        self.config = speechsdk.SpeechConfig(subscription=os.environ["AZURE_SPEECH_KEY"],
+                                             region=os.environ["AZURE_SPEECH_REGION"])
+        self.config.speech_recognition_language = self.language
+        self.push_stream, self.recognizer = self._recognizer()
+        self.connection = speechsdk.Connection.from_recognizer(self.recognizer)
+        self._stopped   = threading.Event()
+
+    def _recognizer(self):
+        speechsdk = self.speechsdk
+        stream = speechsdk.audio.PushAudioInputStream(
+            speechsdk.audio.AudioStreamFormat(samples_per_second=RATE, bits_per_sample=16, channels=1))
+        recognizer = speechsdk.SpeechRecognizer(speech_config=self.config,
+                                                audio_config=speechsdk.audio.AudioConfig(stream=stream))
+        return stream, recognizer
+
+    @property
+    def active(self) -> bool:
+        return not self._stopped.is_set()
+
+    def run(self, events):
+        speechsdk = self.speechsdk
+        recognizer = self.recognizer
+
+        def on_recognizing(evt):
+            if evt.result.text:
+                events.on_speech_started()
+                # Whole hypothesis of the utterance in progress
+                events.on_partial(evt.result.text, True, evt.result.offset)
+
+        def on_recognized(evt):
+            if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech and evt.result.text:
+                events.on_final(evt.result.text)
+
+        recognizer.speech_end_detected.connect(lambda _: events.on_speech_ended())
+        recognizer.recognizing.connect(on_recognizing)
+        recognizer.recognized.connect(on_recognized)
+        recognizer.canceled.connect(lambda evt: print("\n[STT canceled]", evt.reason, evt.error_details))
+        recognizer.start_continuous_recognition()
+        events.on_connected()
+        while not self._stopped.wait(0.5):
+            pass
+
+    def write(self, pcm: bytes):
+        self.push_stream.write(bytes(pcm))   # The SDK takes bytes (the capture reads memoryviews)
+
+    def flush(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def warmups(self) -> dict[str, Callable[[], object]]:
+        from .speech_pool import open_connection
+
+        return {"speech-stt": lambda: open_connection(self.connection, True)}
+
+    def probe(self):
+        from .speech_pool import open_connection
+
+        stream, recognizer = self._recognizer()   # A session of its own
+        connection = self.speechsdk.Connection.from_recognizer(recognizer)
+        try:
+            open_connection(connection, True, timeout=float(os.environ.get("PROBE_TIMEOUT_S", "5")))
+        finally:
+            connection.close()
+            stream.close()
+
+    def close(self):
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self.recognizer.stop_continuous_recognition()
+        self.push_stream.close()
+
+
+# ---------------------------------------------------------------------------
+# LLM
+# ---------------------------------------------------------------------------
+class AOAIChat(Provider):
+    """Azure OpenAI chat completions over every chat deployment."""
+
+    stage, name = "llm", "aoai"
+    requires = ("AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_API_KEY")
+
+    def __init__(self, hedge_ms: int = 0, temperature: float = 0.7, max_tokens: int = 1000):
+        from .routing import Router
+
+        self.temperature = temperature
+        self.max_tokens  = max_tokens
+        self.router = Router.from_env("", _aoai_client, hedge_ms=hedge_ms, name="chat")
+        self.client = self.router.primary.client               # Summaries
+        self.model  = self.router.primary.config.deployment or "gpt-4o-mini"
+
+    def open_stream(self, messages: list[dict], hedge: bool = False, max_tokens: int | None = None):
+        """Stream from the fastest deployment (`hedge`: and a second one after HEDGE_MS)."""
+        return self.router.stream(
+            lambda endpoint: endpoint.client.chat.completions.create(
+                model=endpoint.config.deployment or self.model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=max_tokens or self.max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+            ),
+            hedge=hedge,
+            is_first=lambda chunk: bool(chunk.choices and chunk.choices[0].delta.content),
+        )
+
+    def pings(self):
+        return _router_pings(self.router)
+
+    def probe(self):
+        _first_token(self.open_stream([{"role": "user", "content": PROBE_TEXT}], max_tokens=1))
+
+    def summaries(self):
+        return _router_summaries(self.router)
+
+
+class OpenAIChat(Provider):
+    """Any OpenAI-compatible chat endpoint (OPENAI_BASE_URL, OPENAI_API_KEY, OPENAI_MODEL)."""
+
+    stage, name = "llm", "openai"
+    requires = ("OPENAI_API_KEY",)
+
+    def __init__(self, hedge_ms: int = 0, temperature: float = 0.7, max_tokens: int = 1000):
+        from openai import OpenAI
+
+        from .warmup import pooled_http_client
+
+        env = os.environ
+        self.temperature = temperature
+        self.max_tokens  = max_tokens
+        self.client = OpenAI(api_key=env["OPENAI_API_KEY"], base_url=env.get("OPENAI_BASE_URL") or None,
+                             http_client=pooled_http_client())
+        self.model  = env.get("OPENAI_MODEL", "gpt-4o-mini")
+
+    def open_stream(self, messages: list[dict], hedge: bool = False, max_tokens: int | None = None):
+        return self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=max_tokens or self.max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+    def pings(self):
+        from .warmup import warm_http
+
+        return {"openai": lambda: warm_http(self.client)}
+
+    def probe(self):
+        _first_token(self.open_stream([{"role": "user", "content": PROBE_TEXT}], max_tokens=1))
+
+
+# ---------------------------------------------------------------------------
+# TTS
+# ---------------------------------------------------------------------------
+class AOAITTS(Provider):
+    """Azure OpenAI TTS over every TTS deployment."""
+
+    stage, name = "tts", "aoai"
+    requires = ("AZURE_OPENAI_ENDPOINT_TTS", "AZURE_OPENAI_API_KEY_TTS")
+    voice = "ballad"
+    instructions = (
+        "Affect/personality: A cheerful guide\n\n"
+        "Tone: Friendly, clear, and reassuring.\n"
+        "Pause: Brief pauses after key instructions.\n"
+        "Emotion: Warm and supportive."
+    )
+
+    text_stream = False                  # The speech endpoint takes the whole input in one request
+
+    def __init__(self, hedge_ms: int = 0, lookahead: int = 2, text_stream: bool = False):
+        from .routing import Router
+
+        self.router = Router.from_env("_TTS", _aoai_client, hedge_ms=hedge_ms, name="tts")
+        self.model  = self.router.primary.config.deployment
+
+    def synthesize(self, text: str, hedge: bool = False) -> Iterator[bytes]:
+        """
+        Synthesizes one sentence in streaming and yields 16-bit aligned PCM
+        as it arrives, from the fastest TTS deployment (`hedge`: and a
+        second one after HEDGE_MS).
+        """
+        def request(endpoint):
+            with endpoint.client.audio.speech.with_streaming_response.create(
+                model=endpoint.config.deployment,
+                voice=self.voice,
+                input=text,
+                instructions=self.instructions,
+                response_format="pcm",
+            ) as tts_response:
+                yield from iter_pcm16(tts_response.iter_bytes())
+
+        stream = self.router.stream(request, hedge=hedge)
+        try:
+            yield from stream
+        finally:
+            stream.close()
+
+    def cache_key(self, text: str) -> str:
+        return cache_key(text, self.voice, self.model, self.instructions, "pcm")
+
+    def pings(self):
+        return _router_pings(self.router)
+
+    def probe(self):
+        for _ in self.synthesize(PROBE_TEXT):
+            break
+
+    def summaries(self):
+        return _router_summaries(self.router)
+
+
+class SpeechTTS(Provider):
+    """Azure Speech synthesis through a pool of warm synthesizers."""
+
+    stage, name = "tts", "speech"
+    requires = ("AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION")
+
+    def __init__(self, hedge_ms: int = 0, lookahead: int = 2, text_stream: bool = False):
+        import azure.cognitiveservices.speech as speechsdk
+
+        from .speech_pool import SynthesizerPool, text_stream_config
+
+        self.voice       = os.environ.get("AZURE_SPEECH_VOICE", "es-MX-DaliaNeural")
+        self.text_stream = text_stream
+        key, region = os.environ["AZURE_SPEECH_KEY"], os.environ["AZURE_SPEECH_REGION"]
+        if text_stream:
+            # The v2 endpoint takes text-stream requests as well as whole texts
+            config = text_stream_config(key, region)
+        else:
+            config = speechsdk.SpeechConfig(subscription=key, region=region)
+        config.speech_synthesis_voice_name = self.voice
+        config.set_speech_synthesis_output_format(speechsdk.SpeechSynthesisOutputFormat.Raw24Khz16BitMonoPcm)
+        # One synthesizer per sentence in flight (lookahead + the one playing)
+        self.pool = SynthesizerPool(config, size=lookahead + 1)
+
+    def synthesize(self, text: str, hedge: bool = False) -> Iterator[bytes]:
+        return iter_pcm16(self.pool.synthesize(text))
+
+    def open_text_stream(self):
+        return self.pool.synthesize_stream()
+
+    def cache_key(self, text: str) -> str:
+        return cache_key(text, self.voice, "azure-speech", "", "Raw24Khz16BitMonoPcm")
+
+    def warmups(self):
+        return {"speech-tts": self.pool.warm}
+
+    def pings(self):
+        return {"speech-tts": self.pool.ping}
+
+    def probe(self):
+        chunks = self.synthesize(PROBE_TEXT)
+        next(chunks, None)
+        chunks.close()
+
+    def summaries(self):
+        return {"TTS pool": self.pool.summary()}
+
+    def close(self):
+        self.pool.close()
+
+
+PROVIDERS: dict[str, dict[str, type[Provider]]] = {
+    "stt": {"aoai": RealtimeSTT, "speech": SpeechSTT},
+    "llm": {"aoai": AOAIChat, "openai": OpenAIChat},
+    "tts": {"aoai": AOAITTS, "speech": SpeechTTS},
+}
+
+
+# ---------------------------------------------------------------------------
+# Startup probe
+# ---------------------------------------------------------------------------
+class ProbeReport:
+    """Best probe time (or error) of every candidate of one stage."""
+
+    def __init__(self, stage: str):
+        self.stage   = stage
+        self.results: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+        self.chosen: str | None = None
+
+    def summary(self) -> str:
+        parts = []
+        for name in dict.fromkeys([*self.results, *self.errors]):
+            if name in self.errors:
+                parts.append(f"{name} failed ({self.errors[name]})")
+            else:
+                parts.append(f"{name} {self.results[name] * 1000:.0f} ms" + (" ✓" if name == self.chosen else ""))
+        return f"{self.stage}: " + " | ".join(parts)
+
+
+def _probe(provider: Provider, samples: int) -> float:
+    best = float("inf")
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        provider.probe()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def choose(stage: str, spec: str, **kwargs) -> tuple[Provider, ProbeReport | None]:
+    """
+    The provider of `stage` named by `spec` (`aoai`, `speech,aoai`, `auto`…),
+    built with `kwargs`; with several candidates, the fastest to answer its
+    probe (ValueError if none is usable).
+    """
+    registry = PROVIDERS[stage]
+    names = [n.strip() for n in spec.split(",") if n.strip()]
+    if names == ["auto"]:
+        names = [n for n, cls in registry.items() if cls.available()]
+    unknown = [n for n in names if n not in registry]
+    if unknown or not names:
+        raise ValueError(f"{stage.upper()}_PROVIDER={spec!r}: one or more of {', '.join(registry)} or auto")
+    if len(names) == 1:
+        return registry[names[0]](**kwargs), None
+
+    report = ProbeReport(stage)
+    built: dict[str, Provider] = {}
+    for name in names:
+        try:
+            built[name] = registry[name](**kwargs)
+        except Exception as exc:         # Settings or SDK missing
+            report.errors[name] = f"{type(exc).__name__}: {exc}"
+
+    samples = int(os.environ.get("PROBE_SAMPLES", "2"))
+    timeout = float(os.environ.get("PROBE_TIMEOUT_S", "5"))
+
+    def run(name: str):
+        try:
+            report.results[name] = _probe(built[name], samples)
+        except Exception as exc:
+            report.errors[name] = f"{type(exc).__name__}: {exc}"
+
+    # Daemon threads: a candidate that hangs is left behind, not waited for
+    threads = [threading.Thread(target=run, args=(name,), daemon=True) for name in built]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + timeout * samples
+    for name, thread in zip(built, threads):
+        thread.join(max(0.0, deadline - time.monotonic()))
+        if thread.is_alive():
+            report.errors.setdefault(name, "timeout")
+    usable = {name: t for name, t in report.results.items() if name not in report.errors}
+    if not usable:
+        raise ValueError(f"no {stage} provider answered the probe: {report.summary()}")
+
+    report.chosen = min(usable, key=usable.get)
+    for name, provider in built.items():
+        if name != report.chosen:
+            provider.close()
+    return built[report.chosen], report
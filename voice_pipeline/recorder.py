@@ -0,0 +1,274 @@
+"""
+Session recording for audit: the microphone audio, the answer audio, the
+transcripts, the answers and the turn timelines of a session in one
+appendable file.
+
+    mic sender ──mic(pcm)──┐
+    TTS writes ──tts(pcm)──┼─► bounded channels ─► writer thread ─► session.vprec
+    turn logic ─event()────┘   (append, no lock)   (batch every       (fsync every
+                                                   flush_ms)           fsync_s)
+
+The audio threads only copy the chunk and append it to a `deque` (atomic
+in CPython) with a counter: no lock, no I/O and no JSON on the hot path.
+Each channel has a byte budget: when the writer falls that far behind
+(slow disk), new items are dropped and counted instead of blocking the
+caller, and the writer adds a `drop` event to the file, so the gaps are
+visible. The counters are exact with one producer per channel (the mic
+sender, the TTS player); events may come from any thread.
+
+File format: `MAGIC`, then records
+
+    kind (u8) | t (f64, seconds since the session started) | length (u32) | payload
+
+with kind 1 = microphone PCM, 2 = answer PCM (16-bit mono at the `rate` of
+the `session` event) and 3 = event (UTF-8 JSON with a `type`: `session`,
+`transcript`, `answer`, `turn`, `drop`). Records are only appended, so a
+session cut short (crash, power loss) reads up to its last synced batch.
+`read_session(path)` iterates over the records; `export_session` writes
+them as a stereo WAV (user left, assistant right) and a JSONL of events
+(`python -m voice_pipeline recording export <file>`).
+"""
+
+import collections
+import json
+import os
+import struct
+import threading
+import time
+import wave
+from typing import Iterator
+
+MAGIC  = b"VPREC01\n"
+HEADER = struct.Struct("<BdI")
+MIC, TTS, EVENT = 1, 2, 3
+KINDS = {MIC: "mic", TTS: "tts", EVENT: "events"}
+
+
+class _Channel:
+    def __init__(self, kind: int, budget: int):
+        self.kind    = kind
+        self.budget  = budget            # Bytes waiting for the writer
+        self.items: collections.deque[tuple[float, bytes]] = collections.deque()
+        self.put_bytes     = 0           # Producer side
+        self.taken_bytes   = 0           # Writer side
+        self.dropped       = 0           # Items
+        self.dropped_bytes = 0
+        self.max_depth     = 0
+        self.reported      = (0, 0)      # Drops already written to the file
+
+    def put(self, t: float, payload: bytes) -> bool:
+        depth = self.put_bytes - self.taken_bytes + len(payload)
+        if depth > self.budget:          # Writer behind: drop, never wait
+            self.dropped       += 1
+            self.dropped_bytes += len(payload)
+            return False
+        self.items.append((t, payload))
+        self.put_bytes += len(payload)
+        self.max_depth  = max(self.max_depth, depth)
+        return True
+
+    def take(self) -> list[tuple[float, bytes]]:
+        out = []
+        while self.items:
+            item = self.items.popleft()
+            self.taken_bytes += len(item[1])
+            out.append(item)
+        return out
+
+
+class RecorderStats:
+    def __init__(self, channels: dict[int, _Channel], rate: int):
+        self.channels = channels
+        self.rate     = rate
+        self.written  = 0                # Bytes on disk
+        self.batches  = 0
+        self.fsyncs   = 0
+        self.fsync_s  = 0.0
+        self.max_write_s = 0.0           # Slowest batch (write + flush)
+
+    def summary(self) -> str:
+        drops = ", ".join(
+            f"{KINDS[c.kind]} {c.dropped}" + (f" ({c.dropped_bytes / 2 / self.rate:.1f} s)" if c.kind != EVENT else "")
+            for c in self.channels.values()
+        )
+        depth = max(c.max_depth for c in self.channels.values())
+        fsync = self.fsync_s / self.fsyncs if self.fsyncs else 0.0
+        return (
+            f"{self.written / 1048576:.1f} MiB in {self.batches} batches, slowest write "
+            f"{self.max_write_s * 1000:.0f} ms, fsync avg {fsync * 1000:.1f} ms, max queued "
+            f"{depth / 1024:.0f} KiB, drops: {drops}"
+        )
+
+
+class SessionRecorder:
+    """One per session: `mic()`, `tts()`, `event()` from any thread, `close()` at the end."""
+
+    def __init__(self, path: str, rate: int = 24_000, queue_bytes: int = 8 << 20, flush_ms: int = 200,
+                 fsync_s: float = 1.0):
+        self.path     = path
+        self.rate     = rate
+        self.flush_s  = flush_ms / 1000
+        self.fsync_s  = fsync_s
+        self.started  = time.perf_counter()  # t = 0 of the records
+        self.channels = {kind: _Channel(kind, queue_bytes if kind != EVENT else 1 << 20)
+                         for kind in (MIC, TTS, EVENT)}
+        self.stats    = RecorderStats(self.channels, rate)
+        self._failed  = False
+        self._stop    = threading.Event()
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self.event("session", started=time.time(), rate=rate, format="pcm16")
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def in_dir(cls, directory: str, **kwargs) -> "SessionRecorder":
+        """New session file in `directory`, named after the start time."""
+        name = time.strftime("session-%Y%m%d-%H%M%S") + f"-{os.getpid()}.vprec"
+        return cls(os.path.join(directory, name), **kwargs)
+
+    # --- Producers (never block) -------------------------------------------
+    def now(self, at: float | None = None) -> float:
+        """Session time of `at` (a perf_counter value, default now)."""
+        return (time.perf_counter() if at is None else at) - self.started
+
+    def mic(self, pcm):
+        self.channels[MIC].put(self.now(), bytes(pcm))
+
+    def tts(self, pcm):
+        self.channels[TTS].put(self.now(), bytes(pcm))
+
+    def event(self, type: str, **fields):
+        payload = json.dumps({"type": type, **fields}, ensure_ascii=False).encode()
+        self.channels[EVENT].put(self.now(), payload)
+
+    def turn(self, timeline):
+        """A finished `TurnTimeline`: its points on the session clock, stages and meta."""
+        self.event("turn", points_s={p: round(self.now(t), 4) for p, t in timeline.points.items()},
+                   **{k: v for k, v in timeline.to_dict().items() if k != "points_ms"})
+
+    # --- Writer ------------------------------------------------------------
+    def _batch(self) -> bytes:
+        """Everything queued, in time order across the channels (the `session` event first)."""
+        records = []
+        for channel in self.channels.values():
+            records += ((t, channel.kind, payload) for t, payload in channel.take())
+            reported = (channel.dropped, channel.dropped_bytes)
+            if reported != channel.reported:     # A gap: recorded where it was noticed
+                items, size = (a - b for a, b in zip(reported, channel.reported))
+                channel.reported = reported
+                note = json.dumps({"type": "drop", "channel": KINDS[channel.kind], "items": items,
+                                   "bytes": size}).encode()
+                records.append((self.now(), EVENT, note))
+        records.sort(key=lambda record: record[0])   # Stable: same-time records keep their order
+        return b"".join(HEADER.pack(kind, t, len(payload)) + payload for t, kind, payload in records)
+
+    def _run(self):
+        last_sync = time.perf_counter()
+        while True:
+            stopping = self._stop.wait(self.flush_s)
+            batch = self._batch()
+            try:
+                if batch and not self._failed:
+                    start = time.perf_counter()
+                    self._file.write(batch)
+                    self._file.flush()
+                    self.stats.max_write_s = max(self.stats.max_write_s, time.perf_counter() - start)
+                    self.stats.written += len(batch)
+                    self.stats.batches += 1
+                if not self._failed and (stopping or time.perf_counter() - last_sync >= self.fsync_s):
+                    start = time.perf_counter()
+                    os.fsync(self._file.fileno())
+                    last_sync = time.perf_counter()
+                    self.stats.fsync_s += last_sync - start
+                    self.stats.fsyncs  += 1
+            except OSError as exc:           # Disk full, removed…: the session goes on unrecorded
+                print("Recording error:", exc)
+                self._failed = True
+            if stopping:
+                return
+
+    def close(self):
+        """Writes what is queued, syncs and closes the file."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self._file.close()
+
+
+# ---------------------------------------------------------------------------
+# Reader
+# ---------------------------------------------------------------------------
+def read_session(path: str) -> Iterator[tuple[int, float, bytes]]:
+    """(kind, t, payload) of every complete record; a cut-off tail is ignored."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: not a session recording")
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            kind, t, size = HEADER.unpack(header)
+            payload = f.read(size)
+            if len(payload) < size:
+                return
+            yield kind, t, payload
+
+
+def session_events(path: str) -> list[dict]:
+    return [dict(json.loads(payload), t=round(t, 4)) for kind, t, payload in read_session(path) if kind == EVENT]
+
+
+def _place(track: bytearray, t: float, pcm: bytes, rate: int, cursor: int) -> int:
+    """Writes `pcm` at time `t` of `track` (or right after the previous chunk); returns the new end."""
+    start = max(int(t * rate) * 2, cursor)
+    if len(track) < start + len(pcm):
+        track.extend(bytes(start + len(pcm) - len(track)))
+    track[start:start + len(pcm)] = pcm
+    return start + len(pcm)
+
+
+def session_audio(path: str) -> tuple[bytes, bytes, int]:
+    """
+    (user, assistant, rate): both tracks on the session clock, every chunk
+    at the time it was recorded or right after the previous one (the answer
+    audio is recorded as it is written to the playback buffer, slightly
+    ahead of the speaker).
+    """
+    rate = 24_000
+    tracks = {MIC: bytearray(), TTS: bytearray()}
+    cursors = {MIC: 0, TTS: 0}
+    for kind, t, payload in read_session(path):
+        if kind == EVENT:
+            event = json.loads(payload)
+            if event["type"] == "session":
+                rate = event["rate"]
+        else:
+            cursors[kind] = _place(tracks[kind], t, payload, rate, cursors[kind])
+    size = max(len(tracks[MIC]), len(tracks[TTS]))
+    return (bytes(tracks[MIC].ljust(size, b"\0")), bytes(tracks[TTS].ljust(size, b"\0")), rate)
+
+
+def export_session(path: str, out_dir: str) -> dict:
+    """`session.wav` (stereo: user left, assistant right) and `events.jsonl` in `out_dir`."""
+    import numpy as np
+
+    os.makedirs(out_dir, exist_ok=True)
+    user, assistant, rate = session_audio(path)
+    stereo = np.stack([np.frombuffer(user, dtype="<i2"), np.frombuffer(assistant, dtype="<i2")], axis=1)
+    wav_path = os.path.join(out_dir, "session.wav")
+    with wave.open(wav_path, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(stereo.tobytes())
+    events = session_events(path)
+    events_path = os.path.join(out_dir, "events.jsonl")
+    with open(events_path, "w", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+    return {"wav": wav_path, "events": events_path, "seconds": len(user) / 2 / rate, "events_count": len(events)}
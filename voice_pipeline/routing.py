@@ -0,0 +1,375 @@
+"""
+Latency-aware routing and hedged requests across Azure OpenAI deployments.
+
+    request ─► ranked endpoints ─► best ──(no first byte after hedge_ms)──► second (hedge)
+                                    │                                        │
+                                    └──────── first byte wins, the other is closed
+
+A stage (chat, TTS, STT) can have several deployments, in other regions or
+subscriptions: `AZURE_OPENAI_ENDPOINT{stage}` plus `..._2`, `..._3`…, each
+with its own `AZURE_OPENAI_API_KEY{stage}_n` (and optionally
+`AZURE_OPENAI_DEPLOYMENT_NAME{stage}_n` / `AZURE_OPENAI_API_VERSION{stage}_n`;
+the primary's when missing).
+
+Per endpoint the `Router` keeps a moving average (EWMA) of the time to first
+byte and of the error rate, and sends each request to the best one. While an
+endpoint gets no requests its penalty fades (half-life `decay_s`), so one
+slow or failed request does not keep it out of the rotation for good. A 429 or 5xx puts the endpoint in a cooldown
+(its `Retry-After` / `retry-after-ms` header, or an exponential backoff) and
+the request fails over to the next endpoint; other errors (400, 401…) are
+raised. With `hedge=True` (the first LLM token and the first TTS sentence of
+a turn), a duplicate is sent to the next endpoint when the first one has not
+produced its first byte after `hedge_ms`; whichever answers first is used.
+
+Clients should be created with `max_retries=0`: the router does the retries.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable
+from urllib.parse import urlparse
+
+from openai import APIConnectionError
+
+RETRYABLE = {408, 409, 429, 500, 502, 503, 504}
+MAX_COOLDOWN = 30.0                      # Backoff cap (s)
+
+
+@dataclass
+class EndpointConfig:
+    name: str                            # Host, for the reports
+    endpoint: str
+    api_key: str
+    api_version: str
+    deployment: str
+
+
+def endpoints_from_env(stage: str = "", env=os.environ) -> list[EndpointConfig]:
+    """`stage`: "" (chat), "_TTS" or "_STT". The primary first, then `_2`, `_3`…"""
+    def config(suffix: str, default: EndpointConfig) -> EndpointConfig:
+        endpoint = env[f"AZURE_OPENAI_ENDPOINT{stage}{suffix}"]
+        return EndpointConfig(
+            name=urlparse(endpoint).netloc.split(".")[0] or endpoint,
+            endpoint=endpoint,
+            api_key=env.get(f"AZURE_OPENAI_API_KEY{stage}{suffix}") or default.api_key,
+            api_version=env.get(f"AZURE_OPENAI_API_VERSION{stage}{suffix}") or default.api_version,
+            deployment=env.get(f"AZURE_OPENAI_DEPLOYMENT_NAME{stage}{suffix}") or default.deployment,
+        )
+
+    configs = [config("", EndpointConfig("", "", "", "", ""))]   # Missing: "" (the script's default)
+    n = 2
+    while env.get(f"AZURE_OPENAI_ENDPOINT{stage}_{n}"):
+        configs.append(config(f"_{n}", configs[0]))
+        n += 1
+    # Same host twice (local stand-ins on one machine): the port tells them apart
+    names = [c.name for c in configs]
+    for c in configs:
+        if names.count(c.name) > 1:
+            c.name = urlparse(c.endpoint).netloc
+    return configs
+
+
+def retry_after(exc: Exception) -> float | None:
+    """Seconds asked by the service (`retry-after-ms` / `Retry-After`), if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass                             # HTTP date: use the backoff
+    return None
+
+
+def retryable(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE
+    return isinstance(exc, (APIConnectionError, OSError))
+
+
+class Endpoint:
+    """One deployment with its client and its moving averages."""
+
+    def __init__(self, config: EndpointConfig, client, alpha: float = 0.2):
+        self.config     = config
+        self.name       = config.name
+        self.client     = client
+        self.alpha      = alpha
+        self.latency: float | None = None    # EWMA time to first byte (s)
+        self.error_rate = 0.0                # EWMA of failed requests
+        self.cooldown_until = 0.0
+        self.updated    = 0.0                # Last sample (monotonic)
+        self.requests   = 0
+        self.errors     = 0
+        self.throttled  = 0                  # 429s
+        self.inflight   = 0
+        self._failures  = 0                  # In a row, for the backoff
+        self._lock      = threading.Lock()
+
+    def available(self, now: float | None = None) -> bool:
+        return (now or time.monotonic()) >= self.cooldown_until
+
+    def begin(self):
+        with self._lock:
+            self.requests += 1
+            self.inflight += 1
+
+    def success(self, ttfb: float):
+        with self._lock:
+            self.inflight  -= 1
+            self._failures  = 0
+            self.latency    = ttfb if self.latency is None else self.latency + self.alpha * (ttfb - self.latency)
+            self.error_rate *= 1 - self.alpha
+            self.updated    = time.monotonic()
+
+    def failure(self, exc: Exception | None):
+        """`exc` None: abandoned (the turn was cancelled), not an error of the endpoint."""
+        with self._lock:
+            self.inflight -= 1
+        if exc is not None:
+            self.error(exc)
+
+    def error(self, exc: Exception):
+        with self._lock:
+            self.errors += 1
+            if getattr(exc, "status_code", None) == 429:
+                self.throttled += 1          # Busy, not unhealthy: the cooldown is enough
+            else:
+                self.error_rate += self.alpha * (1 - self.error_rate)
+                self.updated = time.monotonic()
+            if not retryable(exc):
+                return
+            self._failures += 1
+            wait = retry_after(exc)
+            if wait is None:
+                wait = min(MAX_COOLDOWN, 0.5 * 2 ** (self._failures - 1))
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + wait)
+
+    def summary(self) -> str:
+        latency = f"{self.latency * 1000:.0f} ms" if self.latency is not None else "-"
+        cooling = self.cooldown_until - time.monotonic()
+        state = f", cooling {cooling:.1f} s" if cooling > 0 else ""
+        return (f"{self.name} {latency} ({self.requests} req, {self.errors} err, "
+                f"{self.throttled} throttled{state})")
+
+
+class RouterStats:
+    def __init__(self):
+        self.requests  = 0
+        self.failovers = 0                   # Attempts after a retryable error
+        self.hedges    = 0                   # Duplicates sent
+        self.hedge_wins = 0                  # …that answered first
+        self.failed    = 0                   # Requests no endpoint could serve
+
+
+class Router:
+    def __init__(
+        self,
+        endpoints: list[Endpoint],
+        hedge_ms: int = 0,                   # 0: no hedging
+        max_attempts: int | None = None,     # Default: every endpoint + 2 retries
+        max_wait: float = 2.0,               # Longest Retry-After waited for when all are cooling
+        decay_s: float = 10.0,               # Half-life of the penalty of an idle endpoint
+        name: str = "",
+    ):
+        self.endpoints    = endpoints
+        self.decay_s      = decay_s
+        self.hedge_s      = hedge_ms / 1000
+        self.max_attempts = max_attempts or len(endpoints) + 2
+        self.max_wait     = max_wait
+        self.name         = name
+        self.stats        = RouterStats()
+
+    @classmethod
+    def from_env(cls, stage: str, make_client: Callable[[EndpointConfig], object], **kwargs) -> "Router":
+        return cls([Endpoint(c, make_client(c)) for c in endpoints_from_env(stage)], **kwargs)
+
+    @property
+    def primary(self) -> Endpoint:
+        return self.endpoints[0]
+
+    def ranked(self, exclude: Iterable[Endpoint] = ()) -> list[Endpoint]:
+        """Available endpoints by score (latency × error rate), then the cooling ones by recovery."""
+        now = time.monotonic()
+        known = [e.latency for e in self.endpoints if e.latency is not None]
+        best = min(known, default=0.0)       # Unmeasured: as good as the best (ties keep the env order)
+
+        def score(e: Endpoint) -> float:
+            if e.latency is None:
+                return best
+            fade = 0.5 ** ((now - e.updated) / self.decay_s)
+            return (best + (e.latency - best) * fade) * (1 + 4 * e.error_rate * fade)
+
+        candidates = [e for e in self.endpoints if e not in exclude]
+        ready   = sorted((e for e in candidates if e.available(now)), key=score)
+        cooling = sorted((e for e in candidates if not e.available(now)), key=lambda e: e.cooldown_until)
+        return ready + cooling
+
+    def stream(self, open_stream: Callable[[Endpoint], Iterable], hedge: bool = False,
+               is_first: Callable[[object], bool] = lambda item: True) -> "RoutedStream":
+        """
+        `open_stream(endpoint)` → an iterable with `close()` (an openai `Stream`,
+        a generator). `is_first(item)`: the item that counts as the first byte
+        (e.g. the first chunk with content); the ones before it are held back.
+        """
+        self.stats.requests += 1
+        return RoutedStream(self, open_stream, hedge and self.hedge_s > 0 and len(self.endpoints) > 1, is_first)
+
+    def call(self, request: Callable[[Endpoint], object]):
+        """A non-streamed request with failover (no hedging)."""
+        for item in self.stream(lambda endpoint: iter([request(endpoint)])):
+            return item
+
+    def summary(self) -> str:
+        s = self.stats
+        head = " | ".join(e.summary() for e in self.endpoints)
+        return (f"{self.name + ': ' if self.name else ''}{head} | {s.failovers} failovers, "
+                f"{s.hedges} hedges ({s.hedge_wins} won), {s.failed} failed")
+
+
+class _Attempt:
+    """One request to one endpoint, read up to its first byte by a thread."""
+
+    def __init__(self, stream: "RoutedStream", endpoint: Endpoint, hedge: bool):
+        self.owner    = stream
+        self.endpoint = endpoint
+        self.hedge    = hedge
+        self.started  = time.perf_counter()
+        self.source   = None                 # What open_stream returned
+        self.iterator = None
+        self.held: list = []                 # Items up to the first byte
+        self.error: Exception | None = None
+        self.done     = False
+        endpoint.begin()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        owner = self.owner
+        try:
+            self.source = owner.open_stream(self.endpoint)
+            self.iterator = iter(self.source)
+            for item in self.iterator:
+                self.held.append(item)
+                if owner.is_first(item):
+                    break
+            ttfb = time.perf_counter() - self.started
+        except Exception as exc:
+            self.error = exc
+        with owner._cond:                    # Recorded before the router picks the next endpoint
+            self.done = True
+            won = False
+            if self.error is not None:
+                self.endpoint.failure(None if owner._closed else self.error)
+            else:
+                self.endpoint.success(ttfb)
+                won = owner._winner is None and not owner._closed
+                if won:
+                    owner._winner = self
+            owner._cond.notify_all()
+        if self.error is None and not won:   # Lost the race (or the turn was cancelled)
+            self.close()
+
+    def close(self):
+        if self.source is not None and hasattr(self.source, "close"):
+            try:
+                self.source.close()
+            except Exception:
+                pass                         # Generator running in another thread, already closed…
+
+
+class RoutedStream:
+    """Iterate it like the stream it wraps; `close()` can be called from any thread."""
+
+    def __init__(self, router: Router, open_stream, hedge: bool, is_first):
+        self.router      = router
+        self.open_stream = open_stream
+        self.hedge       = hedge
+        self.is_first    = is_first
+        self.endpoint: Endpoint | None = None    # The one that answered
+        self._cond     = threading.Condition()
+        self._attempts: list[_Attempt] = []
+        self._winner: _Attempt | None = None
+        self._closed   = False
+        self._seen: set[_Attempt] = set()       # Failed attempts already handled
+        self._started  = 0.0                    # Last attempt sent (hedge timer)
+
+    def _launch(self, endpoint: Endpoint, hedge: bool = False):
+        self._attempts.append(_Attempt(self, endpoint, hedge))
+
+    def _wait_first(self) -> _Attempt | None:
+        """Under the condition: launches, hedges and fails over until one answers."""
+        router, stats = self.router, self.router.stats
+        last_error: Exception | None = None
+        hedged = False
+        while self._winner is None and not self._closed:
+            running = [a for a in self._attempts if not a.done]
+            for a in self._attempts:
+                if a.done and a.error is not None and a not in self._seen:
+                    self._seen.add(a)
+                    last_error = a.error
+                    if not retryable(a.error):
+                        raise a.error
+            if not running:
+                if len(self._attempts) >= router.max_attempts:
+                    break
+                candidates = router.ranked(exclude=[a.endpoint for a in self._attempts if a.error is None])
+                if not candidates:
+                    break
+                endpoint = candidates[0]
+                wait = endpoint.cooldown_until - time.monotonic()
+                if wait > router.max_wait:
+                    break                    # Every endpoint throttled for longer than a turn can wait
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                if self._attempts:
+                    stats.failovers += 1
+                self._launch(endpoint)
+                self._started = time.perf_counter()
+                continue
+            if self.hedge and not hedged:
+                remaining = self._started + router.hedge_s - time.perf_counter()
+                if remaining <= 0:
+                    hedged = True
+                    busy = {a.endpoint for a in running}
+                    spare = [e for e in router.ranked(exclude=busy) if e.available()]
+                    if spare:
+                        stats.hedges += 1
+                        self._launch(spare[0], hedge=True)
+                    continue
+                self._cond.wait(remaining)
+            else:
+                self._cond.wait()
+        if self._winner is None and not self._closed:
+            stats.failed += 1
+            raise last_error or RuntimeError(f"No endpoint available{' for ' + router.name if router.name else ''}")
+        return self._winner
+
+    def __iter__(self):
+        with self._cond:
+            winner = self._wait_first()
+        if winner is None:                   # Closed before the first byte
+            return
+        self.endpoint = winner.endpoint
+        if winner.hedge:
+            self.router.stats.hedge_wins += 1
+        try:
+            yield from winner.held
+            yield from winner.iterator
+        except Exception as exc:             # Mid-stream: too late to fail over
+            if not self._closed:
+                winner.endpoint.error(exc)
+                raise
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            attempts = list(self._attempts)
+            self._cond.notify_all()
+        for a in attempts:
+            if a.done:
+                a.close()
@@ -0,0 +1,177 @@
+"""
+Incremental text segmenter between the LLM stream and TTS.
+
+`feed(delta)` is called with every token and returns the chunks that are
+ready to be synthesized; `flush()` returns what is left at the end of the
+answer. Every character is scanned once: the scan position, the last
+clause/sentence boundary and the pending terminator are kept between calls.
+
+A terminator (. ! ? …) only ends a sentence when it is followed by
+whitespace (optionally after closing quotes/brackets/markdown), so "3.5",
+"example.com" and "e.g." (abbreviations per language) are not split, nor is
+list numbering ("2. ") at the start of a line. A newline always ends a
+sentence. Text inside `code` spans is never split.
+
+Chunk sizes:
+- first chunk, eager: cut at the first clause boundary (, ; : —) once it
+  has `eager_min_chars`, or at the first sentence end, whichever comes first;
+- next chunks: whole sentences, merged until they reach `min_chars`;
+- any chunk: split before `max_chars` (sentence, clause, word boundary).
+
+Chunks are returned with markdown markup removed (`speakable`).
+"""
+
+import re
+
+TERMINATORS = ".!?…。！？"
+CLAUSE      = ",;:—–"
+CLOSERS     = "\"')]}»”’*_"
+
+# Lowercase, without the final dot
+ABBREVIATIONS = {
+    "en": {
+        "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e",
+        "inc", "ltd", "co", "corp", "no", "fig", "approx", "dept", "est", "min", "max",
+        "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+        "a.m", "p.m", "u.s", "u.k",
+    },
+    "es": {
+        "sr", "sra", "srta", "dr", "dra", "d", "dña", "ud", "uds", "vd", "vds", "etc",
+        "p.ej", "pág", "págs", "núm", "n.º", "aprox", "av", "avda", "c", "tel", "ej",
+        "art", "cap", "vol", "ee.uu", "a.c", "d.c", "a.m", "p.m",
+    },
+}
+
+_MARKDOWN = (
+    (re.compile(r"```\w*"), ""),                         # Code fences
+    (re.compile(r"\[([^\]]*)\]\([^)]*\)"), r"\1"),       # [text](url) → text
+    (re.compile(r"(\*\*|__|\*|`)"), ""),                 # Emphasis, inline code
+    (re.compile(r"^\s*#{1,6}\s+", re.M), ""),            # Headers
+    (re.compile(r"^\s*[-*+]\s+", re.M), ""),             # Bullets
+    (re.compile(r"^\s*([-*_]\s*){3,}$", re.M), ""),      # Horizontal rules
+)
+
+
+def speakable(text: str) -> str:
+    """`text` without markdown markup and with collapsed whitespace."""
+    for pattern, repl in _MARKDOWN:
+        text = pattern.sub(repl, text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class SentenceSegmenter:
+    """Splits one answer; create a new one per turn."""
+
+    def __init__(
+        self,
+        lang: str | None = None,             # "en", "es", "es-ES"…; None: all known
+        eager_first: bool = True,
+        eager_min_chars: int = 20,
+        min_chars: int = 40,
+        max_chars: int = 300,
+    ):
+        if lang is None:
+            self.abbreviations = set().union(*ABBREVIATIONS.values())
+        else:
+            self.abbreviations = ABBREVIATIONS.get(lang.split("-")[0].lower(), set())
+        self.eager_first     = eager_first
+        self.eager_min_chars = eager_min_chars
+        self.min_chars       = min_chars
+        self.max_chars       = max_chars
+        self.chunks          = 0              # Chunks returned so far
+        self._buf      = ""
+        self._pos      = 0                    # Next character to scan
+        self._term     = -1                   # Terminator waiting for whitespace
+        self._clause_c = -1                   # Clause mark waiting for whitespace
+        self._sentence = -1                   # Last sentence boundary (cut index)
+        self._clause   = -1                   # Last clause boundary
+        self._space    = -1                   # Last whitespace
+        self._line     = 0                    # Start of the current line
+        self._in_code  = False
+
+    # --- Public API --------------------------------------------------------
+    def feed(self, delta: str) -> list[str]:
+        self._buf += delta
+        out: list[str] = []
+        buf = self._buf
+        while self._pos < len(buf):
+            i = self._pos
+            c = buf[i]
+            self._pos += 1
+            if c == "`":
+                self._in_code = not self._in_code
+                continue
+            if self._in_code:
+                continue
+            if c.isspace():
+                if self._term >= 0 or c == "\n":
+                    if c == "\n" or self._is_sentence_end(self._term):
+                        self._sentence = i
+                        if self._ready(i):
+                            buf = self._cut(i, out)
+                            continue
+                    self._term = -1
+                elif self._clause_c >= 0:
+                    self._clause = i
+                    if not self.chunks and self.eager_first and len(buf[:i].strip()) >= self.eager_min_chars:
+                        buf = self._cut(i, out)
+                        continue
+                self._clause_c = -1
+                self._space = i
+                if c == "\n":
+                    self._line = i + 1
+            elif c in TERMINATORS:
+                self._term = i
+            elif c in CLAUSE:
+                self._clause_c = i
+            elif c not in CLOSERS:
+                self._term = self._clause_c = -1
+            if self._pos >= self.max_chars:
+                buf = self._cut(self._split_point(), out)
+        return out
+
+    def flush(self) -> list[str]:
+        """What is left at the end of the answer (0 or 1 chunk)."""
+        out: list[str] = []
+        self._cut(len(self._buf), out)
+        self._in_code = False
+        return out
+
+    # --- Boundaries --------------------------------------------------------
+    def _is_sentence_end(self, term: int) -> bool:
+        if self._buf[term] != ".":
+            return True
+        word = self._buf[self._space + 1:term].strip().lstrip("\"'([{¿¡«“‘*_")
+        if word.lower() in self.abbreviations:
+            return False
+        if len(word) == 1 and word.isalpha() and word.isupper():
+            return False                     # Initial: "J. R. R. Tolkien"
+        if word.isdigit() and not self._buf[self._line:self._space + 1].strip():
+            return False                     # List numbering: "2. Second step"
+        return True
+
+    def _ready(self, cut: int) -> bool:
+        size = len(self._buf[:cut].strip())
+        if not self.chunks:
+            return size > 0
+        return size >= self.min_chars
+
+    def _split_point(self) -> int:
+        for cut in (self._sentence, self._clause, self._space):
+            if cut > 0:
+                return cut
+        return self._pos                     # No boundary at all: hard cut
+
+    def _cut(self, cut: int, out: list[str]) -> str:
+        self._emit(self._buf[:cut], out)
+        self._buf = self._buf[cut:]
+        self._pos -= cut
+        self._term = self._clause_c = self._sentence = self._clause = self._space = -1
+        self._line = 0
+        return self._buf
+
+    def _emit(self, text: str, out: list[str]):
+        text = speakable(text)
+        if text:
+            out.append(text)
+            self.chunks += 1
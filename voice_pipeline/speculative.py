@@ -0,0 +1,252 @@
+"""
+Speculative LLM generation on partial transcripts.
+
+    partial ─► stable? ─► chat stream started, chunks buffered (nothing to TTS)
+    final   ─► same words? ─► hit:  the buffered stream is the answer's stream
+                          └─► miss: closed, the answer starts from scratch
+
+`Speculator.feed(text)` takes the partial transcript: the realtime STT
+`...transcription.delta` increments (`replace=False`) or the whole
+hypothesis of Azure Speech `recognizing` events (`replace=True`). The
+partial is stable when it ends a sentence (`.`, `?`, `!`) or has not changed
+for `stable_ms`, and has at least `min_words` words; the chat completion is
+then started on it in a background thread. A later partial with different
+words cancels it and speculates again once it is stable.
+
+`take(final)` is called with the final transcript. Transcripts are compared
+without case, punctuation or extra spaces. On a hit it returns the
+speculative stream (chunks already received are replayed, then the live
+ones) to use in place of a new `chat.completions.create(stream=True)`;
+otherwise None. A speculation started before the conversation memory
+changed (`version()`), or one the caller cannot use (`usable=False`), is
+not used either.
+
+Per turn: hit / miss, latency saved (the final transcript arrived this long
+after the request was sent, up to the time to first token) and the
+completion tokens of the discarded requests (wasted).
+"""
+
+import re
+import threading
+import time
+from typing import Callable
+
+_WORDS = re.compile(r"\w+")
+_SENTENCE_END = ("?", "!", ".")
+
+
+def normalize(text: str) -> str:
+    """Words only, lowercase: 'What is it?' == 'what is it'."""
+    return " ".join(_WORDS.findall(text.casefold()))
+
+
+class SpeculationStats:
+    def __init__(self):
+        self.turns     = 0               # Final transcripts
+        self.hits      = 0
+        self.misses    = 0               # Speculated, final text differed (or stale)
+        self.restarts  = 0               # Speculations cancelled by a newer partial
+        self.wasted_tokens = 0           # Completion tokens of discarded requests
+        self.saved     = 0.0             # Seconds saved, sum over hits
+        self.last: dict = {}             # Outcome of the last turn (timeline meta)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.turns if self.turns else 0.0
+
+    def summary(self) -> str:
+        last = self.last
+        head = last.get("speculation", "none")
+        if head == "hit":
+            head += f", {last['speculation_saved_ms']} ms saved"
+        if last.get("speculation_wasted_tokens"):
+            head += f", {last['speculation_wasted_tokens']} tokens wasted"
+        saved = self.saved / self.hits * 1000 if self.hits else 0.0
+        return (
+            f"{head} | {self.hits}/{self.turns} hits ({self.hit_rate:.0%}), {self.restarts} restarts, "
+            f"{self.wasted_tokens} tokens wasted, {saved:.0f} ms saved per hit"
+        )
+
+
+class SpeculativeStream:
+    """A chat stream read ahead by a background thread; iterate it to replay."""
+
+    def __init__(self, text: str, open_stream: Callable[[str], object], count_tokens: Callable[[str], int]):
+        self.text    = text
+        self.key     = normalize(text)
+        self.started = time.perf_counter()
+        self.first_token_at: float | None = None
+        self.count_tokens = count_tokens
+        self._chunks: list = []
+        self._done   = False
+        self._closed = False
+        self._error: Exception | None = None
+        self._stream = None
+        self._cond   = threading.Condition()
+        threading.Thread(target=self._read, args=(open_stream,), daemon=True).start()
+
+    def _read(self, open_stream):
+        try:
+            stream = open_stream(self.text)
+            with self._cond:
+                self._stream = stream
+                if self._closed:
+                    stream.close()
+                    return
+            for chunk in stream:
+                with self._cond:
+                    if self.first_token_at is None and _content(chunk):
+                        self.first_token_at = time.perf_counter()
+                    self._chunks.append(chunk)
+                    self._cond.notify_all()
+        except Exception as exc:
+            if not self._closed:         # Closed on purpose: expected
+                self._error = exc
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def __iter__(self):
+        i = 0
+        while True:
+            with self._cond:
+                while i == len(self._chunks) and not self._done:
+                    self._cond.wait()
+                if i == len(self._chunks):
+                    if self._error is not None and not self._closed:
+                        raise self._error
+                    return
+                chunk = self._chunks[i]
+            i += 1
+            yield chunk
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            stream = self._stream
+            self._cond.notify_all()
+        if stream is not None:
+            stream.close()
+
+    def tokens(self) -> int:
+        """Completion tokens received so far (the usage, when the stream got that far)."""
+        with self._cond:
+            chunks = list(self._chunks)
+        for chunk in reversed(chunks):
+            if getattr(chunk, "usage", None) is not None:
+                return chunk.usage.completion_tokens
+        return self.count_tokens("".join(_content(c) for c in chunks))
+
+
+def _content(chunk) -> str:
+    choices = getattr(chunk, "choices", None) or ()
+    return "".join(getattr(getattr(c, "delta", None), "content", None) or "" for c in choices)
+
+
+class Speculator:
+    def __init__(
+        self,
+        open_stream: Callable[[str], object],    # partial text → chat stream
+        stable_ms: int = 300,
+        min_words: int = 3,
+        count_tokens: Callable[[str], int] = lambda text: (len(text) + 3) // 4,
+        version: Callable[[], object] = lambda: None,
+    ):
+        self.open_stream  = open_stream
+        self.stable_s     = stable_ms / 1000
+        self.min_words    = min_words
+        self.count_tokens = count_tokens
+        self.version      = version
+        self.stats        = SpeculationStats()
+        self._lock    = threading.Lock()
+        self._partial = ""
+        self._utterance = None
+        self._timer: threading.Timer | None = None
+        self._spec: SpeculativeStream | None = None
+        self._spec_version = None
+        self._wasted  = 0                # Tokens wasted in the current turn
+
+    # --- Partial transcripts -------------------------------------------------
+    def feed(self, text: str, replace: bool = False, utterance=None):
+        """`utterance` (e.g. the STT item id): a new one starts a new partial."""
+        with self._lock:
+            if utterance != self._utterance:
+                self._utterance, self._partial = utterance, ""
+            self._partial = text if replace else self._partial + text
+            partial = self._partial
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if partial.rstrip().endswith(_SENTENCE_END):
+                self._speculate(partial)
+            else:
+                self._timer = threading.Timer(self.stable_s, self._on_stable, args=(partial,))
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _on_stable(self, partial: str):
+        with self._lock:
+            if partial == self._partial:
+                self._speculate(partial)
+
+    def _speculate(self, partial: str):
+        """Under the lock: starts (or restarts) the speculation on `partial`."""
+        key = normalize(partial)
+        if len(key.split()) < self.min_words:
+            return
+        if self._spec is not None:
+            if self._spec.key == key:
+                return
+            self._discard()
+            self.stats.restarts += 1
+        self._spec_version = self.version()
+        self._spec = SpeculativeStream(partial, self.open_stream, self.count_tokens)
+
+    def _discard(self):
+        spec, self._spec = self._spec, None
+        spec.close()
+        self._wasted += spec.tokens()
+
+    # --- Final transcript ------------------------------------------------------
+    def take(self, final: str, usable: bool = True) -> SpeculativeStream | None:
+        """
+        The speculative stream if it was generated for `final`, else None.
+        `usable=False`: the caller cannot use it (e.g. the answer waits for
+        another one, so the prompt will change); a speculation is a miss.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._partial = ""
+            spec, self._spec = self._spec, None
+            self.stats.turns += 1
+            last = {"speculation": "none"}
+            if usable and spec is not None and spec.key == normalize(final) \
+                    and self._spec_version == self.version():
+                saved = min(now, spec.first_token_at or now) - spec.started
+                self.stats.hits  += 1
+                self.stats.saved += saved
+                last = {"speculation": "hit", "speculation_saved_ms": round(saved * 1000)}
+            elif spec is not None:
+                self._spec = spec
+                self._discard()
+                self.stats.misses += 1
+                last = {"speculation": "miss"}
+                spec = None
+            last["speculation_wasted_tokens"], self._wasted = self._wasted, 0
+            self.stats.wasted_tokens += last["speculation_wasted_tokens"]
+            self.stats.last = last
+            return spec
+
+    def reset(self):
+        """Drops the partial and any speculation (e.g. the STT socket closed)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._partial = ""
+            if self._spec is not None:
+                self._discard()
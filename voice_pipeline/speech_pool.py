@@ -0,0 +1,204 @@
+"""
+Pool of reusable Azure Speech synthesizers.
+
+Creating a `SpeechSynthesizer` per sentence costs a new websocket to the
+service (plus TLS) on every fragment, and the synthesizers were never
+released. The pool creates `size` synthesizers once (one per sentence that
+can be synthesized at the same time: TTS lookahead + the one playing),
+opens their connections at startup (`speechsdk.Connection.open`) and lends
+them to `synthesize(text)`, which streams the PCM of one text.
+
+`synthesize_stream()` does the same for a text that is still being written
+(an LLM answer): the synthesizer takes a `TextStream` request, the text is
+written to it token by token and the audio comes back as it is produced,
+one request for the whole answer. It needs the v2 websocket endpoint
+(`text_stream_config`).
+
+The event handlers are connected once per synthesizer and route the audio
+to the queue of the call in progress. A call that is abandoned (barge-in)
+stops the synthesis and waits for its result before the synthesizer goes
+back to the pool, so no late chunk of the old text reaches the next call.
+"""
+
+import queue
+import threading
+import time
+from typing import Iterator
+
+import azure.cognitiveservices.speech as speechsdk
+
+
+class _PooledSynthesizer:
+    def __init__(self, speech_config: speechsdk.SpeechConfig):
+        self.synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+        self.connection  = speechsdk.Connection.from_speech_synthesizer(self.synthesizer)
+        self.connected   = threading.Event()
+        self.reconnects  = 0
+        self.chunks: queue.Queue[bytes | None] | None = None
+        self.words: list[tuple[float, str]] | None = None   # (audio offset s, word) of a text stream
+
+        self.connection.connected.connect(lambda _: self.connected.set())
+        self.connection.disconnected.connect(lambda _: self.connected.clear())
+        self.synthesizer.synthesizing.connect(self._on_audio)
+        self.synthesizer.synthesis_completed.connect(self._on_end)
+        self.synthesizer.synthesis_canceled.connect(self._on_cancel)
+        self.synthesizer.synthesis_word_boundary.connect(self._on_word)
+
+    def _on_audio(self, evt: speechsdk.SpeechSynthesisEventArgs):
+        if self.chunks is not None and evt.result.audio_data:
+            self.chunks.put(evt.result.audio_data)
+
+    def _on_word(self, evt):
+        if self.words is not None:
+            self.words.append((evt.audio_offset / 10_000_000, evt.text))   # Ticks of 100 ns
+
+    def _on_end(self, evt):
+        if self.chunks is not None:
+            self.chunks.put(None)
+
+    def _on_cancel(self, evt):
+        details = evt.result.cancellation_details
+        if details.reason == speechsdk.CancellationReason.Error:
+            print("[TTS canceled]", details.reason, details.error_details)
+        self._on_end(evt)
+
+    def open(self):
+        """Connects (or reconnects after an idle drop) without waiting."""
+        if not self.connected.is_set():
+            self.connection.open(False)
+
+    def close(self):
+        for signal in (self.synthesizer.synthesizing, self.synthesizer.synthesis_completed,
+                       self.synthesizer.synthesis_canceled, self.synthesizer.synthesis_word_boundary,
+                       self.connection.connected,
+                       self.connection.disconnected):
+            signal.disconnect_all()
+        self.connection.close()
+
+
+def text_stream_config(key: str, region: str) -> speechsdk.SpeechConfig:
+    """Config on the v2 websocket endpoint, which takes text-stream requests."""
+    return speechsdk.SpeechConfig(
+        endpoint=f"wss://{region}.tts.speech.microsoft.com/cognitiveservices/websocket/v2",
+        subscription=key,
+    )
+
+
+def open_connection(connection: speechsdk.Connection, for_continuous_recognition: bool, timeout: float = 10.0):
+    """`connection.open` and wait until it is established (e.g. a recognizer's)."""
+    connected = threading.Event()
+    connection.connected.connect(lambda _: connected.set())
+    connection.open(for_continuous_recognition)
+    if not connected.wait(timeout):
+        raise TimeoutError("Azure Speech connection not established")
+
+
+class SynthesizerPool:
+    def __init__(self, speech_config: speechsdk.SpeechConfig, size: int = 3):
+        self._all  = [_PooledSynthesizer(speech_config) for _ in range(size)]
+        self._idle: queue.LifoQueue[_PooledSynthesizer] = queue.LifoQueue()
+        for s in self._all:
+            self._idle.put(s)
+        self.calls  = 0
+        self.closed = False
+
+    def warm(self, timeout: float = 10.0):
+        """Opens every connection and waits until they are established."""
+        for s in self._all:
+            s.open()
+        deadline = time.monotonic() + timeout
+        for s in self._all:
+            if not s.connected.wait(max(0.0, deadline - time.monotonic())):
+                raise TimeoutError("Azure Speech TTS connection not established")
+
+    def ping(self):
+        """Reopens the connections the service closed while idle."""
+        for s in self._all:
+            if not s.connected.is_set():
+                s.reconnects += 1
+                s.open()
+
+    def synthesize(self, text: str) -> Iterator[bytes]:
+        """PCM chunks of `text` as they are synthesized."""
+        s = self._idle.get()             # Most recently used first: warmest connection
+        s.chunks = chunks = queue.Queue()
+        self.calls += 1
+        future = s.synthesizer.speak_text_async(text)
+        finished = False
+        try:
+            while (chunk := chunks.get()) is not None:
+                yield chunk
+            finished = True
+        finally:
+            if not finished:             # Generator closed (barge-in)
+                s.synthesizer.stop_speaking()
+            future.get()                 # No late events into the next call
+            s.chunks = None
+            self._idle.put(s)
+
+    def synthesize_stream(self) -> "TextStream":
+        """A synthesis whose text is written while it plays (see `TextStream`)."""
+        s = self._idle.get()
+        self.calls += 1
+        return TextStream(self, s)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for s in self._all:
+            s.close()
+
+    def summary(self) -> str:
+        reconnects = sum(s.reconnects for s in self._all)
+        return f"{len(self._all)} synthesizers, {self.calls} syntheses, {reconnects} reconnects"
+
+
+class TextStream:
+    """
+    One text-stream synthesis: `write(text)` as the text arrives, `close()`
+    when it is complete; iterating yields the PCM as it is synthesized, and
+    `release()` gives the synthesizer back to the pool. `words` has the
+    audio offset of every word synthesized so far.
+    """
+
+    def __init__(self, pool: SynthesizerPool, s: _PooledSynthesizer):
+        self._pool     = pool
+        self._s        = s
+        self._closed   = False           # Input complete
+        self._finished = False           # Last chunk received
+        self._released = False
+        self.request = speechsdk.SpeechSynthesisRequest(speechsdk.SpeechSynthesisRequestInputType.TextStream)
+        s.chunks = self.chunks = queue.Queue()
+        s.words  = self.words  = []
+        self._future = s.synthesizer.speak_async(self.request)
+
+    def write(self, text: str):
+        if not self._closed:
+            self.request.input_stream.write(text)
+
+    def close(self):
+        """End of the text: the synthesis finishes what it has."""
+        if not self._closed:
+            self._closed = True
+            self.request.input_stream.close()
+
+    def abort(self):
+        """Stops the synthesis (barge-in); the iteration ends."""
+        self._s.synthesizer.stop_speaking_async()
+
+    def __iter__(self) -> Iterator[bytes]:
+        while (chunk := self.chunks.get()) is not None:
+            yield chunk
+        self._finished = True
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        if not self._finished:
+            self._s.synthesizer.stop_speaking()
+        self.close()
+        self._future.get()               # No late events into the next call
+        self._s.chunks = self._s.words = None
+        self._pool._idle.put(self._s)
@@ -0,0 +1,64 @@
+"""
+Startup profile: how long each startup phase takes and what it imports.
+
+`StartupProfile.phase(name)` times a phase (environment, clients, audio
+devices, warm-up…) and records the heavy modules that were imported during
+it, so a variant that loads more than it needs shows up at once.
+
+`import_table(stderr)` summarizes the output of `python -X importtime`:
+cumulative import time per top-level package. `python -m voice_pipeline
+--profile <variant>` re-runs itself with `-X importtime`, starts the
+variant without entering its loop and prints both reports.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+HEAVY = (
+    "pyaudio", "openai", "httpx", "websocket", "websockets", "numpy",
+    "azure.cognitiveservices.speech", "tiktoken", "dotenv",
+)
+
+
+class StartupProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: list[tuple[str, float, list[str]]] = []   # (name, seconds, heavy imports)
+
+    @contextmanager
+    def phase(self, name: str):
+        before = {m for m in HEAVY if m in sys.modules}
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            loaded = [m for m in HEAVY if m in sys.modules and m not in before]
+            self.phases.append((name, time.perf_counter() - t0, loaded))
+
+    def report(self) -> str:
+        total = time.perf_counter() - self.started
+        lines = [f"Startup {total * 1000:.0f} ms"]
+        for name, seconds, loaded in self.phases:
+            imports = f"  (imports {', '.join(loaded)})" if loaded else ""
+            lines.append(f"  {name:<16}{seconds * 1000:8.1f} ms{imports}")
+        heavy = [m for m in HEAVY if m in sys.modules]
+        lines.append(f"  heavy modules loaded: {', '.join(heavy) or 'none'}; {len(sys.modules)} modules in total")
+        return "\n".join(lines)
+
+
+def import_table(stderr: str, top: int = 15) -> str:
+    """Cumulative `-X importtime` per top-level package, slowest first."""
+    totals: dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue                     # Nested import (counted in its parent) or header
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(cumulative)
+    rows = sorted(totals.items(), key=lambda kv: -kv[1])
+    lines = [f"Imports {sum(totals.values()) / 1000:.0f} ms ({len(totals)} top-level packages)"]
+    lines += [f"  {name:<28}{us / 1000:8.1f} ms" for name, us in rows[:top]]
+    return "\n".join(lines)
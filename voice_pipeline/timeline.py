@@ -0,0 +1,242 @@
+"""
+Per-turn latency timelines.
+
+Every turn carries a `TurnTimeline`; the pipeline calls `mark(point)` at:
+
+    end_of_speech → transcript → turn_start → first_token → first_sentence
+        → first_tts_byte → first_audio → playback_end
+
+(`turn_start`: the turn scheduler starts answering, after the previous
+answer of the session. `llm_first_token` is measured from it, so the wait
+for the previous answer is in `turn_wait` only.)
+
+`mark` only keeps the first occurrence of a point and costs a
+`perf_counter()` call, so it is safe on the audio paths. When the turn is
+finished, `TimelineRecorder.finish` turns the points into stage durations,
+feeds the histograms and hands the timeline to a background thread that
+appends it to a JSONL file. The histograms (and p50/p95/p99 over a sliding
+window) are served in Prometheus text format on `/metrics`.
+"""
+
+import bisect
+import json
+import queue
+import threading
+import time
+from collections import deque
+from typing import Iterable, Iterator
+
+POINTS = (
+    "end_of_speech",
+    "transcript",
+    "turn_start",
+    "first_token",
+    "first_sentence",
+    "first_tts_byte",
+    "first_audio",
+    "playback_end",
+)
+
+# stage name → (from point, to point); a tuple of from points: the first one reached
+STAGES = {
+    "stt":                 ("end_of_speech", "transcript"),
+    "turn_wait":           ("transcript", "turn_start"),
+    "llm_first_token":     (("turn_start", "transcript"), "first_token"),
+    "first_sentence":      ("first_token", "first_sentence"),
+    "tts_first_byte":      ("first_sentence", "first_tts_byte"),
+    "audio_start":         ("first_tts_byte", "first_audio"),
+    "playback":            ("first_audio", "playback_end"),
+    "time_to_first_audio": ("end_of_speech", "first_audio"),
+    "turn_total":          ("end_of_speech", "playback_end"),
+}
+
+BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class TurnTimeline:
+    """Timestamps of one turn (perf_counter seconds)."""
+
+    __slots__ = ("points", "started", "meta")
+
+    def __init__(self):
+        self.points: dict[str, float] = {}
+        self.started = time.time()       # Wall clock, for the export
+        self.meta: dict = {}
+
+    def mark(self, point: str, at: float | None = None):
+        if point not in self.points:
+            self.points[point] = time.perf_counter() if at is None else at
+
+    def stages(self) -> dict[str, float]:
+        """Stage durations (seconds) for the points that were reached."""
+        out = {}
+        for stage, (a, b) in STAGES.items():
+            a = next((p for p in ((a,) if isinstance(a, str) else a) if p in self.points), None)
+            if a is not None and b in self.points:
+                out[stage] = self.points[b] - self.points[a]
+        return out
+
+    def to_dict(self) -> dict:
+        base = self.points.get("end_of_speech", min(self.points.values(), default=0.0))
+        return {
+            "started": self.started,
+            "points_ms": {p: round((t - base) * 1000, 1) for p, t in self.points.items()},
+            "stages_ms": {s: round(d * 1000, 1) for s, d in self.stages().items()},
+            **self.meta,
+        }
+
+    def summary(self) -> str:
+        stages = self.stages()
+        if stages.get("turn_wait", 1.0) < 0.01:  # Shown when the turn waited for the previous one
+            del stages["turn_wait"]
+        keys = ("stt", "turn_wait", "llm_first_token", "tts_first_byte", "time_to_first_audio", "turn_total")
+        return " | ".join(f"{k} {stages[k] * 1000:.0f} ms" for k in keys if k in stages)
+
+
+def mark_first(chunks: Iterable[bytes], timeline: TurnTimeline, point: str) -> Iterator[bytes]:
+    """Yields `chunks`, marking `point` when the first one arrives."""
+    it = iter(chunks)
+    try:
+        for chunk in it:
+            timeline.mark(point)
+            yield chunk
+            break
+        yield from it
+    finally:
+        close = getattr(it, "close", None)
+        if close is not None:
+            close()
+
+
+class _Histogram:
+    """Prometheus histogram + sliding window for quantiles."""
+
+    def __init__(self, window: int):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum    = 0.0
+        self.count  = 0
+        self.window: deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum   += value
+        self.count += 1
+        self.window.append(value)
+
+    def quantiles(self) -> dict[float, float]:
+        ordered = sorted(self.window)
+        if not ordered:
+            return {}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class TimelineRecorder:
+    """
+    Collects finished timelines. `jsonl_path` enables the JSONL sink and
+    `port` the Prometheus endpoint; with neither, only the histograms are kept.
+
+    `open_turn()` / `take_turn()` cover the gap between the end of speech
+    (seen by the STT side) and the transcript that starts the answer.
+    """
+
+    def __init__(self, jsonl_path: str | None = None, port: int | None = None, window: int = 1000):
+        self.histograms = {stage: _Histogram(window) for stage in STAGES}
+        self.turns      = 0
+        self._lock      = threading.Lock()
+        self._pending: TurnTimeline | None = None
+        self._out: queue.Queue | None = None
+        if jsonl_path:
+            self._out = queue.Queue(maxsize=1000)
+            threading.Thread(target=self._writer, args=(jsonl_path,), daemon=True).start()
+        self.server = None
+        if port:
+            self.server = _serve_metrics(self, port)
+
+    # --- Turn bookkeeping --------------------------------------------------
+    def open_turn(self) -> TurnTimeline:
+        """Timeline of the turn being spoken (created on first use)."""
+        with self._lock:
+            if self._pending is None:
+                self._pending = TurnTimeline()
+            return self._pending
+
+    def take_turn(self) -> TurnTimeline:
+        """Detaches the pending timeline to hand it to the answer."""
+        with self._lock:
+            timeline, self._pending = self._pending or TurnTimeline(), None
+        return timeline
+
+    def finish(self, timeline: TurnTimeline, **meta):
+        timeline.meta.update(meta)
+        stages = timeline.stages()
+        with self._lock:
+            self.turns += 1
+            timeline.meta.setdefault("turn", self.turns)
+            for stage, value in stages.items():
+                self.histograms[stage].observe(value)
+        if self._out is not None:
+            try:
+                self._out.put_nowait(timeline)
+            except queue.Full:               # Never block the pipeline
+                pass
+
+    # --- Exports -----------------------------------------------------------
+    def _writer(self, path: str):
+        with open(path, "a", encoding="utf-8") as f:
+            while True:
+                timeline = self._out.get()
+                f.write(json.dumps(timeline.to_dict()) + "\n")
+                if self._out.empty():
+                    f.flush()
+
+    def prometheus(self) -> str:
+        lines = [
+            "# HELP voice_turn_stage_seconds Latency of each pipeline stage per turn.",
+            "# TYPE voice_turn_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, h in self.histograms.items():
+                cumulative = 0
+                for bound, n in zip(BUCKETS + (float("inf"),), h.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'voice_turn_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'voice_turn_stage_seconds_sum{{stage="{stage}"}} {h.sum}')
+                lines.append(f'voice_turn_stage_seconds_count{{stage="{stage}"}} {h.count}')
+            lines += [
+                "# HELP voice_turn_stage_window_seconds Stage latency quantiles over the last turns.",
+                "# TYPE voice_turn_stage_window_seconds summary",
+            ]
+            for stage, h in self.histograms.items():
+                for q, v in h.quantiles().items():
+                    lines.append(f'voice_turn_stage_window_seconds{{stage="{stage}",quantile="{q}"}} {v}')
+            lines += [
+                "# TYPE voice_turns_total counter",
+                f"voice_turns_total {self.turns}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def _serve_metrics(recorder: TimelineRecorder, port: int):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer   # Only with METRICS_PORT
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = recorder.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,239 @@
+"""
+Content-addressed cache of synthesized PCM.
+
+The key is a SHA-256 of the normalized text plus everything that changes the
+audio (voice, model, instructions, output format). Two tiers:
+- memory: LRU with a byte budget;
+- disk (optional): one `<key>.pcm` file per phrase under `directory`,
+  evicted oldest-first over a byte budget. It survives restarts and can be
+  shared by several processes. A hit is served as a `memoryview` of the
+  file's `mmap` (no copy: pages are read as they are played) and kept in
+  the memory tier, so the map stays open while the entry is cached there.
+
+`cached(synthesize, key_fn)` wraps a `synthesize(text)` generator so hits
+are served without any network call and misses are stored once complete.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import sys
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+HIT_CHUNK = 9600                         # Bytes per chunk served from cache (200 ms)
+# Python 3.13+: a cached map does not hold a duplicated file descriptor
+_MMAP_OPTIONS = {"trackfd": False} if sys.version_info >= (3, 13) else {}
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(text: str, voice: str, model: str, instructions: str = "", fmt: str = "pcm") -> str:
+    h = hashlib.sha256()
+    for part in (normalize_text(text), voice, model, instructions, fmt):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class CacheStats:
+    def __init__(self):
+        self.memory_hits = 0
+        self.disk_hits   = 0
+        self.misses      = 0
+        self.bytes_saved = 0                 # PCM served without synthesis
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate  = self.hits / total if total else 0.0
+        return (
+            f"{self.hits}/{total} hits ({rate:.0%}; memory {self.memory_hits}, "
+            f"disk {self.disk_hits}), {self.bytes_saved / 1024:.0f} KiB not synthesized"
+        )
+
+
+class TTSCache:
+    def __init__(
+        self,
+        memory_bytes: int = 64 << 20,
+        directory: str | None = None,
+        disk_bytes: int = 512 << 20,
+    ):
+        self.memory_bytes = memory_bytes
+        self.directory    = directory
+        self.disk_bytes   = disk_bytes
+        self.stats        = CacheStats()
+        self._lock        = threading.Lock()
+        self._memory: OrderedDict[str, bytes | memoryview] = OrderedDict()
+        self._memory_used = 0
+        self._disk_used   = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_used = sum(size for _, size, _ in self._disk_entries())
+
+    # --- Lookup / store ----------------------------------------------------
+    def get(self, key: str) -> bytes | memoryview | None:
+        with self._lock:
+            pcm = self._memory.get(key)
+            if pcm is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                self.stats.bytes_saved += len(pcm)
+                return pcm
+        pcm = self._disk_get(key)
+        with self._lock:
+            if pcm is None:
+                self.stats.misses += 1
+                return None
+            self.stats.disk_hits   += 1
+            self.stats.bytes_saved += len(pcm)
+            self._memory_put(key, pcm)
+        return pcm
+
+    def put(self, key: str, pcm: bytes):
+        if not pcm:
+            return
+        with self._lock:
+            self._memory_put(key, pcm)
+        self._disk_put(key, pcm)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._memory:
+                return True
+        return bool(self.directory) and os.path.exists(self._path(key))
+
+    # --- Memory tier -------------------------------------------------------
+    def _memory_put(self, key: str, pcm: bytes | memoryview):
+        if len(pcm) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_used -= len(old)
+        self._memory[key] = pcm
+        self._memory_used += len(pcm)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    # --- Disk tier ---------------------------------------------------------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pcm")
+
+    def _disk_get(self, key: str) -> memoryview | None:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ, **_MMAP_OPTIONS)
+            os.utime(path)                   # Recently used → evicted last
+        except (FileNotFoundError, ValueError):   # ValueError: empty file
+            return None
+        # Files are replaced atomically, never rewritten: the mapping stays
+        # valid after an eviction; it is unmapped with its last view
+        return memoryview(mm)
+
+    def _disk_put(self, key: str, pcm: bytes):
+        if not self.directory or len(pcm) > self.disk_bytes:
+            return
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(pcm)
+        os.replace(tmp, path)                # Atomic: readers never see half a file
+        with self._lock:
+            self._disk_used += len(pcm)
+            over = self._disk_used > self.disk_bytes
+        if over:
+            self._disk_evict()
+
+    def _disk_entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".pcm"):
+                    st = os.stat(os.path.join(root, name))
+                    yield os.path.join(root, name), st.st_size, st.st_mtime
+
+    def _disk_evict(self):
+        for path, size, _ in sorted(self._disk_entries(), key=lambda e: e[2]):
+            with self._lock:
+                if self._disk_used <= self.disk_bytes:
+                    return
+                self._disk_used -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except PermissionError:          # Windows: still mapped by a cached entry
+                with self._lock:
+                    self._disk_used += size
+
+    # --- Integration -------------------------------------------------------
+    def cached(
+        self,
+        synthesize: Callable[[str], Iterable[bytes]],
+        key_fn: Callable[[str], str],
+    ) -> Callable[[str], Iterator[bytes]]:
+        """`synthesize` with the cache in front of it."""
+
+        def synthesize_cached(text: str) -> Iterator[bytes]:
+            key = key_fn(text)
+            pcm = self.get(key)
+            if pcm is not None:
+                for i in range(0, len(pcm), HIT_CHUNK):
+                    yield pcm[i:i + HIT_CHUNK]
+                return
+            parts: list[bytes] = []
+            chunks = iter(synthesize(text))
+            try:
+                for chunk in chunks:
+                    parts.append(chunk)
+                    yield chunk
+            finally:
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
+            self.put(key, b"".join(parts))   # Only reached when complete
+
+        return synthesize_cached
+
+    def prewarm(
+        self,
+        phrases: Iterable[str],
+        synthesize: Callable[[str], Iterable[bytes]],
+        key_fn: Callable[[str], str],
+        workers: int = 4,
+    ) -> int:
+        """Synthesizes the phrases that are not cached yet; returns how many."""
+        missing = [p for p in dict.fromkeys(map(normalize_text, phrases)) if p and key_fn(p) not in self]
+
+        def warm(phrase: str):
+            try:
+                self.put(key_fn(phrase), b"".join(synthesize(phrase)))
+            except Exception as exc:
+                print("TTS cache prewarm error:", exc)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(warm, missing))
+        return len(missing)
+
+
+def load_phrases(path: str) -> list[str]:
+    """One phrase per line; blank lines and lines starting with # are ignored."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
@@ -0,0 +1,209 @@
+"""
+Pipelined TTS: synthesizes the next sentences while the current one plays.
+
+    submit(s1) submit(s2) submit(s3) ...
+        │          │          │
+        ▼          ▼          ▼
+    [synth s1] [synth s2] [synth s3]     ← at most `lookahead` sentences ahead
+        │          │          │            of the one being played
+        └──────────┴──────────┴──► player ─► speaker (in order, no gaps)
+
+`synthesize(text)` must return an iterable of PCM chunks (e.g. a generator
+wrapping `tts_client.audio.speech.with_streaming_response.create`), and
+`write(pcm)` is the speaker sink (e.g. `speaker_out.write`).
+`submit(text, synthesize)` uses another function for that sentence only
+(e.g. a hedged request for the first one).
+
+`cancel()` (barge-in) stops playback after at most one `write_size` block,
+abandons the synthesis requests in flight and skips the pending sentences.
+
+`max_pending` bounds the sentences submitted and not yet played: `submit`
+waits for the speaker beyond it (backpressure up to the LLM stream), and
+the time it waited is in `stats.submit_wait`. 0 keeps `submit` unbounded.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+_END = object()                          # End of a sentence's PCM
+
+
+class GapStats:
+    """
+    Counts how long each sentence's first audio arrived after the previous
+    sentence had been written out. The speaker sink buffers (`Player`), so
+    this is how late TTS was, not silence: it is heard only when it outlasts
+    the audio still buffered (the playback underruns count that).
+    """
+
+    def __init__(self):
+        self.sentences = 0
+        self.gaps      = 0
+        self.total_gap = 0.0             # seconds
+        self.max_gap   = 0.0             # seconds
+        self.submit_wait = 0.0           # seconds submit() waited (max_pending)
+
+    def add_gap(self, seconds: float):
+        self.gaps      += 1
+        self.total_gap += seconds
+        self.max_gap    = max(self.max_gap, seconds)
+
+    def summary(self) -> str:
+        avg = self.total_gap / self.gaps if self.gaps else 0.0
+        waited = f", submit waited {self.submit_wait * 1000:.0f} ms" if self.submit_wait else ""
+        return (
+            f"{self.sentences} sentences, next sentence waited for: "
+            f"total {self.total_gap * 1000:.0f} ms, "
+            f"avg {avg * 1000:.0f} ms, max {self.max_gap * 1000:.0f} ms{waited}"
+        )
+
+
+class _Slot:
+    """PCM buffer of one sentence, filled by a synthesis worker."""
+
+    def __init__(self, text: str, synthesize: Callable[[str], Iterable[bytes]]):
+        self.text   = text
+        self.synthesize = synthesize
+        self.chunks: queue.Queue = queue.Queue()
+
+
+class TTSPrefetcher:
+    """
+    Keeps up to `lookahead` sentences synthesizing ahead of the one being
+    played and hands their PCM to `write` in submission order.
+    `lookahead=0` reproduces the old sequential behaviour.
+    """
+
+    def __init__(
+        self,
+        synthesize: Callable[[str], Iterable[bytes]],
+        write: Callable[[bytes], object],
+        lookahead: int = 2,
+        write_size: int = 0,
+        max_pending: int = 0,
+    ):
+        self.synthesize = synthesize
+        self.write      = write
+        self.lookahead  = max(0, lookahead)
+        self.write_size = write_size         # Max bytes per write (0 = whole chunk)
+        self.max_pending = max(max_pending, self.lookahead + 1) if max_pending else 0
+        self.stats      = GapStats()
+        self.played:    list[str] = []       # Sentences that reached the speaker
+        self.cancelled  = threading.Event()
+
+        # One permit per sentence synthesizing or buffered, including the one
+        # playing; released when that sentence has been fully played.
+        self._permits   = threading.Semaphore(self.lookahead + 1)
+        # One per sentence submitted and not played yet (max_pending)
+        self._pending   = threading.Semaphore(self.max_pending) if self.max_pending else None
+        self._executor  = ThreadPoolExecutor(
+            max_workers=self.lookahead + 1, thread_name_prefix="tts-prefetch"
+        )
+        self._to_synth: queue.Queue = queue.Queue()
+        self._to_play:  queue.Queue = queue.Queue()
+        self._slots:    list[_Slot] = []
+
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._player     = threading.Thread(target=self._play, daemon=True)
+        self._dispatcher.start()
+        self._player.start()
+
+    # --- Public API --------------------------------------------------------
+    def submit(self, text: str, synthesize: Callable[[str], Iterable[bytes]] | None = None):
+        """Queues a sentence; waits only while `max_pending` sentences are unplayed."""
+        if self._pending is not None and not self.cancelled.is_set():
+            start = time.perf_counter()
+            if not self._pending.acquire(blocking=False):
+                self._pending.acquire()          # Backpressure: the speaker is behind
+                self.stats.submit_wait += time.perf_counter() - start
+        if self.cancelled.is_set():
+            return
+        slot = _Slot(text, synthesize or self.synthesize)
+        self._slots.append(slot)
+        self._to_synth.put(slot)
+        self._to_play.put(slot)
+
+    def cancel(self):
+        """Stops playback and synthesis as soon as possible (never blocks)."""
+        self.cancelled.set()
+        self._to_synth.put(None)
+        self._to_play.put(None)
+        for slot in list(self._slots):           # Wakes up a waiting player
+            slot.chunks.put(_END)
+        if self._pending is not None:            # Wakes up a waiting submit
+            self._pending.release()
+
+    def close(self):
+        """Signals the end of the turn and waits until everything is played."""
+        self._to_synth.put(None)
+        self._to_play.put(None)
+        self._player.join()
+        self._dispatcher.join()
+        # After a cancel, requests still blocked on the network finish alone
+        self._executor.shutdown(wait=not self.cancelled.is_set())
+
+    # --- Workers -----------------------------------------------------------
+    def _dispatch(self):
+        while True:
+            slot = self._to_synth.get()
+            if slot is None or self.cancelled.is_set():
+                break
+            self._permits.acquire()              # Bounded lookahead
+            if self.cancelled.is_set():
+                break
+            self._executor.submit(self._synthesize_slot, slot)
+
+    def _synthesize_slot(self, slot: _Slot):
+        try:
+            pcm = slot.synthesize(slot.text)
+            for chunk in pcm:
+                if self.cancelled.is_set():
+                    break
+                if chunk:
+                    slot.chunks.put(chunk)
+            close = getattr(pcm, "close", None)
+            if close is not None:                # Abort the HTTP/SDK request
+                close()
+        except Exception as exc:
+            print("TTS synthesis error:", exc)
+        finally:
+            slot.chunks.put(_END)
+
+    def _play(self):
+        last_end = None                          # When the previous sentence ended
+        while not self.cancelled.is_set():
+            slot = self._to_play.get()
+            if slot is None:
+                break
+            first = True
+            while not self.cancelled.is_set():
+                chunk = slot.chunks.get()
+                if chunk is _END:
+                    break
+                if first:
+                    first = False
+                    self.played.append(slot.text)
+                    if last_end is not None:
+                        self.stats.add_gap(time.perf_counter() - last_end)
+                self._write(chunk)
+            self._permits.release()
+            if self._pending is not None:
+                self._pending.release()
+            if not first:                        # Sentence produced audio
+                self.stats.sentences += 1
+                last_end = time.perf_counter()
+        self._permits.release()                  # Unblocks the dispatcher
+
+    def _write(self, chunk: bytes):
+        step = self.write_size
+        if not step or len(chunk) <= step:
+            self.write(chunk)
+            return
+        # Small blocks so a cancel takes effect within one block
+        for i in range(0, len(chunk), step):
+            if self.cancelled.is_set():
+                return
+            self.write(chunk[i:i + step])
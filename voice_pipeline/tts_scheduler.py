@@ -0,0 +1,183 @@
+"""
+Adaptive TTS chunking: when to send the answer's text to TTS, decided from
+the measured speed of the backend instead of the punctuation alone.
+
+    segmenter ─► feed(fragment) ─► [ pending text ] ─► emit(chunk) ─► tts_queue
+                                     flushed when the audio scheduled ahead
+                                     of the playback cursor runs low
+
+The segmenter cuts the answer at every sentence (the first one at its first
+clause). The scheduler holds the fragments and sends them as one request
+as late as it can without a gap:
+
+    deadline = end of the audio already scheduled − first-byte latency − margin
+
+The first fragment of a turn goes out at once (nothing is playing). While
+the audio ahead covers the time to get the next one, the fragments that
+arrive are merged (up to `max_chars`), so a fast backend gets few, long
+requests and a slow one gets them early. A backend slower than real time
+(RTF ≥ 1) gets every fragment at once: only requests synthesized in
+parallel (TTS_LOOKAHEAD) can keep up with playback. The end of the
+scheduled audio is predicted from the text already sent, and never taken
+below what is in the playback buffer (`buffered()`).
+
+`SynthesisMeter` measures every request of the backend: first-byte latency,
+real-time factor (synthesis time per second of audio after the first byte)
+and seconds of audio per character, as moving averages kept across turns.
+`meter.wrap(synthesize)` measures a synthesize function; wrap the backend
+call, not the cache, so hits do not count as requests.
+"""
+
+import threading
+import time
+from typing import Callable, Iterable
+
+
+class SynthesisMeter:
+    def __init__(self, first_byte: float = 0.3, rtf: float = 0.5, seconds_per_char: float = 0.06,
+                 alpha: float = 0.3, rate: int = 24_000):
+        self.first_byte       = first_byte       # Seconds, until measured
+        self.rtf              = rtf              # Synthesis seconds per audio second
+        self.seconds_per_char = seconds_per_char
+        self.alpha            = alpha            # Weight of the last request
+        self.rate             = rate
+        self.requests         = 0
+        self._lock = threading.Lock()
+
+    def wrap(self, synthesize: Callable[..., Iterable[bytes]]) -> Callable[..., Iterable[bytes]]:
+        def measured(text: str, *args, **kwargs):
+            start, first, size = time.perf_counter(), None, 0
+            chunks = synthesize(text, *args, **kwargs)
+            try:
+                for chunk in chunks:
+                    if first is None:
+                        first = time.perf_counter()
+                    size += len(chunk)
+                    yield chunk
+            finally:
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
+            # Only requests played to the end (not abandoned by a barge-in)
+            if first is not None and size:
+                self.observe(text, first - start, time.perf_counter() - first, size / 2 / self.rate)
+        return measured
+
+    def observe(self, text: str, first_byte: float, synthesis_s: float, audio_s: float):
+        a = self.alpha
+        with self._lock:
+            self.requests += 1
+            self.first_byte += a * (first_byte - self.first_byte)
+            self.rtf        += a * (synthesis_s / audio_s - self.rtf)
+            if text:
+                self.seconds_per_char += a * (audio_s / len(text) - self.seconds_per_char)
+
+    def audio_s(self, text: str) -> float:
+        """Predicted duration of the audio of `text`."""
+        return len(text) * self.seconds_per_char
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} requests measured, first byte {self.first_byte * 1000:.0f} ms, "
+            f"RTF {self.rtf:.2f}, {self.seconds_per_char * 1000:.0f} ms of audio per char"
+        )
+
+
+class SchedulerStats:
+    def __init__(self):
+        self.fragments = 0               # From the segmenter
+        self.requests  = 0               # Sent to TTS
+
+    def summary(self) -> str:
+        return f"{self.requests} requests for {self.fragments} fragments"
+
+
+class TTSScheduler:
+    """One per turn: `feed()` the fragments, `close()` at the end of the answer."""
+
+    def __init__(
+        self,
+        emit: Callable[[str], object],
+        meter: SynthesisMeter,
+        buffered: Callable[[], float] = lambda: 0.0,
+        margin_ms: int = 150,
+        max_chars: int = 300,
+    ):
+        self.emit      = emit
+        self.meter     = meter
+        self.buffered  = buffered        # Seconds in the playback buffer
+        self.margin    = margin_ms / 1000
+        self.max_chars = max_chars
+        self.stats     = SchedulerStats()
+        self._pending: list[str] = []
+        self._chars    = 0
+        self._play_end = 0.0             # perf_counter when the audio scheduled so far ends
+        self._closing  = False
+        self._cancelled = False
+        self._cond     = threading.Condition()
+        self._thread   = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # --- Public API --------------------------------------------------------
+    def feed(self, fragment: str):
+        with self._cond:
+            self._pending.append(fragment)
+            self._chars += len(fragment) + 1
+            self.stats.fragments += 1
+            self._cond.notify()
+
+    def close(self):
+        """Sends what is pending and waits until it has been emitted."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+
+    def cancel(self):
+        """Drops what is pending (never blocks)."""
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify()
+
+    # --- Scheduler thread --------------------------------------------------
+    def _deadline(self, now: float) -> float:
+        ahead_end = max(self._play_end, now + self.buffered())
+        return ahead_end - self.meter.first_byte - self.margin
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._cancelled:
+                        return
+                    if self._pending:
+                        now  = time.perf_counter()
+                        wait = self._deadline(now) - now
+                        if (self._closing or wait <= 0 or self._chars >= self.max_chars
+                                or self.meter.rtf >= 1.0):
+                            break
+                        self._cond.wait(wait)
+                    elif self._closing:
+                        return
+                    else:
+                        self._cond.wait()
+                text = self._take()
+            self._schedule(text)
+            self.emit(text)
+
+    def _take(self) -> str:
+        """Pending fragments merged into one request of at most `max_chars`."""
+        parts = [self._pending.pop(0)]
+        size  = len(parts[0])
+        while self._pending and size + 1 + len(self._pending[0]) <= self.max_chars:
+            size += 1 + len(self._pending[0])
+            parts.append(self._pending.pop(0))
+        self._chars = sum(len(p) + 1 for p in self._pending)
+        return " ".join(parts)
+
+    def _schedule(self, text: str):
+        now   = time.perf_counter()
+        start = max(now + self.meter.first_byte, self._play_end, now + self.buffered())
+        # A backend slower than real time stretches the audio of the request
+        self._play_end = start + self.meter.audio_s(text) * max(1.0, self.meter.rtf)
+        self.stats.requests += 1
@@ -0,0 +1,139 @@
+"""
+Text-streaming TTS: one synthesis per answer, fed token by token.
+
+    LLM tokens ─► submit(text) ─► text stream (one request) ─► player ─► speaker
+
+The sentence path (tts_prefetch.py) sends one TTS request per chunk of the
+answer, each with its own first-byte latency and a prosody that restarts
+at every chunk. Here the tokens are written to one text-stream synthesis
+as they arrive and its audio is played as it is produced: one request per
+answer.
+
+`TextStreamSpeaker` has the part of the `TTSPrefetcher` interface the
+pipeline uses (`submit`, `close`, `cancel`, `played`, `stats`).
+`open_stream()` returns the backend's stream (e.g.
+`SynthesizerPool.synthesize_stream()`): `write(text)`, `close()` (end of
+the text), `abort()`, iteration over the PCM, `release()` and, if the
+backend reports word boundaries, `words` as (audio offset s, word), used
+to know what was heard when the answer is interrupted.
+
+Tokens cannot be parsed as markdown one by one (the sentence path strips
+whole chunks with `segmenter.speakable`), so only the emphasis, heading
+and code marks are dropped from them; the spacing is kept as generated.
+"""
+
+import threading
+import time
+from typing import Callable
+
+_MARKUP = str.maketrans("", "", "*#`")
+
+
+class TextStreamStats:
+    def __init__(self, rate: int = 24_000):
+        self.rate        = rate
+        self.requests    = 0
+        self.chars       = 0             # Text written to the stream
+        self.audio_bytes = 0             # PCM played
+        self.first_audio: float | None = None   # Seconds from the first text to the first audio
+
+    def summary(self) -> str:
+        first = f"{self.first_audio * 1000:.0f} ms" if self.first_audio is not None else "-"
+        return (
+            f"text stream: {self.requests} request(s), {self.chars} chars, "
+            f"{self.audio_bytes / 2 / self.rate:.1f} s of audio, first audio {first} after the first text"
+        )
+
+
+class TextStreamSpeaker:
+    def __init__(
+        self,
+        open_stream: Callable[[], object],
+        write: Callable[[bytes], object],
+        write_size: int = 0,
+        rate: int = 24_000,
+        on_first_audio: Callable[[], object] = lambda: None,
+    ):
+        self.open_stream    = open_stream
+        self.write          = write
+        self.write_size     = write_size     # Max bytes per write (0 = whole chunk)
+        self.rate           = rate
+        self.on_first_audio = on_first_audio
+        self.stats          = TextStreamStats(rate)
+        self.cancelled      = threading.Event()
+        self._stream = None
+        self._player: threading.Thread | None = None
+        self._text: list[str] = []
+        self._started_at = 0.0
+
+    # --- Public API --------------------------------------------------------
+    def submit(self, text: str):
+        """Writes text to the synthesis (opened with the first text); never blocks on audio."""
+        if self.cancelled.is_set():
+            return
+        text = text.translate(_MARKUP)
+        if not text:
+            return
+        if self._stream is None:
+            self._started_at = time.perf_counter()
+            self._stream = self.open_stream()
+            self.stats.requests += 1
+            self._player = threading.Thread(target=self._play, daemon=True)
+            self._player.start()
+        self._text.append(text)
+        self.stats.chars += len(text)
+        self._stream.write(text)
+
+    def cancel(self):
+        """Stops playback and the synthesis as soon as possible (never blocks)."""
+        self.cancelled.set()
+        if self._stream is not None:
+            self._stream.abort()
+
+    def close(self):
+        """Signals the end of the text and waits until everything is played."""
+        if self._stream is None:
+            return
+        self._stream.close()
+        self._player.join()
+
+    @property
+    def played(self) -> list[str]:
+        """What reached the speaker: the whole text, or the words heard before a cancel."""
+        if not self.stats.audio_bytes:
+            return []
+        words = getattr(self._stream, "words", None)
+        if words is None or not self.cancelled.is_set():
+            return ["".join(self._text)]
+        heard = self.stats.audio_bytes / 2 / self.rate
+        return [" ".join(word for offset, word in list(words) if offset < heard)]
+
+    # --- Player ------------------------------------------------------------
+    def _play(self):
+        stream = self._stream
+        try:
+            for chunk in stream:
+                if self.cancelled.is_set():
+                    break
+                if not chunk:
+                    continue
+                if self.stats.first_audio is None:
+                    self.stats.first_audio = time.perf_counter() - self._started_at
+                    self.on_first_audio()
+                self._write(chunk)
+                self.stats.audio_bytes += len(chunk)
+        except Exception as exc:
+            print("TTS text stream error:", exc)
+        finally:
+            stream.release()
+
+    def _write(self, chunk: bytes):
+        step = self.write_size
+        if not step or len(chunk) <= step:
+            self.write(chunk)
+            return
+        # Small blocks so a cancel takes effect within one block
+        for i in range(0, len(chunk), step):
+            if self.cancelled.is_set():
+                return
+            self.write(chunk[i:i + step])
@@ -0,0 +1,249 @@
+"""
+Per-session turn scheduling: one answer at a time, bounded queues between
+the stages.
+
+    STT callbacks ─submit()─► [ pending turns ] ─► turn thread ─► answer(question, …)
+                   (never     policy: queue /       one at a time: returns when the
+                    blocks)   merge / replace       audio is played (or cancelled)
+
+A transcript that arrives while an answer is playing (the user went on
+talking, a late `recognized` event) no longer starts a second answer next
+to it, writing to the same speaker. It waits for the current turn under
+the `policy`:
+- queue:   answered after the current one, in order;
+- merge:   joined to the question already waiting, answered as one;
+- replace: the question already waiting is dropped for the new one.
+
+At most `max_pending` questions wait; beyond that the oldest is dropped
+(the STT callbacks must never block). With barge-in the user's speech
+cancels the current answer first, so the new question starts at once.
+`discard(question, speculative)` is called for every question that will
+not be answered as it came (e.g. to close its speculative chat stream).
+
+`MeteredQueue` is a `queue.Queue` that counts its depth, the time items
+wait in it and the puts that had to wait for room (backpressure). The
+pipelines put one with `maxsize` between the LLM and TTS, so a slow TTS or
+speaker holds the LLM stream back instead of piling up text; barge-in
+closes it, which releases a producer waiting for room.
+"""
+
+import collections
+import queue
+import threading
+import time
+from typing import Callable
+
+POLICIES = ("queue", "merge", "replace")
+
+
+class QueueStats:
+    def __init__(self, name: str, maxsize: int = 0):
+        self.name       = name
+        self.maxsize    = maxsize
+        self.puts       = 0
+        self.max_depth  = 0
+        self.total_wait = 0.0            # Seconds items waited to be taken
+        self.max_wait   = 0.0
+        self.gets       = 0
+        self.blocked    = 0              # Puts that found the queue full
+        self.blocked_s  = 0.0            # Time they waited for room
+
+    def summary(self) -> str:
+        avg = self.total_wait / self.gets if self.gets else 0.0
+        size = f"/{self.maxsize}" if self.maxsize else ""
+        return (
+            f"{self.name} max depth {self.max_depth}{size}, wait avg {avg * 1000:.0f} ms, "
+            f"max {self.max_wait * 1000:.0f} ms, {self.blocked} full ({self.blocked_s * 1000:.0f} ms)"
+        )
+
+
+class MeteredQueue(queue.Queue):
+    """
+    `queue.Queue` with depth, wait and backpressure counters (`stats`), and
+    `close()` for a turn cancelled while its producers wait for room.
+    """
+
+    def __init__(self, maxsize: int = 0, name: str = "queue"):
+        super().__init__(maxsize)
+        self.stats  = QueueStats(name, maxsize)
+        self.closed = False
+        self._times: collections.deque[float] = collections.deque()
+
+    def put(self, item, block: bool = True, timeout: float | None = None):
+        """`queue.Queue.put`, counting the waits for room; a no-op once closed."""
+        with self.not_full:
+            if self.closed:
+                return
+            if 0 < self.maxsize <= self._qsize():
+                if not block:
+                    raise queue.Full
+                start    = time.perf_counter()  # Backpressure: waits for the consumer
+                deadline = None if timeout is None else start + timeout
+                self.stats.blocked += 1
+                try:
+                    while self._qsize() >= self.maxsize and not self.closed:
+                        remaining = None if deadline is None else deadline - time.perf_counter()
+                        if remaining is not None and remaining <= 0:
+                            raise queue.Full
+                        self.not_full.wait(remaining)
+                finally:
+                    self.stats.blocked_s += time.perf_counter() - start
+                if self.closed:
+                    return
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def close(self, sentinel=None):
+        """Discards what is queued, leaves `sentinel` for the consumer and ignores later puts."""
+        with self.mutex:
+            self.closed = True
+            self.queue.clear()
+            self._times.clear()
+            self._put(sentinel)
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
+    # Called by queue.Queue under its mutex
+    def _put(self, item):
+        self._times.append(time.perf_counter())
+        super()._put(item)
+        self.stats.puts     += 1
+        self.stats.max_depth = max(self.stats.max_depth, self._qsize())
+
+    def _get(self):
+        wait = time.perf_counter() - self._times.popleft()
+        self.stats.gets       += 1
+        self.stats.total_wait += wait
+        self.stats.max_wait    = max(self.stats.max_wait, wait)
+        return super()._get()
+
+
+class PendingTurn:
+    def __init__(self, question: str, timeline, speculative=None):
+        self.question    = question
+        self.timeline    = timeline
+        self.speculative = speculative   # Chat stream started on the partial transcript
+        self.merged      = 1             # Transcripts in the question
+        self.submitted   = time.perf_counter()
+
+
+class TurnStats:
+    def __init__(self):
+        self.submitted  = 0
+        self.started    = 0
+        self.overlapped = 0              # Arrived while a turn was in progress
+        self.merged     = 0
+        self.replaced   = 0
+        self.dropped    = 0              # Over `max_pending`
+        self.max_depth  = 0
+        self.total_wait = 0.0
+        self.max_wait   = 0.0
+
+    def summary(self) -> str:
+        avg = self.total_wait / self.started if self.started else 0.0
+        return (
+            f"{self.started}/{self.submitted} answered, {self.overlapped} arrived during an answer "
+            f"({self.merged} merged, {self.replaced} replaced, {self.dropped} dropped), "
+            f"wait avg {avg * 1000:.0f} ms, max {self.max_wait * 1000:.0f} ms, max pending {self.max_depth}"
+        )
+
+
+class TurnScheduler:
+    """`submit()` from any thread; `answer(question, timeline, speculative)` runs on the turn thread."""
+
+    def __init__(
+        self,
+        answer: Callable[[str, object, object], object],
+        policy: str = "queue",
+        max_pending: int = 2,
+        discard: Callable[[str, object], object] | None = None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown turn policy {policy!r} (expected one of {', '.join(POLICIES)})")
+        self.answer      = answer
+        self.policy      = policy
+        self.max_pending = max(1, max_pending)
+        self.discard     = discard or (lambda question, speculative: None)
+        self.stats       = TurnStats()
+        self.busy        = False         # A turn is being answered
+        self._pending: collections.deque[PendingTurn] = collections.deque()
+        self._cond   = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="turns", daemon=True)
+        self._thread.start()
+
+    def submit(self, question: str, timeline=None, speculative=None):
+        """Queues a question under the policy; never blocks."""
+        pending  = PendingTurn(question, timeline, speculative)
+        discards: list[tuple[str, object]] = []
+        with self._cond:
+            self.stats.submitted += 1
+            if self.busy or self._pending:
+                self.stats.overlapped += 1
+            if self._pending and self.policy == "merge":
+                last = self._pending[-1]
+                # The speculative answers were for the questions alone
+                discards += [(p.question, p.speculative) for p in (last, pending) if p.speculative is not None]
+                last.question   += " " + question
+                last.speculative = None
+                last.merged     += 1
+                self.stats.merged += 1
+            else:
+                if self.policy == "replace":
+                    self.stats.replaced += len(self._pending)
+                    discards += [(p.question, p.speculative) for p in self._pending]
+                    self._pending.clear()
+                self._pending.append(pending)
+                while len(self._pending) > self.max_pending:
+                    dropped = self._pending.popleft()
+                    discards.append((dropped.question, dropped.speculative))
+                    self.stats.dropped += 1
+            self.stats.max_depth = max(self.stats.max_depth, len(self._pending))
+            self._cond.notify()
+        for question, speculative in discards:
+            self._discard(question, speculative)
+
+    def pending(self) -> int:
+        """Questions waiting for the turn in progress."""
+        with self._cond:
+            return len(self._pending)
+
+    def close(self):
+        """Drops the questions still waiting; the turn in progress runs to its end."""
+        with self._cond:
+            self._closed = True
+            discards = [(p.question, p.speculative) for p in self._pending]
+            self._pending.clear()
+            self._cond.notify()
+        for question, speculative in discards:
+            self._discard(question, speculative)
+
+    def _discard(self, question: str, speculative):
+        try:
+            self.discard(question, speculative)
+        except Exception as exc:
+            print("Turn discard error:", exc)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if self._closed:
+                    return
+                pending = self._pending.popleft()
+                self.busy = True
+                wait = time.perf_counter() - pending.submitted
+                self.stats.started    += 1
+                self.stats.total_wait += wait
+                self.stats.max_wait    = max(self.stats.max_wait, wait)
+            if pending.timeline is not None:
+                pending.timeline.mark("turn_start")
+                pending.timeline.meta.update(turn_wait_ms=round(wait * 1000, 1), turn_merged=pending.merged)
+            try:
+                self.answer(pending.question, pending.timeline, pending.speculative)
+            except Exception as exc:     # The next turns still run
+                print("Turn error:", exc)
+            finally:
+                with self._cond:
+                    self.busy = False
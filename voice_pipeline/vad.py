@@ -0,0 +1,134 @@
+"""
+Client-side voice activity detection and endpointing for 16-bit mono PCM.
+
+The microphone chunks are cut into short frames and classified all at once
+with NumPy (frame energy in dBFS against an adaptive noise floor). Only
+speech is let through, plus:
+- a pre-roll of the audio just before the speech onset, so the first
+  syllable is not lost;
+- a hangover of silence after the last speech frame, after which the
+  endpointer reports the end of speech (the caller can then commit the
+  input buffer instead of waiting for the server VAD).
+"""
+
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+_FULL_SCALE = 32768.0
+
+
+@dataclass
+class VADResult:
+    """What to do with one microphone chunk."""
+
+    audio: bytes                 # PCM to send (empty while silent)
+    speech_started: bool = False
+    speech_ended: bool = False
+
+
+class VADStats:
+    def __init__(self):
+        self.frames_in   = 0
+        self.frames_sent = 0
+        self.utterances  = 0
+
+    @property
+    def sent_ratio(self) -> float:
+        return self.frames_sent / self.frames_in if self.frames_in else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.utterances} utterances, sent {self.frames_sent}/{self.frames_in} "
+            f"frames ({self.sent_ratio:.0%})"
+        )
+
+
+def frame_energy_db(frames: np.ndarray) -> np.ndarray:
+    """Energy (dBFS) of each row of an int16 `(n_frames, frame_len)` array."""
+    x = frames.astype(np.float32) / _FULL_SCALE
+    power = np.einsum("ij,ij->i", x, x) / frames.shape[1]
+    return 10.0 * np.log10(power + 1e-10)
+
+
+class Endpointer:
+    """
+    Energy VAD + endpointer. `feed(pcm)` takes any chunk size and returns a
+    `VADResult`; the decisions are made on `frame_ms` frames.
+
+    A frame is speech when its energy exceeds both `threshold_db` and the
+    running noise floor by `margin_db`. Speech starts after `min_speech_ms`
+    of consecutive speech frames and ends after `hangover_ms` of silence.
+    """
+
+    def __init__(
+        self,
+        rate: int = 24_000,
+        frame_ms: int = 20,
+        threshold_db: float = -45.0,
+        margin_db: float = 10.0,
+        min_speech_ms: int = 100,
+        hangover_ms: int = 300,
+        pre_roll_ms: int = 300,
+        noise_alpha: float = 0.05,
+    ):
+        self.frame_len    = rate * frame_ms // 1000          # samples
+        self.threshold_db = threshold_db
+        self.margin_db    = margin_db
+        self.noise_alpha  = noise_alpha
+        self.min_speech   = max(1, min_speech_ms // frame_ms)   # frames
+        self.hangover     = max(1, hangover_ms // frame_ms)     # frames
+        self.stats        = VADStats()
+
+        self.noise_db   = threshold_db - margin_db
+        self.in_speech  = False
+        self._run       = 0                  # Consecutive speech / silence frames
+        self._pending   = np.empty(0, dtype=np.int16)
+        self._pre_roll: deque[bytes] = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+
+    def reset(self):
+        self.in_speech = False
+        self._run      = 0
+        self._pending  = np.empty(0, dtype=np.int16)
+        self._pre_roll.clear()
+
+    def feed(self, pcm: bytes) -> VADResult:
+        samples = np.frombuffer(pcm, dtype="<i2")
+        if self._pending.size:
+            samples = np.concatenate((self._pending, samples))
+        n_frames = samples.size // self.frame_len
+        used     = n_frames * self.frame_len
+        self._pending = samples[used:].copy()
+        if not n_frames:
+            return VADResult(b"")
+
+        frames = samples[:used].reshape(n_frames, self.frame_len)
+        energy = frame_energy_db(frames)
+        loud   = energy > self.threshold_db
+
+        out: list[bytes] = []
+        started = ended = False
+        for i in range(n_frames):
+            frame_bytes = frames[i].tobytes()
+            is_speech = bool(loud[i]) and energy[i] > self.noise_db + self.margin_db
+            if not is_speech:                # Noise floor follows the silence
+                self.noise_db += self.noise_alpha * (energy[i] - self.noise_db)
+
+            if not self.in_speech:
+                self._pre_roll.append(frame_bytes)
+                self._run = self._run + 1 if is_speech else 0
+                if self._run >= self.min_speech:
+                    self.in_speech, self._run, started = True, 0, True
+                    self.stats.utterances += 1
+                    out.extend(self._pre_roll)   # Onset + audio just before it
+                    self._pre_roll.clear()
+            else:
+                out.append(frame_bytes)
+                self._run = 0 if is_speech else self._run + 1
+                if self._run >= self.hangover:
+                    self.in_speech, self._run, ended = False, 0, True
+
+        self.stats.frames_in   += n_frames
+        self.stats.frames_sent += len(out)
+        return VADResult(b"".join(out), started, ended)
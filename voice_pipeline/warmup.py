@@ -0,0 +1,174 @@
+"""
+Connection warm-up and keep-alive.
+
+Without it the first turn after startup pays DNS + TCP + TLS (plus the
+websocket handshake for Azure Speech) to every service it touches, and the
+connection pool of the OpenAI clients drops idle sockets after 5 s, so any
+turn after a pause pays it again.
+
+- `pooled_http_client()` / `pooled_async_http_client()`: `http_client=` for
+  `AzureOpenAI` / `AsyncAzureOpenAI` that keeps idle connections for
+  `keepalive_expiry` seconds instead of 5;
+- `warm_http(client)` / `warm_http_async(client)`: one cheap request
+  (`GET /openai/models`) that leaves a connection open in the pool; any
+  HTTP status counts, only connection errors fail;
+- `WarmupReport`: times the warm-up steps for the startup report;
+- `KeepAlive` / `keep_alive_async`: background thread / task that repeats
+  the pings every `interval` seconds while the pipeline is idle, so the
+  pooled connections (and Azure Speech synthesizers, `SynthesizerPool.ping`)
+  never go cold.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable
+
+import httpx
+from openai import APIStatusError, DefaultAsyncHttpxClient, DefaultHttpxClient
+
+KEEPALIVE_EXPIRY = 300.0                 # Idle connections kept in the pool (s)
+
+
+def _limits(keepalive_expiry: float, max_keepalive: int) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=1000,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=keepalive_expiry,
+    )
+
+
+def pooled_http_client(keepalive_expiry: float = KEEPALIVE_EXPIRY, max_keepalive: int = 20) -> httpx.Client:
+    return DefaultHttpxClient(limits=_limits(keepalive_expiry, max_keepalive))
+
+
+def pooled_async_http_client(keepalive_expiry: float = KEEPALIVE_EXPIRY, max_keepalive: int = 100) -> httpx.AsyncClient:
+    return DefaultAsyncHttpxClient(limits=_limits(keepalive_expiry, max_keepalive))
+
+
+def warm_http(client):
+    """Opens (or refreshes) one pooled connection of an `AzureOpenAI` client."""
+    try:
+        client.with_options(max_retries=0).models.list()
+    except APIStatusError:
+        pass                             # 401/404… the connection is open anyway
+
+
+async def warm_http_async(client):
+    try:
+        await client.with_options(max_retries=0).models.list()
+    except APIStatusError:
+        pass
+
+
+class WarmupReport:
+    """Duration (or error) of every warm-up step."""
+
+    def __init__(self):
+        self.steps: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+        self.total = 0.0
+
+    def run(self, steps: dict[str, Callable[[], object]], parallel: bool = True) -> "WarmupReport":
+        """Runs the steps (in parallel by default) and records their durations."""
+        started = time.perf_counter()
+
+        def timed(name: str):
+            t0 = time.perf_counter()
+            try:
+                steps[name]()
+            except Exception as exc:
+                self.errors[name] = f"{type(exc).__name__}: {exc}"
+            self.steps[name] = time.perf_counter() - t0
+
+        if parallel and len(steps) > 1:
+            with ThreadPoolExecutor(max_workers=len(steps)) as pool:
+                list(pool.map(timed, steps))
+        else:
+            for name in steps:
+                timed(name)
+        self.total += time.perf_counter() - started
+        return self
+
+    async def run_async(self, steps: dict[str, Callable[[], Awaitable]]) -> "WarmupReport":
+        started = time.perf_counter()
+
+        async def timed(name: str):
+            t0 = time.perf_counter()
+            try:
+                await steps[name]()
+            except Exception as exc:
+                self.errors[name] = f"{type(exc).__name__}: {exc}"
+            self.steps[name] = time.perf_counter() - t0
+
+        await asyncio.gather(*(timed(name) for name in steps))
+        self.total += time.perf_counter() - started
+        return self
+
+    def summary(self) -> str:
+        parts = [
+            f"{name} {'failed' if name in self.errors else f'{seconds * 1000:.0f} ms'}"
+            for name, seconds in self.steps.items()
+        ]
+        return " | ".join(parts) + f" (startup {self.total * 1000:.0f} ms, off the first turn)"
+
+
+class KeepAlive:
+    """Calls `pings` every `interval` seconds, skipped while `busy()` is true."""
+
+    def __init__(
+        self,
+        pings: dict[str, Callable[[], object]],
+        interval: float = 60.0,
+        busy: Callable[[], bool] = lambda: False,
+    ):
+        self.pings    = pings
+        self.interval = interval
+        self.busy     = busy
+        self.sent     = 0
+        self.failed   = 0
+        self._stop    = threading.Event()
+        self._thread  = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "KeepAlive":
+        if self.interval > 0 and self.pings:
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.busy():
+                continue                 # A turn in progress keeps them warm
+            for name, ping in self.pings.items():
+                try:
+                    ping()
+                    self.sent += 1
+                except Exception as exc:
+                    self.failed += 1
+                    print(f"[keep-alive] {name}: {exc}")
+
+    def summary(self) -> str:
+        return f"{self.sent} pings, {self.failed} failed"
+
+
+async def keep_alive_async(
+    pings: dict[str, Callable[[], Awaitable]],
+    interval: float = 60.0,
+    busy: Callable[[], bool] = lambda: False,
+):
+    """`KeepAlive` for async clients; run it as a task and cancel it to stop."""
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        if busy():
+            continue
+        for name, ping in pings.items():
+            try:
+                await ping()
+            except Exception as exc:
+                print(f"[keep-alive] {name}: {exc}")